@@ -28,6 +28,7 @@ Created by Jonathan deWerd on 2011-01-29.
 """
 
 import sys, imp, util
+import json
 import os.path
 from glob import glob
 from code import interact
@@ -42,13 +43,24 @@ def ignoreEnv():
 
 # The global application object used when cadnano is run as a python module
 
-class HeadlessCadnano(object):
+util.qtWrapImport('QtCore', globals(), ['pyqtSignal', 'QObject'])
+
+class HeadlessCadnano(QObject):
     undoGroup = None
+    documentWasCreatedSignal = pyqtSignal(object)  # doc
+    documentWindowWasCreatedSignal = pyqtSignal(object, object)  # doc, window
+    def __init__(self):
+        super(HeadlessCadnano, self).__init__()
+        self.documentControllers = set()  # stays empty without a GUI
     def isInMaya(self):
         return False
     class prefs():
+        honeycombRows = 30
+        honeycombCols = 32
+        honeycombSteps = 2
         squareRows = 50
         squareCols = 50
+        squareSteps = 2
     def isGui(self):
         return False
 # end def
@@ -93,6 +105,9 @@ def path():
 
 # maps plugin path (extension stripped) -> plugin module
 loadedPlugins = {}
+# maps plugin path -> manifest, for plugins registered from a plugin.json
+# (see registerPlugin) whether or not they have been imported yet
+pluginManifests = {}
 
 def unloadedPlugins():
     """ Returns a list of plugin paths that have yet to
@@ -113,7 +128,13 @@ def unloadedPlugins():
             if os.path.isdir(f) and\
                os.path.isfile(os.path.join(f, '__init__.py')):
                 results.append(f)
-    return filter(lambda x: x not in loadedPlugins, results)
+    return filter(lambda x: pluginKey(x) not in loadedPlugins and\
+                            pluginKey(x) not in pluginManifests, results)
+
+def pluginKey(f):
+    """Returns the path of plugin f with its extension stripped."""
+    path, fname = os.path.split(f)
+    return os.path.join(path, os.path.splitext(fname)[0])
 
 def loadPlugin(f):
     path, fname = os.path.split(f)
@@ -129,9 +150,61 @@ def loadPlugin(f):
     loadedPlugins[pluginKey] = mod
     return mod
 
+def readPluginManifest(f):
+    """
+    Returns the manifest of the plugin package f, read from its
+    plugin.json, or None if it has none or it cannot be read. A manifest
+    looks like
+
+        {"name": "AutoBreak",
+         "actions": [{"objectName": "actionAutoBreak",
+                      "text": "AutoBreak",
+                      "icon": ":/pathtools/autobreak",
+                      "toolTip": "...",
+                      "menu": "menuPlugins",
+                      "toolBar": "topToolBar",
+                      "toolBarBefore": "actionFiltersLabel",
+                      "entryPoint": "actionAutobreakSlot"}]}
+
+    menu, toolBar and toolBarBefore name attributes of the DocumentWindow.
+    entryPoint names a function of the plugin module, which is called
+    with (document, window) when the action is triggered.
+    """
+    fname = os.path.join(f, 'plugin.json')
+    if not os.path.isfile(fname):
+        return None
+    try:
+        with open(fname) as mf:
+            manifest = json.load(mf)
+        for action in manifest.get('actions', []):
+            action['entryPoint']
+    except (IOError, ValueError, KeyError, TypeError, AttributeError), e:
+        print "Ignoring the manifest of plugin %s: %s" % (f, e)
+        return None
+    return manifest
+
+def registerPlugin(f, manifest):
+    """
+    Registers plugin f from its manifest without importing it: every
+    document window, open or opened later, gets the manifest's actions,
+    and the plugin is imported by loadPlugin when one is first triggered.
+    """
+    key = pluginKey(f)
+    pluginManifests[key] = manifest
+    for controller in list(sharedApp.documentControllers):
+        controller.addPluginActions(key, manifest)
+
 def loadAllPlugins():
+    """
+    Registers the plugins that have a manifest (see readPluginManifest)
+    and imports the others. Returns True if there was any.
+    """
     loadedAPlugin = False
     for p in unloadedPlugins():
-        loadPlugin(p)
+        manifest = readPluginManifest(p)
+        if manifest is not None:
+            registerPlugin(p, manifest)
+        else:
+            loadPlugin(p)
         loadedAPlugin = True
-    return loadedAPlugin
\ No newline at end of file
+    return loadedAPlugin
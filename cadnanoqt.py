@@ -28,6 +28,7 @@ Created by Jonathan deWerd on 2012-01-11.
 """
 import util, sys, os
 import cadnano
+import startupprofiler
 from code import interact
 util.qtWrapImport('QtGui', globals(),  ['qApp', 'QApplication', 'QIcon',\
                                         'QUndoGroup'])
@@ -64,7 +65,16 @@ class CadnanoQt(QObject):
         return os.environ.get('CADNANO_IGNORE_ENV_VARS_EXCEPT_FOR_ME', False)
 
     def finishInit(self):
+        if "--instrument" in self.argv or \
+                        (os.environ.get('CADNANO_INSTRUMENT', False) and \
+                         not self.ignoreEnv()):
+            # opt-in timing and signal counts, see instrumentation.py
+            import instrumentation
+            instrumentation.enable()
         self.d = self.newDocument(isFirstNewDoc=True)
+        if startupprofiler.isInstalled():
+            startupprofiler.watchWindow(self.d.controller().window(),
+                                quitAfter="--quit-after-startup" in self.argv)
         os.environ['CADNANO_DISCARD_UNSAVED'] = 'True' ## added by Nick 
         if os.environ.get('CADNANO_DISCARD_UNSAVED', False) and not self.ignoreEnv():
             self.sharedApp.dontAskAndJustDiscardUnsavedChanges = True
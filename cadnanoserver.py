@@ -0,0 +1,712 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+cadnanoserver.py
+
+A long-running headless cadnano that keeps designs loaded and answers
+JSON-RPC 2.0 requests on a local socket, so a pipeline pays for startup
+and for loading a design once instead of once per operation.
+
+    python cadnanoserver.py --port 8765        TCP, on 127.0.0.1 only
+    python cadnanoserver.py --socket cn.sock   Unix domain socket
+
+Each request and each response is one JSON object on one line. Params
+are given by name (or by position, in the order below):
+
+    load(path=None, json=None, document=None)  -> document summary
+    autostaple(document)                       -> document summary
+    autobreak(document, settings={})           -> document summary
+    applySequence(document, sequence=None, name='M13mp18', offset=0)
+                                               -> {'oligos': n}
+    scaffoldOffsets(document, sequence=None, name='M13mp18', settings={},
+                    count=10)                  -> [rotation score, ]
+    exportStaples(document)                    -> staple CSV text
+    drc(document, settings={})                 -> [violation, ]
+    sharedSequences(document, k=10, minLength=None)
+                                               -> [shared sequence, ]
+    scanMotifs(document, motifs=None, reverseComplements=True)
+                                               -> [motif hit, ]
+    save(document, path=None)                  -> design JSON if no path
+    close(document), documents()
+
+load returns the id of the document (the given one, or a new one) for
+the other calls. Each open document has a DocumentWorker thread that
+runs its calls one at a time, in order; calls on different documents
+run side by side. At most maxDocuments stay open: loading another one
+closes the least recently used, discarding unsaved changes.
+
+CadnanoClient is a minimal client for scripts and tests:
+
+    client = CadnanoClient(port=8765)
+    doc = client.call('load', path='design.json')['document']
+    client.call('autostaple', document=doc)
+    csv = client.call('exportStaples', document=doc)
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import inspect
+import json
+import os
+import Queue
+import socket
+import SocketServer
+import threading
+import traceback
+from optparse import OptionParser
+from StringIO import StringIO
+
+import cadnano
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+_pluginLock = threading.Lock()
+
+
+class RpcError(Exception):
+    """An error reported to the client as a JSON-RPC error object."""
+    def __init__(self, message, code=SERVER_ERROR, data=None):
+        super(RpcError, self).__init__(message)
+        self.code = code
+        self.data = data
+    # end def
+# end class
+
+
+class DocumentWorker(threading.Thread):
+    """
+    Owns one Document and runs the calls made on it, one at a time and in
+    order, on its own thread. The Document is created on this thread too,
+    so its QObjects live there.
+    """
+    def __init__(self, documentId):
+        super(DocumentWorker, self).__init__(name="document %s" % documentId)
+        self.daemon = True
+        self.documentId = documentId
+        self.document = None
+        self.checker = None  # (settings, DesignRuleChecker)
+        self._queue = Queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = False
+    # end def
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            func, args, done, outcome = item
+            try:
+                outcome.append(func(self, *args))
+            except Exception, e:
+                outcome.append(e)
+                done.traceback = traceback.format_exc()
+            done.set()
+        self.document = None
+        self.checker = None
+    # end def
+
+    def call(self, func, *args):
+        """
+        Runs func(self, *args) on the worker thread and returns its result,
+        or raises what it raised.
+        """
+        done = threading.Event()
+        done.traceback = None
+        outcome = []
+        with self._lock:
+            if self._stopped:
+                raise RpcError("Document %s was closed." % self.documentId)
+            self._queue.put((func, args, done, outcome))
+        done.wait()
+        result = outcome[0]
+        if isinstance(result, RpcError):
+            raise result
+        if isinstance(result, Exception):
+            raise RpcError(str(result) or result.__class__.__name__,
+                           data=done.traceback)
+        return result
+    # end def
+
+    def stop(self):
+        """Closes the document once the calls already queued are done."""
+        with self._lock:
+            if not self._stopped:
+                self._stopped = True
+                self._queue.put(None)
+    # end def
+
+    def part(self):
+        part = self.document.selectedPart() if self.document else None
+        if part is None:
+            raise RpcError("Document %s has no part." % self.documentId)
+        return part
+    # end def
+# end class
+
+
+class DocumentServer(object):
+    """
+    The JSON-RPC methods, independent of the transport. handle() takes a
+    request dict and returns the response dict (None for notifications).
+    """
+    methods = ('load', 'autostaple', 'autobreak', 'applySequence',
+               'scaffoldOffsets', 'exportStaples', 'drc', 'sharedSequences',
+               'scanMotifs', 'save', 'close', 'documents')
+    # positional params, in order
+    params = {'load': ('path', 'json', 'document'),
+              'autostaple': ('document',),
+              'autobreak': ('document', 'settings'),
+              'applySequence': ('document', 'sequence', 'name', 'offset'),
+              'scaffoldOffsets': ('document', 'sequence', 'name', 'settings',
+                                  'count'),
+              'exportStaples': ('document',),
+              'drc': ('document', 'settings'),
+              'sharedSequences': ('document', 'k', 'minLength'),
+              'scanMotifs': ('document', 'motifs', 'reverseComplements'),
+              'save': ('document', 'path'),
+              'close': ('document',),
+              'documents': ()}
+
+    def __init__(self, maxDocuments=8):
+        self.maxDocuments = maxDocuments
+        self._workers = {}  # document id -> DocumentWorker
+        self._recent = []  # document ids, least recently used first
+        self._lock = threading.Lock()
+        self._nextId = 1
+    # end def
+
+    ### PUBLIC METHODS ###
+    def handle(self, request):
+        if not isinstance(request, dict) or \
+                        not isinstance(request.get('method'), basestring):
+            return self._error(None, RpcError("Invalid request.",
+                                              INVALID_REQUEST))
+        requestId = request.get('id')
+        try:
+            method = str(request['method'])
+            if method not in self.methods:
+                raise RpcError("Method not found: %s." % method,
+                               METHOD_NOT_FOUND)
+            kwargs = self._kwargs(method, request.get('params', {}))
+            result = getattr(self, method)(**kwargs)
+        except RpcError, e:
+            response = self._error(requestId, e)
+        except Exception, e:
+            response = self._error(requestId,
+                            RpcError(str(e) or e.__class__.__name__,
+                                     data=traceback.format_exc()))
+        else:
+            response = {'jsonrpc': '2.0', 'id': requestId, 'result': result}
+        if 'id' not in request:
+            return None  # notifications get no response, not even errors
+        return response
+    # end def
+
+    def handleLine(self, line):
+        """Returns the response line to a request line, or None."""
+        try:
+            request = json.loads(line)
+        except ValueError, e:
+            response = {'jsonrpc': '2.0', 'id': None,
+                        'error': {'code': PARSE_ERROR, 'message': str(e)}}
+        else:
+            response = self.handle(request)
+        if response is None:
+            return None
+        return json.dumps(response)
+    # end def
+
+    def closeAll(self):
+        with self._lock:
+            workers = self._workers.values()
+            self._workers = {}
+            self._recent = []
+        for worker in workers:
+            worker.stop()
+    # end def
+
+    ### RPC METHODS ###
+    def load(self, path=None, json=None, document=None):
+        if (path is None) == (json is None):
+            raise RpcError("load needs either path or json.", INVALID_PARAMS)
+        if path is not None:
+            try:
+                with open(path) as f:
+                    json = f.read()
+            except IOError, e:
+                raise RpcError(str(e))
+        with self._lock:
+            if document is None:
+                while "doc%d" % self._nextId in self._workers:
+                    self._nextId += 1
+                document = "doc%d" % self._nextId
+                self._nextId += 1
+            document = self._documentId(document)
+        worker = DocumentWorker(document)
+        worker.start()
+        try:
+            summary = worker.call(_load, json)
+        except RpcError:
+            worker.stop()
+            raise
+        with self._lock:
+            old = self._workers.get(document)
+            self._workers[document] = worker
+            if document in self._recent:
+                self._recent.remove(document)
+            self._recent.append(document)
+            evicted = [self._workers.pop(documentId) for documentId in \
+                        self._recent[:-self.maxDocuments]]
+            self._recent = self._recent[-self.maxDocuments:]
+        for w in evicted + ([old] if old is not None else []):
+            w.stop()
+        return summary
+    # end def
+
+    def autostaple(self, document):
+        return self._worker(document).call(_autostaple)
+    # end def
+
+    def autobreak(self, document, settings=None):
+        return self._worker(document).call(_autobreak, settings or {})
+    # end def
+
+    def applySequence(self, document, sequence=None, name='M13mp18',
+                      offset=0):
+        return self._worker(document).call(_applySequence, sequence, name,
+                                           offset)
+    # end def
+
+    def scaffoldOffsets(self, document, sequence=None, name='M13mp18',
+                        settings=None, count=10):
+        return self._worker(document).call(_scaffoldOffsets, sequence, name,
+                                           settings or {}, count)
+    # end def
+
+    def exportStaples(self, document):
+        return self._worker(document).call(_exportStaples)
+    # end def
+
+    def drc(self, document, settings=None):
+        return self._worker(document).call(_drc, settings or {})
+    # end def
+
+    def sharedSequences(self, document, k=10, minLength=None):
+        return self._worker(document).call(_sharedSequences, k, minLength)
+    # end def
+
+    def scanMotifs(self, document, motifs=None, reverseComplements=True):
+        return self._worker(document).call(_scanMotifs, motifs,
+                                           reverseComplements)
+    # end def
+
+    def save(self, document, path=None):
+        return self._worker(document).call(_save, path)
+    # end def
+
+    def close(self, document):
+        document = self._documentId(document)
+        with self._lock:
+            worker = self._workers.pop(document, None)
+            if document in self._recent:
+                self._recent.remove(document)
+        if worker is None:
+            raise RpcError("No document %s." % document, INVALID_PARAMS)
+        worker.stop()
+        return True
+    # end def
+
+    def documents(self):
+        """Returns the open document ids, most recently used last."""
+        with self._lock:
+            return list(self._recent)
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _kwargs(self, method, params):
+        names = self.params[method]
+        if isinstance(params, list):
+            if len(params) > len(names):
+                raise RpcError("Too many params for %s." % method,
+                               INVALID_PARAMS)
+            kwargs = dict(zip(names, params))
+        elif isinstance(params, dict):
+            unknown = [key for key in params if key not in names]
+            if unknown:
+                raise RpcError("Unknown params for %s: %s." % \
+                                (method, ', '.join(sorted(unknown))),
+                               INVALID_PARAMS)
+            kwargs = dict((str(key), value) \
+                                        for key, value in params.iteritems())
+        else:
+            raise RpcError("params must be a list or an object.",
+                           INVALID_PARAMS)
+        args, varargs, keywords, defaults = \
+                                    inspect.getargspec(getattr(self, method))
+        required = args[1:len(args) - len(defaults or ())]
+        missing = [name for name in required if name not in kwargs]
+        if missing:
+            raise RpcError("Missing params for %s: %s." % \
+                            (method, ', '.join(missing)), INVALID_PARAMS)
+        return kwargs
+    # end def
+
+    def _error(self, requestId, e):
+        """Returns the error response to an RpcError."""
+        error = {'code': e.code, 'message': str(e)}
+        if e.data is not None:
+            error['data'] = e.data
+        return {'jsonrpc': '2.0', 'id': requestId, 'error': error}
+    # end def
+
+    def _documentId(self, document):
+        if not isinstance(document, basestring):
+            raise RpcError("document must be a string, not %s." % \
+                            json.dumps(document), INVALID_PARAMS)
+        return str(document)
+    # end def
+
+    def _worker(self, document):
+        """Returns the worker of document and marks it most recently used."""
+        if document is None:
+            raise RpcError("No document given.", INVALID_PARAMS)
+        document = self._documentId(document)
+        with self._lock:
+            worker = self._workers.get(document)
+            if worker is None:
+                raise RpcError("No document %s." % document, INVALID_PARAMS)
+            self._recent.remove(document)
+            self._recent.append(document)
+        return worker
+    # end def
+# end class
+
+
+### OPERATIONS, RUN ON THE DOCUMENT WORKERS ###
+def _summary(worker):
+    part = worker.part()
+    oligos = list(part.oligos())
+    return {'document': worker.documentId,
+            'helices': len(part.getVirtualHelices()),
+            'staples': len([o for o in oligos if o.isStaple()]),
+            'scaffolds': len([o for o in oligos if not o.isStaple()]),
+            'revision': part.revision()}
+# end def
+
+
+def _load(worker, text):
+    from model.io.decoder import decodeDocument
+    worker.document = decodeDocument(text)
+    return _summary(worker)
+# end def
+
+
+def _autostaple(worker):
+    worker.part().autoStaple()
+    return _summary(worker)
+# end def
+
+
+def _autobreak(worker, settings):
+    with _pluginLock:
+        cadnano.loadPlugin(os.path.join(cadnano.path(), 'plugins',
+                                        'autobreak'))
+        from autobreak import autobreak as plugin
+    if not plugin.nx:
+        raise RpcError("autobreak needs networkx, which is not installed.")
+    keys = ('minStapleLegLen', 'minStapleLen', 'maxStapleLen',
+            'tgtStapleTm', 'tmWeight', 'thermoSettings')
+    settings = dict((str(k), v) for k, v in settings.iteritems() if k in keys)
+    plugin.AutobreakJob(worker.part(), settings).run()
+    return _summary(worker)
+# end def
+
+
+def _sequence(sequence, name):
+    """Returns sequence, or the bundled sequence name."""
+    if sequence is None:
+        from data.dnasequences import sequences
+        if name not in sequences:
+            raise RpcError("Unknown sequence %s, choose from %s." % \
+                           (name, ', '.join(sorted(sequences))),
+                           INVALID_PARAMS)
+        sequence = sequences[name]
+    return str(sequence).upper()
+# end def
+
+
+def _applySequence(worker, sequence, name, offset):
+    """
+    Applies sequence, or the bundled sequence name, to the scaffolds,
+    starting at base offset of the sequence.
+    """
+    sequence = _sequence(sequence, name)
+    offset %= len(sequence) if sequence else 1
+    sequence = sequence[offset:] + sequence[:offset]
+    scaffolds = [o for o in list(worker.part().oligos()) if not o.isStaple()]
+    for oligo in scaffolds:
+        oligo.applySequence(sequence)
+    return {'oligos': len(scaffolds)}
+# end def
+
+
+def _scaffoldOffsets(worker, sequence, name, settings, count):
+    """
+    Returns the best offsets to apply sequence at (see
+    model/scaffoldoffset.py). Scores in this process: forking the
+    threaded server for a pool is not safe.
+    """
+    from model.scaffoldoffset import bestOffsets
+    settings = dict((str(k), v) for k, v in settings.iteritems())
+    try:
+        best = bestOffsets(worker.part(), _sequence(sequence, name), settings,
+                           count, processes=1)
+    except ValueError, e:
+        raise RpcError(str(e), INVALID_PARAMS)
+    return [r._asdict() for r in best]
+# end def
+
+
+def _exportStaples(worker):
+    part = worker.part()
+    loops = [o for o in part.oligos() if o.isStaple() and o.isLoop()]
+    if loops:
+        raise RpcError("The design has %d staple loops; break them "
+                       "(autobreak) before exporting." % len(loops))
+    return part.getStapleSequences()
+# end def
+
+
+def _drc(worker, settings):
+    """
+    Returns the design rule violations. The checker is kept between calls
+    with the same settings, so only helices edited since are re-checked.
+    """
+    from model.designrules import DesignRuleChecker
+    part = worker.part()
+    if worker.checker is None or worker.checker[0] != settings or \
+                                        worker.checker[1].part() is not part:
+        worker.checker = (settings, DesignRuleChecker(part,
+                            dict((str(k), v) for k, v in settings.iteritems()),
+                            autoUpdate=False))
+    checker = worker.checker[1]
+    checker.update()
+    return [{'rule': v.rule, 'severity': v.severity, 'helix': v.helix,
+             'lowIdx': v.lowIdx, 'highIdx': v.highIdx, 'message': v.message}
+            for v in checker.violations()]
+# end def
+
+
+def _sharedSequences(worker, k, minLength):
+    """
+    Returns the stretches of at least k bases that oligos share, as
+    repeats or complements (see model/kmerindex.py).
+    """
+    from model.kmerindex import sharedSequences
+    if not isinstance(k, int) or not 1 <= k <= 31:
+        raise RpcError("k must be an integer from 1 to 31.", INVALID_PARAMS)
+    ret = []
+    for s in sharedSequences(worker.part(), k, minLength):
+        ret.append({'kind': s.kind, 'length': s.length,
+                    'a': _sharedEnd(s.oligoA, s.posA, s.locationA),
+                    'b': _sharedEnd(s.oligoB, s.posB, s.locationB)})
+    return ret
+# end def
+
+
+def _sharedEnd(oligo, pos, location):
+    strand5p = oligo.strand5p()
+    return {'isStaple': oligo.isStaple(),
+            'oligo': [strand5p.virtualHelix().number(), strand5p.idx5Prime()],
+            'base': pos, 'helix': location[0], 'idx': location[1]}
+# end def
+
+
+def _scanMotifs(worker, motifs, reverseComplements):
+    """
+    Returns the hits of motifs, a {name: IUPAC pattern} (default the
+    restriction sites and poly-G of model/motifscanner.py), in every oligo.
+    """
+    from model.motifscanner import Motif, expandIupac, scanPart
+    if motifs is not None:
+        if not isinstance(motifs, dict):
+            raise RpcError("motifs must be an object of name: pattern.",
+                           INVALID_PARAMS)
+        try:
+            for pattern in motifs.itervalues():
+                expandIupac(str(pattern))
+        except ValueError, e:
+            raise RpcError(str(e), INVALID_PARAMS)
+        motifs = [Motif(str(name), str(pattern).upper()) \
+                  for name, pattern in sorted(motifs.iteritems())]
+    ret = []
+    for hit in scanPart(worker.part(), motifs, reverseComplements):
+        ret.append({'name': hit.motif.name, 'sequence': hit.sequence,
+                    'reverseComplement': hit.isReverseComplement,
+                    'at': _sharedEnd(hit.oligo, hit.pos,
+                                     (hit.helix, hit.idx)),
+                    'segments': [[s.virtualHelix().number(), low, high] \
+                                 for s, low, high in hit.segments]})
+    return ret
+# end def
+
+
+def _save(worker, path):
+    """Encodes the document with the helices in number order."""
+    from model.io.encoder import encode
+    vhs = sorted(worker.part().getVirtualHelices(), key=lambda vh: vh.number())
+    order = [vh.coord() for vh in vhs]
+    if path is None:
+        out = StringIO()
+        out.name = "%s.json" % worker.documentId
+        encode(worker.document, order, out)
+        return out.getvalue()
+    try:
+        with open(path, 'w') as f:
+            encode(worker.document, order, f)
+    except IOError, e:
+        raise RpcError(str(e))
+    return path
+# end def
+
+
+### TRANSPORT ###
+class _RequestHandler(SocketServer.StreamRequestHandler):
+    """Answers newline-delimited requests until the client disconnects."""
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            response = self.server.documentServer.handleLine(line)
+            if response is not None:
+                self.wfile.write(response + '\n')
+                self.wfile.flush()
+    # end def
+# end class
+
+
+class TCPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+# end class
+
+
+if hasattr(SocketServer, 'UnixStreamServer'):
+    class UnixServer(SocketServer.ThreadingMixIn,
+                     SocketServer.UnixStreamServer):
+        daemon_threads = True
+    # end class
+
+
+def makeServer(documentServer, port=None, socketPath=None):
+    """
+    Returns a socket server for documentServer, listening on socketPath
+    or on port of 127.0.0.1 (0 picks a free port). Call serve_forever().
+    """
+    if socketPath is not None:
+        if os.path.exists(socketPath):
+            os.remove(socketPath)
+        server = UnixServer(socketPath, _RequestHandler)
+    else:
+        server = TCPServer(('127.0.0.1', port or 0), _RequestHandler)
+    server.documentServer = documentServer
+    return server
+# end def
+
+
+class CadnanoClient(object):
+    """A blocking client; one request at a time per client."""
+    def __init__(self, port=None, socketPath=None, host='127.0.0.1'):
+        if socketPath is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(socketPath)
+        else:
+            self._socket = socket.create_connection((host, port))
+        self._file = self._socket.makefile('rwb')
+        self._nextId = 1
+    # end def
+
+    def call(self, method, *args, **kwargs):
+        """Returns the result of method, or raises RpcError."""
+        request = {'jsonrpc': '2.0', 'id': self._nextId, 'method': method,
+                   'params': list(args) if args else kwargs}
+        self._nextId += 1
+        self._file.write(json.dumps(request) + '\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise RpcError("The server closed the connection.")
+        response = json.loads(line)
+        if 'error' in response:
+            error = response['error']
+            raise RpcError(error['message'], error['code'], error.get('data'))
+        return response['result']
+    # end def
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+    # end def
+# end class
+
+
+def main():
+    parser = OptionParser(usage="usage: %prog [options]")
+    parser.add_option("-p", "--port", type="int", default=8765,
+                      help="TCP port on 127.0.0.1 [default: %default]")
+    parser.add_option("-s", "--socket", dest="socketPath", default=None,
+                      help="listen on this Unix socket instead of TCP")
+    parser.add_option("-n", "--max-documents", dest="maxDocuments",
+                      type="int", default=8,
+                      help="documents kept open [default: %default]")
+    options, args = parser.parse_args()
+    cadnano.initAppWithoutGui()
+    documentServer = DocumentServer(options.maxDocuments)
+    server = makeServer(documentServer, options.port, options.socketPath)
+    print "cadnano server listening on %s" % \
+                            (options.socketPath or "127.0.0.1:%d" % \
+                                                server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        documentServer.closeAll()
+# end def
+
+
+if __name__ == "__main__":
+    main()
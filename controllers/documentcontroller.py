@@ -23,23 +23,25 @@
 # http://www.opensource.org/licenses/mit-license.php
 
 import os
+import cadnano
 from cadnano import app
 from model.document import Document
-from model.io.decoder import decode
+from controllers.documentloader import DocumentLoader
 from model.io.encoder import encode
 from views.documentwindow import DocumentWindow
 from views import styles
+import instrumentation
 import util
 util.qtWrapImport('QtCore', globals(), ['QDir', 'QFileInfo', 'QRect',
                                         'QString', 'QStringList', 'QSettings',
                                         'QSize', 'Qt'])
-util.qtWrapImport('QtGui', globals(), ['QApplication', 'QDialog', 
+util.qtWrapImport('QtGui', globals(), ['QAction', 'QApplication', 'QDialog', 
                                        'QDockWidget', 'QFileDialog',
-                                       'QKeySequence', 'QGraphicsItem',
+                                       'QInputDialog', 'QKeySequence', 'QGraphicsItem',
                                        'QMainWindow',
                                        'QMessageBox', 'QPainter', 'QIcon',
+                                       'QProgressBar', 'QProgressDialog',
                                        'QStyleOptionGraphicsItem'])
-util.qtWrapImport('QtSvg', globals(), ['QSvgGenerator'])
 
 class DocumentController():
     """
@@ -52,6 +54,7 @@ class DocumentController():
         self._document = Document()
         self._document.setController(self)
         self._activePart = None
+        self._motifText = None  # last Find Motifs text
         self._filename = None
         self._fileOpenPath = None  # will be set in _readSettings
         self._hasNoAssociatedFile = True
@@ -61,6 +64,9 @@ class DocumentController():
         self.win = None
         self.fileopendialog = None
         self.filesavedialog = None
+        self._jobs = set()
+        self._loader = None
+        self._pluginActions = []
 
         self.settings = QSettings()
         self._readSettings()
@@ -76,6 +82,8 @@ class DocumentController():
         self.win = DocumentWindow(docCtrlr=self)
         self.win.setWindowIcon(QIcon('ui/mainwindow/images/cadnano2-app-icon.png'))
         app().documentWindowWasCreatedSignal.emit(self._document, self.win)
+        for key, manifest in cadnano.pluginManifests.iteritems():
+            self.addPluginActions(key, manifest)
         self._connectWindowSignalsToSelf()
         self.win.show()
 
@@ -134,6 +142,46 @@ class DocumentController():
         self.win.actionFilterScaf.triggered.connect(self.actionFilterScafSlot)
         self.win.actionFilterStap.triggered.connect(self.actionFilterStapSlot)
         self.win.actionRenumber.triggered.connect(self.actionRenumberSlot)
+        self.actionFindMotifs = QAction(self.win)
+        self.actionFindMotifs.setText("Find Motifs...")
+        self.actionFindMotifs.setToolTip("Highlight restriction sites and "
+                                         "other motifs in the oligo sequences.")
+        self.actionFindMotifs.triggered.connect(self.actionFindMotifsSlot)
+        self.win.menuEdit.addAction(self.actionFindMotifs)
+        if instrumentation.isEnabled():
+            self.actionInstrumentation = QAction(self.win)
+            self.actionInstrumentation.setText("Instrumentation Report...")
+            self.actionInstrumentation.triggered.connect(\
+                self.actionInstrumentationSlot)
+            self.win.menuPlugins.addAction(self.actionInstrumentation)
+
+    def addPluginActions(self, pluginKey, manifest):
+        """
+        Adds the actions of a registered plugin's manifest to the window.
+        The plugin is imported when one of them is first triggered.
+        """
+        for entry in manifest.get('actions', []):
+            action = QAction(self.win)
+            action.setText(entry.get('text', manifest.get('name', '')))
+            action.setObjectName(entry.get('objectName', ''))
+            if 'toolTip' in entry:
+                action.setToolTip(entry['toolTip'])
+            if 'icon' in entry:
+                action.setIcon(QIcon(entry['icon']))
+            action.triggered.connect(lambda checked=False, entry=entry: \
+                                    self.actionPluginSlot(pluginKey, entry))
+            action.setEnabled(self._loader is None)
+            self._pluginActions.append(action)
+            getattr(self.win, entry.get('menu', 'menuPlugins')).addAction(action)
+            if 'toolBar' in entry:
+                toolBar = getattr(self.win, entry['toolBar'])
+                before = getattr(self.win, entry.get('toolBarBefore', ''), None)
+                if before is None:
+                    toolBar.addAction(action)
+                else:
+                    toolBar.insertAction(before, action)
+                    toolBar.insertSeparator(before)
+    # end def
 
 
     ### SLOTS ###
@@ -347,6 +395,8 @@ class DocumentController():
             del self.svgsavedialog  # prevents hang
             self.svgsavedialog = None
 
+        # QtSvg is only needed here, so it is not imported at startup
+        util.qtWrapImport('QtSvg', globals(), ['QSvgGenerator'])
         generator = QSvgGenerator()
         generator.setFileName(fname)
         generator.setSize(QSize(200, 200))
@@ -426,15 +476,100 @@ class DocumentController():
             fdialog.open()
     # end def
 
+    def actionPluginSlot(self, pluginKey, entry):
+        """
+        Imports the plugin on first use and calls the entry point of the
+        triggered action with the document and window.
+        """
+        mod = cadnano.loadPlugin(pluginKey)
+        getattr(mod, entry['entryPoint'])(self._document, self.win)
+    # end def
+
+    def actionInstrumentationSlot(self):
+        """
+        Shows the instrumentation report (see instrumentation.py), with
+        buttons to save it as a Chrome trace file or to reset the counters.
+        """
+        box = QMessageBox(self.win)
+        box.setWindowTitle("Instrumentation Report")
+        box.setText("Command, signal, import and view refresh timings "
+                    "since startup or the last reset.")
+        box.setDetailedText(instrumentation.report())
+        saveButton = box.addButton("Save Trace...", QMessageBox.ActionRole)
+        resetButton = box.addButton("Reset", QMessageBox.ResetRole)
+        box.addButton(QMessageBox.Close)
+        box.exec_()
+        if box.clickedButton() == saveButton:
+            fname = QFileDialog.getSaveFileName(self.win,
+                            "%s - Save Trace" % QApplication.applicationName(),
+                            ".", "(*.json)")
+            if not fname.isEmpty():
+                fname = str(fname)
+                if not fname.lower().endswith(".json"):
+                    fname += ".json"
+                instrumentation.writeTrace(fname)
+        elif box.clickedButton() == resetButton:
+            instrumentation.reset()
+    # end def
+
+    def actionFindMotifsSlot(self):
+        """
+        Asks for the motifs to find, as IUPAC patterns optionally named
+        name=pattern, and highlights them in the path view (see
+        motifsSelectedCallback).
+        """
+        if self.activePart() is None:
+            return
+        if self._motifText is None:
+            from model.motifscanner import defaultMotifs
+            self._motifText = ", ".join("%s=%s" % m for m in defaultMotifs)
+        self._findMotifsDialog = dlg = QInputDialog(self.win)
+        dlg.setWindowTitle("Find Motifs")
+        dlg.setLabelText("Motifs to highlight, with their reverse "
+                         "complements\n(IUPAC codes, name=pattern; "
+                         "leave empty to clear):")
+        dlg.setTextValue(self._motifText)
+        dlg.textValueSelected.connect(self.motifsSelectedCallback)
+        dlg.open()
+    # end def
+
+    def motifsSelectedCallback(self, text):
+        """
+        Scans every oligo of the active part for the motifs of text in one
+        pass (model/motifscanner.py) and shows the hits as a highlight
+        layer of the path view, with their number in the status bar.
+        """
+        from model.motifscanner import parseMotifs, scanPart
+        self._findMotifsDialog.textValueSelected.disconnect(
+                                                self.motifsSelectedCallback)
+        del self._findMotifsDialog
+        part = self.activePart()
+        partItem = self.win.pathroot.partItemForPart(part)
+        text = str(text)
+        try:
+            motifs = parseMotifs(text)
+        except ValueError, e:
+            QMessageBox.warning(self.win, "Find Motifs", str(e), QMessageBox.Ok)
+            return
+        self._motifText = text
+        hits = scanPart(part, motifs) if motifs else []
+        partItem.setMotifHits(hits)
+        if motifs:
+            oligos = set(hit.oligo for hit in hits)
+            partItem.updateStatusBar("%d motif hits on %d oligos" % \
+                                     (len(hits), len(oligos)))
+        else:
+            partItem.updateStatusBar("")
+    # end def
+
     def actionPrefsSlot(self):
         app().prefsClicked()
 
     def actionAutostapleSlot(self):
         part = self.activePart()
         if part:
-            self.win.pathGraphicsView.setViewportUpdateOn(False)
-            part.autoStaple()
-            self.win.pathGraphicsView.setViewportUpdateOn(True)
+            from model.autostaple import AutoStapleJob
+            self.runJob(AutoStapleJob(part))
 
     def actionModifySlot(self):
         """
@@ -493,9 +628,135 @@ class DocumentController():
     def undoStack(self):
         return self._document.undoStack()
 
+    def runJob(self, job):
+        """
+        Starts job (see jobs.py) in a worker thread behind a window-modal
+        progress dialog whose Cancel button cancels the job. The path view
+        stops repainting while the result is applied.
+        """
+        dialog = QProgressDialog(job.description + "...", "Cancel", 0, 0,
+                                 self.win)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(250)
+        dialog.canceled.connect(job.cancel)
+
+        def progress(done, total):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+
+        def applying(job):
+            dialog.setCancelButton(None)
+            self.win.pathGraphicsView.setViewportUpdateOn(False)
+
+        def ended(job, message=None):
+            self.win.pathGraphicsView.setViewportUpdateOn(True)
+            dialog.reset()
+            self._jobs.discard(job)
+            if message is not None:
+                box = QMessageBox(QMessageBox.Warning, job.description,
+                                  "%s failed." % job.description,
+                                  QMessageBox.Ok, self.win)
+                box.setDetailedText(message)
+                box.exec_()
+        job.jobProgressSignal.connect(progress)
+        job.jobApplyingSignal.connect(applying)
+        job.jobFinishedSignal.connect(ended)
+        job.jobCancelledSignal.connect(ended)
+        job.jobFailedSignal.connect(ended)
+        self._jobs.add(job)  # keep the job alive until it ends
+        job.start(threaded=True)
+
+    def loadDocument(self, fname):
+        """
+        Loads fname into the document with a DocumentLoader, showing its
+        progress and time to first paint in the status bar. Until the load
+        completes the views can be scrolled and zoomed but not edited, and
+        the actions that save or change the document are disabled.
+        """
+        self.cancelLoad()
+        win = self.win
+        loader = DocumentLoader(self._document, fname, win.pathGraphicsView)
+        self._loader = loader
+        name = os.path.basename(fname)
+        statusBar = win.statusBar()
+        bar = QProgressBar()
+        bar.setMaximumWidth(200)
+        bar.setRange(0, 0)  # busy until parsed
+        statusBar.addPermanentWidget(bar)
+        statusBar.showMessage("Opening %s..." % name)
+        self._setEditable(False)
+
+        def progress(done, total):
+            bar.setMaximum(total)
+            bar.setValue(done)
+
+        def firstPaint(seconds):
+            statusBar.showMessage("Opening %s... (first paint after %.2f s)" \
+                                                            % (name, seconds))
+            if instrumentation.isEnabled():
+                instrumentation.recorder().addDuration('import',
+                                        "time to first paint",
+                                        loader.startTime(),
+                                        loader.startTime() + seconds)
+
+        def stopped(loader):
+            statusBar.removeWidget(bar)
+            if self._loader is loader:
+                self._loader = None
+                self._setEditable(True)
+
+        def cancelled(loader):
+            stopped(loader)
+            statusBar.showMessage("Stopped opening %s." % name)
+
+        def ended(loader, message=None):
+            stopped(loader)
+            if message is not None:
+                statusBar.showMessage("")
+                box = QMessageBox(QMessageBox.Warning, "Open",
+                                  "Could not open %s." % name,
+                                  QMessageBox.Ok, win)
+                box.setDetailedText(message)
+                box.exec_()
+                return
+            ttfp = loader.timeToFirstPaint()
+            statusBar.showMessage("Opened %s in %.2f s%s" % (name,
+                        loader.elapsed(),
+                        " (first paint after %.2f s)" % ttfp if ttfp else ""))
+        loader.loaderProgressSignal.connect(progress)
+        loader.loaderFirstPaintSignal.connect(firstPaint)
+        loader.loaderFinishedSignal.connect(ended)
+        loader.loaderCancelledSignal.connect(cancelled)
+        loader.loaderFailedSignal.connect(ended)
+        loader.start()
+
+    def cancelLoad(self):
+        """Stops the running loadDocument, if any."""
+        loader = self._loader
+        if loader is not None:
+            self._loader = None
+            loader.cancel()
+            self._setEditable(True)
+
     ### PRIVATE SUPPORT METHODS ###
+    def _setEditable(self, editable):
+        """
+        Enables or disables editing the document in the views and every
+        action that reads or changes the document, while it is loading.
+        """
+        win = self.win
+        for widget in (win.pathGraphicsView, win.sliceGraphicsView):
+            widget.setInteractive(editable)
+        for action in [win.actionSave, win.actionSave_As, win.actionSVG,
+                       win.actionAutoStaple, win.actionExportStaples,
+                       win.actionModify, win.actionNewHoneycombPart,
+                       win.actionNewSquarePart, win.actionRenumber,
+                       self.actionFindMotifs] + self._pluginActions:
+            action.setEnabled(editable)
+
     def newDocument(self, doc=None, fname=None):
         """Creates a new Document, reusing the DocumentController."""
+        self.cancelLoad()  # it would keep building into the removed part
         self._document.resetViews()
         self._document.removeAllParts()  # clear out old parts
         self._document.undoStack().clear()  # reset undostack
@@ -597,9 +858,9 @@ class DocumentController():
         Receives file selection info from the dialog created by
         openAfterMaybeSave, following user input.
 
-        Extracts the file name and passes it to the decode method, which
-        returns a new document doc, which is then set as the open document
-        by newDocument. Calls finalizeImport and disconnects dialog signaling.
+        Extracts the file name, resets the document with newDocument and
+        loads the file into it in the background with loadDocument.
+        Disconnects dialog signaling.
         """
         if isinstance(selected, QStringList) or isinstance(selected, list):
             fname = selected[0]
@@ -610,7 +871,7 @@ class DocumentController():
         fname = str(fname)
         self._writeFileOpenPath(os.path.dirname(fname))
         self.newDocument(fname=fname)
-        decode(self._document, file(fname).read())
+        self.loadDocument(fname)
         if hasattr(self, "filesavedialog"): # user did save
             if self.fileopendialog != None:
                 self.fileopendialog.filesSelected.disconnect(\
@@ -642,6 +903,7 @@ class DocumentController():
     def windowCloseEventHandler(self, event):
         """Intercept close events when user attempts to close the window."""
         if self.maybeSave():
+            self.cancelLoad()
             event.accept()
             if app().isInMaya():
                 self.windock.setVisible(False)
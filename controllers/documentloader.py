@@ -0,0 +1,195 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+documentloader.py
+
+Opens a .json file into a Document without freezing the window. The file
+is read, parsed and turned into an import plan (decodePlan) in a worker
+thread. The model is then built on the UI thread from a QTimer, a time
+slice per event loop turn (decodeSteps), so the views create their items
+as the helices arrive and repaint in between. Helices are built in file
+order, which is top to bottom in the path view, so the visible ones come
+first.
+"""
+
+import traceback
+from timeit import default_timer
+
+from model.io.decoder import decodePlan, decodeSteps
+import util
+
+util.qtWrapImport('QtCore', globals(), ['pyqtSignal', 'QEvent', 'QObject',
+                                        'QThread', 'QTimer'])
+
+
+class DocumentLoader(QObject):
+    """
+    Loads fname into document. Connect to the signals, then call start().
+    If view is given, the time from start() until view first paints the
+    new part is reported by loaderFirstPaintSignal.
+    """
+    timeSlice = 0.03  # seconds of model building per event loop turn
+
+    def __init__(self, document, fname, view=None):
+        super(DocumentLoader, self).__init__()
+        self._document = document
+        self._fname = fname
+        self._view = view
+        self._steps = None
+        self._thread = None
+        self._cancelled = False
+        self._t0 = None
+        self._firstPaint = None
+        self._built = None  # (done, total) so far
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.loaderTimeoutSlot)
+        self._loaderParsedSignal.connect(self.loaderParsedSlot)
+    # end def
+
+    ### SIGNALS ###
+    loaderProgressSignal = pyqtSignal(int, int)  # done, total
+    loaderFirstPaintSignal = pyqtSignal(float)  # seconds since start
+    loaderFinishedSignal = pyqtSignal(QObject)  # self
+    loaderCancelledSignal = pyqtSignal(QObject)  # self
+    loaderFailedSignal = pyqtSignal(QObject, str)  # self, message
+    # emitted by the parse thread, delivered on the UI thread
+    _loaderParsedSignal = pyqtSignal(object)  # (outcome, value)
+
+    ### SLOTS ###
+    def loaderParsedSlot(self, parsed):
+        outcome, value = parsed
+        if self._cancelled:
+            return
+        if outcome == 'failed':
+            self.loaderFailedSignal.emit(self, value)
+            return
+        # may ask about the lattice type in a modal dialog, so the timer
+        # must not be running yet: it would re-enter the import
+        self._steps = decodeSteps(self._document, value)
+        if self._cancelled:
+            return
+        if self._view is not None:
+            self._view.viewport().installEventFilter(self)
+        self._timer.start()
+    # end def
+
+    def loaderTimeoutSlot(self):
+        """Builds the model for one time slice."""
+        if self._steps is None:
+            return  # finished, failed or cancelled while this was queued
+        deadline = default_timer() + self.timeSlice
+        try:
+            while default_timer() < deadline:
+                self._built = self._steps.next()
+        except StopIteration:
+            self._finish()
+            self.loaderFinishedSignal.emit(self)
+            return
+        except Exception:
+            self._finish()
+            self.loaderFailedSignal.emit(self, traceback.format_exc())
+            return
+        if self._built is not None:
+            self.loaderProgressSignal.emit(*self._built)
+    # end def
+
+    ### ACCESSORS ###
+    def filename(self):
+        return self._fname
+    # end def
+
+    def startTime(self):
+        """Returns the default_timer() value at start()."""
+        return self._t0
+    # end def
+
+    def elapsed(self):
+        """Returns the seconds since start()."""
+        return default_timer() - self._t0
+    # end def
+
+    def timeToFirstPaint(self):
+        """Returns the seconds from start() to the first paint, or None."""
+        return self._firstPaint
+    # end def
+
+    ### PUBLIC METHODS ###
+    def start(self, threaded=True):
+        self._t0 = default_timer()
+        if threaded:
+            self._thread = _ParseThread(self)
+            self._thread.start()
+        else:
+            self.loaderParsedSlot(self._parse())
+    # end def
+
+    def cancel(self):
+        """Stops loading. Whatever was built so far stays in the document."""
+        self._cancelled = True
+        self._finish()
+        self.loaderCancelledSignal.emit(self)
+    # end def
+
+    ### EVENT HANDLERS ###
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self._firstPaint is None and \
+                                                    self._built is not None:
+            self._firstPaint = self.elapsed()
+            self.loaderFirstPaintSignal.emit(self._firstPaint)
+            obj.removeEventFilter(self)
+        return False
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _parse(self):
+        try:
+            with open(self._fname) as f:
+                return ('done', decodePlan(f.read()))
+        except Exception:
+            return ('failed', traceback.format_exc())
+    # end def
+
+    def _finish(self):
+        self._timer.stop()
+        self._steps = None
+        if self._view is not None and self._firstPaint is None:
+            self._view.viewport().removeEventFilter(self)
+    # end def
+# end class
+
+
+class _ParseThread(QThread):
+    """Parses the file and hands the plan back to the UI thread."""
+    def __init__(self, loader):
+        super(_ParseThread, self).__init__()
+        self._loader = loader
+    # end def
+
+    def run(self):
+        loader = self._loader
+        loader._loaderParsedSignal.emit(loader._parse())
+    # end def
+# end class
@@ -0,0 +1,356 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+instrumentation.py
+
+Opt-in timing and counting of cadnano's hot paths. Start cadnano with
+--instrument (or set CADNANO_INSTRUMENT) to turn it on. When enabled it
+records:
+
+    * the redo/undo time of every QUndoCommand, by class
+    * the number of emissions of every model signal, by signal name
+    * the phases of model I/O (see PhaseTimer in legacydecoder.py)
+    * view refreshes decorated with @timed
+
+Results are available as a text report (report()), and as a JSON file
+that loads directly in chrome://tracing (writeTrace()).
+
+When disabled, @timed and PhaseTimer cost one global lookup per call and
+nothing else is patched.
+"""
+
+import json
+import os
+from collections import defaultdict
+from functools import wraps
+from timeit import default_timer
+
+import util
+
+util.qtWrapImport('QtCore', globals(), ['pyqtSignal'])
+util.qtWrapImport('QtGui', globals(), ['QUndoCommand'])
+
+_recorder = None
+_patchedCommands = set()
+_patchedSignalClasses = set()
+
+
+class Recorder(object):
+    """
+    Accumulates durations per (category, name), signal counts per name and
+    a bounded list of trace events for the Chrome trace file.
+    """
+    maxEvents = 200000  # keeps memory bounded during long sessions
+
+    def __init__(self):
+        self.reset()
+    # end def
+
+    def reset(self):
+        self._t0 = default_timer()
+        self._durations = defaultdict(lambda: [0, 0.0, 0.0])  # n, total, max
+        self._signalCounts = defaultdict(int)
+        self._events = []
+        self._droppedEvents = 0
+    # end def
+
+    def addDuration(self, category, name, start, end):
+        dt = end - start
+        stats = self._durations[(category, name)]
+        stats[0] += 1
+        stats[1] += dt
+        if dt > stats[2]:
+            stats[2] = dt
+        if len(self._events) < self.maxEvents:
+            self._events.append((category, name, start, dt))
+        else:
+            self._droppedEvents += 1
+    # end def
+
+    def countSignal(self, name):
+        self._signalCounts[name] += 1
+    # end def
+
+    def durations(self):
+        """Returns {(category, name): (count, totalSeconds, maxSeconds)}."""
+        return dict((k, tuple(v)) for k, v in self._durations.iteritems())
+    # end def
+
+    def signalCounts(self):
+        return dict(self._signalCounts)
+    # end def
+
+    def summary(self):
+        """Returns the accumulated results as a JSON-serializable dict."""
+        durations = [{'category': cat, 'name': name, 'count': n,
+                      'totalMs': total * 1000, 'maxMs': mx * 1000}
+                     for (cat, name), (n, total, mx) in \
+                                                self._durations.iteritems()]
+        durations.sort(key=lambda d: -d['totalMs'])
+        return {'durations': durations,
+                'signals': self.signalCounts(),
+                'droppedEvents': self._droppedEvents}
+    # end def
+
+    def traceEvents(self):
+        """Returns the recorded events in Chrome trace event format."""
+        pid = os.getpid()
+        return [{'name': name, 'cat': cat, 'ph': 'X', 'pid': pid, 'tid': 0,
+                 'ts': (start - self._t0) * 1e6, 'dur': dt * 1e6}
+                for cat, name, start, dt in self._events]
+    # end def
+# end class
+
+
+### PUBLIC API ###
+def isEnabled():
+    return _recorder is not None
+# end def
+
+
+def recorder():
+    return _recorder
+# end def
+
+
+def enable():
+    """
+    Starts recording. Command and signal instrumentation is installed on
+    the classes that are loaded at this point, so call it once the model
+    has been imported (CadnanoQt.finishInit does this for --instrument).
+    """
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder()
+    instrumentUndoCommands()
+    from model.document import Document
+    from model.parts.part import Part
+    from model.virtualhelix import VirtualHelix
+    from model.strandset import StrandSet
+    from model.strand import Strand
+    from model.oligo import Oligo
+    for cls in (Document, Part, VirtualHelix, StrandSet, Strand, Oligo):
+        instrumentSignals(cls)
+# end def
+
+
+def disable():
+    """Stops recording. Installed wrappers become pass-throughs."""
+    global _recorder
+    _recorder = None
+# end def
+
+
+def reset():
+    if _recorder is not None:
+        _recorder.reset()
+# end def
+
+
+def timed(category, name=None):
+    """
+    Decorator that records the duration of each call of the decorated
+    function under (category, name), name defaulting to the function's
+    qualified name.
+    """
+    def decorator(func):
+        label = name
+        if label is None:
+            label = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            if name is None and args:
+                key = "%s.%s" % (args[0].__class__.__name__, label)
+            else:
+                key = label
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if _recorder is not None:
+                    _recorder.addDuration(category, key, start,
+                                          default_timer())
+        return wrapper
+    return decorator
+# end def
+
+
+class PhaseTimer(object):
+    """
+    Times consecutive phases of a long operation. Each mark(phase) ends the
+    previous phase and starts a new one; done() ends the last phase.
+
+        phases = PhaseTimer("import")
+        phases.mark("parse")
+        ...
+        phases.mark("install strands")
+        ...
+        phases.done()
+    """
+    def __init__(self, category):
+        self._category = category
+        self._phase = None
+        self._start = None
+    # end def
+
+    def mark(self, phase):
+        if _recorder is None:
+            return
+        now = default_timer()
+        if self._phase is not None:
+            _recorder.addDuration(self._category, self._phase,
+                                  self._start, now)
+        self._phase, self._start = phase, now
+    # end def
+
+    def done(self):
+        if _recorder is not None and self._phase is not None:
+            _recorder.addDuration(self._category, self._phase,
+                                  self._start, default_timer())
+        self._phase = None
+    # end def
+# end class
+
+
+def report():
+    """Returns a plain text report of the recorded timings and counts."""
+    if _recorder is None:
+        return "Instrumentation is off. Start cadnano with --instrument."
+    summary = _recorder.summary()
+    lines = ["%-10s %-50s %8s %10s %10s" % \
+                            ("Category", "Name", "Calls", "Total ms", "Max ms")]
+    for d in summary['durations']:
+        lines.append("%-10s %-50s %8d %10.1f %10.1f" % \
+                            (d['category'], d['name'][:50], d['count'],
+                             d['totalMs'], d['maxMs']))
+    lines.append("")
+    lines.append("%-61s %8s" % ("Signal", "Emitted"))
+    for name, count in sorted(summary['signals'].iteritems(),
+                              key=lambda item: -item[1]):
+        lines.append("%-61s %8d" % (name[:61], count))
+    if summary['droppedEvents']:
+        lines.append("")
+        lines.append("%d trace events dropped" % summary['droppedEvents'])
+    return "\n".join(lines)
+# end def
+
+
+def writeTrace(fname):
+    """
+    Writes the summary and the trace events to fname. The file is in
+    Chrome trace format (open it in chrome://tracing) with the summary
+    stored under 'otherData'.
+    """
+    if _recorder is None:
+        return
+    obj = {'traceEvents': _recorder.traceEvents(),
+           'displayTimeUnit': 'ms',
+           'otherData': _recorder.summary()}
+    with open(fname, 'w') as f:
+        json.dump(obj, f)
+# end def
+
+
+### INSTALLATION ###
+def _allSubclasses(cls):
+    ret = []
+    stack = [cls]
+    while stack:
+        for sub in stack.pop().__subclasses__():
+            ret.append(sub)
+            stack.append(sub)
+    return ret
+# end def
+
+
+def _wrapCommandMethod(cls, methodName):
+    method = cls.__dict__[methodName]
+    name = "%s.%s" % (cls.__name__, methodName)
+
+    @wraps(method)
+    def wrapper(self, *args):
+        if _recorder is None:
+            return method(self, *args)
+        start = default_timer()
+        try:
+            return method(self, *args)
+        finally:
+            if _recorder is not None:
+                _recorder.addDuration('command', name, start,
+                                      default_timer())
+    setattr(cls, methodName, wrapper)
+# end def
+
+
+def instrumentUndoCommands():
+    """
+    Wraps redo and undo of every QUndoCommand subclass defined so far.
+    Times are inclusive: a command that calls other commands' redo directly
+    includes their time.
+    """
+    for cls in _allSubclasses(QUndoCommand):
+        if cls in _patchedCommands:
+            continue
+        _patchedCommands.add(cls)
+        for methodName in ('redo', 'undo'):
+            if methodName in cls.__dict__:
+                _wrapCommandMethod(cls, methodName)
+# end def
+
+
+def instrumentSignals(cls):
+    """
+    Counts emissions of the signals declared on cls (and its bases) for
+    every instance created from now on, by connecting each signal to a
+    counter as the instance is initialized.
+    """
+    if cls in _patchedSignalClasses:
+        return
+    _patchedSignalClasses.add(cls)
+    names = set()
+    for klass in cls.__mro__:
+        for attrName, attr in klass.__dict__.iteritems():
+            if isinstance(attr, pyqtSignal):
+                names.add(attrName)
+    names = sorted(names)
+    init = cls.__dict__['__init__']
+
+    def counter(name):
+        def countEmission(*args):
+            if _recorder is not None:
+                _recorder.countSignal(name)
+        return countEmission
+
+    @wraps(init)
+    def wrapper(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        if _recorder is not None:
+            for name in names:
+                getattr(self, name).connect(counter(name))
+    cls.__init__ = wrapper
+# end def
@@ -0,0 +1,253 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+jobs.py
+
+Runs long model operations (autostaple, autobreak) off the UI thread.
+A Job works in three steps:
+
+    snapshot()     UI thread. Copies what compute needs out of the model
+                   into plain Python and NumPy data.
+    compute(data)  Worker thread. Must not touch the model. Calls
+                   self.setProgress(done, total) now and then, which is
+                   also where a cancelled job stops.
+    apply(result)  UI thread. Changes the model with undoable commands,
+                   which the job wraps in one super macro.
+
+Nothing is applied if the job is cancelled, if compute raises, or if the
+part was edited while compute was running (see Part.revision).
+
+    job = AutoStapleJob(part)
+    job.jobFinishedSignal.connect(...)
+    job.start()
+"""
+
+import traceback
+
+import cadnano
+import util
+
+util.qtWrapImport('QtCore', globals(), ['pyqtSignal', 'QObject', 'QThread'])
+
+
+class JobCancelled(Exception):
+    """Raised inside compute when the job has been cancelled."""
+    pass
+# end class
+
+
+class Job(QObject):
+    """
+    Base class of background jobs on a Part. Subclasses implement
+    snapshot, compute and apply, and set description, which names both
+    the progress dialog and the undo macro.
+    """
+    description = "Job"
+
+    def __init__(self, part):
+        super(Job, self).__init__()
+        self._part = part
+        self._cancelled = False
+        self._running = False
+        self._revision = None
+        self._thread = None
+        self._result = None
+        self._error = None
+        self._jobComputedSignal.connect(self.jobComputedSlot)
+    # end def
+
+    ### SIGNALS ###
+    jobProgressSignal = pyqtSignal(int, int)  # done, total
+    jobApplyingSignal = pyqtSignal(QObject)  # self
+    jobFinishedSignal = pyqtSignal(QObject)  # self
+    jobCancelledSignal = pyqtSignal(QObject)  # self
+    jobFailedSignal = pyqtSignal(QObject, str)  # self, message
+    # emitted by the worker thread, delivered on the UI thread
+    _jobComputedSignal = pyqtSignal(object)  # (outcome, value)
+
+    ### SLOTS ###
+    def jobComputedSlot(self, computed):
+        outcome, value = computed
+        if outcome == 'done' and self._cancelled:
+            outcome = 'cancelled'
+        if outcome == 'done' and self._part.revision() != self._revision:
+            outcome, value = 'failed', \
+                    "The design was changed while %s was running." % \
+                                                    self.description.lower()
+        if outcome == 'done':
+            self.jobApplyingSignal.emit(self)
+            try:
+                self._applyMacro(value)
+            except Exception:
+                outcome, value = 'failed', traceback.format_exc()
+        self._running = False
+        if outcome == 'done':
+            self.jobFinishedSignal.emit(self)
+        elif outcome == 'cancelled':
+            self.jobCancelledSignal.emit(self)
+        else:
+            self._error = value
+            self.jobFailedSignal.emit(self, value)
+    # end def
+
+    ### ACCESSORS ###
+    def part(self):
+        return self._part
+    # end def
+
+    def isRunning(self):
+        return self._running
+    # end def
+
+    def isCancelled(self):
+        return self._cancelled
+    # end def
+
+    def result(self):
+        """Returns the value apply returned, once the job has finished."""
+        return self._result
+    # end def
+
+    def error(self):
+        """Returns the message of the last failure, or None."""
+        return self._error
+    # end def
+
+    ### PUBLIC METHODS ###
+    def start(self, threaded=None):
+        """
+        Snapshots the part and computes the result, in a worker thread if
+        threaded (the default in the GUI) or else before returning. The
+        outcome is reported by jobFinishedSignal, jobCancelledSignal or
+        jobFailedSignal.
+        """
+        if self._running:
+            return
+        if threaded is None:
+            threaded = cadnano.app().isGui()
+        self._running = True
+        self._cancelled = False
+        self._error = None
+        self._revision = self._part.revision()
+        data = self.snapshot()
+        if threaded:
+            self._thread = _JobThread(self, data)
+            self._thread.start()
+        else:
+            self.jobComputedSlot(self._computeOutcome(data))
+    # end def
+
+    def run(self):
+        """
+        Runs the job synchronously and returns the result of apply. Raises
+        JobCancelled if the job was cancelled from a progress slot.
+        """
+        self.start(threaded=False)
+        if self._error is not None:
+            raise RuntimeError(self._error)
+        if self._cancelled:
+            raise JobCancelled(self.description)
+        return self._result
+    # end def
+
+    def cancel(self):
+        """
+        Asks the job to stop. compute notices at its next setProgress call;
+        a result that is already computed is discarded.
+        """
+        self._cancelled = True
+    # end def
+
+    def wait(self):
+        """Blocks until the worker thread, if any, has finished computing."""
+        if self._thread is not None:
+            self._thread.wait()
+    # end def
+
+    def setProgress(self, done, total):
+        """
+        Called by compute to report progress. Raises JobCancelled once the
+        job has been cancelled.
+        """
+        self.checkCancelled()
+        self.jobProgressSignal.emit(done, total)
+    # end def
+
+    def checkCancelled(self):
+        if self._cancelled:
+            raise JobCancelled(self.description)
+    # end def
+
+    ### METHODS FOR SUBCLASSES ###
+    def snapshot(self):
+        """Returns the model data compute needs. Runs on the UI thread."""
+        return None
+    # end def
+
+    def compute(self, data):
+        """Returns the result to apply. Runs on the worker thread."""
+        raise NotImplementedError
+    # end def
+
+    def apply(self, result):
+        """Applies result to the model. Runs on the UI thread."""
+        raise NotImplementedError
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _computeOutcome(self, data):
+        try:
+            return ('done', self.compute(data))
+        except JobCancelled:
+            return ('cancelled', None)
+        except Exception:
+            return ('failed', traceback.format_exc())
+    # end def
+
+    def _applyMacro(self, result):
+        part = self._part
+        util.beginSuperMacro(part, desc=self.description)
+        try:
+            self._result = self.apply(result)
+        finally:
+            util.endSuperMacro(part)
+    # end def
+# end class
+
+
+class _JobThread(QThread):
+    """Runs Job.compute and hands the outcome back to the UI thread."""
+    def __init__(self, job, data):
+        super(_JobThread, self).__init__()
+        self._job = job
+        self._data = data
+    # end def
+
+    def run(self):
+        job = self._job
+        job._jobComputedSignal.emit(job._computeOutcome(self._data))
+        self._data = None
+    # end def
+# end class
@@ -34,6 +34,10 @@ Created by Shawn Douglas on 2010-09-26.
 import sys
 import os
 sys.path.insert(0, '.')
+if "--profile-startup" in sys.argv or "--quit-after-startup" in sys.argv:
+    # time every import from here on, see startupprofiler.py
+    import startupprofiler
+    startupprofiler.install()
 import cadnano
 
 if "-t" in sys.argv:
@@ -0,0 +1,334 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+autostaple.py
+
+Computes the autostaple layout of a Part without touching the model.
+Part.autoStaple used to build temporary staple strands over the scaffold,
+query them for crossover sites, remove them, then create the real strands
+and split them one crossover at a time. planAutoStaple reaches the same
+layout with interval arithmetic on NumPy arrays:
+
+    1. merge abutting scaffold strands into coverage intervals; these are
+       the staple strands before any crossover is added
+    2. keep the staple crossover sites from the lattice LUTs that lie
+       strictly inside an interval on both helices and are not next to a
+       scaffold crossover (idx - 4 or idx + 5)
+    3. break the intervals at each kept site (idx | idx + 1)
+    4. pair the resulting strand ends across helices, exactly as
+       potentialCrossoverList would report them
+
+installAutoStaple then creates every strand and crossover in one pass.
+The planning reads the model only through snapshotAutoStaple, which is
+what lets AutoStapleJob run computeAutoStaple in a worker thread.
+"""
+
+from itertools import izip
+
+import numpy as np
+
+from jobs import Job
+from model.oligo import Oligo
+from model.strandset import StrandSet
+import util
+
+
+class _Intervals(object):
+    """
+    Sorted, non-overlapping [low, high] intervals on one strand set, with a
+    per-base lookup of the interval covering each base.
+    """
+    def __init__(self, lows, highs, minBase, numBases):
+        self.lows = np.asarray(lows, dtype=int)
+        self.highs = np.asarray(highs, dtype=int)
+        self.minBase = minBase
+        self.cover = np.empty(numBases, dtype=int)
+        self.cover.fill(-1)
+        for i, (lo, hi) in enumerate(izip(self.lows, self.highs)):
+            self.cover[lo - minBase:hi - minBase + 1] = i
+    # end def
+
+    def at(self, idxs):
+        """Returns the interval index covering each of idxs, or -1."""
+        cols = idxs - self.minBase
+        inRange = (cols >= 0) & (cols < len(self.cover))
+        ret = self.cover[cols.clip(0, len(self.cover) - 1)]
+        ret[~inRange] = -1
+        return ret
+    # end def
+# end class
+
+
+def scaffoldIntervals(strandSet):
+    """
+    Returns (lows, highs) of the scaffold coverage of strandSet, merging
+    strands whose ends abut.
+    """
+    lows, highs = [], []
+    for strand in strandSet:
+        lo, hi = strand.idxs()
+        if highs and highs[-1] == lo - 1:
+            highs[-1] = hi
+        else:
+            lows.append(lo)
+            highs.append(hi)
+    return lows, highs
+# end def
+
+
+def crossoverCandidates(part, isLowIdx):
+    """
+    Returns, for each neighbor direction, the sorted array of staple
+    crossover indices on the low (or high) side, tiled along the part the
+    same way potentialCrossoverList does.
+    """
+    numBases = part.maxBaseIdx()
+    steps = np.arange(0, numBases, part._step)
+    luts = part._stapL if isLowIdx else part._stapH
+    ret = []
+    for lut in luts:
+        idxs = np.add.outer(steps, np.asarray(lut, dtype=int)).ravel()
+        ret.append(idxs[(idxs >= part.minBaseIdx()) & (idxs < numBases)])
+    return ret
+# end def
+
+
+def snapshotAutoStaple(part):
+    """
+    Copies what computeAutoStaple needs out of part into plain data, so the
+    computation can run off the UI thread. Helices are referred to by their
+    position in part.getVirtualHelices().
+    """
+    occupancy = part.occupancy()
+    vhs = list(part.getVirtualHelices())
+    positions = dict((vh, k) for k, vh in enumerate(vhs))
+    helices = []
+    for vh in vhs:
+        scafSS = vh.scaffoldStrandSet()
+        neighbors = [positions.get(neighbor) if neighbor is not None else None
+                     for neighbor in part.getVirtualHelixNeighbors(vh)]
+        helices.append({'scaffold': scaffoldIntervals(scafSS),
+                        'scafXovers': occupancy.xoverMask(scafSS).copy(),
+                        'is5to3': vh.stapleStrandSet().isDrawn5to3(),
+                        'neighbors': neighbors})
+    minBase = part.minBaseIdx()
+    return {'minBase': minBase,
+            'numBases': part.maxBaseIdx() - minBase + 1,
+            'lowCandidates': crossoverCandidates(part, True),
+            'highCandidates': crossoverCandidates(part, False),
+            'helices': helices}
+# end def
+
+
+def computeAutoStaple(snapshot, progress=None):
+    """
+    Returns (strands, xovers) for a snapshot from snapshotAutoStaple.
+    strands[k] is the list of staple (lowIdx, highIdx) of helix k in strand
+    set order, and xovers is a list of (k5p, strandIndex5p, k3p,
+    strandIndex3p, idx) in installation order. progress(done, total) is
+    called once per helix and step, and may raise to abort.
+    """
+    minBase = snapshot['minBase']
+    numBases = snapshot['numBases']
+    lowCandidates = snapshot['lowCandidates']
+    highCandidates = snapshot['highCandidates']
+    helices = snapshot['helices']
+    n = len(helices)
+    total = 3 * n
+
+    # 1. scaffold coverage, which is where the staples start out
+    coverage = [_Intervals(h['scaffold'][0], h['scaffold'][1],
+                           minBase, numBases) for h in helices]
+
+    # 2. crossover sites where both coverage intervals extend at least one
+    # base below and two above, and the scaffold has no nearby crossover
+    breaks = [[] for k in xrange(n)]
+    for k, helix in enumerate(helices):
+        if progress is not None:
+            progress(k, total)
+        if not helix['is5to3']:
+            continue
+        scafXovers = helix['scafXovers']
+        for neighbor, idxs in izip(helix['neighbors'], lowCandidates):
+            if neighbor is None:
+                continue
+            ok = np.ones(len(idxs), dtype=bool)
+            for intervals in (coverage[k], coverage[neighbor]):
+                if not len(intervals.lows):
+                    ok[:] = False
+                    break
+                i = intervals.at(idxs)
+                ok &= (i >= 0) & (intervals.lows[i] < idxs) & \
+                                            (intervals.highs[i] > idxs + 1)
+            for offset in (-4, 5):
+                cols = idxs + offset - minBase
+                inRange = (cols >= 0) & (cols < numBases)
+                ok &= ~(inRange & scafXovers[cols.clip(0, numBases - 1)])
+            breaks[k].append(idxs[ok])
+            breaks[neighbor].append(idxs[ok])
+
+    # 3. split the coverage intervals at every site: idx | idx + 1
+    strands = []
+    staples = []
+    for k in xrange(n):
+        if progress is not None:
+            progress(n + k, total)
+        ends = [coverage[k].lows, coverage[k].highs]
+        for idxs in breaks[k]:
+            ends.extend((idxs, idxs + 1))
+        ends = np.sort(np.concatenate(ends))
+        lows, highs = ends[0::2], ends[1::2]
+        strands.append(zip(lows.tolist(), highs.tolist()))
+        staples.append(_Intervals(lows, highs, minBase, numBases))
+
+    # 4. pair strand ends that meet at a crossover site, in the order
+    # potentialCrossoverList reports them. Sites are filtered against the
+    # crossovers of previously visited helices, as before.
+    xoverEnds = np.zeros((n, numBases), dtype=bool)
+    xovers = []
+    for k, helix in enumerate(helices):
+        if progress is not None:
+            progress(2 * n + k, total)
+        is5to3 = helix['is5to3']
+        candidates = lowCandidates if is5to3 else highCandidates
+        fromStaples = staples[k]
+        pending = []
+        for neighbor, idxs in izip(helix['neighbors'], candidates):
+            if neighbor is None:
+                continue
+            toStaples = staples[neighbor]
+            if not len(fromStaples.lows) or not len(toStaples.lows):
+                continue
+            cols = idxs - minBase
+            ok = ~(xoverEnds[k][cols] | xoverEnds[neighbor][cols])
+            i = fromStaples.at(idxs)
+            j = toStaples.at(idxs)
+            ok &= (i >= 0) & (j >= 0)
+            i, j = i.clip(0), j.clip(0)
+            # the crossover leaves the 3' end of this helix's strand and
+            # enters the 5' end of the neighbor's strand
+            if is5to3:
+                ok &= (fromStaples.highs[i] == idxs) & \
+                      (toStaples.highs[j] == idxs)
+            else:
+                ok &= (fromStaples.lows[i] == idxs) & \
+                      (toStaples.lows[j] == idxs)
+            for idx, si, sj in izip(idxs[ok], i[ok], j[ok]):
+                xovers.append((k, int(si), neighbor, int(sj), int(idx)))
+                pending.append((neighbor, idx))
+        for neighbor, idx in pending:
+            xoverEnds[k][idx - minBase] = True
+            xoverEnds[neighbor][idx - minBase] = True
+    return strands, xovers
+# end def
+
+
+def planAutoStaple(part):
+    """
+    Returns (strands, xovers) where strands maps each staple StrandSet to
+    a list of (lowIdx, highIdx) in strand set order, and xovers is a list
+    of (strandSet5p, strandIndex5p, strandSet3p, strandIndex3p, idx) in
+    installation order, with the strand indices pointing into strands.
+    """
+    stapleSets = [vh.stapleStrandSet() for vh in part.getVirtualHelices()]
+    strands, xovers = computeAutoStaple(snapshotAutoStaple(part))
+    return dict(izip(stapleSets, strands)), \
+           [(stapleSets[k5p], i5p, stapleSets[k3p], i3p, idx)
+            for k5p, i5p, k3p, i3p, idx in xovers]
+# end def
+
+
+def clearStaples(part):
+    """Removes every staple oligo of part, as one undoable macro."""
+    cmds = []
+    for o in list(part.oligos()):
+        if not o.isStaple():
+            continue
+        c = Oligo.RemoveOligoCommand(o)
+        cmds.append(c)
+    # end for
+    util.execCommandList(part, cmds, desc="Clear staples")
+# end def
+
+
+def installAutoStaple(part, strands, xovers):
+    """
+    Creates the strands and crossovers returned by planAutoStaple. The
+    strands already end at the crossovers, so no splits are needed.
+    """
+    from model.parts.part import Part
+    cmds = []
+    created = {}  # keyed on StrandSet
+    for stapSS, idxList in strands.iteritems():
+        created[stapSS] = []
+        for ssIdx, (lo, hi) in enumerate(idxList):
+            c = StrandSet.CreateStrandCommand(stapSS, lo, hi, ssIdx)
+            created[stapSS].append(c._strand)
+            cmds.append(c)
+    util.execCommandList(part, cmds, desc="Create strands")
+    cmds = []
+
+    for ss5p, i5p, ss3p, i3p, idx in xovers:
+        c = Part.CreateXoverCommand(part, created[ss5p][i5p], idx,
+                                    created[ss3p][i3p], idx,
+                                    updateOligo=False)
+        cmds.append(c)
+    util.execCommandList(part, cmds, desc="Create xovers")
+    cmds = []
+
+    c = Part.RefreshOligosCommand(part)
+    cmds.append(c)
+    util.execCommandList(part, cmds, desc="Assign oligos")
+# end def
+
+
+class AutoStapleJob(Job):
+    """
+    Autostaple as a background job: the plan is computed in the worker
+    thread, then the old staples are cleared and the new ones installed in
+    a single "Auto-Staple" macro, so one undo restores the old staples.
+    """
+    description = "Auto-Staple"
+
+    def snapshot(self):
+        self._stapleSets = [vh.stapleStrandSet() \
+                                for vh in self.part().getVirtualHelices()]
+        return snapshotAutoStaple(self.part())
+    # end def
+
+    def compute(self, snapshot):
+        return computeAutoStaple(snapshot, progress=self.setProgress)
+    # end def
+
+    def apply(self, plan):
+        strands, xovers = plan
+        stapleSets = self._stapleSets
+        part = self.part()
+        clearStaples(part)
+        installAutoStaple(part, dict(izip(stapleSets, strands)),
+                          [(stapleSets[k5p], i5p, stapleSets[k3p], i3p, idx)
+                           for k5p, i5p, k3p, i3p, idx in xovers])
+    # end def
+# end class
@@ -0,0 +1,380 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+designdiff.py
+
+Structural diff and merge of two Parts, typically two iterations of a
+design loaded from separate files. Helices are aligned by lattice
+coordinate. The strands of each StrandSet are compared as sorted
+(lowIdx, highIdx) interval lists in a single sweep that groups overlapping
+intervals: a group of one old and one new interval is a resize (or
+unchanged if they are equal), any other group is a set of removed and
+added strands. Crossovers and insertions are compared as sets and dicts
+keyed by helix coordinate and base index, so the whole diff is linear in
+the number of strands, never in the number of bases.
+
+    diff = diffFiles('v1.json', 'v2.json')
+    print diff.summary()
+    diff.apply(part)  # turns part (a v1) into v2, as one undoable macro
+"""
+
+from collections import namedtuple
+
+from model.enum import StrandType
+import util
+
+# coord is the (row, col) of the helix. A crossover end is (coord,
+# strandType, idx) of the base the crossover leaves (5' side) or enters
+# (3' side). Sequences are strings, '' where none is applied.
+HelixChange = namedtuple('HelixChange', ['kind', 'coord'])
+StrandChange = namedtuple('StrandChange', ['kind', 'coord', 'strandType',
+                                           'oldIdxs', 'newIdxs'])
+XoverChange = namedtuple('XoverChange', ['kind', 'end5p', 'end3p'])
+InsertionChange = namedtuple('InsertionChange', ['kind', 'coord', 'idx',
+                                                 'oldLength', 'newLength'])
+SequenceChange = namedtuple('SequenceChange', ['coord', 'strandType',
+                                               'idxs', 'oldSequence',
+                                               'newSequence'])
+
+
+class DesignDiff(object):
+    """
+    The changes that turn one Part into another. Each list holds the
+    namedtuples above, with kind one of 'added', 'removed', 'resized' (for
+    strands) or 'changed' (for insertion lengths).
+    """
+    def __init__(self, baseDelta=0):
+        self.baseDelta = baseDelta  # change of the part's maxBaseIdx
+        self.helices = []
+        self.strands = []
+        self.xovers = []
+        self.insertions = []
+        self.sequences = []
+    # end def
+
+    def isEmpty(self):
+        return not (self.baseDelta or self.helices or self.strands or \
+                    self.xovers or self.insertions or self.sequences)
+    # end def
+
+    def summary(self):
+        """Returns a line of counts per kind of change."""
+        def counts(changes):
+            ret = {}
+            for change in changes:
+                ret[change.kind] = ret.get(change.kind, 0) + 1
+            return ", ".join("%d %s" % (n, kind) \
+                                    for kind, n in sorted(ret.iteritems()))
+        parts = []
+        if self.baseDelta:
+            parts.append("length %+d bases" % self.baseDelta)
+        for name in ('helices', 'strands', 'xovers', 'insertions'):
+            changes = getattr(self, name)
+            if changes:
+                parts.append("%s: %s" % (name, counts(changes)))
+        if self.sequences:
+            parts.append("sequences: %d changed" % len(self.sequences))
+        return "; ".join(parts) if parts else "no changes"
+    # end def
+
+    def apply(self, part):
+        """
+        Applies the diff to part, which should be the old side of the diff
+        (or a design with the same structure), as one undoable macro.
+        Scaffold sequences are applied to the scaffold oligos; staple
+        sequences follow from them. Changes that cannot be applied, such
+        as an insertion where part has no strand, are skipped.
+        """
+        util.beginSuperMacro(part, desc="Apply design diff")
+        try:
+            self._apply(part)
+        finally:
+            util.endSuperMacro(part)
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _apply(self, part):
+        if self.baseDelta > 0:
+            part.resizeVirtualHelices(0, self.baseDelta)
+        for change in self.helices:
+            if change.kind == 'added':
+                part.createVirtualHelix(*change.coord)
+        for change in self.xovers:
+            if change.kind == 'removed':
+                strand5p = _strandAt(part, change.end5p)
+                strand3p = _strandAt(part, change.end3p)
+                if strand5p is not None and \
+                                        strand5p.connection3p() is strand3p:
+                    part.removeXover(strand5p, strand3p)
+        for change in self.helices:
+            if change.kind == 'removed':
+                part.virtualHelixAtCoord(change.coord).remove()
+        resized = []
+        for change in self.strands:
+            end = (change.coord, change.strandType,
+                   change.oldIdxs[0] if change.oldIdxs else None)
+            if change.kind == 'removed':
+                strand = _strandAt(part, end)
+                strand.strandSet().removeStrand(strand)
+            elif change.kind == 'resized':
+                # shrink to the overlap first so no strand grows into a
+                # neighbor that has yet to shrink
+                strand = _strandAt(part, end)
+                overlap = (max(change.oldIdxs[0], change.newIdxs[0]),
+                           min(change.oldIdxs[1], change.newIdxs[1]))
+                if overlap != change.oldIdxs:
+                    strand.resize(overlap)
+                resized.append((strand, change.newIdxs))
+        for strand, newIdxs in resized:
+            if strand.idxs() != newIdxs:
+                strand.resize(newIdxs)
+        for change in self.strands:
+            if change.kind == 'added':
+                strandSet = _strandSet(part, change.coord, change.strandType)
+                strandSet.createStrand(*change.newIdxs)
+        for change in self.insertions:
+            strand = _strandAt(part, (change.coord, StrandType.Scaffold,
+                                      change.idx)) or \
+                     _strandAt(part, (change.coord, StrandType.Staple,
+                                      change.idx))
+            if strand is None:
+                continue
+            if change.kind == 'added':
+                strand.addInsertion(change.idx, change.newLength)
+            elif change.kind == 'changed':
+                strand.changeInsertion(change.idx, change.newLength)
+            else:
+                strand.removeInsertion(change.idx)
+        for change in self.xovers:
+            if change.kind == 'added':
+                strand5p = _strandAt(part, change.end5p)
+                strand3p = _strandAt(part, change.end3p)
+                if strand5p is not None and strand3p is not None:
+                    part.createXover(strand5p, change.end5p[2],
+                                     strand3p, change.end3p[2])
+        if self.baseDelta < 0:
+            part.resizeVirtualHelices(0, self.baseDelta)
+        self._applySequences(part)
+    # end def
+
+    def _applySequences(self, part):
+        newSequences = {}
+        oligos = []
+        for change in self.sequences:
+            if change.strandType != StrandType.Scaffold:
+                continue
+            strand = _strandAt(part, (change.coord, change.strandType,
+                                      change.idxs[0]))
+            if strand is None or strand.idxs() != change.idxs:
+                continue
+            newSequences[strand] = change.newSequence
+            if strand.oligo() not in oligos:
+                oligos.append(strand.oligo())
+        for oligo in oligos:
+            seq = []
+            for strand in oligo.strand5p().generator3pStrand():
+                s = newSequences.get(strand, _sequence(strand))
+                seq.append(s if s else ' ' * strand.totalLength())
+            seq = ''.join(seq)
+            oligo.applySequence(seq if seq.strip() else None)
+    # end def
+# end class
+
+
+def diffParts(oldPart, newPart):
+    """Returns the DesignDiff that turns oldPart into newPart."""
+    diff = DesignDiff(newPart.maxBaseIdx() - oldPart.maxBaseIdx())
+    oldHelices = dict((vh.coord(), vh) for vh in oldPart.getVirtualHelices())
+    newHelices = dict((vh.coord(), vh) for vh in newPart.getVirtualHelices())
+    for coord in sorted(set(oldHelices) | set(newHelices)):
+        oldVh, newVh = oldHelices.get(coord), newHelices.get(coord)
+        if oldVh is None:
+            diff.helices.append(HelixChange('added', coord))
+        elif newVh is None:
+            diff.helices.append(HelixChange('removed', coord))
+            continue
+        for strandType in (StrandType.Scaffold, StrandType.Staple):
+            old = _intervals(oldVh, strandType)
+            new = _intervals(newVh, strandType)
+            _sweepStrands(diff, coord, strandType, old, new)
+        _compareInsertions(diff, coord,
+                           oldPart.insertions().get(coord, {}),
+                           newPart.insertions().get(coord, {}))
+    oldXovers, newXovers = _xovers(oldPart), _xovers(newPart)
+    # a crossover kept between the two designs still has to be remade if
+    # a strand it joins is removed (and added again), as removing a strand
+    # removes its crossovers; crossover ends are always strand ends
+    removedEnds = set()
+    for change in diff.strands:
+        if change.kind == 'removed':
+            for idx in change.oldIdxs:
+                removedEnds.add((change.coord, change.strandType, idx))
+    remade = set(ends for ends in oldXovers & newXovers \
+                 if ends[0] in removedEnds or ends[1] in removedEnds)
+    for ends in sorted((oldXovers - newXovers) | remade):
+        diff.xovers.append(XoverChange('removed', *ends))
+    for ends in sorted((newXovers - oldXovers) | remade):
+        diff.xovers.append(XoverChange('added', *ends))
+    return diff
+# end def
+
+
+def loadPart(fname):
+    """
+    Decodes the design file fname into a new Document and returns the
+    document and its part.
+    """
+    from model.io.decoder import decodeDocument
+    with open(fname) as f:
+        document = decodeDocument(f.read())
+    return document, document.selectedPart()
+# end def
+
+
+def diffFiles(oldFname, newFname):
+    """Returns the DesignDiff between two design files."""
+    oldDocument, oldPart = loadPart(oldFname)
+    newDocument, newPart = loadPart(newFname)
+    return diffParts(oldPart, newPart)
+# end def
+
+
+def _intervals(vh, strandType):
+    """Returns the sorted (lowIdx, highIdx, strand) of a StrandSet."""
+    if vh is None:
+        return []
+    strandSet = vh.scaffoldStrandSet() if strandType == StrandType.Scaffold \
+                                            else vh.stapleStrandSet()
+    return [strand.idxs() + (strand,) for strand in strandSet]
+# end def
+
+
+def _sweepStrands(diff, coord, strandType, old, new):
+    """
+    Walks the sorted intervals old and new once, grouping intervals that
+    overlap, and records the strand and sequence changes of each group.
+    """
+    i = j = 0
+    nOld, nNew = len(old), len(new)
+    while i < nOld or j < nNew:
+        if j == nNew or (i < nOld and old[i][0] <= new[j][0]):
+            groupOld, groupNew, end = [old[i]], [], old[i][1]
+            i += 1
+        else:
+            groupOld, groupNew, end = [], [new[j]], new[j][1]
+            j += 1
+        while True:
+            if i < nOld and old[i][0] <= end:
+                groupOld.append(old[i])
+                end = max(end, old[i][1])
+                i += 1
+            elif j < nNew and new[j][0] <= end:
+                groupNew.append(new[j])
+                end = max(end, new[j][1])
+                j += 1
+            else:
+                break
+        if len(groupOld) == 1 and len(groupNew) == 1:
+            oldIdxs, newIdxs = groupOld[0][:2], groupNew[0][:2]
+            oldSeq, newSeq = _sequence(groupOld[0][2]), \
+                                                    _sequence(groupNew[0][2])
+            if oldIdxs != newIdxs:
+                diff.strands.append(StrandChange('resized', coord,
+                                                 strandType, oldIdxs, newIdxs))
+            if oldSeq != newSeq and (newSeq or oldIdxs == newIdxs):
+                diff.sequences.append(SequenceChange(coord, strandType,
+                                                     newIdxs, oldSeq, newSeq))
+            continue
+        for low, high, strand in groupOld:
+            diff.strands.append(StrandChange('removed', coord, strandType,
+                                             (low, high), None))
+        for low, high, strand in groupNew:
+            diff.strands.append(StrandChange('added', coord, strandType,
+                                             None, (low, high)))
+            if _sequence(strand):
+                diff.sequences.append(SequenceChange(coord, strandType,
+                                        (low, high), '', _sequence(strand)))
+# end def
+
+
+def _compareInsertions(diff, coord, old, new):
+    """Compares two {idx: Insertion} dicts of one helix."""
+    for idx in sorted(set(old) | set(new)):
+        oldLength = old[idx].length() if idx in old else None
+        newLength = new[idx].length() if idx in new else None
+        if oldLength == newLength:
+            continue
+        if oldLength is None:
+            kind = 'added'
+        elif newLength is None:
+            kind = 'removed'
+        else:
+            kind = 'changed'
+        diff.insertions.append(InsertionChange(kind, coord, idx,
+                                               oldLength, newLength))
+# end def
+
+
+def _xovers(part):
+    """Returns the set of (end5p, end3p) of every crossover of part."""
+    ret = set()
+    for vh in part.getVirtualHelices():
+        for strandSet in vh.getStrandSets():
+            for strand in strandSet:
+                strand3p = strand.connection3p()
+                if strand3p is None:
+                    continue
+                ret.add(((vh.coord(), strand.strandType(),
+                          strand.idx3Prime()),
+                         (strand3p.virtualHelix().coord(),
+                          strand3p.strandType(), strand3p.idx5Prime())))
+    return ret
+# end def
+
+
+def _sequence(strand):
+    """Returns the sequence of strand, or '' if it has none or is blank."""
+    seq = strand.sequence()
+    return seq if seq.strip() else ''
+# end def
+
+
+def _strandSet(part, coord, strandType):
+    vh = part.virtualHelixAtCoord(coord)
+    if vh is None:
+        return None
+    if strandType == StrandType.Scaffold:
+        return vh.scaffoldStrandSet()
+    return vh.stapleStrandSet()
+# end def
+
+
+def _strandAt(part, end):
+    """Returns the strand at end, a (coord, strandType, idx), or None."""
+    strandSet = _strandSet(part, end[0], end[1])
+    if strandSet is None or end[2] is None:
+        return None
+    return strandSet.getStrand(end[2])
+# end def
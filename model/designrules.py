@@ -0,0 +1,299 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+designrules.py
+
+Design rule checking (DRC) for a Part. Helix rules run on NumPy arrays
+built from each helix's StrandSets and insertions; oligo rules run on
+the oligos that have a strand on a checked helix. Results are cached per
+helix and per oligo, so after an edit only the helices the edit touched
+(see Part.virtualHelicesModifiedSince) and their oligos are re-checked.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+import util
+
+util.qtWrapImport('QtCore', globals(), ['pyqtSignal', 'QObject'])
+
+# rule is one of the names in DesignRuleChecker.rules, helix is the
+# virtualHelix number, lowIdx and highIdx bound the offending bases and
+# item is the offending Oligo or Strand (None for helix-wide rules).
+Violation = namedtuple('Violation', ['rule', 'severity', 'helix',
+                                     'lowIdx', 'highIdx', 'item', 'message'])
+
+
+class DesignRuleChecker(QObject):
+    """
+    Checks a Part against a set of design rules. Construct it with a dict
+    of settings overriding the defaults below (same style as the autobreak
+    plugin settings):
+
+        'minStapleLen'      shortest allowed staple oligo (bases)
+        'maxStapleLen'      longest allowed staple oligo (bases)
+        'minStapleLegLen'   shortest staple strand ending at a crossover
+        'minXoverSpacing'   closest allowed crossovers on one strandSet
+        'skipWindow'        window over which skips are counted
+        'maxSkipsPerWindow' skips allowed within skipWindow
+
+    If autoUpdate is True the checker re-checks touched helices whenever
+    the part's undo stack changes and emits drcViolationsChangedSignal.
+    """
+    rules = ('stapleLength', 'shortLeg', 'xoverSpacing', 'unpairedScaffold',
+             'stapleLoop', 'adjacentEnds', 'skipDensity')
+
+    def __init__(self, part, settings=None, autoUpdate=True):
+        super(DesignRuleChecker, self).__init__(part)
+        settings = settings if settings else {}
+        self._part = part
+        self._minStapleLen = settings.get('minStapleLen', 18)
+        self._maxStapleLen = settings.get('maxStapleLen', 60)
+        self._minStapleLegLen = settings.get('minStapleLegLen', 5)
+        self._minXoverSpacing = settings.get('minXoverSpacing', 6)
+        self._skipWindow = settings.get('skipWindow', part.stepSize())
+        self._maxSkipsPerWindow = settings.get('maxSkipsPerWindow', 1)
+        self._helixViolations = {}  # virtualHelix -> [Violation, ]
+        self._oligoViolations = {}  # oligo -> [Violation, ]
+        self._revision = None
+        self._undoStack = None
+        if autoUpdate:
+            self._undoStack = part.undoStack()
+            self._undoStack.indexChanged.connect(self.undoStackChangedSlot)
+    # end def
+
+    ### SIGNALS ###
+    drcViolationsChangedSignal = pyqtSignal(QObject)  # self
+
+    ### SLOTS ###
+    def undoStackChangedSlot(self, index):
+        if self.update():
+            self.drcViolationsChangedSignal.emit(self)
+    # end def
+
+    ### ACCESSORS ###
+    def part(self):
+        return self._part
+    # end def
+
+    def violations(self, rule=None):
+        """
+        Returns every cached Violation, sorted by helix and base index, and
+        optionally filtered to one rule.
+        """
+        if self._revision is None:
+            self.checkAll()
+        ret = []
+        for vList in self._helixViolations.itervalues():
+            ret.extend(vList)
+        for vList in self._oligoViolations.itervalues():
+            ret.extend(vList)
+        if rule is not None:
+            ret = [v for v in ret if v.rule == rule]
+        ret.sort(key=lambda v: (v.helix, v.lowIdx, v.rule))
+        return ret
+    # end def
+
+    ### PUBLIC METHODS ###
+    def detach(self):
+        """Stops following the undo stack."""
+        if self._undoStack is not None:
+            self._undoStack.indexChanged.disconnect(self.undoStackChangedSlot)
+            self._undoStack = None
+    # end def
+
+    def checkAll(self):
+        """Discards cached results and checks the whole part."""
+        self._helixViolations = {}
+        self._oligoViolations = {}
+        self._revision = self._part.revision()
+        self._checkHelices(self._part.getVirtualHelices())
+    # end def
+
+    def update(self):
+        """
+        Re-checks the helices modified since the last check, and the oligos
+        with strands on them. Returns True if anything was re-checked.
+        """
+        if self._revision is None:
+            self.checkAll()
+            return True
+        part = self._part
+        touched = part.virtualHelicesModifiedSince(self._revision)
+        self._revision = part.revision()
+        current = set(part.getVirtualHelices())
+        removed = [vh for vh in self._helixViolations if vh not in current]
+        for vh in removed:
+            del self._helixViolations[vh]
+        oligos = part.oligos()
+        for oligo in [o for o in self._oligoViolations if o not in oligos]:
+            del self._oligoViolations[oligo]
+        if not touched and not removed:
+            return False
+        self._checkHelices(touched)
+        return True
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _checkHelices(self, virtualHelices):
+        oligos = set()
+        for vh in virtualHelices:
+            self._helixViolations[vh] = self._checkHelix(vh)
+            for strandSet in vh.getStrandSets():
+                for strand in strandSet:
+                    oligos.add(strand.oligo())
+        for oligo in oligos:
+            if oligo is None or oligo.strand5p() is None:
+                continue
+            self._oligoViolations[oligo] = self._checkOligo(oligo)
+    # end def
+
+    def _strandArrays(self, strandSet):
+        """
+        Returns (strands, lows, highs, lengths, hasXover, xoverEnds) for
+        strandSet. lengths include insertions, hasXover marks strands with
+        a crossover at either end and xoverEnds is the sorted array of base
+        indices at which a strand leaves for a crossover.
+        """
+        strands = list(strandSet)
+        n = len(strands)
+        lows = np.empty(n, dtype=int)
+        highs = np.empty(n, dtype=int)
+        lengths = np.empty(n, dtype=int)
+        hasXover = np.zeros(n, dtype=bool)
+        xoverEnds = []
+        for i, strand in enumerate(strands):
+            lows[i], highs[i] = strand.idxs()
+            lengths[i] = strand.totalLength()
+            if strand.connection3p() is not None:
+                xoverEnds.append(strand.idx3Prime())
+                hasXover[i] = True
+            if strand.connection5p() is not None:
+                xoverEnds.append(strand.idx5Prime())
+                hasXover[i] = True
+        return strands, lows, highs, lengths, hasXover, \
+               np.unique(np.array(xoverEnds, dtype=int))
+    # end def
+
+    def _coverage(self, lows, highs, minBase, numBases):
+        """Returns a bool array marking the bases covered by any strand."""
+        delta = np.zeros(numBases + 1, dtype=int)
+        np.add.at(delta, lows - minBase, 1)
+        np.add.at(delta, highs - minBase + 1, -1)
+        return np.cumsum(delta[:-1]) > 0
+    # end def
+
+    def _checkHelix(self, vh):
+        part = self._part
+        num = vh.number()
+        minBase = part.minBaseIdx()
+        numBases = part.maxBaseIdx() - minBase + 1
+        ret = []
+
+        def add(rule, lo, hi, item, message):
+            ret.append(Violation(rule, 'warning', num, int(lo), int(hi),
+                                 item, message))
+        scaf = self._strandArrays(vh.scaffoldStrandSet())
+        stap = self._strandArrays(vh.stapleStrandSet())
+
+        # staple legs at a crossover
+        strands, lows, highs, lengths, hasXover, xovers = stap
+        for i in np.flatnonzero(hasXover & (lengths < self._minStapleLegLen)):
+            add('shortLeg', lows[i], highs[i], strands[i],
+                "staple leg of %d bases at a crossover (minimum %d)" % \
+                (lengths[i], self._minStapleLegLen))
+
+        # crossovers too close together; ends one base apart are the two
+        # halves of a single crossover
+        for strandArrays in (scaf, stap):
+            xovers = strandArrays[5]
+            gaps = np.diff(xovers)
+            for i in np.flatnonzero((gaps > 1) & \
+                                    (gaps < self._minXoverSpacing)):
+                add('xoverSpacing', xovers[i], xovers[i + 1], None,
+                    "crossovers %d bases apart (minimum %d)" % \
+                    (gaps[i], self._minXoverSpacing))
+
+        # scaffold bases with no staple partner, ignoring skipped bases
+        insertions = part.insertions().get(vh.coord(), {})
+        skips = np.array([i.idx() for i in insertions.itervalues() \
+                                                    if i.isSkip()], dtype=int)
+        skips.sort()
+        scafCover = self._coverage(scaf[1], scaf[2], minBase, numBases)
+        stapCover = self._coverage(stap[1], stap[2], minBase, numBases)
+        unpaired = scafCover & ~stapCover
+        if len(skips):
+            unpaired[skips - minBase] = False
+        edges = np.diff(np.concatenate(([0], unpaired.astype(int), [0])))
+        for lo, hi in zip(np.flatnonzero(edges == 1),
+                          np.flatnonzero(edges == -1) - 1):
+            add('unpairedScaffold', lo + minBase, hi + minBase, None,
+                "%d unpaired scaffold bases" % (hi - lo + 1))
+
+        # skip density
+        m = self._maxSkipsPerWindow
+        if m == 0:
+            for idx in skips:
+                add('skipDensity', idx, idx, None,
+                    "skip where none are allowed")
+        elif len(skips) > m:
+            spans = skips[m:] - skips[:-m]
+            for i in np.flatnonzero(spans < self._skipWindow):
+                add('skipDensity', skips[i], skips[i + m], None,
+                    "%d skips within %d bases" % (m + 1, self._skipWindow))
+        return ret
+    # end def
+
+    def _checkOligo(self, oligo):
+        ret = []
+        strand5p = oligo.strand5p()
+        num = strand5p.virtualHelix().number()
+        idx5p = strand5p.idx5Prime()
+        if not oligo.isStaple():
+            return ret
+        if oligo.isLoop():
+            ret.append(Violation('stapleLoop', 'error', num, idx5p, idx5p,
+                                 oligo, "staple %s is a loop" % \
+                                                        oligo.locString()))
+            return ret
+        length = oligo.length()
+        if not self._minStapleLen <= length <= self._maxStapleLen:
+            ret.append(Violation('stapleLength', 'error', num, idx5p, idx5p,
+                       oligo, "staple %s is %d bases (allowed %d-%d)" % \
+                       (oligo.locString(), length, self._minStapleLen,
+                        self._maxStapleLen)))
+        for strand3p in strand5p.generator3pStrand():
+            pass
+        if strand3p.strandSet() == strand5p.strandSet() and \
+                                    abs(strand3p.idx3Prime() - idx5p) == 1:
+            idx3p = strand3p.idx3Prime()
+            ret.append(Violation('adjacentEnds', 'warning', num,
+                       min(idx5p, idx3p), max(idx5p, idx3p), oligo,
+                       "5' and 3' ends of staple %s are adjacent" % \
+                                                        oligo.locString()))
+        return ret
+    # end def
+# end class
@@ -0,0 +1,261 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+helixmesh.py
+
+Maya-independent geometry for the Half-Cylinder Helix shape used by the
+3D (solid) view. The spHalfCylinderHelixNode copies the buffers computed
+here into its MFnMesh, and model.io.meshencoder uses them to write whole
+parts to OBJ/STL/glTF without Maya.
+
+Vertex and face layout is identical to the one the Maya node has always
+produced: a fan-triangulated endcap, numMiddleSections rings of quads, and
+a closing fan-triangulated endcap. Each ring holds numVerticesEnds verts,
+the first of which sits on the helix axis.
+"""
+
+import math
+import numpy as np
+
+from model.enum import LatticeType, StrandType
+
+# Values the solid view assigns to the Maya node attributes (degrees)
+rotationOffsetForLattice = {LatticeType.Honeycomb: 250,
+                            LatticeType.Square: 125}
+decoratorRotOffsetForLattice = {LatticeType.Honeycomb: 90,
+                                LatticeType.Square: 200}
+defaultRise = 0.34  # nanometers per base
+defaultEdgesPerBase = 2
+defaultNumVerticesEnds = 20
+
+
+def halfCylinderHelixMesh(startBase, endBase, totalNumBases, radius,
+                          rotation, rotationOffset, rise, edgesPerBase,
+                          parity, strandType,
+                          numVerticesEnds=defaultNumVerticesEnds):
+    """
+    Returns a tuple (vertices, faceCounts, faceConnects, startPos, endPos)
+    for a Half-Cylinder Helix spanning startBase to endBase.
+
+    vertices is a (numVerticesTotal, 3) float32 array in the node's local
+    frame (the helix axis is the y axis). faceCounts and faceConnects are
+    int32 arrays in the layout expected by MFnMesh.create. startPos and
+    endPos are the 3D positions of the two endcap centers.
+
+    rotation and rotationOffset are in radians, matching the values Maya
+    hands to HalfCylinderHelixNode.compute.
+    """
+    middleBase = totalNumBases / 2
+    end = middleBase - startBase
+    start = endBase - middleBase
+    baseCount = start + end + 1
+    numMiddleSections = int(baseCount * edgesPerBase) - 1
+    numRings = numMiddleSections + 2
+    sectionRise = float(rise) / edgesPerBase
+    startPosY = -start * rise
+    rotAng = -float(rotation) / edgesPerBase
+    gap = sectionRise / 6.0
+    numFacesEnds = numVerticesEnds - 2
+    startingRotation = endBase * rotation + (math.pi * (not parity)) + \
+                       rotationOffset + (math.pi * strandType)
+
+    # ring heights: endcaps are pulled in by gap
+    ringIdx = np.arange(numRings)
+    heights = startPosY + sectionRise * ringIdx
+    heights[0] = startPosY + gap
+    heights[-1] = startPosY + (numMiddleSections + 1) * sectionRise - gap
+    ringRot = rotAng * ringIdx
+
+    # (180 / numFacesEnds) is integer division, as it was in the Maya node
+    arcDeg = np.arange(1, numVerticesEnds) * (180 / numFacesEnds)
+    angles = startingRotation + np.radians(arcDeg)[np.newaxis, :] + \
+             ringRot[:, np.newaxis]
+
+    vertices = np.zeros((numRings, numVerticesEnds, 3), dtype=np.float32)
+    vertices[:, :, 1] = heights[:, np.newaxis]
+    vertices[:, 1:, 0] = radius * np.cos(angles)
+    vertices[:, 1:, 2] = radius * np.sin(angles)
+    vertices = vertices.reshape(-1, 3)
+    numVerticesTotal = len(vertices)
+
+    # Front end piece faces, a fan around vertex 0
+    fan = np.arange(1, numFacesEnds + 1)
+    frontFaces = np.column_stack((np.zeros_like(fan), fan, fan + 1))
+
+    # Middle piece faces, quads between consecutive rings
+    k = np.arange(numMiddleSections + 1)[:, np.newaxis]
+    i = np.arange(numVerticesEnds)[np.newaxis, :]
+    iNext = (i + 1) % numVerticesEnds
+    v1 = k * numVerticesEnds + i
+    v2 = k * numVerticesEnds + iNext
+    v3 = (k + 1) * numVerticesEnds + i
+    v4 = (k + 1) * numVerticesEnds + iNext
+    middleFaces = np.dstack((v1, v2, v4, v3)).reshape(-1, 4)
+
+    # Back end piece faces, a fan around the last ring's center
+    center = numVerticesTotal - numVerticesEnds
+    backFaces = np.column_stack((np.repeat(center, numFacesEnds),
+                                 center + fan, center + fan + 1))
+
+    faceConnects = np.concatenate((frontFaces.ravel(),
+                                   middleFaces.ravel(),
+                                   backFaces.ravel())).astype(np.int32)
+    faceCounts = np.concatenate((np.repeat(3, numFacesEnds),
+                                 np.repeat(4, len(middleFaces)),
+                                 np.repeat(3, numFacesEnds))).astype(np.int32)
+
+    endPos = (0.0, float(heights[0]), 0.0)
+    startPos = (0.0, float(heights[-1]), 0.0)
+    return vertices, faceCounts, faceConnects, startPos, endPos
+# end def
+
+
+def faceTriangles(faceCounts, faceConnects):
+    """
+    Converts MFnMesh style triangle and quad faces into a (numTris, 3)
+    int32 array of triangles. Quads (a, b, c, d) become (a, b, c) and
+    (a, c, d).
+    """
+    faceStarts = np.concatenate(([0], np.cumsum(faceCounts)[:-1]))
+    triStarts = faceStarts[faceCounts == 3]
+    quadStarts = faceStarts[faceCounts == 4]
+    tris = faceConnects[triStarts[:, np.newaxis] + np.arange(3)]
+    quads = faceConnects[quadStarts[:, np.newaxis] + np.arange(4)]
+    quadTris = np.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+    return np.concatenate((tris, quadTris)).astype(np.int32)
+# end def
+
+
+def triangleNormals(vertices, triangles):
+    """Returns the (unnormalized, area-weighted) normal of each triangle."""
+    v0 = vertices[triangles[:, 0]]
+    v1 = vertices[triangles[:, 1]]
+    v2 = vertices[triangles[:, 2]]
+    return np.cross(v1 - v0, v2 - v0)
+# end def
+
+
+def vertexNormals(vertices, triangles):
+    """
+    Returns unit per-vertex normals computed by accumulating the
+    area-weighted normals of every triangle sharing the vertex.
+    """
+    faceNormals = triangleNormals(vertices, triangles)
+    numVertices = len(vertices)
+    normals = np.empty(vertices.shape, dtype=np.float64)
+    # bincount is much faster than np.add.at for scatter-adds
+    idx = triangles.ravel()
+    for k in range(3):
+        weights = np.repeat(faceNormals[:, k], 3)
+        normals[:, k] = np.bincount(idx, weights, minlength=numVertices)
+    lengths = np.sqrt((normals ** 2).sum(axis=1))
+    lengths[lengths == 0] = 1.0
+    return (normals / lengths[:, np.newaxis]).astype(np.float32)
+# end def
+
+
+def strandMeshParams(strand, edgesPerBase=defaultEdgesPerBase,
+                     rise=defaultRise):
+    """
+    Returns the keyword arguments for halfCylinderHelixMesh that the solid
+    view assigns to a strand's spHalfCylinderHelixNode.
+    """
+    vh = strand.virtualHelix()
+    part = vh.part()
+    lo, hi = strand.idxs()
+    latticeType = part.crossSectionType()
+    return {'startBase': lo,
+            'endBase': hi,
+            'totalNumBases': part.maxBaseIdx(),
+            'radius': part.radius(),
+            'rotation': math.radians(part.twistPerBase()),
+            'rotationOffset': \
+                    math.radians(rotationOffsetForLattice[latticeType]),
+            'rise': rise,
+            'edgesPerBase': edgesPerBase,
+            'parity': int(vh.isEvenParity()),
+            'strandType': strand.strandType()}
+# end def
+
+
+def strandMesh(strand, edgesPerBase=defaultEdgesPerBase, rise=defaultRise):
+    """
+    Returns (vertices, triangles) for a strand in part coordinates, i.e.
+    with the helix placed at its lattice position and the same rotateX(90)
+    transform the solid view applies to each strand's transform node.
+    """
+    params = strandMeshParams(strand, edgesPerBase, rise)
+    vertices, faceCounts, faceConnects, startPos, endPos = \
+                                            halfCylinderHelixMesh(**params)
+    row, col = strand.virtualHelix().coord()
+    x, y = strand.part().latticeCoordToPositionXY(row, col)
+    world = np.empty_like(vertices)
+    world[:, 0] = vertices[:, 0] + x
+    world[:, 1] = -vertices[:, 2] - y
+    world[:, 2] = vertices[:, 1]
+    return world, faceTriangles(faceCounts, faceConnects)
+# end def
+
+
+def partOligoMeshes(part, edgesPerBase=defaultEdgesPerBase, rise=defaultRise,
+                    strandTypes=(StrandType.Scaffold, StrandType.Staple)):
+    """
+    Returns a list of (oligo, vertices, normals, triangles) tuples, one per
+    oligo in part, where the meshes of every strand of the oligo have been
+    merged into a single set of buffers.
+    """
+    perOligo = {}
+    order = []
+    for vh in part.getVirtualHelices():
+        for strandSet in vh.getStrandSets():
+            if strandSet.strandType() not in strandTypes:
+                continue
+            for strand in strandSet:
+                oligo = strand.oligo()
+                if oligo not in perOligo:
+                    perOligo[oligo] = []
+                    order.append(oligo)
+                perOligo[oligo].append(strandMesh(strand, edgesPerBase, rise))
+    # end for
+    ret = []
+    for oligo in order:
+        vertices, triangles = mergeMeshes(perOligo[oligo])
+        normals = vertexNormals(vertices, triangles)
+        ret.append((oligo, vertices, normals, triangles))
+    return ret
+# end def
+
+
+def mergeMeshes(meshes):
+    """
+    Concatenates a list of (vertices, triangles) into one mesh, offsetting
+    the triangle indices of each mesh by the vertices that precede it.
+    """
+    counts = np.array([len(v) for v, t in meshes])
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    vertices = np.concatenate([v for v, t in meshes])
+    triangles = np.concatenate([t + o for (v, t), o in zip(meshes, offsets)])
+    return vertices, triangles.astype(np.int32)
+# end def
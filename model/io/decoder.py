@@ -24,7 +24,9 @@
 
 import json
 from exceptions import ImportError
-from legacydecoder import import_legacy_dict
+from legacydecoder import import_legacy_dict, legacyImportPlan, \
+                          legacyImportSteps, legacyLatticeType
+from instrumentation import PhaseTimer
 from ui.dialogs.ui_latticetype import Ui_LatticeType
 import util, cadnano
 if cadnano.app().isGui():#headless:
@@ -51,7 +53,45 @@ def decode(document, string):
     #     dialogLT.buttonBox.setStandardButtons(QDialogButtonBox.Ok)
     #     dialog.exec_()
     #     return
+    phases = PhaseTimer('import')
+    phases.mark("parse json")
     packageObject = json.loads(string)
+    phases.done()
 
     if packageObject.get('.format', None) != 'caDNAno2':
-        import_legacy_dict(document, packageObject)
\ No newline at end of file
+        import_legacy_dict(document, packageObject)
+
+def decodeDocument(string):
+    """Decodes string into a new Document and returns it."""
+    from model.document import Document
+    document = Document()
+    decode(document, string)
+    return document
+
+def decodePlan(string):
+    """
+    Parses string into the plain data decodeSteps builds the model from.
+    Doesn't touch the model, so it can run off the UI thread. Returns None
+    for formats that aren't imported.
+    """
+    phases = PhaseTimer('import')
+    phases.mark("parse json")
+    packageObject = json.loads(string)
+    phases.done()
+    if packageObject.get('.format', None) == 'caDNAno2':
+        return None
+    return legacyImportPlan(packageObject)
+
+
+def decodeSteps(document, plan):
+    """
+    Returns an iterator that builds plan (from decodePlan) into document,
+    yielding (done, total) as it goes. Must be iterated on the UI thread.
+    Any questions about the file (the lattice type) are asked here, with
+    modal dialogs, before the iterator is returned, so the caller must not
+    be driving another import from the event loop yet. Iterating raises
+    ValueError if the file isn't a design cadnano can build.
+    """
+    if plan is None:
+        return iter(())
+    return legacyImportSteps(document, plan, legacyLatticeType(plan))
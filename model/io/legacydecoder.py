@@ -22,16 +22,16 @@
 #
 # http://www.opensource.org/licenses/mit-license.php
 
-from collections import defaultdict
+from itertools import izip
 from model.document import Document
 from model.enum import LatticeType, StrandType
 from model.parts.honeycombpart import HoneycombPart
 from model.parts.squarepart import SquarePart
 from model.virtualhelix import VirtualHelix
 from views import styles
+from instrumentation import PhaseTimer
 import util, cadnano
 # import Qt stuff into the module namespace with PySide, PyQt4 independence
-util.qtWrapImport('QtGui', globals(),  ['QColor'])
 if cadnano.app().isGui():
     from ui.dialogs.ui_latticetype import Ui_LatticeType
     util.qtWrapImport('QtGui', globals(),  ['QDialog', 'QDialogButtonBox'])
@@ -53,39 +53,146 @@ STAPLE = "staple"
 INSERTION = "insertion"
 DELETION = "deletion"
 
+# bases per lattice step; numBases must be a multiple of it
+_latticeStep = {LatticeType.Honeycomb: HoneycombPart._step,
+                LatticeType.Square: SquarePart._step}
+
 def import_legacy_dict(document, obj, latticeType=LatticeType.Honeycomb):
     """
     Parses a dictionary (obj) created from reading a json file and uses it
     to populate the given document with model data.
     """
-    numBases = len(obj['vstrands'][0]['scaf'])
-    if cadnano.app().isGui():
-        # from ui.dialogs.ui_latticetype import Ui_LatticeType
-        # util.qtWrapImport('QtGui', globals(),  ['QDialog', 'QDialogButtonBox'])
-        dialog = QDialog()
-        dialogLT = Ui_LatticeType()
-        dialogLT.setupUi(dialog)
-        # DETERMINE LATTICE TYPE
-        if numBases % 21 == 0 and numBases % 32 == 0:
-            if dialog.exec_() == 1:
-                latticeType = LatticeType.Square
-            else:
-                latticeType = LatticeType.Honeycomb
-        elif numBases % 32 == 0:
+    plan = legacyImportPlan(obj)
+    latticeType = legacyLatticeType(plan, latticeType)
+    try:
+        for progress in legacyImportSteps(document, plan, latticeType):
+            pass
+    except ValueError, e:
+        if not cadnano.app().isGui():
+            print e
+        else:
+            dialog = QDialog()
+            dialogLT = Ui_LatticeType()
+            dialogLT.setupUi(dialog)
+            dialogLT.label.setText(str(e))
+            dialogLT.buttonBox.setStandardButtons(QDialogButtonBox.Ok)
+            dialog.exec_()
+
+def legacyImportPlan(obj):
+    """
+    Reads everything legacyImportSteps needs out of obj into plain lists.
+    This is most of the work of an import and doesn't touch the model, so
+    it can run off the UI thread (see DocumentLoader).
+    """
+    vstrands = obj['vstrands']
+    numBases = len(vstrands[0]['scaf'])
+    helices = []
+    for helix in vstrands:
+        helices.append({'num': helix['num'],
+                        'row': helix['row'],
+                        'col': helix['col']})
+    plan = {'numBases': numBases, 'helices': helices, 'valid': True}
+
+    # READ STRAND SEGMENTS AND XOVER LOCATIONS
+    try:
+        for h, helix in izip(helices, vstrands):
+            vhNum = h['num']
+            scaf = helix['scaf']
+            stap = helix['stap']
+            insertions = helix['loop']
+            skips = helix['skip']
+            assert(len(scaf)==len(stap) and len(stap)==numBases and\
+                   len(scaf)==len(insertions) and len(insertions)==len(skips))
+            for strandType, bases, key in \
+                                ((StrandType.Scaffold, scaf, 'scaf'),
+                                 (StrandType.Staple, stap, 'stap')):
+                seg = []
+                xo = []
+                for i in range(len(bases)):
+                    fiveVH, fiveIdx, threeVH, threeIdx = bases[i]
+                    if fiveVH == -1 and threeVH == -1:
+                        continue  # null base
+                    if isSegmentStartOrEnd(strandType, vhNum, i, fiveVH,\
+                                           fiveIdx, threeVH, threeIdx):
+                        seg.append(i)
+                    if fiveVH != vhNum and threeVH != vhNum:  # special case
+                        seg.append(i)  # end segment on a double crossover
+                    if is3primeXover(strandType, vhNum, i, threeVH, threeIdx):
+                        xo.append((i, threeVH, threeIdx))
+                assert (len(seg) % 2 == 0)
+                h[key + 'Segments'] = zip(seg[0::2], seg[1::2])
+                h[key + 'Xovers'] = xo
+            h['insertions'] = [(baseIdx, insertions[baseIdx] + skips[baseIdx])
+                               for baseIdx in range(len(stap)) \
+                               if insertions[baseIdx] + skips[baseIdx] != 0]
+            h['stapColors'] = [(baseIdx, "#%02x%02x%02x" % \
+                                ((colorNumber>>16)&0xFF,
+                                 (colorNumber>>8)&0xFF, colorNumber&0xFF))
+                               for baseIdx, colorNumber in helix['stap_colors']]
+    except AssertionError:
+        plan['valid'] = False
+    return plan
+
+def legacyLatticeType(plan, latticeType=LatticeType.Honeycomb):
+    """
+    Returns the lattice type to import plan as. In the GUI the user is
+    asked when numBases doesn't settle it, and whether a single column
+    square design is an SQ100 file (kept in plan['isSQ100']). These are
+    modal dialogs, so call this before legacyImportSteps is driven from
+    the event loop, not in between its steps.
+    """
+    if not cadnano.app().isGui():
+        return latticeType  # Headless, assume the latticeType arg was meaningful
+    numBases = plan['numBases']
+    dialog = QDialog()
+    dialogLT = Ui_LatticeType()
+    dialogLT.setupUi(dialog)
+    # DETERMINE LATTICE TYPE
+    if numBases % 21 == 0 and numBases % 32 == 0:
+        if dialog.exec_() == 1:
             latticeType = LatticeType.Square
-        elif numBases % 21 == 0:
+        else:
             latticeType = LatticeType.Honeycomb
+    elif numBases % 32 == 0:
+        latticeType = LatticeType.Square
+    elif numBases % 21 == 0:
+        latticeType = LatticeType.Honeycomb
+    else:
+        if dialog.exec_() == 1:
+            latticeType = LatticeType.Square
         else:
-            if dialog.exec_() == 1:
-                latticeType = LatticeType.Square
-            else:
-                latticeType = LatticeType.Honeycomb
-    else:  # Headless, assume the latticeType arg was meaningful
-        pass
+            latticeType = LatticeType.Honeycomb
+    if latticeType == LatticeType.Square:
+        # check for custom SQ100 format
+        if all(helix['col'] == 0 for helix in plan['helices']):
+            dialogLT.label.setText("Is this a SQ100 file?")
+            plan['isSQ100'] = dialog.exec_() == 1
+    return latticeType
 
+def legacyImportSteps(document, plan, latticeType=LatticeType.Honeycomb):
+    """
+    Builds the part described by plan (see legacyImportPlan) in document
+    as latticeType (see legacyLatticeType), yielding (done, total) after
+    each helix of each phase and after each insertion, which can be slow,
+    so the caller can interleave the import with the event loop. Must run
+    on the UI thread; iterate it to the end to import everything. Raises
+    ValueError, before anything is built, if plan isn't a design of
+    latticeType.
+    """
+    numBases = plan['numBases']
+    helices = plan['helices']
+    total = 4 * len(helices) + 2
+    done = 0
+    if latticeType not in _latticeStep:
+        raise TypeError("Lattice type not recognized")
+    if not plan['valid'] or numBases % _latticeStep[latticeType] != 0:
+        raise ValueError("Unrecognized file format.")
+
+    phases = PhaseTimer('import')
+    phases.mark("create part")
     # DETERMINE MAX ROW,COL
     maxRowJson = maxColJson = 0
-    for helix in obj['vstrands']:
+    for helix in helices:
         maxRowJson = max(maxRowJson, int(helix['row'])+1)
         maxColJson = max(maxColJson, int(helix['col'])+1)
 
@@ -96,17 +203,8 @@ def import_legacy_dict(document, obj, latticeType=LatticeType.Honeycomb):
         nCols = max(32, maxColJson, cadnano.app().prefs.honeycombCols)
         part = HoneycombPart(document=document, maxRow=nRows, maxCol=nCols, maxSteps=steps)
     elif latticeType == LatticeType.Square:
-        isSQ100 = True  # check for custom SQ100 format
-        for helix in obj['vstrands']:
-            if helix['col'] != 0:
-                isSQ100 = False
-                break
-        if isSQ100:
-            dialogLT.label.setText("Is this a SQ100 file?")
-            if dialog.exec_() == 1:
-                nRows, nCols = 100, 1
-            else:
-                nRows, nCols = 40, 30
+        if plan.get('isSQ100'):
+            nRows, nCols = 100, 1
         else:
             nRows, nCols = 40, 30
         steps = numBases/32
@@ -116,147 +214,92 @@ def import_legacy_dict(document, obj, latticeType=LatticeType.Honeycomb):
     else:
         raise TypeError("Lattice type not recognized")
     document._addPart(part, useUndoStack=False)
+    done += 1
+    yield done, total
 
     # POPULATE VIRTUAL HELICES
+    phases.mark("populate virtual helices")
     orderedCoordList = []
     vhNumToCoord = {}
-    for helix in obj['vstrands']:
-        vhNum = helix['num']
-        row = helix['row']
-        col = helix['col']
-        scaf= helix['scaf']
-        coord = (row, col)
-        vhNumToCoord[vhNum] = coord
+    for helix in helices:
+        coord = (helix['row'], helix['col'])
+        vhNumToCoord[helix['num']] = coord
         orderedCoordList.append(coord)
     # make sure we retain the original order
     for vhNum in sorted(vhNumToCoord.iterkeys()):
         row, col = vhNumToCoord[vhNum]
         part.createVirtualHelix(row, col, useUndoStack=False)
+        done += 1
+        yield done, total
     part.setImportedVHelixOrder(orderedCoordList)
 
-    # INSTALL STRANDS AND COLLECT XOVER LOCATIONS
-    numHelixes = len(obj['vstrands'])-1
-    scaf_seg = defaultdict(list)
-    scaf_xo = defaultdict(list)
-    stap_seg = defaultdict(list)
-    stap_xo = defaultdict(list)
-    try:
-        for helix in obj['vstrands']:
-            vhNum = helix['num']
-            row = helix['row']
-            col = helix['col']
-            scaf = helix['scaf']
-            stap = helix['stap']
-            insertions = helix['loop']
-            skips = helix['skip']
-            vh = part.virtualHelixAtCoord((row, col))
-            scafStrandSet = vh.scaffoldStrandSet()
-            stapStrandSet = vh.stapleStrandSet()
-            assert(len(scaf)==len(stap) and len(stap)==part.maxBaseIdx()+1 and\
-                   len(scaf)==len(insertions) and len(insertions)==len(skips))
-            # read scaffold segments and xovers
-            for i in range(len(scaf)):
-                fiveVH, fiveIdx, threeVH, threeIdx = scaf[i]
-                if fiveVH == -1 and threeVH == -1:
-                    continue  # null base
-                if isSegmentStartOrEnd(StrandType.Scaffold, vhNum, i, fiveVH,\
-                                       fiveIdx, threeVH, threeIdx):
-                    scaf_seg[vhNum].append(i)
-                if fiveVH != vhNum and threeVH != vhNum:  # special case
-                    scaf_seg[vhNum].append(i)  # end segment on a double crossover
-                if is3primeXover(StrandType.Scaffold, vhNum, i, threeVH, threeIdx):
-                    scaf_xo[vhNum].append((i, threeVH, threeIdx))
-            assert (len(scaf_seg[vhNum]) % 2 == 0)
-            # install scaffold segments
-            for i in range(0, len(scaf_seg[vhNum]), 2):
-                lowIdx = scaf_seg[vhNum][i]
-                highIdx = scaf_seg[vhNum][i+1]
-                scafStrandSet.createStrand(lowIdx, highIdx, useUndoStack=False)
-            # read staple segments and xovers
-            for i in range(len(stap)):
-                fiveVH, fiveIdx, threeVH, threeIdx = stap[i]
-                if fiveVH == -1 and threeVH == -1:
-                    continue  # null base
-                if isSegmentStartOrEnd(StrandType.Staple, vhNum, i, fiveVH,\
-                                       fiveIdx, threeVH, threeIdx):
-                    stap_seg[vhNum].append(i)
-                if fiveVH != vhNum and threeVH != vhNum:  # special case
-                    stap_seg[vhNum].append(i)  # end segment on a double crossover
-                if is3primeXover(StrandType.Staple, vhNum, i, threeVH, threeIdx):
-                    stap_xo[vhNum].append((i, threeVH, threeIdx))
-            assert (len(stap_seg[vhNum]) % 2 == 0)
-            # install staple segments
-            for i in range(0, len(stap_seg[vhNum]), 2):
-                lowIdx = stap_seg[vhNum][i]
-                highIdx = stap_seg[vhNum][i+1]
-                stapStrandSet.createStrand(lowIdx, highIdx, useUndoStack=False)
-    except AssertionError:
-        if not cadnano.app().isGui():
-            print "Unrecognized file format."
-        else:
-            dialogLT.label.setText("Unrecognized file format.")
-            dialogLT.buttonBox.setStandardButtons(QDialogButtonBox.Ok)
-            dialog.exec_()
+    # INSTALL STRANDS
+    phases.mark("install strands")
+    for helix in helices:
+        vh = part.virtualHelixAtCoord((helix['row'], helix['col']))
+        scafStrandSet = vh.scaffoldStrandSet()
+        stapStrandSet = vh.stapleStrandSet()
+        for lowIdx, highIdx in helix['scafSegments']:
+            scafStrandSet.createStrand(lowIdx, highIdx, useUndoStack=False)
+        for lowIdx, highIdx in helix['stapSegments']:
+            stapStrandSet.createStrand(lowIdx, highIdx, useUndoStack=False)
+        done += 1
+        yield done, total
 
     # INSTALL XOVERS
-    for helix in obj['vstrands']:
-        vhNum = helix['num']
-        row = helix['row']
-        col = helix['col']
-        scaf = helix['scaf']
-        stap = helix['stap']
-        insertions = helix['loop']
-        skips = helix['skip']
-        fromVh = part.virtualHelixAtCoord((row, col))
+    phases.mark("install xovers")
+    for helix in helices:
+        fromVh = part.virtualHelixAtCoord((helix['row'], helix['col']))
         scafStrandSet = fromVh.scaffoldStrandSet()
         stapStrandSet = fromVh.stapleStrandSet()
         # install scaffold xovers
-        for (idx5p, toVhNum, idx3p) in scaf_xo[vhNum]:
+        for (idx5p, toVhNum, idx3p) in helix['scafXovers']:
             # idx3p is 3' end of strand5p, idx5p is 5' end of strand3p
             strand5p = scafStrandSet.getStrand(idx5p)
             toVh = part.virtualHelixAtCoord(vhNumToCoord[toVhNum])
             strand3p = toVh.scaffoldStrandSet().getStrand(idx3p)
             part.createXover(strand5p, idx5p, strand3p, idx3p, useUndoStack=False)
         # install staple xovers
-        for (idx5p, toVhNum, idx3p) in stap_xo[vhNum]:
+        for (idx5p, toVhNum, idx3p) in helix['stapXovers']:
             # idx3p is 3' end of strand5p, idx5p is 5' end of strand3p
             strand5p = stapStrandSet.getStrand(idx5p)
             toVh = part.virtualHelixAtCoord(vhNumToCoord[toVhNum])
             strand3p = toVh.stapleStrandSet().getStrand(idx3p)
             part.createXover(strand5p, idx5p, strand3p, idx3p, useUndoStack=False)
+        done += 1
+        yield done, total
 
     # SET DEFAULT COLOR
+    phases.mark("set default colors")
     for oligo in part.oligos():
         if oligo.isStaple():
             defaultColor = styles.DEFAULT_STAP_COLOR
         else:
             defaultColor = styles.DEFAULT_SCAF_COLOR
         oligo.applyColor(defaultColor, useUndoStack=False)
+    done += 1
+    yield done, total
 
     # COLORS, INSERTIONS, SKIPS
-    for helix in obj['vstrands']:
-        vhNum = helix['num']
-        row = helix['row']
-        col = helix['col']
-        scaf = helix['scaf']
-        stap = helix['stap']
-        insertions = helix['loop']
-        skips = helix['skip']
-        vh = part.virtualHelixAtCoord((row, col))
+    phases.mark("colors, insertions, skips")
+    for helix in helices:
+        vh = part.virtualHelixAtCoord((helix['row'], helix['col']))
         scafStrandSet = vh.scaffoldStrandSet()
         stapStrandSet = vh.stapleStrandSet()
         # install insertions and skips
-        for baseIdx in range(len(stap)):
-            sumOfInsertSkip = insertions[baseIdx] + skips[baseIdx]
-            if sumOfInsertSkip != 0:
-                strand = scafStrandSet.getStrand(baseIdx)
-                strand.addInsertion(baseIdx, sumOfInsertSkip, useUndoStack=False)
-        # end for
+        for baseIdx, sumOfInsertSkip in helix['insertions']:
+            strand = scafStrandSet.getStrand(baseIdx)
+            strand.addInsertion(baseIdx, sumOfInsertSkip, useUndoStack=False)
+            # each insertion refreshes the oligo's sequence, so give the
+            # caller a chance to run the event loop in between
+            yield done, total
         # populate colors
-        for baseIdx, colorNumber in helix['stap_colors']:
-            color = QColor((colorNumber>>16)&0xFF, (colorNumber>>8)&0xFF, colorNumber&0xFF).name()
+        for baseIdx, color in helix['stapColors']:
             strand = stapStrandSet.getStrand(baseIdx)
             strand.oligo().applyColor(color, useUndoStack=False)
+        done += 1
+        yield done, total
+    phases.done()
 
 def isSegmentStartOrEnd(strandType, vhNum, baseIdx, fiveVH, fiveIdx, threeVH, threeIdx):
     """Returns True if the base is a breakpoint or crossover."""
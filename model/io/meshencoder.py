@@ -0,0 +1,222 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+meshencoder.py
+
+Writes the 3D (solid view) geometry of a Part to OBJ, STL or glTF without
+requiring Maya. Each oligo becomes its own material group.
+"""
+
+import base64
+import json
+import struct
+from os.path import splitext, basename
+
+import numpy as np
+
+from model.helixmesh import partOligoMeshes
+
+
+def encodeMesh(part, fname, **kwargs):
+    """
+    Writes the merged mesh of part to fname, choosing the format from the
+    file extension (.obj, .stl, .gltf or .glb). Extra keyword arguments are
+    forwarded to partOligoMeshes.
+    """
+    ext = splitext(fname)[1].lower()
+    writers = {'.obj': writeObj,
+               '.stl': writeStl,
+               '.gltf': writeGltf,
+               '.glb': writeGlb}
+    if ext not in writers:
+        raise ValueError("Unsupported mesh format %s" % ext)
+    meshes = partOligoMeshes(part, **kwargs)
+    writers[ext](meshes, fname)
+# end def
+
+
+def colorToRGB(color):
+    """Converts '#rrggbb' into a tuple of floats in [0, 1]."""
+    c = str(color).lstrip('#')
+    return tuple(int(c[i:i + 2], 16) / 255.0 for i in (0, 2, 4))
+# end def
+
+
+def materialName(index, oligo):
+    strandType = "stap" if oligo.isStaple() else "scaf"
+    return "oligo%d_%s_%s" % (index, strandType, oligo.locString())
+# end def
+
+
+def writeObj(meshes, fname):
+    """
+    Writes an OBJ file plus a companion .mtl holding one material per oligo.
+    Vertex indices in OBJ are 1-based and global to the file.
+    """
+    mtlName = splitext(fname)[0] + ".mtl"
+    with open(mtlName, 'w') as mtl:
+        for i, (oligo, vertices, normals, triangles) in enumerate(meshes):
+            r, g, b = colorToRGB(oligo.color())
+            mtl.write("newmtl %s\nKd %.4f %.4f %.4f\n\n" % \
+                                            (materialName(i, oligo), r, g, b))
+    with open(fname, 'w') as obj:
+        obj.write("mtllib %s\n" % basename(mtlName))
+        offset = 1
+        for i, (oligo, vertices, normals, triangles) in enumerate(meshes):
+            name = materialName(i, oligo)
+            obj.write("g %s\nusemtl %s\n" % (name, name))
+            obj.write(_formatRows("v %.4f %.4f %.4f\n", vertices))
+            obj.write(_formatRows("vn %.4f %.4f %.4f\n", normals))
+            idx = triangles + offset
+            faces = np.column_stack((idx[:, 0], idx[:, 0], idx[:, 1],
+                                     idx[:, 1], idx[:, 2], idx[:, 2]))
+            obj.write(_formatRows("f %d//%d %d//%d %d//%d\n", faces))
+            offset += len(vertices)
+# end def
+
+
+def _formatRows(fmt, rows):
+    """
+    Formats every row of a 2D array with fmt in a single string operation,
+    which is several times faster than np.savetxt.
+    """
+    return (fmt * len(rows)) % tuple(rows.ravel().tolist())
+# end def
+
+
+def writeStl(meshes, fname):
+    """
+    Writes a binary STL. STL has no notion of materials, so the oligo color
+    is stored in each facet's attribute word using the common 15-bit
+    RGB555 convention (bit 15 set means the color is valid).
+    """
+    facetType = np.dtype([('normal', '<f4', (3,)),
+                          ('v', '<f4', (3, 3)),
+                          ('attr', '<u2')])
+    numFacets = sum(len(m[3]) for m in meshes)
+    with open(fname, 'wb') as f:
+        f.write(struct.pack('<80sI', 'cadnano', numFacets))
+        for oligo, vertices, normals, triangles in meshes:
+            facets = np.zeros(len(triangles), dtype=facetType)
+            tv = vertices[triangles]
+            n = np.cross(tv[:, 1] - tv[:, 0], tv[:, 2] - tv[:, 0])
+            lengths = np.sqrt((n ** 2).sum(axis=1))
+            lengths[lengths == 0] = 1.0
+            facets['normal'] = n / lengths[:, np.newaxis]
+            facets['v'] = tv
+            r, g, b = [int(c * 31) for c in colorToRGB(oligo.color())]
+            facets['attr'] = 0x8000 | (r << 10) | (g << 5) | b
+            f.write(facets.tostring())
+# end def
+
+
+def _gltfDocument(meshes):
+    """
+    Builds the glTF 2.0 JSON dictionary and binary buffer for meshes,
+    with one primitive and one material per oligo.
+    """
+    chunks = []
+    bufferViews = []
+    accessors = []
+    materials = []
+    primitives = []
+    byteOffset = 0
+
+    def addView(data, target):
+        # bufferViews must be 4-byte aligned
+        raw = data.tostring()
+        pad = (4 - len(raw) % 4) % 4
+        bufferViews.append({'buffer': 0, 'byteOffset': byteOffset,
+                            'byteLength': len(raw), 'target': target})
+        chunks.append(raw + '\x00' * pad)
+        return len(bufferViews) - 1, len(raw) + pad
+
+    for i, (oligo, vertices, normals, triangles) in enumerate(meshes):
+        vertices = vertices.astype('<f4')
+        normals = normals.astype('<f4')
+        indices = triangles.astype('<u4').ravel()
+        view, size = addView(vertices, 34962)  # ARRAY_BUFFER
+        byteOffset += size
+        accessors.append({'bufferView': view, 'componentType': 5126,
+                          'count': len(vertices), 'type': 'VEC3',
+                          'min': vertices.min(axis=0).tolist(),
+                          'max': vertices.max(axis=0).tolist()})
+        posAccessor = len(accessors) - 1
+        view, size = addView(normals, 34962)
+        byteOffset += size
+        accessors.append({'bufferView': view, 'componentType': 5126,
+                          'count': len(normals), 'type': 'VEC3'})
+        normAccessor = len(accessors) - 1
+        view, size = addView(indices, 34963)  # ELEMENT_ARRAY_BUFFER
+        byteOffset += size
+        accessors.append({'bufferView': view, 'componentType': 5125,
+                          'count': len(indices), 'type': 'SCALAR'})
+        idxAccessor = len(accessors) - 1
+        r, g, b = colorToRGB(oligo.color())
+        materials.append({'name': materialName(i, oligo),
+                          'pbrMetallicRoughness': {
+                                'baseColorFactor': [r, g, b, 1.0],
+                                'metallicFactor': 0.0}})
+        primitives.append({'attributes': {'POSITION': posAccessor,
+                                          'NORMAL': normAccessor},
+                           'indices': idxAccessor,
+                           'material': len(materials) - 1})
+    # end for
+    doc = {'asset': {'version': '2.0', 'generator': 'cadnano'},
+           'scene': 0,
+           'scenes': [{'nodes': [0]}],
+           'nodes': [{'mesh': 0}],
+           'meshes': [{'primitives': primitives}],
+           'materials': materials,
+           'accessors': accessors,
+           'bufferViews': bufferViews,
+           'buffers': [{'byteLength': byteOffset}]}
+    return doc, ''.join(chunks)
+# end def
+
+
+def writeGltf(meshes, fname):
+    """Writes a .gltf with the binary buffer embedded as a data URI."""
+    doc, data = _gltfDocument(meshes)
+    doc['buffers'][0]['uri'] = "data:application/octet-stream;base64," + \
+                                                    base64.b64encode(data)
+    with open(fname, 'w') as f:
+        json.dump(doc, f, separators=(',', ':'))
+# end def
+
+
+def writeGlb(meshes, fname):
+    """Writes a binary .glb container."""
+    doc, data = _gltfDocument(meshes)
+    jsonChunk = json.dumps(doc, separators=(',', ':'))
+    jsonChunk += ' ' * ((4 - len(jsonChunk) % 4) % 4)
+    total = 12 + 8 + len(jsonChunk) + 8 + len(data)
+    with open(fname, 'wb') as f:
+        f.write(struct.pack('<4sII', 'glTF', 2, total))
+        f.write(struct.pack('<I4s', len(jsonChunk), 'JSON'))
+        f.write(jsonChunk)
+        f.write(struct.pack('<I4s', len(data), 'BIN\x00'))
+        f.write(data)
+# end def
@@ -0,0 +1,218 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+stapleorder.py
+
+Incremental staple export. Compares the staples of a Part with a previous
+order, either a staple CSV as written by Part.getStapleSequences or a
+manifest written by writeOrderManifest, and writes only the staples that
+have to be ordered again:
+
+    reused   the sequence was in the previous order (wherever it was)
+    changed  a staple with the same 5' and 3' ends was in the previous
+             order, with a different sequence
+    new      neither
+
+Staples are matched by the SHA-1 of their sequence and by their location
+("5'vh[idx],3'vh[idx]"), both through dicts, so an export is linear in the
+number of staples. The manifest stores only these two keys per staple,
+which keeps it small and lets an order be compared without the sequences
+having been kept.
+
+    with open(previousCsv) as f:
+        previous = readOrder(f)
+    with open(newCsv, 'w') as f:
+        report = writeChangedStaples(part, previous, f)
+    print formatReport(report)
+"""
+
+import hashlib
+import json
+
+csvHeader = "Start,End,Sequence,Length,Color\n"
+manifestFormat = "cadnano staple order"
+
+
+def sequenceHash(sequence):
+    return hashlib.sha1(sequence.strip().upper()).hexdigest()
+# end def
+
+
+class StapleOrder(object):
+    """
+    Index of a previous order: the sequence hash and location of each
+    staple, looked up in both directions.
+    """
+    def __init__(self):
+        self._hashToLocation = {}
+        self._locationToHash = {}
+    # end def
+
+    def __len__(self):
+        return len(self._hashToLocation)
+    # end def
+
+    def add(self, location, seqHash):
+        self._hashToLocation.setdefault(seqHash, location)
+        self._locationToHash[location] = seqHash
+    # end def
+
+    def hasSequenceHash(self, seqHash):
+        return seqHash in self._hashToLocation
+    # end def
+
+    def locationOfSequenceHash(self, seqHash):
+        return self._hashToLocation.get(seqHash)
+    # end def
+
+    def sequenceHashAt(self, location):
+        return self._locationToHash.get(location)
+    # end def
+
+    def sequenceHashes(self):
+        return self._hashToLocation.keys()
+    # end def
+
+    def manifest(self):
+        return {'format': manifestFormat,
+                'staples': [{'location': location, 'sha1': seqHash} \
+                    for location, seqHash in \
+                                    sorted(self._locationToHash.iteritems())]}
+    # end def
+# end class
+
+
+def readOrder(f):
+    """
+    Returns the StapleOrder read from the open file f, which holds either
+    a staple CSV or a JSON manifest. CSV rows with bases of unknown
+    sequence ('?') are left out, as they were never a real order.
+    """
+    text = f.read()
+    order = StapleOrder()
+    if text.lstrip().startswith('{'):
+        obj = json.loads(text)
+        if obj.get('format') != manifestFormat:
+            raise ValueError("Not a staple order manifest")
+        for staple in obj['staples']:
+            order.add(str(staple['location']), str(staple['sha1']))
+        return order
+    for line in text.splitlines():
+        fields = line.split(',')
+        if len(fields) < 3 or fields[0] == 'Start':
+            continue
+        if '?' in fields[2]:
+            continue  # unassigned bases; every such row would hash alike
+        order.add("%s,%s" % (fields[0], fields[1]), sequenceHash(fields[2]))
+    return order
+# end def
+
+
+def partOrder(part):
+    """
+    Returns the StapleOrder of the current staples of part, leaving out
+    those with bases of unknown sequence.
+    """
+    order = StapleOrder()
+    for location, sequence, line in _stapleRows(part):
+        if '?' in sequence:
+            continue
+        order.add(location, sequenceHash(sequence))
+    return order
+# end def
+
+
+def writeOrderManifest(part, f):
+    """Writes the manifest of the staples of part to the open file f."""
+    json.dump(partOrder(part).manifest(), f, indent=1)
+    f.write("\n")
+# end def
+
+
+def writeChangedStaples(part, previous, f, header=True):
+    """
+    Writes the CSV rows of the staples of part that are not in the
+    StapleOrder previous to the open file f, one row at a time, and
+    returns the report: lists of locations under 'reused', 'moved' (reused
+    but now at a different location), 'changed', 'new' and 'dropped'
+    (locations in previous whose sequence is no longer used), and
+    'unassigned', the locations of staples with bases of unknown
+    sequence, which are always written.
+    """
+    report = dict((key, []) for key in ('reused', 'moved', 'changed', 'new',
+                                        'dropped', 'unassigned'))
+    used = set()
+    if header:
+        f.write(csvHeader)
+    for location, sequence, line in _stapleRows(part):
+        seqHash = sequenceHash(sequence)
+        if '?' in sequence:
+            report['unassigned'].append(location)
+        elif previous.hasSequenceHash(seqHash):
+            used.add(seqHash)
+            report['reused'].append(location)
+            if previous.locationOfSequenceHash(seqHash) != location:
+                report['moved'].append(location)
+            continue
+        elif previous.sequenceHashAt(location) is not None:
+            report['changed'].append(location)
+        else:
+            report['new'].append(location)
+        f.write(line)
+    report['dropped'] = sorted(previous.locationOfSequenceHash(seqHash) \
+                                for seqHash in previous.sequenceHashes() \
+                                if seqHash not in used)
+    return report
+# end def
+
+
+def formatReport(report):
+    """Returns a short plain text summary of a writeChangedStaples report."""
+    ordered = len(report['changed']) + len(report['new']) + \
+                                                len(report['unassigned'])
+    lines = ["%d staples to order: %d changed, %d new, %d unassigned" % \
+                        (ordered, len(report['changed']), len(report['new']),
+                         len(report['unassigned'])),
+             "%d staples reused (%d moved), %d previous staples unused" % \
+                        (len(report['reused']), len(report['moved']),
+                         len(report['dropped']))]
+    for key in ('changed', 'new', 'unassigned'):
+        if report[key]:
+            lines.append("%s: %s" % (key, " ".join(report[key])))
+    return "\n".join(lines)
+# end def
+
+
+def _stapleRows(part):
+    """
+    Yields (location, sequence, CSV row) for each staple of part, in the
+    order of Part.getStapleSequences.
+    """
+    for oligo in part.oligos():
+        if oligo.strand5p().strandSet().isStaple():
+            line = oligo.sequenceExport()
+            fields = line.split(',')
+            yield "%s,%s" % (fields[0], fields[1]), fields[2], line
+# end def
@@ -0,0 +1,218 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+structureencoder.py
+
+Writes a Part as a coarse-grained structure for simulation: an oxDNA
+topology + configuration pair, or a PDB with two pseudo-atoms (backbone P
+and a base site) per nucleotide.
+
+Each Oligo is walked 5' to 3' with strand5p().generator3pStrand(). Skipped
+bases are dropped and the extra bases of an insertion are spread evenly
+between the insertion's base index and the next one, so the number of
+nucleotides always matches the applied sequence. Output is written one
+oligo at a time so memory stays bounded by the longest oligo.
+
+Coordinates come from Part.geometry(). The lattice y axis points down (it
+is a Qt scene coordinate), so y and the backbone angle are negated here to
+give a right-handed frame in which both strands form right-handed helices.
+"""
+
+import numpy as np
+
+oxDNALength = 0.8518  # nanometers per oxDNA simulation unit
+oxDNAComRadius = 0.6  # distance of the nucleotide center from the axis (su)
+unassignedBase = 'T'  # written where no sequence has been applied
+
+pdbResidueNames = {'A': ' DA', 'C': ' DC', 'G': ' DG', 'T': ' DT'}
+pdbChainIDs = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def sortedOligos(part):
+    """
+    Returns the oligos of part in a stable order: scaffolds first, then
+    staples, each sorted by the helix number and index of their 5' end.
+    """
+    def key(oligo):
+        strand = oligo.strand5p()
+        return (oligo.isStaple(),
+                strand.virtualHelix().number(),
+                strand.idx5Prime())
+    return sorted([o for o in part.oligos() if o.strand5p() is not None],
+                  key=key)
+# end def
+
+
+def strandNucleotidePositions(strand):
+    """
+    Returns a float array with one (possibly fractional) base position per
+    nucleotide of strand, in 5' to 3' order, with insertions and skips
+    applied.
+    """
+    lo, hi = strand.idxs()
+    idxs = np.arange(lo, hi + 1)
+    counts = np.ones(len(idxs), dtype=int)
+    for insertion in strand.insertionsOnStrand():
+        # a skip has length -1 and so contributes no nucleotide
+        counts[insertion.idx() - lo] += insertion.length()
+    direction = 1
+    if not strand.isDrawn5to3():
+        idxs, counts, direction = idxs[::-1], counts[::-1], -1
+    rep = np.repeat(idxs, counts)
+    repCounts = np.repeat(counts, counts)
+    groupStarts = np.repeat(np.cumsum(counts) - counts, counts)
+    k = np.arange(len(rep)) - groupStarts
+    return rep + direction * k / repCounts.astype(float)
+# end def
+
+
+def oligoNucleotides(oligo):
+    """
+    Returns (backbone, axis, direction, sequence) for every nucleotide of
+    oligo in 5' to 3' order. backbone and axis are (n, 3) arrays in
+    nanometers, direction is +1 or -1 for the 5' to 3' sense of each
+    nucleotide along z, and sequence is a string of length n.
+    """
+    geometry = oligo.part().geometry()
+    backbones, axes, directions, seqs = [], [], [], []
+    for strand in oligo.strand5p().generator3pStrand():
+        vh = strand.virtualHelix()
+        positions = strandNucleotidePositions(strand)
+        xyz, angle = geometry.positionsAt(vh, strand.strandType(), positions)
+        radius = oligo.part().radius()
+        axis = xyz.copy()
+        axis[:, 0] -= radius * np.cos(angle)
+        axis[:, 1] -= radius * np.sin(angle)
+        backbones.append(xyz)
+        axes.append(axis)
+        directions.append(np.repeat(1 if strand.isDrawn5to3() else -1,
+                                    len(positions)))
+        seq = strand.sequence()
+        if len(seq) != len(positions):
+            seq = unassignedBase * len(positions)
+        seqs.append(seq)
+    backbone = np.concatenate(backbones)
+    axis = np.concatenate(axes)
+    # flip to a right-handed frame
+    backbone[:, 1] *= -1
+    axis[:, 1] *= -1
+    sequence = ''.join(seqs).upper()
+    sequence = ''.join([b if b in 'ACGT' else unassignedBase
+                        for b in sequence])
+    return backbone, axis, np.concatenate(directions), sequence
+# end def
+
+
+def _partBounds(part):
+    """Returns (lo, hi) corners, in nanometers, of every helix in part."""
+    vhs = list(part.getVirtualHelices())
+    if not vhs:
+        return np.zeros(3), np.zeros(3)
+    xy = np.array([part.latticeCoordToPositionXY(*vh.coord()) for vh in vhs])
+    xy[:, 1] *= -1
+    r = part.radius()
+    lo = np.append(xy.min(axis=0) - r, part.minBaseIdx() * part.rise())
+    hi = np.append(xy.max(axis=0) + r, part.maxBaseIdx() * part.rise())
+    return lo, hi
+# end def
+
+
+def encodeOxDNA(part, topologyFname, configurationFname, margin=10.0):
+    """
+    Writes part as an oxDNA topology and configuration. Nucleotides of each
+    strand are listed 3' to 5', following the classic oxDNA topology
+    convention. margin (nanometers) pads the periodic box around the part.
+    """
+    oligos = sortedOligos(part)
+    numNucleotides = sum(o.length() for o in oligos)
+    lo, hi = _partBounds(part)
+    box = (hi - lo + 2 * margin) / oxDNALength
+    with open(topologyFname, 'w') as top:
+        with open(configurationFname, 'w') as conf:
+            # header nucleotide count is patched below if lengths disagree
+            top.write("%10d %d\n" % (numNucleotides, len(oligos)))
+            conf.write("t = 0\nb = %f %f %f\nE = 0 0 0\n" % tuple(box))
+            start = 0
+            for strandId, oligo in enumerate(oligos, 1):
+                backbone, axis, direction, seq = oligoNucleotides(oligo)
+                # reverse into 3' to 5' order
+                backbone, axis = backbone[::-1], axis[::-1]
+                direction, seq = direction[::-1], seq[::-1]
+                n = len(seq)
+                ids = np.arange(start, start + n)
+                n3 = ids - 1  # 3' neighbor precedes in 3' to 5' order
+                n5 = ids + 1
+                n3[0], n5[-1] = -1, -1
+                if oligo.isLoop():
+                    n3[0], n5[-1] = ids[-1], ids[0]
+                top.write(''.join(["%d %s %d %d\n" % (strandId, b, i3, i5)
+                                   for b, i3, i5 in zip(seq, n3, n5)]))
+                outward = backbone - axis
+                outward /= np.sqrt((outward ** 2).sum(axis=1))[:, np.newaxis]
+                com = (axis - lo + margin) / oxDNALength + \
+                      oxDNAComRadius * outward
+                # a3 points from a nucleotide toward its 5' neighbor
+                a3 = np.zeros((n, 3))
+                a3[:, 2] = -direction
+                rows = np.hstack((com, -outward, a3, np.zeros((n, 6))))
+                np.savetxt(conf, rows, fmt="%.6f")
+                start += n
+            # end for
+            if start != numNucleotides:
+                top.seek(0)
+                top.write("%10d" % start)
+# end def
+
+
+def encodePDB(part, fname):
+    """
+    Writes part as a PDB file in Angstroms. Each nucleotide is a residue
+    with a P atom on the backbone and an N1 atom halfway to the helix
+    axis. Chain IDs cycle through pdbChainIDs and the segment ID carries
+    the oligo number, so designs with many oligos remain unambiguous.
+    """
+    with open(fname, 'w') as f:
+        f.write("REMARK   1 CADNANO COARSE-GRAINED MODEL\n")
+        serial = 1
+        for oligoNum, oligo in enumerate(sortedOligos(part)):
+            backbone, axis, direction, seq = oligoNucleotides(oligo)
+            base = (backbone + axis) / 2
+            chain = pdbChainIDs[oligoNum % len(pdbChainIDs)]
+            segId = "%4d" % (oligoNum % 10000)
+            lines = []
+            for i, b in enumerate(seq):
+                resName = pdbResidueNames[b]
+                resSeq = (i + 1) % 10000
+                for name, xyz in ((" P  ", backbone[i]), (" N1 ", base[i])):
+                    x, y, z = xyz * 10
+                    lines.append("ATOM  %5d %s %s %s%4d    %8.3f%8.3f%8.3f"
+                                 "  1.00  0.00      %s %s\n" %
+                                 (serial % 100000, name, resName, chain,
+                                  resSeq, x, y, z, segId, name[1]))
+                    serial += 1
+            lines.append("TER\n")
+            f.write(''.join(lines))
+        f.write("END\n")
+# end def
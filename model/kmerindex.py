@@ -0,0 +1,319 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+kmerindex.py
+
+Finds the subsequences of k or more bases that oligos of a design share,
+without comparing every pair of oligos. Every k-mer of every oligo
+sequence is packed 2 bits per base into an integer (k <= 31) and the
+k-mers of the whole design are sorted once. Each oligo then looks up its
+k-mers and the reverse complements of its k-mers with a binary search,
+and hits on the same diagonal are merged into one SharedSequence:
+
+    'repeat'      both oligos contain the same sequence, so they compete
+                  for one binding site (or the scaffold repeats itself)
+    'complement'  the two stretches are complementary, so the oligos can
+                  hybridize there (or an oligo folds back on itself)
+
+Complements where every base pairs with the base it is paired with in the
+design (a staple on its own scaffold site) are left out. Loop oligos are
+read from their 5' strand on, without wrapping around.
+
+The search runs oligo by oligo, so sharedSequences yields results while
+it goes and report writes them as they come.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from model.thermodynamics import encode, UNKNOWN
+
+# kind is 'repeat' or 'complement'; posA and posB are the base indices of
+# the first base of each stretch, from the 5' end of oligoA and oligoB, and
+# locationA and locationB are (virtualHelix number, base idx) of those
+# bases. For complements, the stretch of oligoB pairs 3' to 5' with that of
+# oligoA.
+SharedSequence = namedtuple('SharedSequence', ['kind', 'length',
+                                               'oligoA', 'posA', 'locationA',
+                                               'oligoB', 'posB', 'locationB'])
+
+
+def _kmers(codes, k):
+    """
+    Returns (forward, reverse complement, valid) arrays for the k-mers
+    starting at each position of codes that has k bases after it.
+    """
+    n = len(codes) - k + 1
+    if n <= 0:
+        empty = np.zeros(0, dtype=np.uint64)
+        return empty, empty, np.zeros(0, dtype=bool)
+    c = codes.astype(np.uint64)
+    forward = np.zeros(n, dtype=np.uint64)
+    reverse = np.zeros(n, dtype=np.uint64)
+    two = np.uint64(2)
+    three = np.uint64(3)
+    for j in xrange(k):
+        window = c[j:j + n]
+        forward = (forward << two) | (window & three)
+        # A C G T = 0 1 2 3, so 3 - code is the complement
+        reverse |= (three - (window & three)) << np.uint64(2 * j)
+    unknown = np.concatenate(([0], np.cumsum(codes == UNKNOWN)))
+    valid = (unknown[k:] - unknown[:n]) == 0
+    return forward, reverse, valid
+# end def
+
+
+def _join(values, sortedValues, order):
+    """
+    Returns index arrays (i, j) of every pair with values[i] equal to the
+    value at position j of the index, where sortedValues is the index
+    sorted by order.
+    """
+    lo = np.searchsorted(sortedValues, values, 'left')
+    hi = np.searchsorted(sortedValues, values, 'right')
+    counts = hi - lo
+    total = counts.sum()
+    i = np.repeat(np.arange(len(values)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    j = order[np.repeat(lo, counts) + within]
+    return i, j
+# end def
+
+
+def _runs(a, b, step):
+    """
+    Merges k-mer hits (a[n], b[n]) into runs where a goes up by one and b
+    by step (1 for repeats, -1 for complements). Returns the (a, b, count)
+    arrays of the first hit of each run and its number of hits.
+    """
+    if len(a) == 0:
+        return a, b, a
+    diagonal = b - step * a
+    order = np.lexsort((a, diagonal))
+    a, b, diagonal = a[order], b[order], diagonal[order]
+    starts = np.ones(len(a), dtype=bool)
+    starts[1:] = (diagonal[1:] != diagonal[:-1]) | (a[1:] != a[:-1] + 1)
+    first = np.flatnonzero(starts)
+    counts = np.diff(np.append(first, len(a)))
+    return a[first], b[first], counts
+# end def
+
+
+def baseLocations(oligo):
+    """
+    Returns the (helices, idxs, isScaffold) arrays of oligo from 5' to 3',
+    one entry per base. Insertion bases share the idx they are inserted at
+    and skipped bases are left out.
+    """
+    helices, idxs, scaffold = [], [], []
+    for strand in oligo.strand5p().generator3pStrand():
+        low, high = strand.lowIdx(), strand.highIdx()
+        strandIdxs = np.arange(low, high + 1)
+        repeats = np.ones(len(strandIdxs), dtype=np.intp)
+        for insertion in strand.insertionsOnStrand():
+            repeats[insertion.idx() - low] += insertion.length()
+        if not strand.isDrawn5to3():
+            strandIdxs, repeats = strandIdxs[::-1], repeats[::-1]
+        strandIdxs = np.repeat(strandIdxs, repeats)
+        idxs.append(strandIdxs)
+        helices.append(np.repeat(strand.virtualHelix().number(),
+                                 len(strandIdxs)))
+        scaffold.append(np.repeat(strand.strandSet().isScaffold(),
+                                  len(strandIdxs)))
+    return np.concatenate(helices), np.concatenate(idxs), \
+           np.concatenate(scaffold)
+# end def
+
+
+def oligoBases(oligo):
+    """
+    Returns the (sequence, helices, idxs, isScaffold) of oligo from 5' to
+    3' (see baseLocations), or None if no sequence has been applied.
+    """
+    if not oligo.sequence():
+        return None
+    sequence = ''.join(strand.sequence() or ' ' * strand.totalLength() \
+                       for strand in oligo.strand5p().generator3pStrand())
+    return (sequence,) + baseLocations(oligo)
+# end def
+
+
+class KmerIndex(object):
+    """
+    The sorted k-mers of a set of oligos. The oligo sequences are laid end
+    to end, so a position in that layout names an oligo and a base of it.
+    """
+    def __init__(self, oligos, k=10):
+        if not 1 <= k <= 31:
+            raise ValueError("k must be between 1 and 31, not %d" % k)
+        self._k = k
+        self._oligos = []
+        sequences, helices, idxs, scaffold = [], [], [], []
+        for oligo in oligos:
+            bases = oligoBases(oligo)
+            if bases is None:
+                continue
+            self._oligos.append(oligo)
+            # one unknown base after each oligo keeps k-mers from spanning two
+            sequences.append(bases[0] + ' ')
+            helices.append(np.append(bases[1], -1))
+            idxs.append(np.append(bases[2], -1))
+            scaffold.append(np.append(bases[3], False))
+        self._lengths = np.array([len(seq) - 1 for seq in sequences],
+                                 dtype=np.intp)
+        self._starts = np.concatenate(([0],
+                            np.cumsum(self._lengths + 1)[:-1])).astype(np.intp)
+        self._codes = encode(''.join(sequences))
+        self._helices = np.concatenate(helices or [[]]).astype(np.intp)
+        self._idxs = np.concatenate(idxs or [[]]).astype(np.intp)
+        self._scaffold = np.concatenate(scaffold or [[]]).astype(bool)
+        forward, reverse, valid = _kmers(self._codes, k)
+        self._forward = forward
+        self._reverse = reverse
+        self._valid = valid
+        positions = np.flatnonzero(valid)
+        order = np.argsort(forward[positions], kind='mergesort')
+        self._order = positions[order]
+        self._sorted = forward[self._order]
+    # end def
+
+    ### ACCESSORS ###
+    def k(self):
+        return self._k
+    # end def
+
+    def oligos(self):
+        """Returns the indexed oligos, the ones with a sequence."""
+        return list(self._oligos)
+    # end def
+
+    ### PUBLIC METHODS ###
+    def sharedSequences(self, minLength=None):
+        """
+        Yields a SharedSequence for every stretch of at least minLength
+        (default k) bases that two oligos, or two places of one oligo,
+        share. Each pair is found once, from the oligo that comes first.
+        """
+        minLength = self._k if minLength is None else max(minLength, self._k)
+        for number in xrange(len(self._oligos)):
+            for shared in self._oligoShared(number, minLength):
+                yield shared
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _oligoShared(self, number, minLength):
+        k = self._k
+        start = self._starts[number]
+        end = start + self._lengths[number]
+        positions = np.arange(start, max(end - k + 1, start))
+        positions = positions[self._valid[positions]]
+        ret = []
+        for kind, values, step in (
+                        ('repeat', self._forward[positions], 1),
+                        ('complement', self._reverse[positions], -1)):
+            i, j = _join(values, self._sorted, self._order)
+            a = positions[i]
+            # each pair once: from the lower position
+            keep = a < j
+            a, b = a[keep], j[keep]
+            if kind == 'complement':
+                keep = ~self._pairedInDesign(a, b)
+                a, b = a[keep], b[keep]
+            a, b, counts = _runs(a, b, step)
+            lengths = counts + k - 1
+            if step == -1:
+                b = b - counts + 1  # the stretch of b starts at its last hit
+            for a0, b0, length in zip(a, b, lengths):
+                if length >= minLength:
+                    ret.append(self._shared(kind, int(length), a0, b0))
+        ret.sort(key=lambda s: (s.posA, s.kind))
+        return ret
+    # end def
+
+    def _pairedInDesign(self, a, b):
+        """
+        Returns whether the k-mers at a pair base by base with the k-mers
+        at b in the design: same helix and idx, opposite strands.
+        """
+        paired = np.ones(len(a), dtype=bool)
+        k = self._k
+        for t in xrange(k):
+            x, y = a + t, b + k - 1 - t
+            paired &= (self._helices[x] == self._helices[y]) & \
+                      (self._idxs[x] == self._idxs[y]) & \
+                      (self._scaffold[x] != self._scaffold[y])
+        return paired
+    # end def
+
+    def _shared(self, kind, length, a, b):
+        oligoA = np.searchsorted(self._starts, a, 'right') - 1
+        oligoB = np.searchsorted(self._starts, b, 'right') - 1
+        return SharedSequence(kind, length,
+                    self._oligos[oligoA], int(a - self._starts[oligoA]),
+                    (int(self._helices[a]), int(self._idxs[a])),
+                    self._oligos[oligoB], int(b - self._starts[oligoB]),
+                    (int(self._helices[b]), int(self._idxs[b])))
+    # end def
+# end class
+
+
+def sharedSequences(part, k=10, minLength=None):
+    """
+    Yields the SharedSequences of all the oligos of part that have a
+    sequence; see KmerIndex.sharedSequences.
+    """
+    index = KmerIndex(list(part.oligos()), k)
+    return index.sharedSequences(minLength)
+# end def
+
+
+def report(part, out, k=10, minLength=None, staplesOnly=False):
+    """
+    Writes a CSV line to out for each SharedSequence of part as it is
+    found, and returns the number of lines. If staplesOnly, stretches
+    within the scaffold are left out.
+    """
+    out.write("Kind,Length,Oligo A,Base A,Helix A[Idx],"
+              "Oligo B,Base B,Helix B[Idx]\n")
+    count = 0
+    for s in sharedSequences(part, k, minLength):
+        if staplesOnly and not (s.oligoA.isStaple() or s.oligoB.isStaple()):
+            continue
+        out.write("%s,%d,%s,%d,%d[%d],%s,%d,%d[%d]\n" % (s.kind, s.length,
+                _oligoName(s.oligoA), s.posA, s.locationA[0], s.locationA[1],
+                _oligoName(s.oligoB), s.posB, s.locationB[0], s.locationB[1]))
+        count += 1
+    return count
+# end def
+
+
+def _oligoName(oligo):
+    """Names oligo by its 5' end, as the staple export does."""
+    strand = oligo.strand5p()
+    kind = "staple" if oligo.isStaple() else "scaffold"
+    return "%s %d[%d]" % (kind, strand.virtualHelix().number(),
+                          strand.idx5Prime())
+# end def
@@ -0,0 +1,288 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+
+"""
+motifscanner.py
+
+Finds motifs (restriction sites, poly-G runs, custom patterns) in the
+sequences of every oligo of a design in one pass. Patterns may use the
+IUPAC codes (N, R, Y, ...); each is expanded into the plain sequences it
+stands for, together with those of its reverse complement, and all of
+them go into one Aho-Corasick automaton. The oligo sequences are laid end
+to end and the automaton reads them once, whatever the number of
+patterns.
+
+Each MotifHit is mapped back to the design: the helix, base idx and
+strand of its 5' base, and the stretch it covers on each strand, which
+the path view draws as a highlight layer (see
+views/pathview/motifhighlightitem.py). Loop oligos are read across their
+5' end, so a site over the junction of a circular scaffold is found too.
+"""
+
+from collections import namedtuple
+import itertools
+
+import numpy as np
+
+from model.kmerindex import oligoBases
+from model.thermodynamics import encode, UNKNOWN
+
+# IUPAC code -> the bases it stands for, and its complement
+_iupac = {'A': 'A', 'C': 'C', 'G': 'G', 'T': 'T', 'U': 'T',
+          'R': 'AG', 'Y': 'CT', 'S': 'CG', 'W': 'AT', 'K': 'GT', 'M': 'AC',
+          'B': 'CGT', 'D': 'AGT', 'H': 'ACT', 'V': 'ACG', 'N': 'ACGT'}
+_iupacComplement = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A', 'U': 'A',
+                    'R': 'Y', 'Y': 'R', 'S': 'S', 'W': 'W', 'K': 'M',
+                    'M': 'K', 'B': 'V', 'V': 'B', 'D': 'H', 'H': 'D',
+                    'N': 'N'}
+
+MAX_EXPANSION = 4096  # plain sequences one pattern may stand for
+
+Motif = namedtuple('Motif', ['name', 'pattern'])
+
+restrictionSites = [Motif('EcoRI', 'GAATTC'), Motif('BamHI', 'GGATCC'),
+                    Motif('HindIII', 'AAGCTT'), Motif('XhoI', 'CTCGAG'),
+                    Motif('NotI', 'GCGGCCGC'), Motif('PstI', 'CTGCAG'),
+                    Motif('BsaI', 'GGTCTC'), Motif('BsmBI', 'CGTCTC')]
+defaultMotifs = restrictionSites + [Motif('polyG', 'GGGGG')]
+
+# motif is the Motif found and sequence the bases that matched it, 5' to
+# 3' on oligo; isReverseComplement if they match the reverse complement
+# of the pattern. pos is the base index of the first base from the 5' end
+# of oligo, and helix, idx and strand locate that base in the design.
+# segments holds a (strand, lowIdx, highIdx) for each strand the hit
+# covers, 5' to 3'.
+MotifHit = namedtuple('MotifHit', ['motif', 'sequence', 'isReverseComplement',
+                                   'oligo', 'pos', 'helix', 'idx', 'strand',
+                                   'segments'])
+
+
+def reverseComplement(pattern):
+    """Returns the reverse complement of an IUPAC pattern."""
+    try:
+        return ''.join(_iupacComplement[c] for c in reversed(pattern.upper()))
+    except KeyError, e:
+        raise ValueError("%r is not an IUPAC base code" % e.args[0])
+# end def
+
+
+def expandIupac(pattern):
+    """
+    Returns the plain ACGT sequences an IUPAC pattern stands for. Raises
+    ValueError for other characters, or if there are more than
+    MAX_EXPANSION of them.
+    """
+    pattern = pattern.upper()
+    if not pattern:
+        raise ValueError("empty pattern")
+    choices = []
+    count = 1
+    for c in pattern:
+        if c not in _iupac:
+            raise ValueError("%r is not an IUPAC base code" % c)
+        choices.append(_iupac[c])
+        count *= len(_iupac[c])
+    if count > MAX_EXPANSION:
+        raise ValueError("%s stands for %d sequences, more than %d" % \
+                         (pattern, count, MAX_EXPANSION))
+    return [''.join(p) for p in itertools.product(*choices)]
+# end def
+
+
+def parseMotifs(text):
+    """
+    Returns the Motifs of text, a comma or whitespace separated list of
+    patterns, each optionally named as name=pattern.
+    """
+    motifs = []
+    for item in text.replace(',', ' ').split():
+        name, sep, pattern = item.rpartition('=')
+        expandIupac(pattern)  # raises ValueError on a bad pattern
+        motifs.append(Motif(name or pattern.upper(), pattern.upper()))
+    return motifs
+# end def
+
+
+class AhoCorasick(object):
+    """
+    An Aho-Corasick automaton over the bases ACGT. The failure links are
+    folded into a dense transition table, so search takes one lookup per
+    base; any other base returns it to the root.
+    """
+    def __init__(self, patterns):
+        self._patterns = list(patterns)
+        goto = [[-1] * 4]
+        outputs = [[]]
+        for number, pattern in enumerate(self._patterns):
+            state = 0
+            for code in encode(pattern).tolist():
+                if code == UNKNOWN:
+                    raise ValueError("%r is not a plain ACGT pattern" % pattern)
+                if goto[state][code] == -1:
+                    goto[state][code] = len(goto)
+                    goto.append([-1] * 4)
+                    outputs.append([])
+                state = goto[state][code]
+            outputs[state].append(number)
+        # breadth first, so each failure link is complete when it is used
+        fail = [0] * len(goto)
+        queue = []
+        for code in xrange(4):
+            child = goto[0][code]
+            if child == -1:
+                goto[0][code] = 0
+            else:
+                queue.append(child)
+        for state in queue:
+            for code in xrange(4):
+                child = goto[state][code]
+                if child == -1:
+                    goto[state][code] = goto[fail[state]][code]
+                else:
+                    fail[child] = goto[fail[state]][code]
+                    outputs[child] = outputs[child] + outputs[fail[child]]
+                    queue.append(child)
+        self._delta = [target for row in goto for target in row]
+        self._outputs = outputs
+    # end def
+
+    ### ACCESSORS ###
+    def patterns(self):
+        return list(self._patterns)
+    # end def
+
+    ### PUBLIC METHODS ###
+    def search(self, text):
+        """
+        Returns (start, pattern number) for every occurrence of the
+        patterns in text, in order of their last base.
+        """
+        delta = self._delta
+        outputs = self._outputs
+        lengths = [len(p) for p in self._patterns]
+        ret = []
+        state = 0
+        for i, code in enumerate(encode(text).tolist()):
+            if code == UNKNOWN:
+                state = 0
+                continue
+            state = delta[4 * state + code]
+            for number in outputs[state]:
+                ret.append((i - lengths[number] + 1, number))
+        return ret
+    # end def
+# end class
+
+
+def _automaton(motifs, reverseComplements):
+    """
+    Returns an AhoCorasick of the expanded motifs and a (motif,
+    isReverseComplement) for each of its patterns. Reverse complements
+    already among the forward sequences of a motif, as for palindromic
+    restriction sites, are left out.
+    """
+    patterns, labels = [], []
+    for motif in motifs:
+        forward = expandIupac(motif.pattern)
+        patterns.extend(forward)
+        labels.extend((motif, False) for p in forward)
+        if reverseComplements:
+            forward = set(forward)
+            reverse = [p for p in expandIupac(reverseComplement(motif.pattern))
+                       if p not in forward]
+            patterns.extend(reverse)
+            labels.extend((motif, True) for p in reverse)
+    return AhoCorasick(patterns), labels
+# end def
+
+
+def _segments(strands, idxs, positions):
+    """Returns the (strand, lowIdx, highIdx) runs of the bases at positions."""
+    ret = []
+    for p in positions:
+        strand = strands[p]
+        if ret and ret[-1][0] is strand:
+            ret[-1][1].append(idxs[p])
+        else:
+            ret.append((strand, [idxs[p]]))
+    return [(strand, int(min(i)), int(max(i))) for strand, i in ret]
+# end def
+
+
+def scanOligos(oligos, motifs=None, reverseComplements=True):
+    """
+    Returns a MotifHit for every occurrence of motifs (default
+    defaultMotifs) in the oligos that have a sequence, ordered by oligo
+    and by position from the 5' end. If reverseComplements, the reverse complements of the
+    motifs are found too.
+    """
+    motifs = defaultMotifs if motifs is None else list(motifs)
+    if not motifs:
+        return []
+    automaton, labels = _automaton(motifs, reverseComplements)
+    overlap = max(len(m.pattern) for m in motifs) - 1
+    texts, layouts = [], []
+    start = 0
+    for oligo in oligos:
+        bases = oligoBases(oligo)
+        if bases is None:
+            continue
+        sequence, helices, idxs = bases[:3]
+        strands = []
+        for strand in oligo.strand5p().generator3pStrand():
+            strands.extend([strand] * strand.totalLength())
+        text = sequence
+        if oligo.isLoop():
+            text += sequence[:overlap]
+        layouts.append((start, oligo, sequence, strands, helices, idxs))
+        # one unknown base after each oligo keeps hits from spanning two
+        texts.append(text + ' ')
+        start += len(text) + 1
+    found = sorted(automaton.search(''.join(texts)))
+    starts = [layout[0] for layout in layouts]
+    patterns = automaton.patterns()
+    ret = []
+    for first, number in found:
+        layout = layouts[np.searchsorted(starts, first, 'right') - 1]
+        oligoStart, oligo, sequence, strands, helices, idxs = layout
+        pos = first - oligoStart
+        n = len(sequence)
+        if pos >= n:
+            continue  # found again from the 5' end of a loop
+        length = len(patterns[number])
+        positions = [(pos + t) % n for t in xrange(length)]
+        motif, isReverseComplement = labels[number]
+        ret.append(MotifHit(motif, ''.join(sequence[p] for p in positions),
+                            isReverseComplement, oligo, pos,
+                            int(helices[pos]), int(idxs[pos]), strands[pos],
+                            _segments(strands, idxs, positions)))
+    return ret
+# end def
+
+
+def scanPart(part, motifs=None, reverseComplements=True):
+    """Returns the MotifHits of all the oligos of part; see scanOligos."""
+    return scanOligos(list(part.oligos()), motifs, reverseComplements)
+# end def
@@ -419,6 +419,7 @@ class Oligo(QObject):
                 isInSet, overlap, sSetIdx = strandSet._findIndexOfRangeFor(strand)
                 sIList.append(sSetIdx)
                 strandSet._strandList.pop(sSetIdx)
+                strandSet.virtualHelix().touch()
                 # Emit a signal to notify on completion
                 strand.strandRemovedSignal.emit(strand)
                 # for updating the Slice View displayed helices
@@ -442,6 +443,7 @@ class Oligo(QObject):
                 strandSet = strand.strandSet()
                 sSetIdx = sIList.pop(-1)
                 strandSet._strandList.insert(sSetIdx, strand)
+                strandSet.virtualHelix().touch()
                 # Emit a signal to notify on completion
                 strandSet.strandsetStrandAddedSignal.emit(strandSet, strand)
                 # for updating the Slice View displayed helices
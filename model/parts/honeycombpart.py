@@ -123,6 +123,7 @@ class HoneycombPart(Part):
         else:
             # even parity
             row = int(rowTemp/3 + 0.5)
+        return row, column
     # end def
 
     ########################## Archiving / Unarchiving #########################
@@ -63,6 +63,7 @@ class Part(QObject):
 
     _step = 21  # this is the period (in bases) of the part lattice
     _radius = 1.125  # nanometers
+    _rise = 0.34  # nanometers per base
     _turnsPerStep = 2
     _helicalPitch = _step / _turnsPerStep
     _twistPerBase = 360 / _helicalPitch  # degrees
@@ -98,6 +99,10 @@ class Part(QObject):
         self._activeBaseIndex = self._step
         self._activeVirtualHelix = None
         self._activeVirtualHelixIdx = None
+        self._fingerprint = None
+        self._geometry = None
+        self._occupancy = None
+        self._revision = 0  # bumped by every VirtualHelix.touch()
 
     # end def
 
@@ -259,6 +264,66 @@ class Part(QObject):
         return self._radius
     # end def
 
+    def revision(self):
+        """
+        Returns the latest modification stamp handed to a VirtualHelix.
+        Save it and pass it to virtualHelicesModifiedSince later to find the
+        helices an edit touched.
+        """
+        return self._revision
+    # end def
+
+    def nextRevision(self):
+        self._revision += 1
+        return self._revision
+    # end def
+
+    def virtualHelicesModifiedSince(self, revision):
+        """
+        Returns the virtualHelices whose strands, xovers, insertions or
+        sequences changed after revision (see Part.revision).
+        """
+        return [vh for vh in self._coordToVirtualHelix.itervalues() \
+                                                if vh.revision() > revision]
+    # end def
+
+    def rise(self):
+        return self._rise
+    # end def
+
+    def occupancy(self):
+        """
+        Returns the PartOccupancy index of which strand and crossover covers
+        each (helix, base). Imported on first use since it requires numpy.
+        """
+        if self._occupancy is None:
+            from model.parts.partoccupancy import PartOccupancy
+            self._occupancy = PartOccupancy(self)
+        return self._occupancy
+    # end def
+
+    def fingerprint(self):
+        """
+        Returns the PartFingerprint that hashes the helices, oligos and
+        whole part for change detection.
+        """
+        if self._fingerprint is None:
+            from model.parts.partfingerprint import PartFingerprint
+            self._fingerprint = PartFingerprint(self)
+        return self._fingerprint
+    # end def
+
+    def geometry(self):
+        """
+        Returns the PartGeometry that computes and caches base coordinates
+        for this part. Imported on first use since it requires numpy.
+        """
+        if self._geometry is None:
+            from model.parts.partgeometry import PartGeometry
+            self._geometry = PartGeometry(self)
+        return self._geometry
+    # end def
+
     def helicalPitch(self):
         return self._helicalPitch
     # end def
@@ -284,130 +349,19 @@ class Part(QObject):
         1. Clear existing staple strands by iterating over each strand
         and calling RemoveStrandCommand on each. The next strand to remove
         is always at index 0.
-        2. Create temporary strands that span regions where scaffold is present.
-        3. Determine where actual strands will go based on strand overlap with
-        prexovers.
-        4. Delete temporary strands and create new strands.
+        2. Compute the staple strands and crossovers from the scaffold
+        coverage and the lattice crossover LUTs (see model/autostaple.py).
+        3. Create the strands, already split at the crossovers, then install
+        the crossovers and assign oligos in one pass.
+        AutoStapleJob (model/autostaple.py) does the same in the background.
         """
-        epDict = {}  # keyed on StrandSet
-        cmds = []
-
-        # clear existing staple strands
-        # part.verifyOligos()
-
-        for o in list(part.oligos()):
-            if not o.isStaple():
-                continue
-            c = Oligo.RemoveOligoCommand(o)
-            cmds.append(c)
-        # end for
-        util.execCommandList(part, cmds, desc="Clear staples")
-        cmds = []
-
-        # create strands that span all bases where scaffold is present
-        for vh in part.getVirtualHelices():
-            segments = []
-            scafSS = vh.scaffoldStrandSet()
-            for strand in scafSS:
-                lo, hi = strand.idxs()
-                if len(segments) == 0:
-                    segments.append([lo, hi])  # insert 1st strand
-                elif segments[-1][1] == lo - 1:
-                    segments[-1][1] = hi  # extend
-                else:
-                    segments.append([lo, hi])  # insert another strand
-            stapSS = vh.stapleStrandSet()
-            epDict[stapSS] = []
-            for i in range(len(segments)):
-                lo, hi = segments[i]
-                epDict[stapSS].extend(segments[i])
-                c = StrandSet.CreateStrandCommand(stapSS, lo, hi, i)
-                cmds.append(c)
-        util.execCommandList(part, cmds, desc="Add tmp strands", useUndoStack=False)
-        cmds = []
-
-        # determine where xovers should be installed
-        for vh in part.getVirtualHelices():
-            stapSS = vh.stapleStrandSet()
-            scafSS = vh.scaffoldStrandSet()
-            is5to3 = stapSS.isDrawn5to3()
-            potentialXovers = part.potentialCrossoverList(vh)
-            for neighborVh, idx, strandType, isLowIdx in potentialXovers:
-                if strandType != StrandType.Staple:
-                    continue
-                if isLowIdx and is5to3:
-                    strand = stapSS.getStrand(idx)
-                    neighborSS = neighborVh.stapleStrandSet()
-                    nStrand = neighborSS.getStrand(idx)
-                    if strand == None or nStrand == None:
-                        continue
-                    # check for bases on both strands at [idx-1:idx+3]
-                    if not (strand.lowIdx() < idx and strand.highIdx() > idx + 1):
-                        continue
-                    if not (nStrand.lowIdx() < idx and nStrand.highIdx() > idx + 1):
-                        continue
-
-                    # check for nearby scaffold xovers
-                    scafStrandL = scafSS.getStrand(idx-4)
-                    scafStrandH = scafSS.getStrand(idx+5)
-                    if scafStrandL:
-                        if scafStrandL.hasXoverAt(idx-4):
-                            continue
-                    if scafStrandH:
-                        if scafStrandH.hasXoverAt(idx+5):
-                            continue
-                    # Finally, add the xovers to install
-                    epDict[stapSS].extend([idx, idx+1])
-                    epDict[neighborSS].extend([idx, idx+1])
-
-        # clear temporary staple strands
-        for vh in part.getVirtualHelices():
-            stapSS = vh.stapleStrandSet()
-            for strand in stapSS:
-                c = StrandSet.RemoveStrandCommand(stapSS, strand, 0)
-                cmds.append(c)
-        util.execCommandList(part, cmds, desc="Rm tmp strands", useUndoStack=False)
-        cmds = []
-
+        from model.autostaple import clearStaples, planAutoStaple, \
+                                      installAutoStaple
+        clearStaples(part)
+        strands, xovers = planAutoStaple(part)
         util.beginSuperMacro(part, desc="Auto-Staple")
-
-        for stapSS, epList in epDict.iteritems():
-            assert (len(epList) % 2 == 0)
-            epList = sorted(epList)
-            ssIdx = 0
-            for i in range(0, len(epList),2):
-                lo, hi = epList[i:i+2]
-                c = StrandSet.CreateStrandCommand(stapSS, lo, hi, ssIdx)
-                cmds.append(c)
-                ssIdx += 1
-        util.execCommandList(part, cmds, desc="Create strands")
-        cmds = []
-
-        # create crossovers wherever possible (from strand5p only)
-        for vh in part.getVirtualHelices():
-            stapSS = vh.stapleStrandSet()
-            is5to3 = stapSS.isDrawn5to3()
-            potentialXovers = part.potentialCrossoverList(vh)
-            for neighborVh, idx, strandType, isLowIdx in potentialXovers:
-                if strandType != StrandType.Staple:
-                    continue
-                if (isLowIdx and is5to3) or (not isLowIdx and not is5to3):
-                    strand = stapSS.getStrand(idx)
-                    neighborSS = neighborVh.stapleStrandSet()
-                    nStrand = neighborSS.getStrand(idx)
-                    if strand == None or nStrand == None:
-                        continue
-                    if idx in strand.idxs() and idx in nStrand.idxs():
-                        # only install xovers on pre-split strands
-                        part.createXover(strand, idx, nStrand, idx, updateOligo=False)
-
-        c = Part.RefreshOligosCommand(part)
-        cmds.append(c)
-        util.execCommandList(part, cmds, desc="Assign oligos")
-
-        cmds = []
+        installAutoStaple(part, strands, xovers)
         util.endSuperMacro(part)
-
     # end def
 
     def verifyOligoStrandCounts(self):
@@ -911,6 +865,7 @@ class Part(QObject):
         of virtualHelix references
         """
         self._coordToVirtualHelix[virtualHelix.coord()] = virtualHelix
+        virtualHelix.touch()
     # end def
 
     def _removeVirtualHelix(self, virtualHelix):
@@ -919,6 +874,12 @@ class Part(QObject):
         of virtualHelix references
         """
         del self._coordToVirtualHelix[virtualHelix.coord()]
+        if self._geometry is not None:
+            self._geometry.invalidate(virtualHelix)
+        if self._occupancy is not None:
+            self._occupancy.invalidate(virtualHelix)
+        if self._fingerprint is not None:
+            self._fingerprint.invalidate(virtualHelix)
     # end def
 
     def _reserveHelixIDNumber(self, parityEven=True, requestedIDnum=None):
@@ -1126,6 +1087,7 @@ class Part(QObject):
 
         fromStrandSets = vh.getStrandSets()
         neighbors = self.getVirtualHelixNeighbors(vh)
+        occupancy = part.occupancy()
 
         # print neighbors, lutsNeighbor
         for neighbor, lut in izip(neighbors, lutsNeighbor):
@@ -1143,14 +1105,11 @@ class Part(QObject):
             for fromSS, toSS, pts, st in izip(fromStrandSets, toStrandSets, lut, sTs):
                 # test each period of each lattice for each StrandType
                 for pt, isLowIdx in izip(pts, (True, False)):
-                    for i, j in product(baseRange, pt):
-                        index = i + j
-                        if index < numBases:
-                            if fromSS.hasNoStrandAtOrNoXover(index) and \
-                                    toSS.hasNoStrandAtOrNoXover(index):
-                                ret.append((neighbor, index, st, isLowIdx))
-                            # end if
-                        # end if
+                    idxs = [i + j for i, j in product(baseRange, pt) \
+                                                        if i + j < numBases]
+                    # skip indices where either side already has an xover
+                    for index in occupancy.withoutXovers((fromSS, toSS), idxs):
+                        ret.append((neighbor, index, st, isLowIdx))
                     # end for
                 # end for
             # end for
@@ -1562,6 +1521,7 @@ class Part(QObject):
                     sSet.removeStrand(strand)
                 # end for
                 sSet._strandList = []
+                sSet.virtualHelix().touch()
             #end for
             for vh in self._vhs:
                 # for updating the Slice View displayed helices
@@ -1580,6 +1540,7 @@ class Part(QObject):
                     sSet.strandsetStrandAddedSignal.emit(sSet, strand)
                 # end for
                 sSet._strandList = sList
+                sSet.virtualHelix().touch()
             #end for
             for vh in self._vhs:
                 # for updating the Slice View displayed helices
@@ -1611,6 +1572,10 @@ class Part(QObject):
             part._maxBase += self._maxDelta
             if self._minDelta != 0:
                 self.deltaMinDimension(part, self._minDelta)
+            if part._geometry is not None:
+                part._geometry.invalidate()
+            if part._occupancy is not None:
+                part._occupancy.invalidate()
             for vh in part._coordToVirtualHelix.itervalues():
                 part.partVirtualHelixResizedSignal.emit(part, vh.coord())
             if self._oldActiveIdx > part._maxBase:
@@ -1624,6 +1589,10 @@ class Part(QObject):
             part._maxBase -= self._maxDelta
             if self._minDelta != 0:
                 self.deltaMinDimension(part, self._minDelta)
+            if part._geometry is not None:
+                part._geometry.invalidate()
+            if part._occupancy is not None:
+                part._occupancy.invalidate()
             for vh in part._coordToVirtualHelix.itervalues():
                 part.partVirtualHelixResizedSignal.emit(part, vh.coord())
             if self._oldActiveIdx != part.activeBaseIndex():
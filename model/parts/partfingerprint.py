@@ -0,0 +1,216 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+partfingerprint.py
+
+Content hashes of a Part for change detection and cache keys, arranged
+as a Merkle tree:
+
+    strand set  SHA-1 over its strands in strand list order: indices,
+                crossover partners and insertions
+    helix       SHA-1 over its coordinate and its two strand set hashes
+    part        SHA-1 over the lattice, the helix length and every helix
+                hash
+    oligo       SHA-1 over its path (helix, strand type and indices of each
+                strand, 5' to 3'), its sequence and its color
+
+Every strand, crossover, insertion and sequence mutator calls
+VirtualHelix.touch(), so a helix hash is only recomputed when its helix
+revision has moved, and the part hash mostly recombines cached helix
+hashes. Sequences are covered by the oligo hashes, not the strand set
+hashes, so applying a scaffold sequence leaves the part hash unchanged.
+
+manifest() returns all the hashes as a JSON-serializable dict, and
+changesSince(manifest) compares the part against one saved earlier.
+"""
+
+import hashlib
+
+
+def _strandEnd(strand, idx):
+    """Identifies the end idx of strand, for crossover partners."""
+    return strand.virtualHelix().coord(), strand.strandType(), idx
+# end def
+
+
+def _coordKey(coord):
+    return "%d,%d" % coord
+# end def
+
+
+class PartFingerprint(object):
+    """
+    Hash service owned by a Part. Access it through Part.fingerprint().
+    Hashes are hex digest strings.
+    """
+    def __init__(self, part):
+        self._part = part
+        self.invalidate()
+    # end def
+
+    def part(self):
+        return self._part
+    # end def
+
+    def invalidate(self, virtualHelix=None):
+        """
+        Drops the cached hashes of virtualHelix, or of everything if
+        virtualHelix is None. The part calls this when a helix is removed.
+        """
+        if virtualHelix is not None:
+            self._helixHashes.pop(virtualHelix, None)
+            return
+        self._helixHashes = {}  # virtualHelix -> (revision, hash, ssHashes)
+        self._oligoHashes = {}  # oligo -> (revision, helices, color, hash)
+    # end def
+
+    ### HASHES ###
+    def strandSetHash(self, strandSet):
+        return self._helixEntry(strandSet.virtualHelix())[2][
+                                                    strandSet.strandType()]
+    # end def
+
+    def helixHash(self, virtualHelix):
+        return self._helixEntry(virtualHelix)[1]
+    # end def
+
+    def partHash(self):
+        """
+        Returns the root hash, over the part's lattice, length and helices.
+        Only the helices touched since the last call are rehashed.
+        """
+        part = self._part
+        h = hashlib.sha1(repr((part.__class__.__name__, part.maxBaseIdx())))
+        for vh in sorted(part.getVirtualHelices(), key=lambda vh: vh.coord()):
+            h.update(self.helixHash(vh))
+        return h.hexdigest()
+    # end def
+
+    def oligoHash(self, oligo):
+        """
+        Returns the hash of oligo's path, sequence and color. The cached
+        value is reused until one of the helices the oligo runs through is
+        touched.
+        """
+        cached = self._oligoHashes.get(oligo)
+        if cached is not None and cached[2] == oligo.color() and \
+                    all(vh.revision() <= cached[0] for vh in cached[1]):
+            return cached[3]
+        path = []
+        helices = set()
+        strand5p = oligo.strand5p()
+        if strand5p is not None:
+            for strand in strand5p.generator3pStrand():
+                vh = strand.virtualHelix()
+                helices.add(vh)
+                path.append((vh.coord(), strand.strandType(),
+                             strand.idx5Prime(), strand.idx3Prime(),
+                             [(i.idx(), i.length()) for i in \
+                                                strand.insertionsOnStrand()],
+                             strand.sequence()))
+        digest = hashlib.sha1(repr((oligo.isLoop(), oligo.color(), path)))
+        entry = (self._part.revision(), helices, oligo.color(),
+                 digest.hexdigest())
+        self._oligoHashes[oligo] = entry
+        return entry[3]
+    # end def
+
+    ### COMPARISON ###
+    def manifest(self):
+        """
+        Returns {'part': hash, 'helices': {"row,col": hash},
+        'oligos': {"vh[idx]" of the 5' end: hash}}.
+        """
+        part = self._part
+        self._pruneOligos()
+        return {'part': self.partHash(),
+                'helices': dict((_coordKey(vh.coord()), self.helixHash(vh)) \
+                                for vh in part.getVirtualHelices()),
+                'oligos': dict((oligo.locString(), self.oligoHash(oligo)) \
+                                for oligo in part.oligos())}
+    # end def
+
+    def changesSince(self, manifest):
+        """
+        Compares the part with a manifest() taken earlier (possibly of
+        another file). Returns a dict of sorted lists: helicesAdded,
+        helicesRemoved and helicesChanged hold "row,col" keys, and
+        oligosAdded and oligosRemoved the 5' locations of oligos whose
+        hash is new or gone (a changed oligo is in both).
+        """
+        current = self.manifest()
+        oldHelices, newHelices = manifest['helices'], current['helices']
+        oldOligos, newOligos = manifest['oligos'], current['oligos']
+        return {
+            'partChanged': manifest['part'] != current['part'],
+            'helicesAdded': sorted(set(newHelices) - set(oldHelices)),
+            'helicesRemoved': sorted(set(oldHelices) - set(newHelices)),
+            'helicesChanged': sorted(k for k in newHelices \
+                        if k in oldHelices and oldHelices[k] != newHelices[k]),
+            'oligosAdded': sorted(k for k, v in newOligos.iteritems() \
+                                                if oldOligos.get(k) != v),
+            'oligosRemoved': sorted(k for k, v in oldOligos.iteritems() \
+                                                if newOligos.get(k) != v)}
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _helixEntry(self, vh):
+        """Returns (revision, hash, {strandType: strand set hash})."""
+        entry = self._helixHashes.get(vh)
+        if entry is not None and entry[0] == vh.revision():
+            return entry
+        ssHashes = {}
+        h = hashlib.sha1(repr(vh.coord()))
+        for strandSet in vh.getStrandSets():
+            strands = []
+            for strand in strandSet:
+                lowIdx, highIdx = strand.idxs()
+                # a crossover joins the 3' end of the 5' partner and the
+                # 5' end of the 3' partner
+                strand5p = strand.connection5p()
+                strand3p = strand.connection3p()
+                strands.append((lowIdx, highIdx,
+                                strand5p and _strandEnd(strand5p,
+                                                    strand5p.idx3Prime()),
+                                strand3p and _strandEnd(strand3p,
+                                                    strand3p.idx5Prime()),
+                                [(i.idx(), i.length()) for i in \
+                                                strand.insertionsOnStrand()]))
+            ssHash = hashlib.sha1(repr(strands)).hexdigest()
+            ssHashes[strandSet.strandType()] = ssHash
+            h.update(ssHash)
+        entry = (vh.revision(), h.hexdigest(), ssHashes)
+        self._helixHashes[vh] = entry
+        return entry
+    # end def
+
+    def _pruneOligos(self):
+        """Forgets the cached hashes of oligos no longer in the part."""
+        oligos = self._part.oligos()
+        for oligo in self._oligoHashes.keys():
+            if oligo not in oligos:
+                del self._oligoHashes[oligo]
+    # end def
+# end class
@@ -0,0 +1,166 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+partgeometry.py
+
+Bulk 3D coordinates for the bases of a Part. Positions are in nanometers:
+x and y come from Part.latticeCoordToPositionXY (the helix axis) and z runs
+along the helix at Part.rise() per base index. The backbone angle of each
+base uses the same phase as the solid view's helix meshes and pre-decorator
+placement (VirtualHelixItem.cadnanoVBaseToMayaCoords), so the two agree.
+
+Arrays are computed once per virtual helix and cached until the part is
+resized or the helix is removed.
+"""
+
+import math
+import numpy as np
+
+from model.enum import StrandType
+from model.helixmesh import rotationOffsetForLattice, \
+                             decoratorRotOffsetForLattice
+
+
+class PartGeometry(object):
+    """
+    Vectorized geometry service owned by a Part. Access it through
+    Part.geometry().
+
+    Every query returns a tuple (xyz, angle) where xyz is an (n, 3)
+    float64 array of backbone positions and angle is the (n,) backbone
+    angle in radians about the helix axis.
+    """
+    def __init__(self, part):
+        self._part = part
+        self._cache = {}  # virtualHelix -> {strandType: (xyz, angle)}
+    # end def
+
+    def part(self):
+        return self._part
+    # end def
+
+    def invalidate(self, virtualHelix=None):
+        """
+        Drops cached arrays for virtualHelix, or for every helix if
+        virtualHelix is None.
+        """
+        if virtualHelix is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(virtualHelix, None)
+    # end def
+
+    def phaseOffset(self, virtualHelix, strandType):
+        """Returns the backbone angle (radians) of base index 0."""
+        latticeType = self._part.crossSectionType()
+        offset = rotationOffsetForLattice[latticeType] + \
+                 decoratorRotOffsetForLattice[latticeType]
+        return math.radians(offset) + \
+               math.pi * (not virtualHelix.isEvenParity()) + \
+               math.pi * strandType
+    # end def
+
+    def helixGeometry(self, virtualHelix, strandType=StrandType.Scaffold):
+        """
+        Returns (xyz, angle) for every base index of virtualHelix from
+        minBaseIdx to maxBaseIdx inclusive; row i is base minBaseIdx + i.
+        The returned arrays are shared with the cache and are read-only.
+        """
+        perHelix = self._cache.setdefault(virtualHelix, {})
+        if strandType not in perHelix:
+            perHelix[strandType] = self._computeHelix(virtualHelix, strandType)
+        return perHelix[strandType]
+    # end def
+
+    def baseGeometry(self, virtualHelix, strandType, idxs):
+        """
+        Returns (xyz, angle) for an array-like of base indices on
+        virtualHelix.
+        """
+        xyz, angle = self.helixGeometry(virtualHelix, strandType)
+        rows = np.asarray(idxs) - self._part.minBaseIdx()
+        return xyz[rows], angle[rows]
+    # end def
+
+    def strandGeometry(self, strand):
+        """Returns (xyz, angle) for the bases lowIdx..highIdx of strand."""
+        lo, hi = strand.idxs()
+        xyz, angle = self.helixGeometry(strand.virtualHelix(),
+                                        strand.strandType())
+        minBase = self._part.minBaseIdx()
+        return xyz[lo - minBase:hi - minBase + 1], \
+               angle[lo - minBase:hi - minBase + 1]
+    # end def
+
+    def partGeometry(self, strandType=StrandType.Scaffold):
+        """
+        Returns (xyz, angle, helixNumbers, idxs) for every base of every
+        helix in the part, ordered by helix number. helixNumbers and idxs
+        identify the helix and base index of each row.
+        """
+        part = self._part
+        vhs = sorted(part.getVirtualHelices(), key=lambda vh: vh.number())
+        numBases = part.maxBaseIdx() - part.minBaseIdx() + 1
+        if not vhs:
+            return np.zeros((0, 3)), np.zeros(0), \
+                   np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        geoms = [self.helixGeometry(vh, strandType) for vh in vhs]
+        xyz = np.concatenate([g[0] for g in geoms])
+        angle = np.concatenate([g[1] for g in geoms])
+        helixNumbers = np.repeat([vh.number() for vh in vhs], numBases)
+        idxs = np.tile(np.arange(part.minBaseIdx(), part.maxBaseIdx() + 1),
+                       len(vhs))
+        return xyz, angle, helixNumbers, idxs
+    # end def
+
+    def positionsAt(self, virtualHelix, strandType, idxs):
+        """
+        Returns uncached (xyz, angle) for an array of base positions on
+        virtualHelix. Positions may be fractional, which is how exporters
+        place the extra bases of an insertion between two base indices.
+        """
+        part = self._part
+        idxs = np.asarray(idxs, dtype=float)
+        row, col = virtualHelix.coord()
+        x, y = part.latticeCoordToPositionXY(row, col)
+        radius = part.radius()
+        angle = self.phaseOffset(virtualHelix, strandType) - \
+                math.radians(part.twistPerBase()) * idxs
+        xyz = np.empty((len(idxs), 3))
+        xyz[:, 0] = x + radius * np.cos(angle)
+        xyz[:, 1] = y + radius * np.sin(angle)
+        xyz[:, 2] = part.rise() * idxs
+        return xyz, angle
+    # end def
+
+    def _computeHelix(self, virtualHelix, strandType):
+        part = self._part
+        idxs = np.arange(part.minBaseIdx(), part.maxBaseIdx() + 1)
+        xyz, angle = self.positionsAt(virtualHelix, strandType, idxs)
+        xyz.flags.writeable = False
+        angle.flags.writeable = False
+        return xyz, angle
+    # end def
+# end class
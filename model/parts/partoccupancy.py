@@ -0,0 +1,305 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+partoccupancy.py
+
+A helix x base index of which strand covers each base, and of which bases
+are crossover ends, for both strand types of a Part.
+
+For each strand type there are two 2D arrays with one row per virtual
+helix and one column per base index:
+
+    strand index  the position of the covering strand in its StrandSet's
+                  strand list, or -1 where the base is empty
+    xover end     True where a strand end at that base has a crossover
+
+A row is rebuilt lazily the next time it is read after its helix was
+touched (VirtualHelix.touch, called by every strand, xover and insertion
+mutator), so the index is always in sync with the model without the
+commands having to update it themselves.
+"""
+
+import numpy as np
+
+from model.enum import StrandType
+
+_strandTypes = (StrandType.Scaffold, StrandType.Staple)
+
+
+class PartOccupancy(object):
+    """
+    Shared occupancy index owned by a Part. Access it through
+    Part.occupancy(). Single-base queries cost an array lookup; whole
+    helix and whole slice queries are single NumPy operations.
+    """
+    def __init__(self, part):
+        self._part = part
+        self.invalidate()
+    # end def
+
+    def part(self):
+        return self._part
+    # end def
+
+    def invalidate(self, virtualHelix=None):
+        """
+        Drops the row of virtualHelix, or every row (and the array shape)
+        if virtualHelix is None. The part calls this when a helix is
+        removed or the part is resized.
+        """
+        if virtualHelix is not None:
+            row = self._rows.pop(virtualHelix, None)
+            self._staleQueries.pop(virtualHelix, None)
+            if row is not None:
+                for strandType in _strandTypes:
+                    self._strandIndex[strandType][row] = -1
+                    self._xoverEnds[strandType][row] = False
+                self._rowRevisions[row] = -1
+                self._rowVirtualHelices[row] = None
+                self._freeRows.append(row)
+            return
+        part = self._part
+        self._minBase = part.minBaseIdx()
+        self._numBases = part.maxBaseIdx() - self._minBase + 1
+        if self._numBases <= np.iinfo(np.int16).max:
+            self._dtype = np.int16
+        else:
+            self._dtype = np.int32
+        self._rows = {}  # virtualHelix -> row
+        self._rowVirtualHelices = []
+        self._rowRevisions = []
+        self._freeRows = []
+        self._staleQueries = {}  # virtualHelix -> revision first queried at
+        self._strandIndex = {}  # strandType -> (helices, bases) int array
+        self._xoverEnds = {}  # strandType -> (helices, bases) bool array
+        for strandType in _strandTypes:
+            self._strandIndex[strandType] = np.empty((0, self._numBases),
+                                                     dtype=self._dtype)
+            self._xoverEnds[strandType] = np.empty((0, self._numBases),
+                                                   dtype=bool)
+    # end def
+
+    ### SINGLE HELIX QUERIES ###
+    def strandIndices(self, strandSet):
+        """
+        Returns the strand index row of strandSet; element i is the position
+        in strandSet of the strand covering base minBaseIdx + i, or -1. The
+        row is a view into the index and must not be modified.
+        """
+        row = self._row(strandSet.virtualHelix())
+        return self._strandIndex[strandSet.strandType()][row]
+    # end def
+
+    def occupancyMask(self, strandSet):
+        """Returns a bool array marking the bases of strandSet with a strand."""
+        return self.strandIndices(strandSet) >= 0
+    # end def
+
+    def xoverMask(self, strandSet):
+        """
+        Returns a bool array marking the crossover ends of strandSet. Like
+        strandIndices, this is a view that must not be modified.
+        """
+        row = self._row(strandSet.virtualHelix())
+        return self._xoverEnds[strandSet.strandType()][row]
+    # end def
+
+    def getStrand(self, strandSet, idx):
+        """Returns the strand of strandSet covering base idx, or None."""
+        col = idx - self._minBase
+        if col < 0 or col >= self._numBases:
+            return None
+        row = self._freshRow(strandSet.virtualHelix())
+        if row is None:
+            strands = self._scan(strandSet, idx, idx)
+            return strands[0] if strands else None
+        i = self._strandIndex[strandSet.strandType()][row, col]
+        return strandSet._strandList[i] if i >= 0 else None
+    # end def
+
+    def getStrands(self, strandSet, idxLow, idxHigh):
+        """
+        Returns the strands of strandSet overlapping idxLow..idxHigh, in
+        strand list order.
+        """
+        lo = max(idxLow - self._minBase, 0)
+        hi = min(idxHigh - self._minBase + 1, self._numBases)
+        if lo >= hi:
+            return []
+        row = self._freshRow(strandSet.virtualHelix())
+        if row is None:
+            return self._scan(strandSet, idxLow, idxHigh)
+        covering = self._strandIndex[strandSet.strandType()][row, lo:hi]
+        covering = covering[covering >= 0]
+        if not len(covering):
+            return []
+        strandList = strandSet._strandList
+        return [strandList[i] for i in np.unique(covering)]
+    # end def
+
+    def hasStrandAt(self, strandSet, idxLow, idxHigh):
+        lo = max(idxLow - self._minBase, 0)
+        hi = min(idxHigh - self._minBase + 1, self._numBases)
+        if lo >= hi:
+            return False
+        row = self._freshRow(strandSet.virtualHelix())
+        if row is None:
+            return len(self._scan(strandSet, idxLow, idxHigh)) > 0
+        return bool((self._strandIndex[strandSet.strandType()][row, lo:hi] \
+                                                                >= 0).any())
+    # end def
+
+    def hasXoverAt(self, strandSet, idx):
+        col = idx - self._minBase
+        if col < 0 or col >= self._numBases:
+            return False
+        row = self._freshRow(strandSet.virtualHelix())
+        if row is None:
+            strands = self._scan(strandSet, idx, idx)
+            return len(strands) > 0 and strands[0].hasXoverAt(idx)
+        return bool(self._xoverEnds[strandSet.strandType()][row, col])
+    # end def
+
+    def withoutXovers(self, strandSets, idxs):
+        """
+        Returns the base indices in idxs (in order) at which none of
+        strandSets has a crossover end, as a list of ints.
+        """
+        idxs = np.asarray(idxs, dtype=int)
+        cols = idxs - self._minBase
+        inRange = (cols >= 0) & (cols < self._numBases)
+        cols = cols.clip(0, self._numBases - 1)
+        blocked = np.zeros(len(idxs), dtype=bool)
+        for strandSet in strandSets:
+            blocked |= self.xoverMask(strandSet)[cols]
+        return idxs[~(blocked & inRange)].tolist()
+    # end def
+
+    ### WHOLE PART QUERIES ###
+    def partOccupancy(self, strandType):
+        """
+        Returns (virtualHelices, strandIndex, xoverEnds) for every helix in
+        the part; row i of both arrays belongs to virtualHelices[i]. The
+        arrays are copies and may be modified.
+        """
+        vhs = list(self._part.getVirtualHelices())
+        rows = [self._row(vh) for vh in vhs]
+        return vhs, self._strandIndex[strandType][rows], \
+               self._xoverEnds[strandType][rows]
+    # end def
+
+    def virtualHelicesWithStrandAt(self, idx, strandType=StrandType.Scaffold):
+        """Returns the helices with a strandType strand at base idx."""
+        col = idx - self._minBase
+        if col < 0 or col >= self._numBases:
+            return []
+        vhs = list(self._part.getVirtualHelices())
+        rows = [self._row(vh) for vh in vhs]
+        covered = self._strandIndex[strandType][rows, col] >= 0
+        return [vhs[i] for i in np.flatnonzero(covered)]
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _row(self, vh):
+        """Returns the row of vh, (re)building it if vh has been touched."""
+        row = self._rows.get(vh)
+        if row is None:
+            row = self._allocateRow(vh)
+        if self._rowRevisions[row] != vh.revision():
+            self._fillRow(vh, row)
+        return row
+    # end def
+
+    def _freshRow(self, vh):
+        """
+        Returns the row of vh for a single-base query, or None if the caller
+        should scan the strand list instead. Edits often alternate with
+        single queries (e.g. while importing), so a touched row is only
+        rebuilt the second time it is queried at the same revision.
+        """
+        row = self._rows.get(vh)
+        revision = vh.revision()
+        if row is not None and self._rowRevisions[row] == revision:
+            return row
+        if self._staleQueries.get(vh) != revision:
+            self._staleQueries[vh] = revision
+            return None
+        return self._row(vh)
+    # end def
+
+    def _scan(self, strandSet, idxLow, idxHigh):
+        """Returns the strands of strandSet overlapping idxLow..idxHigh."""
+        ret = []
+        for strand in strandSet._strandList:
+            lo, hi = strand.idxs()
+            if lo > idxHigh:
+                break
+            if hi >= idxLow:
+                ret.append(strand)
+        return ret
+    # end def
+
+    def _allocateRow(self, vh):
+        if self._freeRows:
+            row = self._freeRows.pop()
+            self._rowVirtualHelices[row] = vh
+            self._rowRevisions[row] = -1
+        else:
+            row = len(self._rowVirtualHelices)
+            capacity = len(self._strandIndex[StrandType.Scaffold])
+            if row >= capacity:
+                # grow geometrically so adding helices is amortized O(1)
+                grow = max(capacity, 16)
+                for strandType in _strandTypes:
+                    self._strandIndex[strandType] = np.vstack(
+                        (self._strandIndex[strandType],
+                         np.empty((grow, self._numBases), dtype=self._dtype)))
+                    self._xoverEnds[strandType] = np.vstack(
+                        (self._xoverEnds[strandType],
+                         np.zeros((grow, self._numBases), dtype=bool)))
+            self._rowVirtualHelices.append(vh)
+            self._rowRevisions.append(-1)
+        self._rows[vh] = row
+        return row
+    # end def
+
+    def _fillRow(self, vh, row):
+        minBase = self._minBase
+        for strandSet in vh.getStrandSets():
+            strandType = strandSet.strandType()
+            strandIndex = self._strandIndex[strandType][row]
+            xoverEnds = self._xoverEnds[strandType][row]
+            strandIndex[:] = -1
+            xoverEnds[:] = False
+            for i, strand in enumerate(strandSet._strandList):
+                lo, hi = strand.idxs()
+                strandIndex[lo - minBase:hi - minBase + 1] = i
+                if strand.connectionLow() is not None:
+                    xoverEnds[lo - minBase] = True
+                if strand.connectionHigh() is not None:
+                    xoverEnds[hi - minBase] = True
+        self._rowRevisions[row] = vh.revision()
+    # end def
+# end class
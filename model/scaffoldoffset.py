@@ -0,0 +1,349 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+scaffoldoffset.py
+
+Chooses where a circular scaffold sequence starts on the scaffold oligo.
+Applying the sequence rotated by offset (sequence[offset:] +
+sequence[:offset]) changes every staple sequence, so bestOffsets scores
+all rotations of the sequence against these objectives, lower is better:
+
+    'tmVariance'  variance of the staple melting temperatures, Celsius^2
+                  (see model/thermodynamics.py)
+    'polyN'       bases in staples that start a run of polyNLength equal
+                  bases
+    'motifs'      occurrences of the motifList sequences in staples, on
+                  either strand
+
+and returns the best ones without touching the model; applyOffset applies
+the chosen one. Settings, as a dict overriding the defaults below, give
+the weight of each objective in the score, polyNLength, motifList (ACGT
+strings) and thermoSettings (for model.thermodynamics).
+
+Each staple domain (a stretch paired with consecutive scaffold bases) is
+a window of the scaffold that slides along the sequence as the offset
+changes, so its nearest-neighbor sums for a block of offsets are rolling
+window sums (SequenceWindows.stackSums on the circular sequence). Stacks
+across crossovers are added one by one. Runs and motifs are counted on a
+(staple bases x offsets) array of the bases each staple pairs with.
+Blocks of offsets are scored in a process pool.
+"""
+
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from model.kmerindex import baseLocations
+from model.thermodynamics import SequenceWindows, encode, initiation, \
+                                 stackValues, thermo, UNKNOWN
+
+defaults = {'tmVariance': 1.0, 'polyN': 1.0, 'motifs': 10.0,
+            'polyNLength': 6, 'motifList': [], 'thermoSettings': None}
+
+# offset is the index of the sequence base applied to the 5' base of the
+# scaffold oligo; score is the weighted sum of the other fields
+RotationScore = namedtuple('RotationScore', ['offset', 'score', 'tmVariance',
+                                             'polyN', 'motifs'])
+
+_blockSize = 256  # offsets scored at once, bounds the domain x offset arrays
+
+
+def _settings(settings):
+    return dict(defaults, **settings) if settings else dict(defaults)
+# end def
+
+
+def scaffoldOligo(part):
+    """Returns the longest scaffold oligo of part, or None."""
+    scaffolds = [o for o in list(part.oligos()) if not o.isStaple()]
+    return max(scaffolds, key=lambda o: o.length()) if scaffolds else None
+# end def
+
+
+def offsetProblem(part, sequence, oligo=None):
+    """
+    Reads what scoreOffsets needs from part: for each staple that pairs
+    with oligo (default scaffoldOligo(part)), the scaffold base paired with
+    each of its bases, -1 where there is none. The problem is plain data,
+    so it can be sent to other processes.
+    """
+    oligo = oligo if oligo is not None else scaffoldOligo(part)
+    if oligo is None:
+        raise ValueError("The part has no scaffold to apply a sequence to.")
+    helices, idxs, isScaffold = baseLocations(oligo)
+    scaffoldBases = {}  # (helix, idx) -> [scaffold base, ]
+    for pos, key in enumerate(zip(helices.tolist(), idxs.tolist())):
+        scaffoldBases.setdefault(key, []).append(pos)
+    partners = []
+    for staple in list(part.oligos()):
+        if not staple.isStaple():
+            continue
+        helices, idxs, isScaffold = baseLocations(staple)
+        keys = zip(helices.tolist(), idxs.tolist())
+        bases = [scaffoldBases.get(key, []) for key in keys]
+        if not any(bases):
+            continue
+        seen = {}
+        p = []
+        for key, b in zip(keys, bases):
+            # insertion bases pair in reverse order
+            j = seen[key] = seen.get(key, -1) + 1
+            p.append(b[len(b) - 1 - j] if j < len(b) else -1)
+        partners.append(np.array(p, dtype=np.intp))
+    return {'sequence': str(sequence).upper(), 'partners': partners}
+# end def
+
+
+class _OffsetScorer(object):
+    """Scores blocks of offsets for one problem."""
+    def __init__(self, problem, settings):
+        s = self._settings = _settings(settings)
+        sequence = problem['sequence']
+        n = len(sequence)
+        self._codes = encode(sequence)
+        # offsets are below n and scaffold bases below n, so indices into
+        # the doubled sequence need no modulo
+        self._codes2 = np.concatenate((self._codes, self._codes))
+        known = self._codes2 != UNKNOWN
+        self._compCodes2 = np.where(known, 3 - self._codes2, UNKNOWN)
+        self._windows = SequenceWindows(sequence, circular=True)
+        # staples that pair base by base with the applied sequence
+        partners = [p for p in problem['partners'] \
+                    if len(p) >= 2 and p.min() >= 0 and p.max() < n]
+        domW, domL, domStaple = [], [], []
+        junU, junV, junStaple = [], [], []
+        for t, p in enumerate(partners):
+            cuts = np.flatnonzero(p[1:] != p[:-1] - 1) + 1
+            firsts = np.concatenate(([0], cuts))
+            lasts = np.concatenate((cuts, [len(p)])) - 1
+            domW.append(p[lasts])  # the lowest scaffold base of each domain
+            domL.append(lasts - firsts + 1)
+            domStaple.append(np.repeat(t, len(firsts)))
+            junU.append(p[cuts - 1])
+            junV.append(p[cuts])
+            junStaple.append(np.repeat(t, len(cuts)))
+        join = lambda arrays: np.concatenate(arrays).astype(np.intp) \
+                                    if arrays else np.zeros(0, dtype=np.intp)
+        self._domW, self._domL = join(domW), join(domL)
+        self._domStaple = join(domStaple)
+        self._junU, self._junV = join(junU), join(junV)
+        self._junStaple = join(junStaple)
+        self._first = join([p[0:1] for p in partners])
+        self._last = join([p[-1:] for p in partners])
+        self._lengths = join([[len(p)] for p in partners])
+        self._staples = len(partners)
+        staples = np.arange(len(partners) + 1)
+        self._domSegments = np.searchsorted(self._domStaple, staples)
+        self._junSegments = np.searchsorted(self._junStaple, staples)
+        # the scaffold base of every staple base, one -1 after each staple
+        self._bases = join([np.append(p, -1) for p in partners])
+        self._runLength = s['polyNLength']
+        self._motifs = set()
+        for motif in s['motifList']:
+            motif = str(motif).upper()
+            self._motifs.update([motif, _rcomp(motif)])  # either strand
+        self._motifs = [encode(m) for m in sorted(self._motifs)]
+    # end def
+
+    def _stapleCodes(self, offsets):
+        """
+        Returns the codes of the staple bases, a (staple bases, offsets)
+        array, UNKNOWN between staples.
+        """
+        codes = self._compCodes2[self._bases[:, None] + offsets[None, :]]
+        codes[self._bases < 0] = UNKNOWN
+        return codes
+    # end def
+
+    def _runs(self, codes):
+        """Counts the bases starting a run of runLength, per offset."""
+        k = self._runLength
+        if len(codes) < k:
+            return np.zeros(codes.shape[1], dtype=np.intp)
+        if k < 2:
+            return (codes != UNKNOWN).sum(axis=0)
+        same = (codes[1:] == codes[:-1]) & (codes[1:] != UNKNOWN)
+        n = len(same) - k + 2
+        starts = same[0:n].copy()
+        for j in xrange(1, k - 1):
+            starts &= same[j:j + n]
+        return starts.sum(axis=0)
+    # end def
+
+    def _motifCount(self, codes, motif):
+        """Counts the occurrences of the encoded motif, per offset."""
+        n = len(codes) - len(motif) + 1
+        if n <= 0:
+            return np.zeros(codes.shape[1], dtype=np.intp)
+        starts = np.ones((n, codes.shape[1]), dtype=bool)
+        for j, code in enumerate(motif):
+            starts &= codes[j:j + n] == code
+        return starts.sum(axis=0)
+    # end def
+
+    def score(self, offsets):
+        """
+        Returns the (tmVariance, polyN, motifs) arrays for offsets, which
+        must be below the sequence length.
+        """
+        offsets = np.asarray(offsets, dtype=np.intp)
+        if self._staples:
+            starts = self._domW[:, None] + offsets[None, :]
+            domH, domS = self._windows.stackSums(starts,
+                                                 self._domL[:, None])
+            # domains with one base have no stacks
+            single = self._domL == 1
+            domH[single], domS[single] = 0.0, 0.0
+            # a crossover stack of the staple is the stack of its two
+            # scaffold bases, read from the second to the first
+            u = self._codes2[self._junU[:, None] + offsets[None, :]]
+            v = self._codes2[self._junV[:, None] + offsets[None, :]]
+            junH, junS = stackValues(v, u)
+            dH = _segmentSums(domH, self._domSegments) + \
+                 _segmentSums(junH, self._junSegments)
+            dS = _segmentSums(domS, self._domSegments) + \
+                 _segmentSums(junS, self._junSegments)
+            initH, initS = initiation(
+                    self._codes2[self._first[:, None] + offsets],
+                    self._codes2[self._last[:, None] + offsets])
+            tm = thermo(dH + initH, dS + initS, self._lengths[:, None],
+                        self._settings['thermoSettings']).tm
+            tmVariance = _nanvar(tm)
+        else:
+            tmVariance = np.zeros(len(offsets))
+        codes = self._stapleCodes(offsets)
+        polyN = self._runs(codes)
+        motifs = np.zeros(len(offsets), dtype=np.intp)
+        for motif in self._motifs:
+            motifs = motifs + self._motifCount(codes, motif)
+        return tmVariance, polyN, motifs
+    # end def
+# end class
+
+
+def _segmentSums(a, segments):
+    """
+    Returns the sums of the rows of a between consecutive segments, NaN
+    where a row is NaN.
+    """
+    nan = np.isnan(a)
+    hasNan = nan.any()
+    if hasNan:
+        a = np.where(nan, 0.0, a)
+    total = np.concatenate((np.zeros((1,) + a.shape[1:]),
+                            np.cumsum(a, axis=0)))
+    sums = total[segments[1:]] - total[segments[:-1]]
+    if hasNan:
+        nans = np.concatenate((np.zeros((1,) + a.shape[1:], dtype=np.intp),
+                               np.cumsum(nan, axis=0)))
+        sums[(nans[segments[1:]] - nans[segments[:-1]]) > 0] = np.nan
+    return sums
+# end def
+
+
+def _nanvar(a):
+    """Variance over axis 0, ignoring NaN."""
+    ok = ~np.isnan(a)
+    count = np.maximum(ok.sum(axis=0), 1)
+    a = np.where(ok, a, 0.0)
+    mean = a.sum(axis=0) / count
+    return np.where(ok, (a - mean) ** 2, 0.0).sum(axis=0) / count
+# end def
+
+
+def _rcomp(sequence):
+    comp = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'}
+    return ''.join(comp.get(base, 'N') for base in reversed(sequence))
+# end def
+
+
+def _scoreBlock(args):
+    """Pool worker: scores one block of offsets."""
+    problem, settings, offsets = args
+    return _OffsetScorer(problem, settings).score(offsets)
+# end def
+
+
+def scoreOffsets(problem, settings=None, offsets=None, processes=None):
+    """
+    Returns the (tmVariance, polyN, motifs) arrays of offsets (default: all
+    the rotations of the problem's sequence). Blocks of offsets are scored
+    in a pool of processes (default one per CPU); processes=1 scores them
+    in this process.
+    """
+    n = len(problem['sequence'])
+    offsets = np.arange(n) if offsets is None else \
+                                np.asarray(offsets, dtype=np.intp) % n
+    blocks = [offsets[i:i + _blockSize] \
+                                for i in xrange(0, len(offsets), _blockSize)]
+    processes = processes if processes else cpu_count()
+    if processes > 1 and len(blocks) > 1:
+        pool = Pool(min(processes, len(blocks)))
+        try:
+            results = pool.map(_scoreBlock,
+                               [(problem, settings, b) for b in blocks])
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        scorer = _OffsetScorer(problem, settings)
+        results = [scorer.score(b) for b in blocks]
+    if not results:
+        return np.zeros(0), np.zeros(0, dtype=np.intp), \
+               np.zeros(0, dtype=np.intp)
+    return tuple(np.concatenate(r) for r in zip(*results))
+# end def
+
+
+def bestOffsets(part, sequence, settings=None, count=10, oligo=None,
+                processes=None):
+    """
+    Returns the count best RotationScores of applying sequence (or the
+    name of one in data.dnasequences) to oligo (default scaffoldOligo(part)),
+    best first. The model is not changed.
+    """
+    from data.dnasequences import sequences
+    sequence = sequences.get(sequence, sequence)
+    s = _settings(settings)
+    problem = offsetProblem(part, sequence, oligo)
+    tmVariance, polyN, motifs = scoreOffsets(problem, settings,
+                                             processes=processes)
+    score = s['tmVariance'] * tmVariance + s['polyN'] * polyN + \
+            s['motifs'] * motifs
+    best = np.argsort(score, kind='mergesort')[:count]
+    return [RotationScore(int(i), float(score[i]), float(tmVariance[i]),
+                          int(polyN[i]), int(motifs[i])) for i in best]
+# end def
+
+
+def applyOffset(oligo, sequence, offset, useUndoStack=True):
+    """Applies sequence to oligo, starting at base offset of sequence."""
+    from data.dnasequences import sequences
+    sequence = sequences.get(sequence, sequence)
+    offset %= len(sequence)
+    oligo.applySequence(sequence[offset:] + sequence[:offset],
+                        useUndoStack=useUndoStack)
+# end def
@@ -225,6 +225,7 @@ class Strand(QObject):
         Applies sequence string from 5' to 3'
         return the tuple (used, unused) portion of the sequenceString
         """
+        self._strandSet.virtualHelix().touch()
         if sequenceString == None:
             self._sequence = None
             return None, None
@@ -247,6 +248,7 @@ class Strand(QObject):
         # i.e. both endpoints thanks to multiple selections so just redo the 
         # whole thing
         self._sequence = None
+        self._strandSet.virtualHelix().touch()
         
         for compStrand in compSS._findOverlappingRanges(self):
             compSeq = compStrand.sequence()
@@ -321,8 +323,9 @@ class Strand(QObject):
 
         # see if we are applying
         if sequenceString == None:
-            # clear out string for in case of not total overlap
-            useSeq = ''.join([' ' for x in range(totalLength)])
+            # clear out string for in case of not total overlap; it is
+            # indexed like the complement strand's sequence would be
+            useSeq = ''.join([' ' for x in range(strand.totalLength())])
         else:  # use the string as is
             useSeq = sequenceString[::-1] if self._isDrawn5to3 \
                                             else sequenceString
@@ -344,6 +347,7 @@ class Strand(QObject):
                                                                 temp[start:end]
         # print "old sequence", self._sequence
         self._sequence = tempSelf.tostring()
+        self._strandSet.virtualHelix().touch()
         
         # if we need to reverse it do it now
         if not self._isDrawn5to3:
@@ -683,19 +687,27 @@ class Strand(QObject):
 
     def setConnection3p(self, strand):
         self._strand3p = strand
+        self._strandSet.virtualHelix().touch()
     # end def
 
     def setConnection5p(self, strand):
         self._strand5p = strand
+        self._strandSet.virtualHelix().touch()
     # end def
 
     def setIdxs(self, idxs):
         self._baseIdxLow = idxs[0]
         self._baseIdxHigh = idxs[1]
+        self._strandSet.virtualHelix().touch()
+        # crossover partners hash the ends they are joined to
+        for strand in (self._strand5p, self._strand3p):
+            if strand is not None:
+                strand.virtualHelix().touch()
     # end def
 
     def setOligo(self, newOligo, emitSignal=True):
         self._oligo = newOligo
+        self._strandSet.virtualHelix().touch()
         if emitSignal:
             self.strandHasNewOligoSignal.emit(self)
     # end def
@@ -711,6 +723,7 @@ class Strand(QObject):
     def updateIdxs(self, delta):
         self._baseIdxLow += delta
         self._baseIdxHigh += delta
+        self._strandSet.virtualHelix().touch()
     # end def
 
     ### PUBLIC SUPPORT METHODS ###
@@ -923,6 +936,7 @@ class Strand(QObject):
         def redo(self):
             strand = self._strand
             cStrand = self._compStrand
+            strand.virtualHelix().touch()
             inst = self._insertion
             self._insertions[self._idx] = inst
             strand.oligo().incrementLength(inst.length())
@@ -935,6 +949,7 @@ class Strand(QObject):
         def undo(self):
             strand = self._strand
             cStrand = self._compStrand
+            strand.virtualHelix().touch()
             inst = self._insertion
             strand.oligo().decrementLength(inst.length())
             if cStrand:
@@ -962,6 +977,7 @@ class Strand(QObject):
         def redo(self):
             strand = self._strand
             cStrand = self._compStrand
+            strand.virtualHelix().touch()
             inst = self._insertion
             strand.oligo().decrementLength(inst.length())
             if cStrand:
@@ -976,6 +992,7 @@ class Strand(QObject):
         def undo(self):
             strand = self._strand
             cStrand = self._compStrand
+            strand.virtualHelix().touch()
             coord = strand.virtualHelix().coord()
             inst = self._insertion
             strand.oligo().incrementLength(inst.length())
@@ -1008,6 +1025,7 @@ class Strand(QObject):
         def redo(self):
             strand = self._strand
             cStrand = self._compStrand
+            strand.virtualHelix().touch()
             inst = self._insertions[self._idx]
             inst.setLength(self._newLength)
             strand.oligo().incrementLength(self._newLength - self._oldLength)
@@ -1021,6 +1039,7 @@ class Strand(QObject):
         def undo(self):
             strand = self._strand
             cStrand = self._compStrand
+            strand.virtualHelix().touch()
             inst = self._insertions[self._idx]
             inst.setLength(self._oldLength)
             strand.oligo().decrementLength(self._newLength - self._oldLength)
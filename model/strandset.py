@@ -355,51 +355,23 @@ class StrandSet(QObject):
         return "scaffold" if self._strandType == StrandType.Scaffold else "staple"
 
     def hasStrandAt(self, idxLow, idxHigh):
-        """
-        """
-        dummyStrand = Strand(self, idxLow, idxHigh)
-        strandList = [s for s in self._findOverlappingRanges(dummyStrand)]
-        dummyStrand._strandSet = None
-        dummyStrand.setParent(None)
-        dummyStrand.deleteLater()
-        dummyStrand = None
-        return len(strandList) > 0
+        """Returns True if any strand overlaps idxLow..idxHigh."""
+        return self.part().occupancy().hasStrandAt(self, idxLow, idxHigh)
     # end def
 
     def getOverlappingStrands(self, idxLow, idxHigh):
-        dummyStrand = Strand(self, idxLow, idxHigh)
-        strandList = [s for s in self._findOverlappingRanges(dummyStrand)]
-        dummyStrand._strandSet = None
-        dummyStrand.setParent(None)
-        dummyStrand.deleteLater()
-        dummyStrand = None
-        return strandList
+        return self.part().occupancy().getStrands(self, idxLow, idxHigh)
     # end def
 
     def hasStrandAtAndNoXover(self, idx):
-        dummyStrand = Strand(self, idx, idx)
-        strandList = [s for s in self._findOverlappingRanges(dummyStrand)]
-        dummyStrand._strandSet = None
-        dummyStrand.setParent(None)
-        dummyStrand.deleteLater()
-        dummyStrand = None
-        if len(strandList) > 0:
-            return False if strandList[0].hasXoverAt(idx) else True
-        else:
-            return False
+        occupancy = self.part().occupancy()
+        return occupancy.getStrand(self, idx) is not None and \
+               not occupancy.hasXoverAt(self, idx)
     # end def
 
     def hasNoStrandAtOrNoXover(self, idx):
-        dummyStrand = Strand(self, idx, idx)
-        strandList = [s for s in self._findOverlappingRanges(dummyStrand)]
-        dummyStrand._strandSet = None
-        dummyStrand.setParent(None)
-        dummyStrand.deleteLater()
-        dummyStrand = None
-        if len(strandList) > 0:
-            return False if strandList[0].hasXoverAt(idx) else True
-        else:
-            return True
+        # xover ends only exist where there is a strand
+        return not self.part().occupancy().hasXoverAt(self, idx)
     # end def
 
     def getIndexToInsert(self, idxLow, idxHigh):
@@ -421,13 +393,7 @@ class StrandSet(QObject):
 
     def getStrand(self, baseIdx):
         """Returns the strand that overlaps with baseIdx."""
-        dummyStrand = Strand(self, baseIdx, baseIdx)
-        strandList = [s for s in self._findOverlappingRanges(dummyStrand)]
-        dummyStrand._strandSet = None
-        dummyStrand.setParent(None)
-        dummyStrand.deleteLater()
-        dummyStrand = None
-        return strandList[0] if len(strandList) > 0 else None
+        return self.part().occupancy().getStrand(self, baseIdx)
     # end def
 
     def getLegacyArray(self):
@@ -494,11 +460,13 @@ class StrandSet(QObject):
     def _addToStrandList(self, strand, idx):
         """Inserts strand into the _strandList at idx."""
         self._strandList.insert(idx, strand)
+        self._virtualHelix.touch()
 
     def _removeFromStrandList(self, strand):
         """Remove strand from _strandList."""
         self._doc.removeStrandFromSelection(strand)  # make sure the strand is no longer selected
         self._strandList.remove(strand)
+        self._virtualHelix.touch()
 
     def _couldStrandInsertAtLastIndex(self, strand):
         """Verification of insertability based on cached last index."""
@@ -772,6 +740,7 @@ class StrandSet(QObject):
             strand = self._strand
             strandSet = self._strandSet
             strandSet._strandList.insert(self._sSetIdx, strand)
+            strandSet._virtualHelix.touch()
             # Set up the new oligo
             oligo = self._newOligo
             oligo.setStrand5p(strand)
@@ -792,6 +761,7 @@ class StrandSet(QObject):
             strandSet = self._strandSet
             strandSet._doc.removeStrandFromSelection(strand)
             strandSet._strandList.pop(self._sSetIdx)
+            strandSet._virtualHelix.touch()
             # Get rid of the new oligo
             oligo = self._newOligo
             oligo.setStrand5p(None)
@@ -840,6 +810,7 @@ class StrandSet(QObject):
             # strandSet._removeFromStrandList(strand)
             strandSet._doc.removeStrandFromSelection(strand)
             strandSet._strandList.pop(self._sSetIdx)
+            strandSet._virtualHelix.touch()
             strand5p = self._oldStrand5p
             strand3p = self._oldStrand3p
             oligo = self._oligo
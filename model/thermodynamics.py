@@ -0,0 +1,267 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+thermodynamics.py
+
+Nearest-neighbor melting temperatures and free energies of staples, with
+the unified parameters of SantaLucia (1998, PNAS 95:1460). Sequences are
+encoded as NumPy integer arrays and the nearest-neighbor sums are taken
+from cumulative sums, so any number of windows of one sequence (or of a
+whole design, see stapleThermodynamics) are evaluated in one vectorized
+pass.
+
+Settings, as a dict overriding the defaults below:
+
+    'na'           monovalent salt, M
+    'mg'           Mg2+, M, folded in as sodium equivalents (von Ahsen
+                   et al. 2001: Na + 120 sqrt(Mg - dNTP), in mM)
+    'dntp'         dNTPs, M
+    'strandConc'   total strand concentration Ct, M
+    'concFactor'   x in Tm = dH / (dS + R ln(Ct / x)); 4 for two
+                   strands at equal concentration, 1 for one in excess
+    'temperature'  temperature of dG, Celsius
+
+Windows with unknown bases (no sequence applied) or shorter than two
+bases give NaN. The symmetry correction of self-complementary duplexes
+is left out; for staple lengths it is under a degree.
+"""
+
+from collections import namedtuple
+import math
+
+import numpy as np
+
+defaults = {'na': 0.05, 'mg': 0.0125, 'dntp': 0.0, 'strandConc': 1e-7,
+            'concFactor': 4, 'temperature': 37.0}
+
+R = 1.9872  # gas constant, cal / (K mol)
+
+# stack -> (dH kcal/mol, dS cal/(K mol)), each also stands for its
+# reverse complement
+_stacks = {'AA': (-7.9, -22.2), 'AT': (-7.2, -20.4), 'TA': (-7.2, -21.3),
+           'CA': (-8.5, -22.7), 'GT': (-8.4, -22.4), 'CT': (-7.8, -21.0),
+           'GA': (-8.2, -22.2), 'CG': (-10.6, -27.2), 'GC': (-9.8, -24.4),
+           'GG': (-8.0, -19.9)}
+# initiation, per terminal base pair
+_initGC = (0.1, -2.8)
+_initAT = (2.3, 4.1)
+
+UNKNOWN = 4  # code of bases other than ACGT
+_encoding = np.empty(256, dtype=np.uint8)
+_encoding.fill(UNKNOWN)
+for _i, _base in enumerate('ACGT'):
+    _encoding[ord(_base)] = _encoding[ord(_base.lower())] = _i
+
+
+def _stackTables():
+    """Returns the (16,) dH and dS arrays indexed by 4 * 5' base + 3' base."""
+    comp = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'}
+    dH = np.zeros(16)
+    dS = np.zeros(16)
+    for stack, (h, s) in _stacks.iteritems():
+        rc = comp[stack[1]] + comp[stack[0]]
+        for pair in (stack, rc):
+            i = 4 * 'ACGT'.index(pair[0]) + 'ACGT'.index(pair[1])
+            dH[i], dS[i] = h, s
+    return dH, dS
+# end def
+
+_dH, _dS = _stackTables()
+
+Thermo = namedtuple('Thermo', ['dH', 'dS', 'dG', 'tm'])
+# one staple oligo; domains holds a DomainThermo per strand, 5' to 3'
+StapleThermo = namedtuple('StapleThermo', ['oligo', 'tm', 'dG', 'domains'])
+DomainThermo = namedtuple('DomainThermo', ['strand', 'tm', 'dG'])
+
+
+def encode(sequence):
+    """Returns sequence as a uint8 array, A C G T = 0 1 2 3, others 4."""
+    return _encoding[np.frombuffer(str(sequence), dtype=np.uint8)]
+# end def
+
+
+def sodiumEquivalent(settings):
+    """Returns the sodium equivalent of the salts in settings, in M."""
+    s = dict(defaults, **settings) if settings else defaults
+    free = max(s['mg'] - s['dntp'], 0.0) * 1000
+    return (s['na'] * 1000 + 120 * math.sqrt(free)) / 1000
+# end def
+
+
+def stackValues(first, second):
+    """
+    Returns the (dH, dS) of the stacks 5'-first second-3', from arrays of
+    codes. Stacks with an unknown base are NaN.
+    """
+    first = np.asarray(first, dtype=np.intp)
+    second = np.asarray(second, dtype=np.intp)
+    ok = (first != UNKNOWN) & (second != UNKNOWN)
+    stack = np.where(ok, 4 * first + second, 0)
+    nan = np.where(ok, 1.0, np.nan)
+    return _dH[stack] * nan, _dS[stack] * nan
+# end def
+
+
+def initiation(first, last):
+    """
+    Returns the (dH, dS) initiation terms of duplexes with the codes first
+    and last at their ends. Either strand's codes give the same terms.
+    """
+    isAT5 = (first == 0) | (first == 3)
+    isAT3 = (last == 0) | (last == 3)
+    return np.where(isAT5, _initAT[0], _initGC[0]) + \
+           np.where(isAT3, _initAT[0], _initGC[0]), \
+           np.where(isAT5, _initAT[1], _initGC[1]) + \
+           np.where(isAT3, _initAT[1], _initGC[1])
+# end def
+
+
+def thermo(dH, dS, lengths, settings=None):
+    """
+    Returns a Thermo of arrays for duplexes with the nearest-neighbor and
+    initiation sums dH and dS (at 1 M Na+) and lengths in bases, at the
+    salt, concentration and temperature of settings.
+    """
+    s = dict(defaults, **settings) if settings else defaults
+    # SantaLucia 1998 salt correction, one phosphate per stack
+    dS = dS + 0.368 * (np.asarray(lengths) - 1) * \
+                                    math.log(sodiumEquivalent(s))
+    dG = dH - (s['temperature'] + 273.15) * dS / 1000
+    tm = 1000 * dH / (dS + R * math.log(s['strandConc'] / \
+                                        s['concFactor'])) - 273.15
+    return Thermo(dH, dS, dG, tm)
+# end def
+
+
+class SequenceWindows(object):
+    """
+    The nearest-neighbor sums of one sequence, for evaluating many of its
+    windows at once. If circular, windows may run past the end and wrap
+    around to the start (lengths up to the sequence length).
+    """
+    def __init__(self, sequence, settings=None, circular=False):
+        self._settings = dict(defaults, **settings) if settings else \
+                                                        dict(defaults)
+        codes = encode(sequence)
+        self._n = len(codes)
+        if circular:
+            codes = np.concatenate((codes, codes))
+        self._codes = codes
+        valid = (codes[:-1] != UNKNOWN) & (codes[1:] != UNKNOWN)
+        stack = np.where(valid, 4 * codes[:-1].astype(np.intp) + codes[1:], 0)
+        self._cumH = np.concatenate(([0.0], np.cumsum(np.where(valid,
+                                                    _dH[stack], 0.0))))
+        self._cumS = np.concatenate(([0.0], np.cumsum(np.where(valid,
+                                                    _dS[stack], 0.0))))
+        self._cumUnknown = np.concatenate(([0],
+                                    np.cumsum(codes == UNKNOWN)))
+    # end def
+
+    def __len__(self):
+        return self._n
+    # end def
+
+    def stackSums(self, starts, lengths):
+        """
+        Returns the (dH, dS) sums of the nearest-neighbor stacks within the
+        windows [start, start + length), arrays of any shape, without
+        initiation or salt. Windows with unknown bases, shorter than two
+        bases or out of range are NaN.
+        """
+        starts = np.asarray(starts, dtype=np.intp)
+        lengths = np.asarray(lengths, dtype=np.intp)
+        if len(self._codes) < 2:
+            nan = np.empty(np.broadcast(starts, lengths).shape)
+            nan.fill(np.nan)
+            return nan, nan
+        ends = starts + lengths
+        ok = (lengths >= 2) & (starts >= 0) & (ends <= len(self._codes))
+        starts = np.where(ok, starts, 0)
+        ends = np.where(ok, ends, 2)
+        ok &= (self._cumUnknown[ends] - self._cumUnknown[starts]) == 0
+        nan = np.where(ok, 1.0, np.nan)
+        return (self._cumH[ends - 1] - self._cumH[starts]) * nan, \
+               (self._cumS[ends - 1] - self._cumS[starts]) * nan
+    # end def
+
+    def evaluate(self, starts, lengths):
+        """
+        Returns a Thermo of arrays for the windows [start, start + length).
+        dH is in kcal/mol, dS in cal/(K mol) at the settings' salt, dG in
+        kcal/mol at the settings' temperature and tm in Celsius.
+        """
+        starts = np.asarray(starts, dtype=np.intp)
+        lengths = np.asarray(lengths, dtype=np.intp)
+        dH, dS = self.stackSums(starts, lengths)
+        n = len(self._codes)
+        if n:
+            first = self._codes[np.clip(starts, 0, n - 1)]
+            last = self._codes[np.clip(starts + lengths - 1, 0, n - 1)]
+            initH, initS = initiation(first, last)
+            dH, dS = dH + initH, dS + initS
+        return thermo(dH, dS, lengths, self._settings)
+    # end def
+# end class
+
+
+def evaluate(sequences, settings=None):
+    """Returns a Thermo of arrays, one entry per sequence in sequences."""
+    sequences = [str(seq) if seq else '' for seq in sequences]
+    lengths = np.array([len(seq) for seq in sequences], dtype=np.intp)
+    # one unknown base between sequences keeps stacks from spanning two
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])) \
+                                        if sequences else lengths
+    windows = SequenceWindows('N'.join(sequences), settings)
+    return windows.evaluate(starts, lengths)
+# end def
+
+
+def stapleThermodynamics(part, settings=None):
+    """
+    Returns a StapleThermo for every staple oligo of part with the Tm and
+    dG of the whole staple and of each of its strands (the per-helix
+    domains), all computed in one pass. Values are None where no sequence
+    has been applied.
+    """
+    oligos = [o for o in list(part.oligos()) if o.isStaple()]
+    sequences = []
+    strandLists = []
+    for oligo in oligos:
+        strands = list(oligo.strand5p().generator3pStrand())
+        strandLists.append(strands)
+        sequences.append(oligo.sequence())
+        sequences.extend(strand.sequence() for strand in strands)
+    result = evaluate(sequences, settings)
+    tm = [None if np.isnan(t) else float(t) for t in result.tm]
+    dG = [None if np.isnan(g) else float(g) for g in result.dG]
+    ret = []
+    i = 0
+    for oligo, strands in zip(oligos, strandLists):
+        domains = [DomainThermo(strand, tm[i + j + 1], dG[i + j + 1]) \
+                                        for j, strand in enumerate(strands)]
+        ret.append(StapleThermo(oligo, tm[i], dG[i], domains))
+        i += len(strands) + 1
+    return ret
+# end def
@@ -58,6 +58,7 @@ class VirtualHelix(QObject):
         # the virtualhelix owns self._number and may modify it.
         self._number = None
         self.setNumber(idnum)
+        self._revision = part.nextRevision()
     # end def
 
     def __repr__(self):
@@ -94,6 +95,19 @@ class VirtualHelix(QObject):
         return self._doc
     # end def
     
+    def revision(self):
+        return self._revision
+    # end def
+
+    def touch(self):
+        """
+        Marks this helix as modified. Called by the low-level strand, xover
+        and insertion mutators so consumers such as the design rule checker
+        can re-examine only the helices an edit touched.
+        """
+        self._revision = self._part.nextRevision()
+    # end def
+
     def setNumber(self, number):
         if self._number != number:
             numToVhDict = self._part._numberToVirtualHelix
@@ -1,22 +1,13 @@
+"""
+The AutoBreak action is declared in plugin.json, so cadnano adds it to
+every window at startup and imports this package only when it is first
+triggered (see cadnano.registerPlugin).
+"""
 from autobreakconfig import AutobreakConfig
-import cadnano, util
-util.qtWrapImport('QtGui', globals(), ['QIcon', 'QPixmap', 'QAction'])
 
 class AutobreakHandler(object):
     def __init__(self, document, window):
         self.doc, self.win = document, window
-        icon10 = QIcon()
-        icon10.addPixmap(QPixmap(":/pathtools/autobreak"), QIcon.Normal, QIcon.Off)
-        self.actionAutoBreak = QAction(window)
-        self.actionAutoBreak.setIcon(icon10)
-        self.actionAutoBreak.setText('AutoBreak')
-        self.actionAutoBreak.setToolTip("Click this button to generate a default set of staples.")
-        self.actionAutoBreak.setObjectName("actionAutoBreak")
-        self.actionAutoBreak.triggered.connect(self.actionAutobreakSlot)
-        self.win.menuPlugins.addAction(self.actionAutoBreak)
-        # add to main tool bar
-        self.win.topToolBar.insertAction(self.win.actionFiltersLabel, self.actionAutoBreak)
-        self.win.topToolBar.insertSeparator(self.win.actionFiltersLabel)
         self.configDialog = None
 
     def actionAutobreakSlot(self):
@@ -30,11 +21,10 @@ class AutobreakHandler(object):
                     self.configDialog.show()
                     return
 
-def documentWindowWasCreatedSlot(doc, win):
-    doc.autobreakHandler = AutobreakHandler(doc, win)
-
-# Initialization
-for c in cadnano.app().documentControllers:
-    doc, win = c.document(), c.window()
-    doc.autobreakHandler = AutobreakHandler(doc, win)
-cadnano.app().documentWindowWasCreatedSignal.connect(documentWindowWasCreatedSlot)
+def actionAutobreakSlot(document, window):
+    """Entry point of the AutoBreak action."""
+    handler = getattr(document, 'autobreakHandler', None)
+    if handler is None:
+        handler = AutobreakHandler(document, window)
+        document.autobreakHandler = handler
+    handler.actionAutobreakSlot()
@@ -6,6 +6,8 @@ from model.parts.part import Part
 from model.oligo import Oligo
 from multiprocessing import Pool, cpu_count
 from operator import itemgetter
+from itertools import izip
+from jobs import Job
 
 try:
     import staplegraph
@@ -15,16 +17,22 @@ except:
 
 token_cache = {}
 
-def breakStaples(part, settings):
-    clearTokenCache()
+def oligosToBreak(part):
+    """
+    Returns the selected staple oligos of part, or all of them if none are
+    selected, and clears the selection.
+    """
     breakOligos = part.document().selectedOligos()
     if not breakOligos:
         breakOligos = part.oligos()
     else:
         part.document().clearAllSelected()
-    for o in list(breakOligos):
-        if not o.isStaple():
-            continue
+    return [o for o in list(breakOligos) if o.isStaple()]
+# end def
+
+def breakStaples(part, settings):
+    clearTokenCache()
+    for o in oligosToBreak(part):
         if nx:
             nxBreakStaple(o, settings)
         else:
@@ -33,6 +41,18 @@ def breakStaples(part, settings):
 # end def
 
 def nxBreakStaple(oligo, settings):
+    problem = nxStapleProblem(oligo, settings)
+    if problem is None:
+        return
+    nxApplySolution(oligo, problem, nxSolveStaple(problem))
+# end def
+
+def nxStapleProblem(oligo, settings):
+    """
+    Reads what nxSolveStaple needs from oligo. Returns None if the oligo is
+    too short to break. The problem is plain data, so it can be solved off
+    the UI thread (see AutobreakJob).
+    """
     stapleScorer = settings.get('stapleScorer', tgtLengthStapleScorer)
     minStapleLegLen = settings.get('minStapleLegLen', 3)
     minStapleLen = settings.get('minStapleLen', 30)
@@ -45,54 +65,134 @@ def nxBreakStaple(oligo, settings):
 
     # print "tkList", tokenList, oligo.length(), oligo.color()
     if len(tokenList) == 0:
-        return
-    cacheString = stringifyToken(oligo, tokenList)
+        return None
+    problem = {'tokenList': tokenList,
+               'cacheString': stringifyToken(oligo, tokenList),
+               'isLoop': oligo.isLoop(),
+               'minStapleLegLen': minStapleLegLen,
+               'stapleLimits': [minStapleLen, maxStapleLen, tgtStapleLen],
+               'tmTerm': None}
+    tgtStapleTm = settings.get('tgtStapleTm')
+    sequence = oligo.sequence()
+    if tgtStapleTm is not None and sequence:
+        # tokenList[0] of a loop starts with the last strand's final bases
+        offset = -loopTokenLength(oligo, settings) if oligo.isLoop() else 0
+        problem['tmTerm'] = {'sequence': sequence,
+                             'offset': offset,
+                             'tgtTm': tgtStapleTm,
+                             'weight': settings.get('tmWeight', 1.0),
+                             'thermoSettings': settings.get('thermoSettings')}
+        problem['cacheString'] += '%s%r' % (sequence,
+                        sorted((k, v) for k, v in problem['tmTerm'].items() \
+                                                    if k != 'sequence'))
+    return problem
+# end def
+
+def nxSolveStaple(problem):
+    """
+    Returns (breakItems, startingToken) for a problem from nxStapleProblem,
+    or None if the oligo can't be broken. Doesn't touch the model.
+    """
+    tokenList = problem['tokenList']
+    cacheString = problem['cacheString']
     if cacheString in token_cache:
         # print "cacheHit!"
-        breakItems, shortestScoreIdx = token_cache[cacheString]
-        nxPerformBreaks(oligo, breakItems, tokenList, shortestScoreIdx, minStapleLegLen)
-    else:
-        staple_limits = [minStapleLen, maxStapleLen, tgtStapleLen] 
-        tokenLists = [(tokenList, staple_limits,0)]
-        tokenCount = tokenList[0]
-        if oligo.isLoop():
-            lenList = len(tokenList)
-            for i in range(1, lenList):
-                if tokenCount > 2*maxStapleLen:
-                    break
-                tL = tokenLists[i-1][0]
-                rotatedList =  tL[1:-1] + tL[0:1]   # assumes lenList > 1
-                tokenCount += rotatedList[0]
-                tokenLists.append((rotatedList, staple_limits, i))
-            # end for
-        # end if
-        # p = Pool(cpu_count() * 2)
-        # p = Pool(4)
-        # returns ( [breakStart, [breakLengths, ], score], tokenIdx)
-        # results = p.map(staplegraph.minimumPath, tokenLists)
-        results = map(staplegraph.minimumPath, tokenLists)
-
-        f = itemgetter(0)   # get the graph results
-        g = itemgetter(2)    # get the score
-        # so this is
-        scoreTuple = min(results, key=lambda x: g(f(x)) if x else 10000)
-        # ensure there's at least one result
-        if scoreTuple:
-            shortestScore, shortestScoreIdx = scoreTuple
-            breakItems = results[shortestScoreIdx][0][1]
-            addToTokenCache(cacheString, breakItems, shortestScoreIdx)
-            nxPerformBreaks(oligo, breakItems, tokenList, shortestScoreIdx, minStapleLegLen)
-        else:
-            if oligo.isLoop():
-                print "unbroken Loop", oligo, oligo.length()
+        return token_cache[cacheString]
+    staple_limits = problem['stapleLimits']
+    maxStapleLen = staple_limits[1]
+    tmTerm = problem.get('tmTerm')
+    scorer = TmStapleScorer(tmTerm, problem['isLoop']) if tmTerm else None
+    # the base of the oligo each token list starts at, for the scorer
+    startBase = 0
+    tokenLists = [(tokenList, staple_limits, 0, (scorer, startBase))]
+    tokenCount = tokenList[0]
+    if problem['isLoop']:
+        lenList = len(tokenList)
+        for i in range(1, lenList):
+            if tokenCount > 2*maxStapleLen:
+                break
+            tL = tokenLists[i-1][0]
+            startBase += tL[0]
+            rotatedList =  tL[1:-1] + tL[0:1]   # assumes lenList > 1
+            tokenCount += rotatedList[0]
+            tokenLists.append((rotatedList, staple_limits, i,
+                               (scorer, startBase)))
+        # end for
+    # end if
+    # p = Pool(cpu_count() * 2)
+    # p = Pool(4)
+    # returns ( [breakStart, [breakLengths, ], score], tokenIdx)
+    # results = p.map(staplegraph.minimumPath, tokenLists)
+    results = map(staplegraph.minimumPath, tokenLists)
+
+    f = itemgetter(0)   # get the graph results
+    g = itemgetter(2)    # get the score
+    # so this is
+    scoreTuple = min(results, key=lambda x: g(f(x)) if x else 10000)
+    # ensure there's at least one result
+    if not scoreTuple:
+        return None
+    shortestScore, shortestScoreIdx = scoreTuple
+    breakItems = results[shortestScoreIdx][0][1]
+    addToTokenCache(cacheString, breakItems, shortestScoreIdx)
+    return breakItems, shortestScoreIdx
+# end def
+
+def nxApplySolution(oligo, problem, solution):
+    if solution:
+        breakItems, shortestScoreIdx = solution
+        nxPerformBreaks(oligo, breakItems, problem['tokenList'],
+                        shortestScoreIdx, problem['minStapleLegLen'])
+    elif problem['isLoop']:
+        print "unbroken Loop", oligo, oligo.length()
 # end def
 
+class AutobreakJob(Job):
+    """
+    Autobreak as a background job: the oligos are tokenized on the UI
+    thread, the break points are found in the worker thread and the breaks
+    are applied as one "Auto-Break" macro.
+    """
+    description = "Auto-Break"
+
+    def __init__(self, part, settings):
+        super(AutobreakJob, self).__init__(part)
+        self._settings = settings
+    # end def
+
+    def snapshot(self):
+        clearTokenCache()
+        self._oligos = oligosToBreak(self.part())
+        if not nx:
+            print "Not breaking"
+            self._oligos = []
+        self._problems = [nxStapleProblem(o, self._settings) \
+                                                    for o in self._oligos]
+        return self._problems
+    # end def
+
+    def compute(self, problems):
+        solutions = []
+        for i, problem in enumerate(problems):
+            self.setProgress(i, len(problems))
+            solutions.append(nxSolveStaple(problem) if problem else None)
+        return solutions
+    # end def
+
+    def apply(self, solutions):
+        for oligo, problem, solution in \
+                                izip(self._oligos, self._problems, solutions):
+            if problem is not None:
+                nxApplySolution(oligo, problem, solution)
+    # end def
+# end class
+
 def addToTokenCache(cacheString, breakItems, shortestScoreIdx):
     token_cache[cacheString] = (breakItems, shortestScoreIdx)
 # end def
 
 def clearTokenCache():
-    token_cache = {}
+    token_cache.clear()
 # end def
 
 def stringifyToken(oligo, tokenList):
@@ -151,6 +251,19 @@ def tokenizeOligo(oligo, settings):
     return tokenList
 # end def
 
+def loopTokenLength(oligo, settings):
+    """
+    Returns the length of the last token of a loop oligo, which
+    tokenizeOligo moves to the start of the token list.
+    """
+    minStapleLegLen = settings.get('minStapleLegLen', 2)
+    strand = oligo.strand5p().connection5p()
+    a = strand.totalLength()
+    if a > 2*minStapleLegLen-1 and not strand.hasInsertion():
+        return minStapleLegLen
+    return a
+# end def
+
 def nxPerformBreaks(oligo, breakItems, tokenList, startingToken, minStapleLegLen):
     """ fullBreakptSoln is in the format of an IBS (see breakStrands).
     This function performs the breaks proposed by the solution. """
@@ -232,6 +345,39 @@ def tgtLengthStapleScorer(currentIBS, proposedNextBreakNode, settings):
     # a single larger deviation.
     return abs(stapleLen - tgtStapleLen)**3
 
+class TmStapleScorer(object):
+    """
+    The optional melting temperature term of nxSolveStaple. Scores staples
+    by weight * |Tm - tgtTm|, from the 'tmTerm' of nxStapleProblem, which
+    is set when settings has a 'tgtStapleTm' and the oligo has a sequence.
+    The Tm of all the candidate staples of a token list are computed in
+    one vectorized pass (see model.thermodynamics). Staples with unknown
+    bases score 0.
+    """
+    def __init__(self, tmTerm, isLoop):
+        from model.thermodynamics import SequenceWindows
+        self._windows = SequenceWindows(tmTerm['sequence'],
+                                        tmTerm['thermoSettings'],
+                                        circular=isLoop)
+        self._offset = tmTerm['offset']
+        self._tgtTm = tmTerm['tgtTm']
+        self._weight = tmTerm['weight']
+    # end def
+
+    def __call__(self, starts, lengths):
+        """
+        Returns the scores of the staples at bases starts (counted from
+        the start of the token list) with lengths, as an array.
+        """
+        import numpy as np
+        n = len(self._windows)
+        starts = (np.asarray(starts) + self._offset) % n
+        tm = self._windows.evaluate(starts, lengths).tm
+        scores = self._weight * np.abs(tm - self._tgtTm)
+        return np.where(np.isnan(scores), 0.0, scores)
+    # end def
+# end class
+
 def breakStaple(oligo, settings):
     # We were passed a super-long, highly suboptimal staple in the
     # oligo parameter. Our task is to break it into more reasonable staples.
@@ -55,12 +55,6 @@ class AutobreakConfig(QDialog, autobreakconfig_ui.Ui_Dialog):
                 'minStapleLen'    : self.minLengthSpinBox.value(),\
                 'maxStapleLen'    : self.maxLengthSpinBox.value(),\
             }
-            self.handler.win.pathGraphicsView.setViewportUpdateOn(False)
-            # print "pre verify"
-            # part.verifyOligos()
-            # print "breakStaples"
-            autobreak.breakStaples(part, settings)
-            # print "post break verify"
-            # part.verifyOligos()
-            self.handler.win.pathGraphicsView.setViewportUpdateOn(True)
+            job = autobreak.AutobreakJob(part, settings)
+            self.handler.doc.controller().runJob(job)
         self.close()
@@ -73,9 +73,17 @@ MAX_IND = 1     # maximum length index
 OPT_IND = 2     # optimum length index
 
 def minimumPath(tokenlist_and_staple_limits):
-    tokenList, staple_limits, idx = tokenlist_and_staple_limits
+    """
+    Takes (tokenList, staple_limits, idx) or, with an extra edge scorer,
+    (tokenList, staple_limits, idx, (scorer, start_base)); see StapleGraph.
+    """
+    tokenList, staple_limits, idx = tokenlist_and_staple_limits[0:3]
+    scorer, start_base = None, 0
+    if len(tokenlist_and_staple_limits) > 3:
+        scorer, start_base = tokenlist_and_staple_limits[3]
     sg = StapleGraph(token_list_in=tokenList, \
-                    staple_limits=staple_limits)
+                    staple_limits=staple_limits, \
+                    scorer=scorer, start_base=start_base)
     # print sg.graph().nodes(), sg.graph().edges()
     # if len(sg.graph().nodes()) > 1:
         # print "total nodes:", len(sg.graph().nodes())
@@ -94,7 +102,8 @@ class StapleGraph(object):
     """
     
     """
-    def __init__(self,token_list_in=[4,7,6,5,7,8,3], staple_limits=[3,18,10]):
+    def __init__(self,token_list_in=[4,7,6,5,7,8,3], staple_limits=[3,18,10],
+                 scorer=None, start_base=0):
         """
         Constructor  takes a
         
@@ -102,7 +111,14 @@ class StapleGraph(object):
             points in a staple
         staple_limits: min staple length, max staple length, optimum 
             staple length 
+        scorer: optional, called once with the arrays of start bases and
+            lengths of all the edges, returns an array of extra weights
+            (see autobreak.TmStapleScorer)
+        start_base: the base of the staple the token list starts at, 
+            passed on to the scorer
         """
+        self.scorer = scorer
+        self.start_base = start_base
             
         self.token_list = token_list_in
         self.token_list_length = len(self.token_list)
@@ -148,6 +164,9 @@ class StapleGraph(object):
         current_staple_length = 0
         index_to_build = 0
         token_sum = 0
+        # edges in the order they go into the graph, as (from, to, weight,
+        # start base, length), so the scorer weighs all staples in one call
+        edges = []
         
         for ind in range(self.token_list_length):
             from_node_index = ind + 1 # no '0' node all non-zero
@@ -156,7 +175,7 @@ class StapleGraph(object):
             from_node_index = -from_node_index
             current_staple_length = 0
             visited_edge_counter = 1
-            self.G.add_weighted_edges_from([(ind+1, from_node_index,0)])
+            edges.append((ind+1, from_node_index, 0, None, 0))
             
             """
             We limit the size of the graph by using the cutoffs of max_staple_length
@@ -175,13 +194,23 @@ class StapleGraph(object):
                 current_staple_length += self.token_list[edge_index]
                 if (current_staple_length > self.min_staple_length):
                     root_mean_sq = abs(current_staple_length-self.optimum_staple)
-                    self.G.add_weighted_edges_from([(from_node_index, to_node_index, root_mean_sq)])
+                    edges.append((from_node_index, to_node_index, root_mean_sq,
+                                  token_sum, current_staple_length))
                 # end if
                 to_node_index += 1
                 edge_index += 1
                 visited_edge_counter +=1
             # end while
+            token_sum += self.token_list[ind]
         # end for
+        staples = [e for e in edges if e[3] is not None]
+        if self.scorer is not None and staples:
+            extra = self.scorer([self.start_base + e[3] for e in staples],
+                                [e[4] for e in staples])
+            extra = iter(extra)
+            edges = [e if e[3] is None else \
+                     (e[0], e[1], e[2] + float(extra.next())) for e in edges]
+        self.G.add_weighted_edges_from([e[0:3] for e in edges])
     #end def
 
     def draw(self):
@@ -0,0 +1,200 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+startupprofiler.py
+
+Cold start timing. Start cadnano with --profile-startup and it prints,
+once the path view of the first window has painted:
+
+    * the time from the start of main.py to that first paint
+    * a tree of the imports that loaded new modules, with their total and
+      self times
+    * which of deferredModules were imported anyway
+
+--quit-after-startup does the same and then quits, which is what
+tests/startuptests.py runs. The import hook is removed after the report,
+so the rest of the session runs at full speed.
+
+This module imports nothing from cadnano or Qt at load time, so main.py
+can install it before anything else is imported.
+"""
+
+import __builtin__
+import sys
+from timeit import default_timer
+
+# modules that are imported on first use, not at startup
+deferredModules = ('OpenGL', 'PyQt4.QtOpenGL', 'PyQt4.QtSvg',
+                   'ui.dialogs.ui_preferences', 'ui.dialogs.dialogicons_rc',
+                   'ui.dialogs.ui_about', 'ui.dialogs.ui_addseq',
+                   'views.pathview.tools.addseqtool', 'autobreak',
+                   'networkx')
+
+_realImport = None
+_t0 = None
+_root = None
+_stack = []
+_timeToWindow = None
+_firstPaintFilter = None
+
+
+class ImportNode(object):
+    """One import statement that loaded at least one new module."""
+    __slots__ = ('name', 'total', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.total = 0.0
+        self.children = []
+    # end def
+
+    def selfTime(self):
+        return self.total - sum(child.total for child in self.children)
+    # end def
+# end class
+
+
+def _timedImport(name, globals=None, locals=None, fromlist=None, level=-1):
+    before = len(sys.modules)
+    node = ImportNode(name)
+    parent = _stack[-1]
+    _stack.append(node)
+    start = default_timer()
+    try:
+        return _realImport(name, globals, locals, fromlist, level)
+    finally:
+        node.total = default_timer() - start
+        _stack.pop()
+        if len(sys.modules) > before:  # leave out imports of loaded modules
+            parent.children.append(node)
+# end def
+
+
+### PUBLIC API ###
+def install():
+    """Starts timing imports. Call it as early as possible."""
+    global _realImport, _t0, _root, _stack
+    if _realImport is not None:
+        return
+    _t0 = default_timer()
+    _root = ImportNode('(startup)')
+    _stack = [_root]
+    _realImport = __builtin__.__import__
+    __builtin__.__import__ = _timedImport
+# end def
+
+
+def uninstall():
+    """Stops timing imports. The tree recorded so far is kept."""
+    global _realImport
+    if _realImport is not None:
+        __builtin__.__import__ = _realImport
+        _realImport = None
+        _root.total = default_timer() - _t0
+# end def
+
+
+def isInstalled():
+    return _realImport is not None
+# end def
+
+
+def timeToWindow():
+    """Returns the seconds from install() to the first paint, or None."""
+    return _timeToWindow
+# end def
+
+
+def importTree():
+    """Returns the root ImportNode; its children are top level imports."""
+    return _root
+# end def
+
+
+def deferredModulesImported():
+    """Returns the deferredModules (or their submodules) now loaded."""
+    loaded = [name for name, mod in sys.modules.items() if mod is not None]
+    return sorted(d for d in deferredModules \
+                  if any(n == d or n.startswith(d + '.') for n in loaded))
+# end def
+
+
+def report(minMs=1.0):
+    """
+    Returns the text report: time to window, the import tree without the
+    imports that took less than minMs, and the deferred modules that were
+    imported anyway.
+    """
+    lines = []
+    if _timeToWindow is not None:
+        lines.append("Time to window: %.1f ms" % (_timeToWindow * 1000))
+    lines.append("Imports of %.1f ms and over (total ms, self ms):" % minMs)
+
+    def addNode(node, depth):
+        for child in node.children:
+            if child.total * 1000 < minMs:
+                continue
+            lines.append("%8.1f %8.1f  %s%s" % (child.total * 1000,
+                                                child.selfTime() * 1000,
+                                                '  ' * depth, child.name))
+            addNode(child, depth + 1)
+    if _root is not None:
+        addNode(_root, 0)
+    deferred = deferredModulesImported()
+    lines.append("Deferred modules imported: %s" % \
+                                        (', '.join(deferred) or 'none'))
+    return '\n'.join(lines)
+# end def
+
+
+def watchWindow(window, quitAfter=False):
+    """
+    Records the time of the first paint of window's path view, then prints
+    the report and removes the import hook. Quits the application
+    afterwards if quitAfter.
+    """
+    global _firstPaintFilter
+    import util
+    util.qtWrapImport('QtCore', globals(), ['QCoreApplication', 'QEvent',
+                                            'QObject', 'QTimer'])
+
+    class FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            global _timeToWindow
+            if event.type() == QEvent.Paint and _timeToWindow is None:
+                _timeToWindow = default_timer() - _t0
+                obj.removeEventFilter(self)
+                uninstall()
+                print report()
+                sys.stdout.flush()
+                if quitAfter:
+                    QTimer.singleShot(0, QCoreApplication.instance().quit)
+            return False
+        # end def
+    # end class
+
+    _firstPaintFilter = FirstPaintFilter()
+    window.pathGraphicsView.viewport().installEventFilter(_firstPaintFilter)
+# end def
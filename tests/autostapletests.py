@@ -0,0 +1,115 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+autostapletests.py
+
+Checks the staple layout made by Part.autoStaple against fingerprints of
+the layout made by the original temporary-strand implementation, for
+every design in tests/functionaltestinputs.
+
+Run these tests by calling "python -m tests.autostapletests" from cadnano2
+root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import hashlib
+import os
+import unittest
+
+import cadnano
+from model.designdiff import loadPart
+
+inputDir = "tests/functionaltestinputs"
+
+# design: (staple strands, staple crossovers, sha1 of the layout), as
+# made by the original Part.autoStaple
+referenceLayouts = {
+    'Nature09_monolith.json':
+        (812, 752, '673fd9cdd3977b5b099d4654bb02f5307a49f54d'),
+    'Nature09_squarenut.json':
+        (818, 758, 'a5bbb66d422418040b503e6593323d79e35683bd'),
+    'Science09_beachball_v1.json':
+        (328, 274, '5b955351d36ba705c1736873420b2f4695c77056'),
+    'Science09_prot120_98_v3.json':
+        (748, 728, 'b7256295f05bba17a4c13ee2723cfbc1a2cd246f'),
+    'gap_vs_skip.json':
+        (3, 0, '75c559d64a1c6876d46cb9c21e4798235cd9bd51'),
+    'loop_size_1.json':
+        (1, 0, 'b129d0477be01dac7a86f8221e20d27eb1c71387'),
+    'loops_and_skips.json':
+        (1, 0, 'f8bab0c1f04d4e796d619425c825db372c3f03fa'),
+    'simple42legacy.json':
+        (1, 0, 'f8bab0c1f04d4e796d619425c825db372c3f03fa'),
+    'skip.json':
+        (1, 0, 'b129d0477be01dac7a86f8221e20d27eb1c71387'),
+}
+
+
+def stapleLayout(part):
+    """
+    Returns a sorted list of (helix number, lowIdx, highIdx, 3' xover) for
+    every staple strand of part, where 3' xover is None or the (helix
+    number, 5' idx) of the strand it connects to.
+    """
+    layout = []
+    for vh in part.getVirtualHelices():
+        for strand in vh.stapleStrandSet():
+            strand3p = strand.connection3p()
+            if strand3p is None:
+                xover = None
+            else:
+                xover = (strand3p.virtualHelix().number(),
+                         strand3p.idx5Prime())
+            layout.append((vh.number(), strand.lowIdx(), strand.highIdx(),
+                           xover))
+    return sorted(layout)
+
+
+def layoutFingerprint(layout):
+    """(staple strands, staple crossovers, sha1) of a stapleLayout."""
+    xovers = len([s for s in layout if s[3] is not None])
+    return (len(layout), xovers, hashlib.sha1(repr(layout)).hexdigest())
+
+
+class AutoStapleTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+
+    def testAllInputsCovered(self):
+        designs = [f for f in os.listdir(inputDir) if f.endswith('.json')]
+        self.assertEqual(sorted(designs), sorted(referenceLayouts))
+
+    def testMatchesReference(self):
+        for design, reference in sorted(referenceLayouts.iteritems()):
+            part = loadPart("%s/%s" % (inputDir, design))[1]
+            part.autoStaple()
+            self.assertEqual(layoutFingerprint(stapleLayout(part)),
+                             reference, design)
+
+
+if __name__ == "__main__":
+    unittest.main()
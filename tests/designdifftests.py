@@ -0,0 +1,105 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+designdifftests.py
+
+Checks that applying the diff between two designs (model/designdiff.py)
+turns the first into the second, and that undo turns it back.
+
+Run these tests by calling "python -m tests.designdifftests" from cadnano2
+root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import unittest
+
+import cadnano
+from model.designdiff import diffParts, loadPart
+
+inputDir = "tests/functionaltestinputs"
+
+# (old design, new design) pairs of the same lattice
+designPairs = [("skip.json", "loops_and_skips.json"),
+               ("gap_vs_skip.json", "skip.json"),
+               ("simple42legacy.json", "loop_size_1.json")]
+
+# designs diffed against an autostapled copy of themselves
+autoStapleDesigns = ["Nature09_monolith.json"]
+
+
+def loadDesign(designname):
+    return loadPart("%s/%s" % (inputDir, designname))[1]
+
+
+def stapledDesign(designname):
+    part = loadDesign(designname)
+    part.autoStaple()
+    return part
+
+
+class DesignDiffTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+
+    def pairs(self):
+        for old, new in designPairs:
+            yield "%s -> %s" % (old, new), loadDesign(old), loadDesign(new)
+        for design in autoStapleDesigns:
+            yield "%s -> autostapled" % design, loadDesign(design), \
+                                                    stapledDesign(design)
+
+    def testSameDesignIsEmpty(self):
+        for design in autoStapleDesigns:
+            diff = diffParts(loadDesign(design), loadDesign(design))
+            self.assertTrue(diff.isEmpty(), diff.summary())
+
+    def testApplyThenRediffIsEmpty(self):
+        for name, old, new in self.pairs():
+            diff = diffParts(old, new)
+            self.assertFalse(diff.isEmpty(), name)
+            diff.apply(old)
+            rediff = diffParts(old, new)
+            self.assertTrue(rediff.isEmpty(),
+                            "%s: %s" % (name, rediff.summary()))
+            self.assertEqual(old.fingerprint().partHash(),
+                             new.fingerprint().partHash(), name)
+
+    def testUndoRestoresPart(self):
+        for name, old, new in self.pairs():
+            startHash = old.fingerprint().partHash()
+            stack = old.undoStack()
+            diffParts(old, new).apply(old)
+            stack.undo()
+            self.assertEqual(old.fingerprint().partHash(), startHash, name)
+            oldName = name.split(" -> ")[0]
+            rediff = diffParts(old, loadDesign(oldName))
+            self.assertTrue(rediff.isEmpty(),
+                            "%s: %s" % (name, rediff.summary()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+
+"""
+designgenerator.py
+
+Builds synthetic designs of any size through the model API, for scaling
+benchmarks and memory tests, and writes them as .json fixtures.
+
+Helices fill a block of the lattice row by row. With the serpentine
+scaffold routing one scaffold strand runs the full length of each helix
+and end crossovers join them in boustrophedon order (left to right on
+even rows, right to left on odd rows), so neighboring helices in the path
+always have opposite parity and run antiparallel. Staples are laid on a
+common grid of stapleLength bases separated by gaps that give the
+requested stapleDensity (the covered fraction of each helix), and
+neighboring staples are joined by crossovers on alternate grid cells, so
+no staple end carries two crossovers. Insertions and skips are placed at
+random bases with insertionDensity per base, from a seeded generator.
+
+Run the generator by calling "python -m tests.designgenerator" from
+cadnano2 root directory:
+
+    python -m tests.designgenerator -n 500 -o tests/synthetic500.json
+    python -m tests.designgenerator -n 100 --lattice square -o sq.json
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import random
+from math import ceil, sqrt
+from optparse import OptionParser
+
+import cadnano
+
+defaults = {'lattice': 'honeycomb',
+            'helices': 100,
+            'length': None,  # bases; by default 6 honeycomb or 4 square steps
+            'scaffoldRouting': 'serpentine',  # or 'separate'
+            'stapleDensity': 0.95,
+            'stapleLength': 32,
+            'insertionDensity': 0.0,
+            'seed': 0}
+
+
+def latticeCoords(count):
+    """
+    Returns count (row, col) coordinates filling a near-square block in
+    boustrophedon order, and the block's (rows, cols).
+    """
+    cols = int(ceil(sqrt(count)))
+    rows = int(ceil(count / float(cols)))
+    coords = []
+    for row in xrange(rows):
+        order = xrange(cols) if row % 2 == 0 else reversed(xrange(cols))
+        for col in order:
+            if len(coords) < count:
+                coords.append((row, col))
+    return coords, (rows, cols)
+# end def
+
+
+def stapleSegments(length, stapleLength, density):
+    """
+    Returns the (lowIdx, highIdx) grid of staple strands along a helix of
+    length bases covering about density of it.
+    """
+    gap = max(1, int(round(stapleLength * (1 - density) / density))) \
+                                                    if density < 1 else 1
+    segments = []
+    low = 0
+    while low < length:
+        high = min(low + stapleLength - 1, length - 1)
+        if high - low >= 1:
+            segments.append((low, high))
+        low += stapleLength + gap
+    return segments
+# end def
+
+
+def generateDesign(**settings):
+    """
+    Returns a new Document holding one part built from settings (see
+    defaults). Nothing is put on the undo stack.
+    """
+    from model.document import Document
+    from model.parts.honeycombpart import HoneycombPart
+    from model.parts.squarepart import SquarePart
+    s = dict(defaults)
+    s.update(settings)
+    rng = random.Random(s['seed'])
+    coords, (rows, cols) = latticeCoords(s['helices'])
+    if s['lattice'] == 'honeycomb':
+        partClass, step, minRows, minCols = HoneycombPart, 21, 30, 32
+    elif s['lattice'] == 'square':
+        partClass, step, minRows, minCols = SquarePart, 32, 50, 50
+    else:
+        raise ValueError("Unknown lattice %s" % s['lattice'])
+    length = s['length'] or (6 if step == 21 else 4) * step
+    steps = int(ceil(length / float(step)))
+    length = steps * step
+    document = Document()
+    part = partClass(document=document, maxRow=max(rows, minRows),
+                     maxCol=max(cols, minCols), maxSteps=steps)
+    document._addPart(part, useUndoStack=False)
+    vhs = []
+    for row, col in coords:
+        part.createVirtualHelix(row, col, useUndoStack=False)
+        vhs.append(part.virtualHelixAtCoord((row, col)))
+    # scaffold
+    scafStrands = []
+    for vh in vhs:
+        vh.scaffoldStrandSet().createStrand(0, length - 1, useUndoStack=False)
+        scafStrands.append(vh.scaffoldStrandSet().getStrand(0))
+    if s['scaffoldRouting'] == 'serpentine':
+        for strand5p, strand3p in zip(scafStrands, scafStrands[1:]):
+            part.createXover(strand5p, strand5p.idx3Prime(),
+                             strand3p, strand3p.idx5Prime(),
+                             useUndoStack=False)
+    elif s['scaffoldRouting'] != 'separate':
+        raise ValueError("Unknown scaffold routing %s" % s['scaffoldRouting'])
+    # staples
+    segments = stapleSegments(length, s['stapleLength'], s['stapleDensity'])
+    for vh in vhs:
+        stapStrandSet = vh.stapleStrandSet()
+        for lowIdx, highIdx in segments:
+            stapStrandSet.createStrand(lowIdx, highIdx, useUndoStack=False)
+    for p in xrange(len(vhs) - 1):
+        for k, (lowIdx, highIdx) in enumerate(segments):
+            if (k + p) % 2:
+                continue
+            strandA = vhs[p].stapleStrandSet().getStrand(lowIdx)
+            strandB = vhs[p + 1].stapleStrandSet().getStrand(lowIdx)
+            # the staple whose 3' end is at lowIdx is the 5' side
+            if strandA.idx3Prime() == lowIdx:
+                strand5p, strand3p = strandA, strandB
+            else:
+                strand5p, strand3p = strandB, strandA
+            part.createXover(strand5p, lowIdx, strand3p, lowIdx,
+                             useUndoStack=False)
+    # insertions and skips, placed away from strand ends
+    if s['insertionDensity'] > 0:
+        for vh, strand in zip(vhs, scafStrands):
+            for idx in xrange(2, length - 2):
+                if rng.random() < s['insertionDensity']:
+                    strand = vh.scaffoldStrandSet().getStrand(idx)
+                    strand.addInsertion(idx, rng.choice((1, -1)),
+                                        useUndoStack=False)
+    return document
+# end def
+
+
+def writeDesign(document, fname):
+    """Writes document to fname as a .json fixture."""
+    from tests.modelbenchmarks import saveDesign
+    with open(fname, 'w') as f:
+        saveDesign(document, f)
+# end def
+
+
+def main(argv):
+    parser = OptionParser(usage="%prog [options] -o design.json")
+    parser.add_option("-o", "--output", help="the .json file to write")
+    parser.add_option("-n", "--helices", type="int",
+                      default=defaults['helices'])
+    parser.add_option("-l", "--length", type="int", default=None,
+                      help="bases per helix, rounded up to whole steps")
+    parser.add_option("--lattice", default=defaults['lattice'],
+                      help="honeycomb or square")
+    parser.add_option("--routing", dest="scaffoldRouting",
+                      default=defaults['scaffoldRouting'],
+                      help="serpentine or separate")
+    parser.add_option("--staple-density", dest="stapleDensity",
+                      type="float", default=defaults['stapleDensity'])
+    parser.add_option("--staple-length", dest="stapleLength", type="int",
+                      default=defaults['stapleLength'])
+    parser.add_option("--insertion-density", dest="insertionDensity",
+                      type="float", default=defaults['insertionDensity'],
+                      help="insertions and skips per base")
+    parser.add_option("--seed", type="int", default=defaults['seed'])
+    options, args = parser.parse_args(argv)
+    if not options.output:
+        parser.error("no output file given")
+    cadnano.initAppWithoutGui()
+    settings = dict((key, getattr(options, key)) for key in defaults)
+    writeDesign(generateDesign(**settings), options.output)
+    return 0
+# end def
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,156 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+designrulestests.py
+
+Triggers each rule of model/designrules.py on a small generated design,
+and checks that the incremental re-check after an edit or an undo agrees
+with checking the part from scratch.
+
+Run these tests by calling "python -m tests.designrulestests" from cadnano2
+root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import unittest
+
+import cadnano
+from model.designrules import DesignRuleChecker
+from tests.designgenerator import generateDesign
+
+
+def located(violations):
+    return [(v.rule, v.helix, v.lowIdx, v.highIdx) for v in violations]
+
+
+class DesignRulesTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Three helices of 126 bases. Each has staples at (0, 31), (34, 65),
+        (68, 99) and (102, 125), and alternate staples are joined across
+        neighboring helices at their low ends.
+        """
+        cadnano.app()
+        self.document = generateDesign(helices=3, length=126)
+        self.part = self.document.selectedPart()
+        self.stack = self.part.undoStack()
+        self.vhs = sorted(self.part.getVirtualHelices(),
+                          key=lambda vh: vh.number())
+        self.checker = DesignRuleChecker(self.part)
+
+    def staple(self, helix, idx):
+        return self.vhs[helix].stapleStrandSet().getStrand(idx)
+
+    def assertMatchesFresh(self):
+        fresh = DesignRuleChecker(self.part, autoUpdate=False)
+        self.assertEqual(located(self.checker.violations()),
+                         located(fresh.violations()))
+
+    def testStapleLength(self):
+        violations = self.checker.violations('stapleLength')
+        self.assertEqual(located(violations),
+                         [('stapleLength', 0, 31, 31),
+                          ('stapleLength', 0, 99, 99),
+                          ('stapleLength', 2, 65, 65)])
+        self.assertTrue(all(v.item.length() == 64 for v in violations))
+        checker = DesignRuleChecker(self.part, {'maxStapleLen': 64},
+                                    autoUpdate=False)
+        self.assertEqual(checker.violations('stapleLength'), [])
+
+    def testUnpairedScaffold(self):
+        self.assertEqual(located(self.checker.violations('unpairedScaffold')),
+                         [('unpairedScaffold', helix, lowIdx, lowIdx + 1) \
+                            for helix in range(3) for lowIdx in (32, 66, 100)])
+        # a skipped base needs no staple
+        scaffold = self.vhs[1].scaffoldStrandSet().getStrand(32)
+        scaffold.addInsertion(32, -1)
+        self.assertTrue(('unpairedScaffold', 1, 33, 33) in \
+                        located(self.checker.violations('unpairedScaffold')))
+
+    def testShortLeg(self):
+        self.assertEqual(self.checker.violations('shortLeg'), [])
+        strand = self.staple(0, 0)  # joined to helix 1 at idx 0
+        strand.resize((0, 2))
+        self.assertEqual(located(self.checker.violations('shortLeg')),
+                         [('shortLeg', 0, 0, 2)])
+        self.assertMatchesFresh()
+        self.stack.undo()
+        self.assertEqual(self.checker.violations('shortLeg'), [])
+        self.assertMatchesFresh()
+
+    def testXoverSpacing(self):
+        # helix 1 is joined to helix 0 at 0 and 68, and to helix 2 at 34
+        # and 102
+        checker = DesignRuleChecker(self.part, {'minXoverSpacing': 40},
+                                    autoUpdate=False)
+        self.assertEqual(located(checker.violations('xoverSpacing')),
+                         [('xoverSpacing', 1, 0, 34),
+                          ('xoverSpacing', 1, 34, 68),
+                          ('xoverSpacing', 1, 68, 102)])
+        self.assertEqual(self.checker.violations('xoverSpacing'), [])
+
+    def testStapleLoopAndAdjacentEnds(self):
+        strandA, strandB = self.staple(0, 0), self.staple(1, 0)
+        if strandA.idx3Prime() == 31:
+            self.part.createXover(strandA, 31, strandB, 31)
+        else:
+            self.part.createXover(strandB, 31, strandA, 31)
+        self.assertEqual(located(self.checker.violations('stapleLoop')),
+                         [('stapleLoop', 0, 31, 31)])
+        self.assertMatchesFresh()
+        self.staple(0, 15).split(15)
+        self.assertEqual(self.checker.violations('stapleLoop'), [])
+        self.assertEqual(located(self.checker.violations('adjacentEnds')),
+                         [('adjacentEnds', 0, 14, 15)])
+        self.assertMatchesFresh()
+        self.stack.undo()
+        self.stack.undo()
+        self.assertEqual(self.checker.violations('stapleLoop'), [])
+        self.assertEqual(self.checker.violations('adjacentEnds'), [])
+        self.assertMatchesFresh()
+
+    def testSkipDensity(self):
+        scaffold = self.vhs[0].scaffoldStrandSet().getStrand(10)
+        scaffold.addInsertion(10, -1)
+        self.assertEqual(self.checker.violations('skipDensity'), [])
+        scaffold.addInsertion(12, -1)
+        self.assertEqual(located(self.checker.violations('skipDensity')),
+                         [('skipDensity', 0, 10, 12)])
+        self.assertMatchesFresh()
+        # with no skips allowed, every skip is a violation
+        checker = DesignRuleChecker(self.part, {'maxSkipsPerWindow': 0},
+                                    autoUpdate=False)
+        self.assertEqual(located(checker.violations('skipDensity')),
+                         [('skipDensity', 0, 10, 10),
+                          ('skipDensity', 0, 12, 12)])
+        self.stack.undo()
+        self.assertEqual(self.checker.violations('skipDensity'), [])
+        self.assertMatchesFresh()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,370 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+
+"""
+editstress.py
+
+Seeded random edits of a design, headless. An EditStress replays a mix of
+strand creates, removes, resizes, splits and merges, crossover creates and
+removes, insertion and skip edits and sequence applications, each through
+the same model methods the tools use, then undoes and redoes all of them.
+It checks the strand and oligo invariants (checkInvariants) during the
+run and after the undo and the redo, checks that undo restores the
+part's fingerprint (Part.fingerprint) and that redo restores the edited
+one, and reports operations per second for each kind of edit.
+
+A failure prints the seed and operation number, so the run can be
+replayed and cut short just before it with --ops.
+
+Run the stress test by calling "python -m tests.editstress" from cadnano2
+root directory:
+
+    python -m tests.editstress --seed 7 --ops 5000 --helices 40
+    python -m tests.editstress --ops 2000 tests/functionaltestinputs/skip.json
+    python -m tests.editstress --exclude insertion,sequence
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import random
+from optparse import OptionParser
+from timeit import default_timer
+
+import cadnano
+from model.enum import StrandType
+
+operations = ('create', 'remove', 'resize', 'split', 'merge', 'xover',
+              'removeXover', 'insertion', 'sequence')
+
+
+def checkInvariants(part):
+    """
+    Returns a list of messages describing every broken invariant of the
+    strands and oligos of part, or [] if there are none.
+    """
+    errors = []
+    oligos = part.oligos()
+    maxIdx = part.maxBaseIdx()
+    strandCount = 0
+    for vh in sorted(part.getVirtualHelices(), key=lambda vh: vh.number()):
+        for strandSet in vh.getStrandSets():
+            where = "%d.%d" % (vh.number(), strandSet.strandType())
+            prevHigh = -1
+            for strand in strandSet:
+                strandCount += 1
+                lowIdx, highIdx = strand.idxs()
+                if not (prevHigh < lowIdx <= highIdx <= maxIdx):
+                    errors.append("%s: strand %d-%d out of order or bounds" \
+                                                % (where, lowIdx, highIdx))
+                prevHigh = highIdx
+                if strand.oligo() not in oligos:
+                    errors.append("%s[%d]: oligo not in part" % \
+                                                (where, strand.idx5Prime()))
+                strand3p = strand.connection3p()
+                if strand3p is not None and \
+                        (strand3p.connection5p() is not strand or \
+                         strand3p.strandType() != strand.strandType() or \
+                         strand3p not in strand3p.strandSet()._strandList):
+                    errors.append("%s[%d]: unpaired 3' connection" % \
+                                                (where, strand.idx3Prime()))
+                strand5p = strand.connection5p()
+                if strand5p is not None and \
+                                        strand5p.connection3p() is not strand:
+                    errors.append("%s[%d]: unpaired 5' connection" % \
+                                                (where, strand.idx5Prime()))
+    visited = 0
+    for oligo in oligos:
+        strand5p = oligo.strand5p()
+        if strand5p is None:
+            errors.append("oligo without strands")
+            continue
+        if oligo.isLoop() != (strand5p.connection5p() is not None):
+            errors.append("%s: loop flag is %s" % \
+                                        (oligo.locString(), oligo.isLoop()))
+        length = 0
+        for strand in strand5p.generator3pStrand():
+            visited += 1
+            length += strand.totalLength()
+            if strand.oligo() is not oligo:
+                errors.append("%s: strand of another oligo at %d[%d]" % \
+                        (oligo.locString(), strand.virtualHelix().number(),
+                         strand.idx5Prime()))
+                break
+        if length != oligo.length():
+            errors.append("%s: length %d but strands total %d" % \
+                                (oligo.locString(), oligo.length(), length))
+    if visited != strandCount:
+        errors.append("oligos cover %d of %d strands" % \
+                                                    (visited, strandCount))
+    return errors
+# end def
+
+
+class EditStress(object):
+    """
+    Random edits of part from a seeded generator. run() returns a report
+    dict; report['errors'] is empty when every check passed.
+    """
+    def __init__(self, part, seed=0, checkEvery=100, ops=operations):
+        self._part = part
+        self._ops = ops
+        self._rng = random.Random(seed)
+        self._seed = seed
+        self._checkEvery = checkEvery
+        self._vhs = sorted(part.getVirtualHelices(), key=lambda vh: vh.number())
+    # end def
+
+    def run(self, count):
+        part = self._part
+        stack = part.undoStack()
+        errors = []
+        counts = dict((op, 0) for op in operations)
+        seconds = dict((op, 0.) for op in operations)
+        fingerprint = part.fingerprint()
+        startIndex = stack.index()
+        startHash = fingerprint.partHash()
+        for i in xrange(count):
+            op = self._rng.choice(self._ops)
+            before = stack.index()
+            t = default_timer()
+            try:
+                getattr(self, '_' + op)()
+            except Exception, e:
+                errors.append("seed %d op %d (%s): %r" % \
+                                                    (self._seed, i, op, e))
+                break
+            if stack.index() != before:
+                seconds[op] += default_timer() - t
+                counts[op] += 1
+            if self._checkEvery and (i + 1) % self._checkEvery == 0:
+                errors.extend("seed %d op %d: %s" % (self._seed, i, msg) \
+                                            for msg in checkInvariants(part))
+                if errors:
+                    break
+        endHash = fingerprint.partHash()
+        edits = stack.index() - startIndex
+        t = default_timer()
+        for i in xrange(edits):
+            stack.undo()
+        undoSeconds = default_timer() - t
+        errors.extend("after undo: " + msg for msg in checkInvariants(part))
+        if fingerprint.partHash() != startHash:
+            errors.append("undo did not restore the design")
+        t = default_timer()
+        for i in xrange(edits):
+            stack.redo()
+        redoSeconds = default_timer() - t
+        errors.extend("after redo: " + msg for msg in checkInvariants(part))
+        if fingerprint.partHash() != endHash:
+            errors.append("redo did not restore the edited design")
+        return {'seed': self._seed, 'edits': edits, 'counts': counts,
+                'seconds': seconds, 'undoSeconds': undoSeconds,
+                'redoSeconds': redoSeconds, 'errors': errors}
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _strandSet(self):
+        vh = self._rng.choice(self._vhs)
+        if self._rng.random() < 0.5:
+            return vh.scaffoldStrandSet()
+        return vh.stapleStrandSet()
+    # end def
+
+    def _strand(self, strandSet=None):
+        """Returns a random strand of a random StrandSet, or None."""
+        strandSet = strandSet or self._strandSet()
+        strands = strandSet._strandList
+        return self._rng.choice(strands) if strands else None
+    # end def
+
+    def _create(self):
+        strandSet = self._strandSet()
+        idx = self._rng.randint(0, self._part.maxBaseIdx())
+        if strandSet.hasStrandAt(idx, idx):
+            return
+        low, high = strandSet.getBoundsOfEmptyRegionContaining(idx)
+        if high - low < 1:
+            return
+        lowIdx = self._rng.randint(low, high - 1)
+        highIdx = self._rng.randint(lowIdx + 1, min(high, lowIdx + 40))
+        strandSet.createStrand(lowIdx, highIdx)
+    # end def
+
+    def _remove(self):
+        strand = self._strand()
+        if strand is not None:
+            strand.strandSet().removeStrand(strand)
+    # end def
+
+    def _resize(self):
+        strand = self._strand()
+        if strand is None:
+            return
+        lowIdx, highIdx = strand.idxs()
+        idx = self._rng.choice((lowIdx, highIdx))
+        if strand.hasXoverAt(idx):
+            return
+        low, high = strand.getResizeBounds(idx)
+        if high < low:
+            return
+        newIdx = self._rng.randint(low, high)
+        if idx == lowIdx:
+            strand.resize((newIdx, highIdx))
+        else:
+            strand.resize((lowIdx, newIdx))
+    # end def
+
+    def _split(self):
+        strand = self._strand()
+        if strand is None or strand.length() < 4:
+            return
+        lowIdx, highIdx = strand.idxs()
+        idx = self._rng.randint(lowIdx + 1, highIdx - 1)
+        strand.strandSet().splitStrand(strand, idx)
+    # end def
+
+    def _merge(self):
+        strand = self._strand()
+        if strand is None:
+            return
+        strandSet = strand.strandSet()
+        for neighbor in strandSet.getNeighbors(strand):
+            if neighbor is not None and \
+                            strandSet.strandsCanBeMerged(strand, neighbor):
+                strandSet.mergeStrands(strand, neighbor)
+                return
+    # end def
+
+    def _xover(self):
+        """
+        Joins two strands on neighboring helices at a shared base index,
+        splitting them as needed, like the crossover tool does.
+        """
+        strandSet = self._strandSet()
+        vh = strandSet.virtualHelix()
+        neighbors = [n for n in self._part.getVirtualHelixNeighbors(vh) if n]
+        strandA = self._strand(strandSet)
+        if strandA is None or not neighbors:
+            return
+        neighbor = self._rng.choice(neighbors)
+        if strandSet.strandType() == StrandType.Scaffold:
+            otherSet = neighbor.scaffoldStrandSet()
+        else:
+            otherSet = neighbor.stapleStrandSet()
+        idx = self._rng.randint(*strandA.idxs())
+        strandB = otherSet.getStrand(idx)
+        if strandB is None:
+            return
+        if self._rng.random() < 0.5:
+            strandA, strandB = strandB, strandA
+        if strandA.canInstallXoverAt(idx, strandB, idx) and \
+                            strandB.canInstallXoverAt(idx, strandA, idx):
+            self._part.createXover(strandA, idx, strandB, idx)
+    # end def
+
+    def _removeXover(self):
+        strand = self._strand()
+        if strand is not None and strand.connection3p() is not None:
+            self._part.removeXover(strand, strand.connection3p())
+    # end def
+
+    def _insertion(self):
+        strand = self._strand()
+        if strand is None or strand.length() < 3:
+            return
+        lowIdx, highIdx = strand.idxs()
+        idx = self._rng.randint(lowIdx + 1, highIdx - 1)
+        if not strand.hasInsertionAt(idx):
+            strand.addInsertion(idx, self._rng.choice((1, 2, -1)))
+        elif self._rng.random() < 0.5:
+            strand.changeInsertion(idx, self._rng.choice((1, 3, -1)))
+        else:
+            strand.removeInsertion(idx)
+    # end def
+
+    def _sequence(self):
+        strand = self._strand(self._rng.choice(self._vhs).scaffoldStrandSet())
+        if strand is None:
+            return
+        oligo = strand.oligo()
+        if self._rng.random() < 0.2:
+            oligo.applySequence(None)
+        else:
+            rng = self._rng
+            oligo.applySequence(''.join(rng.choice('ACGT') \
+                                        for i in xrange(oligo.length())))
+    # end def
+# end class
+
+
+def formatReport(report):
+    lines = ["seed %d: %d edits" % (report['seed'], report['edits'])]
+    for op in operations:
+        n, t = report['counts'][op], report['seconds'][op]
+        rate = "%.0f ops/s" % (n / t) if t else "-"
+        lines.append("  %-12s %6d %12s" % (op, n, rate))
+    edits = report['edits']
+    for name in ('undo', 'redo'):
+        t = report[name + 'Seconds']
+        rate = "%.0f ops/s" % (edits / t) if t else "-"
+        lines.append("  %-12s %6d %12s" % (name, edits, rate))
+    lines.extend("ERROR " + error for error in report['errors'])
+    return "\n".join(lines)
+# end def
+
+
+def main(argv):
+    parser = OptionParser(usage="%prog [options] [design.json]")
+    parser.add_option("-s", "--seed", type="int", default=0)
+    parser.add_option("-n", "--ops", type="int", default=2000,
+                      help="random operations to attempt")
+    parser.add_option("--helices", type="int", default=20,
+                      help="size of the generated design if none is given")
+    parser.add_option("-c", "--check-every", dest="checkEvery", type="int",
+                      default=100, help="operations between invariant checks")
+    parser.add_option("-x", "--exclude", default="",
+                      help="comma separated operations to leave out")
+    options, args = parser.parse_args(argv)
+    excluded = options.exclude.split(',')
+    ops = tuple(op for op in operations if op not in excluded)
+    cadnano.initAppWithoutGui()
+    if args:
+        from model.designdiff import loadPart
+        document = loadPart(args[0])[0]
+    else:
+        from tests.designgenerator import generateDesign
+        document = generateDesign(helices=options.helices,
+                                  seed=options.seed)
+    stress = EditStress(document.selectedPart(), options.seed,
+                        options.checkEvery, ops)
+    report = stress.run(options.ops)
+    print formatReport(report)
+    return 1 if report['errors'] else 0
+# end def
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,134 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+kmerindextests.py
+
+Checks the shared sequences found by model/kmerindex.py against a plain
+dict of every k-mer of the design.
+
+Run these tests by calling "python -m tests.kmerindextests" from cadnano2
+root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import unittest
+
+import cadnano
+import util
+from data.dnasequences import sequences
+from model.designdiff import loadPart
+from model.kmerindex import KmerIndex, oligoBases
+
+inputDir = "tests/functionaltestinputs"
+
+
+def loadDesign(designname, sequenceName, helixNumber, idx):
+    """
+    Loads a test design and applies a sequence to the scaffold oligo of
+    the strand at idx of helix helixNumber, if there is one.
+    """
+    part = loadPart("%s/%s" % (inputDir, designname))[1]
+    for vh in part.getVirtualHelices():
+        if vh.number() == helixNumber:
+            strand = vh.scaffoldStrandSet().getStrand(idx)
+            strand.oligo().applySequence(sequences[sequenceName])
+    return part
+
+
+def kmerHits(index, shared):
+    """Expands SharedSequences into their k-mer hits."""
+    k = index.k()
+    number = dict((oligo, n) for n, oligo in enumerate(index.oligos()))
+    hits = set()
+    for s in shared:
+        a, b = number[s.oligoA], number[s.oligoB]
+        for t in range(s.length - k + 1):
+            if s.kind == 'repeat':
+                hits.add((s.kind, (a, s.posA + t), (b, s.posB + t)))
+            else:
+                hits.add((s.kind, (a, s.posA + t),
+                          (b, s.posB + s.length - k - t)))
+    return hits
+
+
+def bruteForceHits(index):
+    """Every k-mer hit, from a dict of all the k-mers of the design."""
+    k = index.k()
+    bases = [oligoBases(oligo) for oligo in index.oligos()]
+    kmers = {}
+    for n, (seq, helices, idxs, scaffold) in enumerate(bases):
+        for i in range(len(seq) - k + 1):
+            if ' ' not in seq[i:i + k]:
+                kmers.setdefault(seq[i:i + k], []).append((n, i))
+
+    def pairedInDesign(x, y):
+        bx, by = bases[x[0]], bases[y[0]]
+        for t in range(k):
+            i, j = x[1] + t, y[1] + k - 1 - t
+            if (bx[1][i], bx[2][i]) != (by[1][j], by[2][j]) or \
+                                                bx[3][i] == by[3][j]:
+                return False
+        return True
+
+    hits = set()
+    for kmer, locations in kmers.iteritems():
+        complements = kmers.get(util.rcomp(kmer), [])
+        for x in locations:
+            hits.update(('repeat', x, y) for y in locations if x < y)
+            hits.update(('complement', x, y) for y in complements \
+                                        if x < y and not pairedInDesign(x, y))
+    return hits
+
+
+class KmerIndexTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+
+    def testMatchesBruteForce(self):
+        part = loadDesign("Nature09_monolith.json", 'p7560', 4, 73)
+        for k in (6, 9):
+            index = KmerIndex(list(part.oligos()), k)
+            shared = list(index.sharedSequences())
+            self.assertTrue(shared)
+            self.assertEqual(kmerHits(index, shared), bruteForceHits(index))
+
+    def testMinLength(self):
+        part = loadDesign("Nature09_monolith.json", 'p7560', 4, 73)
+        index = KmerIndex(list(part.oligos()), 6)
+        shared = list(index.sharedSequences(minLength=9))
+        self.assertTrue(all(s.length >= 9 for s in shared))
+        self.assertEqual(len(shared), len([s for s in \
+                            index.sharedSequences() if s.length >= 9]))
+
+    def testNoSequence(self):
+        part = loadDesign("Nature09_monolith.json", 'p7560', -1, 0)
+        self.assertEqual(list(KmerIndex(list(part.oligos())).sharedSequences()),
+                         [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+meshencodertests.py
+
+Checks the vertex and face counts of the helix meshes in
+model/helixmesh.py, and that model/io/meshencoder.py writes well-formed
+OBJ, STL, glTF and GLB files for a design.
+
+Run these tests by calling "python -m tests.meshencodertests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import base64
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+import cadnano
+from model.designdiff import loadPart
+from model.helixmesh import defaultEdgesPerBase, defaultNumVerticesEnds, \
+                            faceTriangles, halfCylinderHelixMesh, \
+                            partOligoMeshes, strandMeshParams
+from model.io.meshencoder import encodeMesh
+
+inputDir = "tests/functionaltestinputs"
+
+
+def expectedCounts(strand, edgesPerBase=defaultEdgesPerBase,
+                   numVerticesEnds=defaultNumVerticesEnds):
+    """
+    (vertices, triangles) of a strand mesh: a ring of numVerticesEnds per
+    section boundary, fans of numVerticesEnds - 2 triangles at both ends
+    and two triangles per quad between rings.
+    """
+    lowIdx, highIdx = strand.idxs()
+    numRings = (highIdx - lowIdx + 1) * edgesPerBase + 1
+    fans = 2 * (numVerticesEnds - 2)
+    return numRings * numVerticesEnds, \
+           fans + 2 * (numRings - 1) * numVerticesEnds
+
+
+class HelixMeshTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+        self.part = loadPart("%s/Nature09_monolith.json" % inputDir)[1]
+        self.strands = [strand for vh in self.part.getVirtualHelices() \
+                               for strandSet in vh.getStrandSets() \
+                               for strand in strandSet]
+
+    def testStrandMesh(self):
+        for strand in self.strands[:20]:
+            vertices, faceCounts, faceConnects, startPos, endPos = \
+                        halfCylinderHelixMesh(**strandMeshParams(strand))
+            numVertices, numTriangles = expectedCounts(strand)
+            self.assertEqual(vertices.shape, (numVertices, 3))
+            numFans = 2 * (defaultNumVerticesEnds - 2)
+            self.assertEqual(list(faceCounts).count(3), numFans)
+            self.assertEqual(list(faceCounts).count(4),
+                             (numTriangles - numFans) / 2)
+            self.assertEqual(len(faceConnects), faceCounts.sum())
+            self.assertTrue(0 <= faceConnects.min() and \
+                            faceConnects.max() < numVertices)
+            triangles = faceTriangles(faceCounts, faceConnects)
+            self.assertEqual(triangles.shape, (numTriangles, 3))
+
+    def testPartOligoMeshes(self):
+        meshes = partOligoMeshes(self.part)
+        self.assertEqual(set(m[0] for m in meshes),
+                         set(strand.oligo() for strand in self.strands))
+        counts = np.array([expectedCounts(strand) \
+                                        for strand in self.strands]).sum(0)
+        self.assertEqual(sum(len(m[1]) for m in meshes), counts[0])
+        self.assertEqual(sum(len(m[3]) for m in meshes), counts[1])
+        for oligo, vertices, normals, triangles in meshes:
+            self.assertEqual(normals.shape, vertices.shape)
+            self.assertTrue(triangles.max() < len(vertices))
+            lengths = np.sqrt((normals.astype(float) ** 2).sum(axis=1))
+            self.assertTrue(np.allclose(lengths, 1, atol=1e-3))
+
+
+class MeshEncoderTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+        self.part = loadPart("%s/loops_and_skips.json" % inputDir)[1]
+        self.meshes = partOligoMeshes(self.part)
+        self.numVertices = sum(len(m[1]) for m in self.meshes)
+        self.numTriangles = sum(len(m[3]) for m in self.meshes)
+        self.tdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tdir)
+
+    def encode(self, ext):
+        fname = os.path.join(self.tdir, "design" + ext)
+        encodeMesh(self.part, fname)
+        return fname
+
+    def testObj(self):
+        fname = self.encode(".obj")
+        lines = open(fname).read().splitlines()
+        self.assertEqual(lines[0], "mtllib design.mtl")
+        records = {}
+        for line in lines[1:]:
+            records.setdefault(line.split()[0], []).append(line.split()[1:])
+        self.assertEqual(len(records['v']), self.numVertices)
+        self.assertEqual(len(records['vn']), self.numVertices)
+        self.assertEqual(len(records['f']), self.numTriangles)
+        for face in records['f']:
+            for corner in face:
+                v, vn = corner.split('//')
+                self.assertTrue(v == vn and 1 <= int(v) <= self.numVertices)
+        materials = [line.split()[1] for line in \
+                     open(os.path.join(self.tdir, "design.mtl")) \
+                     if line.startswith("newmtl")]
+        self.assertEqual([g[0] for g in records['usemtl']], materials)
+        self.assertEqual(len(materials), len(self.meshes))
+
+    def testStl(self):
+        data = open(self.encode(".stl"), 'rb').read()
+        numFacets = struct.unpack('<I', data[80:84])[0]
+        self.assertEqual(numFacets, self.numTriangles)
+        self.assertEqual(len(data), 84 + 50 * numFacets)
+        attrs = set(struct.unpack('<H', data[84 + 50 * i + 48:
+                                             84 + 50 * i + 50])[0] \
+                    for i in range(numFacets))
+        self.assertTrue(all(attr & 0x8000 for attr in attrs))
+
+    def checkGltf(self, doc, data):
+        self.assertEqual(doc['asset']['version'], '2.0')
+        self.assertEqual(doc['buffers'][0]['byteLength'], len(data))
+        for view in doc['bufferViews']:
+            self.assertEqual(view['byteOffset'] % 4, 0)
+            self.assertTrue(view['byteOffset'] + view['byteLength'] <= \
+                                                                len(data))
+        primitives = doc['meshes'][0]['primitives']
+        self.assertEqual(len(primitives), len(self.meshes))
+        accessors = doc['accessors']
+        self.assertEqual(sum(accessors[p['attributes']['POSITION']]['count'] \
+                             for p in primitives), self.numVertices)
+        for p in primitives:
+            position = accessors[p['attributes']['POSITION']]
+            self.assertEqual(accessors[p['attributes']['NORMAL']]['count'],
+                             position['count'])
+            indices = accessors[p['indices']]
+            view = doc['bufferViews'][indices['bufferView']]
+            values = np.fromstring(data[view['byteOffset']:
+                                   view['byteOffset'] + view['byteLength']],
+                                   dtype='<u4')
+            self.assertEqual(len(values), indices['count'])
+            self.assertTrue(values.max() < position['count'])
+        self.assertEqual(sum(accessors[p['indices']]['count'] \
+                             for p in primitives), 3 * self.numTriangles)
+
+    def testGltf(self):
+        doc = json.load(open(self.encode(".gltf")))
+        prefix = "data:application/octet-stream;base64,"
+        uri = doc['buffers'][0]['uri']
+        self.assertTrue(uri.startswith(prefix))
+        self.checkGltf(doc, base64.b64decode(uri[len(prefix):]))
+
+    def testGlb(self):
+        data = open(self.encode(".glb"), 'rb').read()
+        magic, version, total = struct.unpack('<4sII', data[:12])
+        self.assertEqual((magic, version, total), ('glTF', 2, len(data)))
+        jsonLength, jsonType = struct.unpack('<I4s', data[12:20])
+        self.assertEqual(jsonType, 'JSON')
+        doc = json.loads(data[20:20 + jsonLength])
+        binStart = 20 + jsonLength
+        binLength, binType = struct.unpack('<I4s', data[binStart:binStart + 8])
+        self.assertEqual(binType, 'BIN\x00')
+        self.assertEqual(binStart + 8 + binLength, len(data))
+        self.checkGltf(doc, data[binStart + 8:])
+
+    def testUnknownFormat(self):
+        self.assertRaises(ValueError, encodeMesh, self.part,
+                          os.path.join(self.tdir, "design.ply"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,270 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+
+"""
+modelbenchmarks.py
+
+Headless timings of the model operations on the functional test designs:
+load, autostaple, autobreak, sequence application, staple export, save,
+and undo then redo of everything done since the load. Each design is run
+several times and the fastest time of each operation is kept.
+
+The results are written as JSON and compared with a baseline of the same
+format; an operation more than threshold (a fraction) slower than its
+baseline is a regression and makes the run exit with status 1. Timings
+depend on the machine, so no baseline is kept in the repository: record
+one with --save-baseline on the machine that runs the comparison. A
+comparison without a baseline exits with status 2, so it cannot pass
+unnoticed; --no-compare only reports the timings.
+
+Run these benchmarks by calling "python -m tests.modelbenchmarks" from
+cadnano2 root directory:
+
+    python -m tests.modelbenchmarks --save-baseline   # record a baseline
+    python -m tests.modelbenchmarks --threshold 0.2   # compare with it
+    python -m tests.modelbenchmarks --no-compare      # timings only
+    python -m tests.modelbenchmarks path/to/design.json ...
+    python -m tests.modelbenchmarks --synthetic 10,100,500,2000
+
+Synthetic designs come from tests.designgenerator and are named by their
+helix count, e.g. synthetic500.json.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import json
+import os
+import platform
+import shutil
+import tempfile
+from optparse import OptionParser
+from StringIO import StringIO
+from timeit import default_timer
+
+import cadnano
+
+inputDir = "tests/functionaltestinputs"
+defaultDesigns = ["Nature09_monolith.json", "Nature09_squarenut.json",
+                  "Science09_beachball_v1.json",
+                  "Science09_prot120_98_v3.json", "loops_and_skips.json"]
+defaultBaseline = "tests/modelbenchmarkbaseline.json"
+operations = ('load', 'autostaple', 'autobreak', 'applySequence',
+              'exportStaples', 'save', 'undo', 'redo')
+noiseFloor = 0.005  # seconds; smaller differences are never regressions
+
+
+def saveDesign(document, f):
+    """Encodes document to f with the helices in number order."""
+    from model.io.encoder import encode
+    part = document.selectedPart()
+    vhs = sorted(part.getVirtualHelices(), key=lambda vh: vh.number())
+    encode(document, [vh.coord() for vh in vhs], f)
+# end def
+
+
+def applyScaffoldSequences(part):
+    """Applies the longest bundled sequence to every scaffold oligo."""
+    from data.dnasequences import sequences
+    sequence = max(sequences.itervalues(), key=len)
+    for oligo in list(part.oligos()):
+        if not oligo.isStaple():
+            oligo.applySequence(sequence)
+# end def
+
+
+def exportStaples(part):
+    """
+    Returns the staple CSV like Part.getStapleSequences, leaving out the
+    staple loops that remain when autobreak could not run.
+    """
+    rows = [oligo.sequenceExport() for oligo in part.oligos() \
+                                    if oligo.isStaple() and not oligo.isLoop()]
+    return "Start,End,Sequence,Length,Color\n" + "".join(rows)
+# end def
+
+
+def autobreak(part):
+    """
+    Runs the autobreak plugin, or returns False if it cannot be imported or
+    networkx is missing.
+    """
+    try:
+        cadnano.loadPlugin(os.path.join(cadnano.path(), 'plugins', 'autobreak'))
+        from autobreak import autobreak as plugin
+    except ImportError:
+        return False
+    if not plugin.nx:
+        return False
+    plugin.AutobreakJob(part, {}).run()
+    return True
+# end def
+
+
+def benchmarkDesign(fname):
+    """
+    Runs every operation once on a freshly loaded copy of fname and
+    returns {operation: seconds}, with None for operations that could not
+    run.
+    """
+    from model.designdiff import loadPart
+    times = {}
+    t = default_timer()
+    document = loadPart(fname)[0]
+    times['load'] = default_timer() - t
+    part = document.selectedPart()
+    stack = document.undoStack()
+    t = default_timer()
+    part.autoStaple()
+    times['autostaple'] = default_timer() - t
+    t = default_timer()
+    didBreak = autobreak(part)
+    times['autobreak'] = default_timer() - t if didBreak else None
+    t = default_timer()
+    applyScaffoldSequences(part)
+    times['applySequence'] = default_timer() - t
+    t = default_timer()
+    exportStaples(part)
+    times['exportStaples'] = default_timer() - t
+    out = StringIO()
+    out.name = fname
+    t = default_timer()
+    saveDesign(document, out)
+    times['save'] = default_timer() - t
+    n = stack.index()
+    t = default_timer()
+    for i in xrange(n):
+        stack.undo()
+    times['undo'] = default_timer() - t
+    t = default_timer()
+    for i in xrange(n):
+        stack.redo()
+    times['redo'] = default_timer() - t
+    return times
+# end def
+
+
+def runBenchmarks(fnames, repeat=3, log=None):
+    """Returns {design name: {operation: fastest seconds}}."""
+    results = {}
+    for fname in fnames:
+        name = os.path.basename(fname)
+        best = {}
+        for i in xrange(repeat):
+            for op, seconds in benchmarkDesign(fname).iteritems():
+                if seconds is not None:
+                    best[op] = min(best.get(op, seconds), seconds)
+        results[name] = best
+        if log is not None:
+            log.write("%-32s %s\n" % (name, " ".join("%s=%.1fms" % \
+                (op, best[op] * 1000) for op in operations if op in best)))
+    return results
+# end def
+
+
+def makeReport(results):
+    return {'platform': platform.platform(),
+            'python': platform.python_version(),
+            'results': results}
+# end def
+
+
+def compareWithBaseline(results, baseline, threshold):
+    """
+    Returns a list of (design, operation, baseline seconds, seconds) for
+    the operations more than threshold slower than in baseline.
+    """
+    regressions = []
+    for name, times in sorted(results.iteritems()):
+        old = baseline['results'].get(name, {})
+        for op in operations:
+            if op not in times or op not in old:
+                continue
+            if times[op] > old[op] * (1 + threshold) and \
+                                        times[op] - old[op] > noiseFloor:
+                regressions.append((name, op, old[op], times[op]))
+    return regressions
+# end def
+
+
+def main(argv):
+    parser = OptionParser(usage="%prog [options] [design.json ...]")
+    parser.add_option("-r", "--repeat", type="int", default=3,
+                      help="runs per design, the fastest is kept")
+    parser.add_option("-t", "--threshold", type="float", default=0.25,
+                      help="allowed slowdown as a fraction of the baseline")
+    parser.add_option("-b", "--baseline", default=defaultBaseline,
+                      help="baseline JSON to compare with or save")
+    parser.add_option("-o", "--report", default=None,
+                      help="write the results as JSON to this file")
+    parser.add_option("-s", "--synthetic", default=None,
+                      help="also run generated designs of these helix "
+                           "counts, e.g. 10,100,500")
+    parser.add_option("--save-baseline", action="store_true", default=False,
+                      help="store the results as the new baseline")
+    parser.add_option("--no-compare", action="store_true", default=False,
+                      help="only report the timings, without a baseline")
+    options, args = parser.parse_args(argv)
+    fnames = args or [os.path.join(inputDir, f) for f in defaultDesigns]
+    cadnano.initAppWithoutGui()
+    tempDir = None
+    if options.synthetic:
+        from tests.designgenerator import generateDesign, writeDesign
+        tempDir = tempfile.mkdtemp()
+        for count in options.synthetic.split(','):
+            fname = os.path.join(tempDir, "synthetic%d.json" % int(count))
+            writeDesign(generateDesign(helices=int(count)), fname)
+            fnames.append(fname)
+    try:
+        report = makeReport(runBenchmarks(fnames, options.repeat, sys.stdout))
+    finally:
+        if tempDir is not None:
+            shutil.rmtree(tempDir)
+    if options.report:
+        with open(options.report, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    if options.save_baseline:
+        with open(options.baseline, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        return 0
+    if options.no_compare:
+        return 0
+    if not os.path.exists(options.baseline):
+        print "No baseline at %s; run with --save-baseline first, or " \
+              "with --no-compare for timings only." % options.baseline
+        return 2
+    with open(options.baseline) as f:
+        baseline = json.load(f)
+    regressions = compareWithBaseline(report['results'], baseline,
+                                      options.threshold)
+    for name, op, old, new in regressions:
+        print "REGRESSION %s %s: %.1fms -> %.1fms (%+.0f%%)" % \
+                    (name, op, old * 1000, new * 1000, (new / old - 1) * 100)
+    return 1 if regressions else 0
+# end def
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
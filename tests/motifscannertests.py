@@ -0,0 +1,133 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+
+"""
+motifscannertests.py
+
+Checks the hits of model/motifscanner.py against a regular expression
+search of each oligo sequence.
+
+Run these tests by calling "python -m tests.motifscannertests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import re
+import unittest
+
+import cadnano
+from model.kmerindex import oligoBases
+from model.motifscanner import AhoCorasick, Motif, defaultMotifs, \
+                               expandIupac, reverseComplement, scanPart
+from tests.kmerindextests import loadDesign
+
+_classes = {'R': '[AG]', 'Y': '[CT]', 'S': '[CG]', 'W': '[AT]', 'K': '[GT]',
+            'M': '[AC]', 'B': '[CGT]', 'D': '[AGT]', 'H': '[ACT]',
+            'V': '[ACG]', 'N': '[ACGT]'}
+
+
+def bruteForceHits(part, motifs):
+    """Every (oligo, pos, name, sequence, isReverseComplement) found by re."""
+    hits = set()
+    for oligo in part.oligos():
+        bases = oligoBases(oligo)
+        if bases is None:
+            continue
+        sequence = bases[0]
+        for motif in motifs:
+            forward = ''.join(_classes.get(c, c) for c in motif.pattern)
+            reverse = ''.join(_classes.get(c, c) for c in \
+                                            reverseComplement(motif.pattern))
+            for m in re.finditer('(?=(%s|%s))' % (forward, reverse), sequence):
+                match = m.group(1)
+                hits.add((oligo, m.start(), motif.name, match,
+                          re.match(forward, match) is None))
+    return hits
+# end def
+
+
+class MotifScannerTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+
+    def testMatchesBruteForce(self):
+        part = loadDesign("Nature09_monolith.json", 'p7560', 4, 73)
+        motifs = defaultMotifs + [Motif('BsrI', 'ACTGG'),
+                                  Motif('custom', 'GGNNRYC')]
+        hits = scanPart(part, motifs)
+        self.assertTrue(hits)
+        self.assertEqual(set((h.oligo, h.pos, h.motif.name, h.sequence,
+                              h.isReverseComplement) for h in hits),
+                         bruteForceHits(part, motifs))
+
+    def testLocations(self):
+        part = loadDesign("Nature09_monolith.json", 'p7560', 4, 73)
+        for hit in scanPart(part):
+            helices, idxs = oligoBases(hit.oligo)[1:3]
+            self.assertEqual((hit.helix, hit.idx),
+                             (helices[hit.pos], idxs[hit.pos]))
+            self.assertEqual(hit.strand.virtualHelix().number(), hit.helix)
+            self.assertEqual(hit.segments[0][0], hit.strand)
+            for strand, low, high in hit.segments:
+                self.assertTrue(strand.lowIdx() <= low <= high <= \
+                                                            strand.highIdx())
+
+    def testLoopJunction(self):
+        part = loadDesign("Nature09_monolith.json", 'p7560', -1, 0)
+        oligo = [o for o in part.oligos() if not o.isStaple()][0]
+        strand5p = oligo.strand5p()
+        strand3p = list(strand5p.generator3pStrand())[-1]
+        part.createXover(strand3p, strand3p.idx3Prime(),
+                         strand5p, strand5p.idx5Prime())
+        oligo = strand5p.oligo()
+        self.assertTrue(oligo.isLoop())
+        n = oligo.length()
+        oligo.applySequence('ATTC' + 'A' * (n - 6) + 'GA')
+        hits = [h for h in scanPart(part, [Motif('EcoRI', 'GAATTC')]) \
+                                                    if h.oligo is oligo]
+        self.assertEqual([(h.pos, h.sequence) for h in hits],
+                         [(n - 2, 'GAATTC')])
+        self.assertEqual(len(hits[0].segments), 2)
+
+    def testAutomaton(self):
+        patterns = ['A', 'AA', 'CAA', 'ACG', 'T']
+        text = 'CAAACGT NAAT'
+        found = set(AhoCorasick(patterns).search(text))
+        expected = set((i, n) for n, p in enumerate(patterns) \
+                            for i in range(len(text)) if text.startswith(p, i))
+        self.assertEqual(found, expected)
+
+    def testIupac(self):
+        self.assertEqual(sorted(expandIupac('RN')), sorted(
+                                [a + b for a in 'AG' for b in 'ACGT']))
+        self.assertEqual(reverseComplement('GRNYC'), 'GRNYC')
+        self.assertRaises(ValueError, expandIupac, 'GAXTC')
+        self.assertRaises(ValueError, expandIupac, 'N' * 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
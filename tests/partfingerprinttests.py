@@ -0,0 +1,124 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+partfingerprinttests.py
+
+Checks the hashes of model/parts/partfingerprint.py: equal designs hash
+equal, edits change the hashes of what they touch, and undo restores
+them.
+
+Run these tests by calling "python -m tests.partfingerprinttests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import unittest
+
+import cadnano
+from data.dnasequences import sequences
+from model.designdiff import loadPart
+
+inputDir = "tests/functionaltestinputs"
+
+
+def loadDesign(designname):
+    return loadPart("%s/%s" % (inputDir, designname))[1]
+
+
+def scaffoldOligo(part, helixNumber, idx):
+    for vh in part.getVirtualHelices():
+        if vh.number() == helixNumber:
+            return vh.scaffoldStrandSet().getStrand(idx).oligo()
+
+
+class PartFingerprintTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+        self.part = loadDesign("Nature09_monolith.json")
+        self.fingerprint = self.part.fingerprint()
+        self.manifest = self.fingerprint.manifest()
+
+    def assertUnchanged(self):
+        changes = self.fingerprint.changesSince(self.manifest)
+        self.assertFalse(changes.pop('partChanged'))
+        self.assertEqual(changes, dict((key, []) for key in changes))
+
+    def testEqualDesignsHashEqual(self):
+        other = loadDesign("Nature09_monolith.json").fingerprint()
+        self.assertEqual(other.manifest(), self.manifest)
+
+    def testUndoRestoresPartHash(self):
+        startHash = self.fingerprint.partHash()
+        stack = self.part.undoStack()
+        startIndex = stack.index()
+        self.part.autoStaple()  # clears the staples, then adds new ones
+        endIndex = stack.index()
+        endHash = self.fingerprint.partHash()
+        self.assertNotEqual(endHash, startHash)
+        self.assertTrue(self.fingerprint.changesSince(self.manifest)[
+                                                        'helicesChanged'])
+        while stack.index() > startIndex:
+            stack.undo()
+        self.assertEqual(self.fingerprint.partHash(), startHash)
+        self.assertUnchanged()
+        while stack.index() < endIndex:
+            stack.redo()
+        self.assertEqual(self.fingerprint.partHash(), endHash)
+
+    def testCrossoverPartnerEnds(self):
+        strand = [s for vh in self.part.getVirtualHelices() \
+                    for s in vh.stapleStrandSet() \
+                    if s.connection3p() is not None and \
+                       s.connection3p().virtualHelix() is not vh][0]
+        vh = strand.virtualHelix()
+        startHash = self.fingerprint.helixHash(vh)
+        # move the 5' end of the 3' partner, on another helix
+        strand3p = strand.connection3p()
+        lowIdx, highIdx = strand3p.idxs()
+        if strand3p.isDrawn5to3():
+            strand3p.setIdxs((lowIdx + 1, highIdx))
+        else:
+            strand3p.setIdxs((lowIdx, highIdx - 1))
+        self.assertNotEqual(self.fingerprint.helixHash(vh), startHash)
+        strand3p.setIdxs((lowIdx, highIdx))
+        self.assertEqual(self.fingerprint.helixHash(vh), startHash)
+
+    def testUndoRestoresSequences(self):
+        stack = self.part.undoStack()
+        oligo = scaffoldOligo(self.part, 4, 73)
+        oligo.applySequence(sequences['p7560'])
+        changes = self.fingerprint.changesSince(self.manifest)
+        # sequences are in the oligo hashes only
+        self.assertFalse(changes['partChanged'])
+        self.assertEqual(changes['helicesChanged'], [])
+        self.assertTrue(oligo.locString() in changes['oligosAdded'])
+        stack.undo()
+        self.assertUnchanged()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+partoccupancytests.py
+
+Checks the StrandSet queries answered by the occupancy index
+(model/parts/partoccupancy.py) against a scan of the strand lists,
+after strand edits and after undoing and redoing them.
+
+Run these tests by calling "python -m tests.partoccupancytests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import unittest
+
+import cadnano
+from tests.designgenerator import generateDesign
+
+
+def scanStrand(strandSet, idx):
+    for strand in strandSet._strandList:
+        if strand.lowIdx() <= idx <= strand.highIdx():
+            return strand
+    return None
+
+
+def scanOverlapping(strandSet, idxLow, idxHigh):
+    return [strand for strand in strandSet._strandList \
+            if strand.lowIdx() <= idxHigh and idxLow <= strand.highIdx()]
+
+
+def scanXoverAt(strandSet, idx):
+    strand = scanStrand(strandSet, idx)
+    if strand is None:
+        return False
+    return (strand.connection5p() is not None and \
+                                        strand.idx5Prime() == idx) or \
+           (strand.connection3p() is not None and \
+                                        strand.idx3Prime() == idx)
+
+
+class PartOccupancyTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Three helices of 126 bases. Each has staples at (0, 31), (34, 65),
+        (68, 99) and (102, 125), and alternate staples are joined across
+        neighboring helices at their low ends.
+        """
+        cadnano.app()
+        self.document = generateDesign(helices=3, length=126)
+        self.part = self.document.selectedPart()
+        self.stack = self.part.undoStack()
+        self.vhs = sorted(self.part.getVirtualHelices(),
+                          key=lambda vh: vh.number())
+
+    def assertMatchesScan(self, when):
+        for vh in self.vhs:
+            for strandSet in vh.getStrandSets():
+                where = "%s, helix %d, %s" % (when, vh.number(),
+                        "scaffold" if strandSet.isScaffold() else "staple")
+                for idx in range(self.part.maxBaseIdx() + 1):
+                    strand = scanStrand(strandSet, idx)
+                    xover = scanXoverAt(strandSet, idx)
+                    self.assertTrue(strandSet.getStrand(idx) is strand,
+                                    "%s: getStrand(%d)" % (where, idx))
+                    self.assertEqual(strandSet.hasNoStrandAtOrNoXover(idx),
+                                     not xover, "%s: %d" % (where, idx))
+                    self.assertEqual(strandSet.hasStrandAtAndNoXover(idx),
+                                     strand is not None and not xover,
+                                     "%s: %d" % (where, idx))
+                    overlapping = scanOverlapping(strandSet, idx, idx + 3)
+                    self.assertEqual(strandSet.hasStrandAt(idx, idx + 3),
+                                     bool(overlapping),
+                                     "%s: hasStrandAt(%d)" % (where, idx))
+                    self.assertEqual(
+                            strandSet.getOverlappingStrands(idx, idx + 3),
+                            overlapping, "%s: overlapping %d" % (where, idx))
+
+    def testEdits(self):
+        self.assertMatchesScan("loaded")
+        staples = self.vhs[0].stapleStrandSet()
+        edits = [
+            ("add", lambda: staples.createStrand(32, 33)),
+            ("merge", lambda: staples.mergeStrands(staples.getStrand(32),
+                                                   staples.getStrand(34))),
+            ("resize", lambda: staples.getStrand(68).resize((68, 97))),
+            ("split", lambda: staples.getStrand(15).split(15)),
+            ("remove xover", lambda: self.part.removeXover(
+                        *self.xoverAt(self.vhs[1].stapleStrandSet(), 34))),
+            ("remove", lambda: staples.removeStrand(staples.getStrand(110)))]
+        startIndex = self.stack.index()
+        for name, edit in edits:
+            before = self.stack.index()
+            edit()
+            self.assertTrue(self.stack.index() > before, name)
+            self.assertMatchesScan("after " + name)
+        names = [name for name, edit in edits]
+        self.assertEqual(self.stack.index() - startIndex, len(names))
+        while self.stack.index() > startIndex:
+            self.stack.undo()
+            self.assertMatchesScan("undo to %d" % self.stack.index())
+        self.assertEqual(staples.getStrand(32), None)
+        for name in names:
+            self.stack.redo()
+            self.assertMatchesScan("redo " + name)
+        self.assertEqual(staples.getStrand(32).idxs(), (32, 65))
+
+    def xoverAt(self, strandSet, idx):
+        """Returns (strand5p, strand3p) of the crossover at idx."""
+        strand = strandSet.getStrand(idx)
+        if strand.idx3Prime() == idx:
+            return strand, strand.connection3p()
+        return strand.connection5p(), strand
+
+
+if __name__ == "__main__":
+    unittest.main()
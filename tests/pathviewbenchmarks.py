@@ -0,0 +1,121 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+pathviewbenchmarks.py
+
+Item counts and frame times of the path view for the functional test
+designs, drawn with one set of items per strand and with the oligo batch
+(the batchPathItems preference).
+
+Run these benchmarks by calling "python -m tests.pathviewbenchmarks" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from timeit import default_timer
+from tests.cadnanoguitestcase import CadnanoGuiTestCase
+import tests.cadnanoguitestcase  # for main()
+
+
+class PathViewBenchmarks(CadnanoGuiTestCase):
+    """
+    Each test loads a design, repaints the zoomed-to-fit path view
+    numFrames times in each drawing mode and prints one line of results.
+    """
+    numFrames = 20
+
+    def setUp(self):
+        CadnanoGuiTestCase.setUp(self)
+        prefs = self.app.prefs
+        self.savedPrefs = (prefs.virtualizePathView, prefs.batchPathItems)
+
+    def tearDown(self):
+        prefs = self.app.prefs
+        prefs.virtualizePathView, prefs.batchPathItems = self.savedPrefs
+        CadnanoGuiTestCase.tearDown(self)
+
+    def loadDesign(self, designname):
+        from model.io.decoder import decode
+        inputfile = "tests/functionaltestinputs/%s" % designname
+        document = self.documentController.document()
+        with file(inputfile) as f:
+            decode(document, f.read())
+        self.setWidget(self.documentController.win, False, None)
+
+    def measure(self, batch):
+        """
+        Returns (number of scene items, seconds per frame) with the path
+        view drawn as items or as an oligo batch. Preferences are only
+        changed in memory.
+        """
+        prefs = self.app.prefs
+        prefs.virtualizePathView = False
+        prefs.batchPathItems = batch
+        win = self.documentController.win
+        for partItem in win.pathroot.partItems():
+            partItem.virtualizer().update()
+        view = win.pathGraphicsView
+        view.zoomToFit()
+        viewport = view.viewport()
+        viewport.repaint()  # fill the item caches
+        start = default_timer()
+        for i in range(self.numFrames):
+            viewport.repaint()
+        frameTime = (default_timer() - start) / self.numFrames
+        return len(win.pathscene.items()), frameTime
+
+    def benchmarkDesign(self, designname):
+        self.loadDesign(designname)
+        items, frameTime = self.measure(False)
+        batchItems, batchFrameTime = self.measure(True)
+        print "%-36s items %6d -> %6d   frame %7.1f ms -> %7.1f ms" % \
+                            (designname, items, batchItems,
+                             frameTime * 1000, batchFrameTime * 1000)
+        self.assertTrue(batchItems <= items)
+
+    def testPathView_simple42legacy(self):
+        self.benchmarkDesign("simple42legacy.json")
+
+    def testPathView_loops_and_skips(self):
+        self.benchmarkDesign("loops_and_skips.json")
+
+    def testPathView_Nature09_monolith(self):
+        self.benchmarkDesign("Nature09_monolith.json")
+
+    def testPathView_Nature09_squarenut(self):
+        self.benchmarkDesign("Nature09_squarenut.json")
+
+    def testPathView_Science09_prot120_98_v3(self):
+        self.benchmarkDesign("Science09_prot120_98_v3.json")
+
+    def testPathView_Science09_beachball_v1(self):
+        self.benchmarkDesign("Science09_beachball_v1.json")
+
+
+if __name__ == '__main__':
+    print "Running Path View Benchmarks"
+    tests.cadnanoguitestcase.main()
@@ -0,0 +1,94 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+scaffoldoffsettests.py
+
+Checks the scores of model/scaffoldoffset.py against the staples that
+applying the sequence at those offsets gives.
+
+Run these tests by calling "python -m tests.scaffoldoffsettests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import re
+import unittest
+
+import numpy as np
+
+import cadnano
+from data.dnasequences import sequences
+from model.designdiff import loadPart
+from model.scaffoldoffset import applyOffset, bestOffsets, offsetProblem, \
+                                 scaffoldOligo, scoreOffsets
+from model.thermodynamics import stapleThermodynamics
+
+inputDir = "tests/functionaltestinputs"
+settings = {'polyNLength': 5, 'motifList': ['GAATTC', 'GGGG']}
+
+
+class ScaffoldOffsetTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+        self.part = loadPart("%s/Nature09_monolith.json" % inputDir)[1]
+
+    def testScoresMatchAppliedSequence(self):
+        sequence = sequences['p7560']
+        offsets = [0, 17, 7559]
+        tmVariance, polyN, motifs = scoreOffsets(
+                                    offsetProblem(self.part, sequence),
+                                    settings, offsets, processes=1)
+        for i, offset in enumerate(offsets):
+            applyOffset(scaffoldOligo(self.part), sequence, offset,
+                        useUndoStack=False)
+            tms = [s.tm for s in stapleThermodynamics(self.part)]
+            self.assertAlmostEqual(tmVariance[i], np.var(tms), places=6)
+            staples = [o.sequence() for o in self.part.oligos() \
+                                                        if o.isStaple()]
+            runs = sum(len(re.findall('(?=(A{5}|C{5}|G{5}|T{5}))', s)) \
+                                                        for s in staples)
+            found = sum(len(re.findall('(?=(GAATTC|GGGG|CCCC))', s)) \
+                                                        for s in staples)
+            self.assertEqual(polyN[i], runs)
+            self.assertEqual(motifs[i], found)
+
+    def testBestOffsets(self):
+        before = scaffoldOligo(self.part).sequence()
+        best = bestOffsets(self.part, 'p7560', settings, count=3,
+                           processes=2)
+        self.assertEqual(len(best), 3)
+        self.assertEqual([r.score for r in best],
+                         sorted(r.score for r in best))
+        self.assertEqual(scaffoldOligo(self.part).sequence(), before)
+        every = scoreOffsets(offsetProblem(self.part, sequences['p7560']),
+                             settings, processes=1)
+        score = every[0] + every[1] + 10 * every[2]
+        self.assertAlmostEqual(best[0].score, score.min(), places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
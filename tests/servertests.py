@@ -0,0 +1,201 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+servertests.py
+
+Tests of the headless design server (cadnanoserver.py) through a local
+TCP client.
+
+Run these tests by calling "python -m tests.servertests" from cadnano2
+root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import cadnano
+from cadnanoserver import CadnanoClient, DocumentServer, RpcError, \
+                          makeServer, METHOD_NOT_FOUND, INVALID_PARAMS, \
+                          SERVER_ERROR
+
+inputDir = "tests/functionaltestinputs"
+
+
+class ServerTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+        self.documentServer = DocumentServer(maxDocuments=2)
+        self.server = makeServer(self.documentServer, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.client = CadnanoClient(port=self.server.server_address[1])
+        self.tdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.documentServer.closeAll()
+        shutil.rmtree(self.tdir)
+
+    def load(self, designname, **kwargs):
+        return self.client.call('load',
+                        path=os.path.join(inputDir, designname), **kwargs)
+
+    def testRoundTrip(self):
+        """Load, autostaple, sequence, export, check and save a design."""
+        doc = self.load("Nature09_monolith.json")['document']
+        summary = self.client.call('autostaple', document=doc)
+        self.assertTrue(summary['staples'] > 0)
+        self.assertEqual(self.client.call('applySequence', doc),
+                         {'oligos': summary['scaffolds']})
+        violations = self.client.call('drc', document=doc)
+        self.assertTrue(all('rule' in v for v in violations))
+        fname = os.path.join(self.tdir, "saved.json")
+        self.assertEqual(self.client.call('save', document=doc, path=fname),
+                         fname)
+        saved = self.client.call('load', path=fname)
+        self.assertEqual(saved['helices'], summary['helices'])
+        self.assertEqual(saved['staples'], summary['staples'])
+        text = self.client.call('save', document=doc)
+        self.assertEqual(json.loads(text)['vstrands'],
+                         json.load(open(fname))['vstrands'])
+
+    def testExportStaples(self):
+        doc = self.load("simple42legacy.json")['document']
+        self.client.call('applySequence', document=doc, name='p7308')
+        csv = self.client.call('exportStaples', document=doc)
+        lines = csv.strip().split('\n')
+        self.assertEqual(lines[0], "Start,End,Sequence,Length,Color")
+        self.assertTrue(len(lines) > 1)
+
+    def testSharedSequences(self):
+        doc = self.load("Nature09_monolith.json")['document']
+        self.client.call('applySequence', document=doc, name='p7560')
+        shared = self.client.call('sharedSequences', document=doc, k=12)
+        self.assertTrue(shared)
+        self.assertTrue(all(s['length'] >= 12 for s in shared))
+        self.assertTrue(set(shared[0]) >= set(['kind', 'a', 'b']))
+        self.assertRaises(RpcError, self.client.call, 'sharedSequences',
+                          document=doc, k=40)
+
+    def testScanMotifs(self):
+        doc = self.load("Nature09_monolith.json")['document']
+        self.client.call('applySequence', document=doc, name='p7560')
+        hits = self.client.call('scanMotifs', document=doc,
+                                motifs={'EcoRI': 'GAATTC', 'custom': 'GGNNRYC'})
+        self.assertTrue(hits)
+        self.assertTrue(set(h['name'] for h in hits) <= set(['EcoRI',
+                                                             'custom']))
+        self.assertTrue(all(h['segments'] for h in hits))
+        self.assertRaises(RpcError, self.client.call, 'scanMotifs',
+                          document=doc, motifs={'bad': 'GAXTC'})
+
+    def testScaffoldOffsets(self):
+        doc = self.load("Nature09_monolith.json")['document']
+        best = self.client.call('scaffoldOffsets', document=doc, name='p7560',
+                                count=2)
+        self.assertEqual(len(best), 2)
+        self.assertTrue(best[0]['score'] <= best[1]['score'])
+        self.client.call('applySequence', document=doc, name='p7560',
+                         offset=best[0]['offset'])
+        self.assertTrue(self.client.call('exportStaples', document=doc))
+
+    def testDocumentsAreLeastRecentlyUsed(self):
+        a = self.load("skip.json")['document']
+        b = self.load("loop_size_1.json")['document']
+        self.client.call('drc', document=a)  # a is now the most recent
+        c = self.load("gap_vs_skip.json", document='gaps')['document']
+        self.assertEqual(c, 'gaps')
+        self.assertEqual(self.client.call('documents'), [a, c])
+        self.assertRaises(RpcError, self.client.call, 'drc', document=b)
+        self.assertTrue(self.client.call('close', document=a))
+        self.assertEqual(self.client.call('documents'), [c])
+
+    def testErrors(self):
+        try:
+            self.client.call('noSuchMethod')
+        except RpcError, e:
+            self.assertEqual(e.code, METHOD_NOT_FOUND)
+        else:
+            self.fail("no error for an unknown method")
+        try:
+            self.client.call('autostaple', document='missing')
+        except RpcError, e:
+            self.assertEqual(e.code, INVALID_PARAMS)
+        else:
+            self.fail("no error for an unknown document")
+        self.assertRaises(RpcError, self.client.call, 'load',
+                          path=os.path.join(self.tdir, "missing.json"))
+        self.assertRaises(RpcError, self.client.call, 'load', json="{")
+        self.assertEqual(self.client.call('documents'), [])
+        response = json.loads(self.documentServer.handleLine("not json"))
+        self.assertEqual(response['error']['code'], -32700)
+
+    def testInvalidParams(self):
+        handle = self.documentServer.handle
+        for params in ({}, [], {'document': [1]}, [{'a': 1}]):
+            response = handle({'jsonrpc': '2.0', 'id': 1,
+                               'method': 'autostaple', 'params': params})
+            self.assertEqual(response['error']['code'], INVALID_PARAMS)
+        response = handle({'jsonrpc': '2.0', 'id': 2, 'method': 'close',
+                           'params': {'document': {}}})
+        self.assertEqual(response['error']['code'], INVALID_PARAMS)
+        # the connection survives
+        self.assertEqual(self.client.call('documents'), [])
+
+    def testServerError(self):
+        doc = self.load("simple42legacy.json")['document']
+        response = self.documentServer.handle({'jsonrpc': '2.0', 'id': 1,
+                        'method': 'scaffoldOffsets',
+                        'params': {'document': doc, 'count': 'x'}})
+        self.assertEqual(response['error']['code'], SERVER_ERROR)
+        self.assertEqual(response['id'], 1)
+        # raised outside the document workers
+        response = self.documentServer.handle({'jsonrpc': '2.0', 'id': 2,
+                        'method': 'load', 'params': {'path': [1]}})
+        self.assertEqual(response['error']['code'], SERVER_ERROR)
+        self.assertTrue('data' in response['error'])
+
+    def testNotifications(self):
+        handle = self.documentServer.handle
+        self.assertEqual(handle({'jsonrpc': '2.0', 'method': 'documents'}),
+                         None)
+        self.assertEqual(handle({'jsonrpc': '2.0', 'method': 'noSuchMethod'}),
+                         None)
+        self.assertEqual(handle({'jsonrpc': '2.0', 'method': 'autostaple',
+                                 'params': {'document': [1]}}), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
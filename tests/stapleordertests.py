@@ -0,0 +1,140 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+stapleordertests.py
+
+Checks how model/io/stapleorder.py classifies the staples of a design
+against a previous order, read from a staple CSV or from a manifest.
+
+Run these tests by calling "python -m tests.stapleordertests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import json
+import unittest
+from StringIO import StringIO
+
+import cadnano
+from data.dnasequences import sequences
+from model.designdiff import loadPart
+from model.io.stapleorder import StapleOrder, csvHeader, readOrder, \
+                                 writeChangedStaples, writeOrderManifest
+
+inputDir = "tests/functionaltestinputs"
+
+
+class StapleOrderTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Monolith with part of a scaffold sequence applied, so some staples
+        have bases of unknown sequence. The previous order is the current
+        one with one staple moved, one changed, one missing (so new), an
+        extra one that is no longer used, and the unassigned rows.
+        """
+        cadnano.app()
+        self.part = loadPart("%s/Nature09_monolith.json" % inputDir)[1]
+        for vh in self.part.getVirtualHelices():
+            if vh.number() == 4:
+                oligo = vh.scaffoldStrandSet().getStrand(73).oligo()
+                oligo.applySequence(sequences['p7560'][:5000])
+        f = StringIO()
+        writeChangedStaples(self.part, StapleOrder(), f, header=False)
+        rows = [line.split(',') for line in f.getvalue().splitlines()]
+        assigned = [row for row in rows if '?' not in row[2]]
+        counts = {}
+        for row in assigned:
+            counts[row[2]] = counts.get(row[2], 0) + 1
+        unique = [row for row in assigned if counts[row[2]] == 1]
+        moved, changed, new = unique[:3]
+        self.moved = "%s,%s" % tuple(moved[:2])
+        self.changed = "%s,%s" % tuple(changed[:2])
+        self.new = "%s,%s" % tuple(new[:2])
+        self.unassigned = sorted("%s,%s" % tuple(row[:2]) \
+                                        for row in rows if '?' in row[2])
+        self.reused = sorted("%s,%s" % tuple(row[:2]) for row in assigned \
+                             if row is not changed and row is not new)
+        previous = []
+        for row in rows:
+            if row is new:
+                continue
+            row = list(row)
+            if row[:2] == moved[:2]:
+                row[:2] = ["99[1]", "99[30]"]
+            elif row[:2] == changed[:2]:
+                row[2] = 'A' * len(row[2])
+            previous.append(row)
+        previous.append(["98[1]", "98[30]", "GATTACA" * 4, "28", "#000000"])
+        # the old sequence of the changed staple is no longer used either
+        self.dropped = sorted([self.changed, "98[1],98[30]"])
+        self.previousCsv = csvHeader + \
+                        "".join(",".join(row) + "\n" for row in previous)
+
+    def checkReport(self, previous):
+        f = StringIO()
+        report = writeChangedStaples(self.part, previous, f)
+        self.assertEqual(sorted(report['reused']), self.reused)
+        self.assertEqual(report['moved'], [self.moved])
+        self.assertEqual(report['changed'], [self.changed])
+        self.assertEqual(report['new'], [self.new])
+        self.assertEqual(report['dropped'], self.dropped)
+        self.assertEqual(sorted(report['unassigned']), self.unassigned)
+        # only staples to order are written
+        lines = f.getvalue().splitlines()
+        self.assertEqual(lines[0] + "\n", csvHeader)
+        self.assertEqual(sorted(",".join(line.split(',')[:2]) \
+                                                    for line in lines[1:]),
+                         sorted([self.changed, self.new] + self.unassigned))
+
+    def testCsv(self):
+        self.assertTrue(self.unassigned)
+        previous = readOrder(StringIO(self.previousCsv))
+        # unassigned rows are not part of the previous order, which holds
+        # the reused, changed and dropped staples
+        self.assertEqual(len(previous), len(self.reused) + 2)
+        self.checkReport(previous)
+
+    def testManifest(self):
+        manifest = json.dumps(readOrder(StringIO(self.previousCsv)).manifest())
+        self.checkReport(readOrder(StringIO(manifest)))
+
+    def testUnchanged(self):
+        f = StringIO()
+        writeOrderManifest(self.part, f)
+        f.seek(0)
+        report = writeChangedStaples(self.part, readOrder(f), StringIO())
+        self.assertEqual((report['moved'], report['changed'], report['new'],
+                          report['dropped']), ([], [], [], []))
+        self.assertEqual(sorted(report['unassigned']), self.unassigned)
+
+    def testNotAManifest(self):
+        self.assertRaises(ValueError, readOrder,
+                          StringIO(json.dumps({'format': 'other'})))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+startuptests.py
+
+Cold start regression tests. Each test starts cadnano in a new process
+with --quit-after-startup (see startupprofiler.py) and checks the report
+it prints: the time to the first paint of the window must be within
+timeToWindowBudget seconds (or CADNANO_STARTUP_BUDGET), and none of the
+modules that are meant to load on first use may have been imported.
+
+Run these tests by calling "python -m tests.startuptests" from cadnano2
+root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import os
+import re
+import subprocess
+import unittest
+
+
+class StartupTests(unittest.TestCase):
+    timeToWindowBudget = 3.0  # seconds, generous for slow build machines
+    runs = 3  # the fastest run counts, the first one warms the disk cache
+
+    def startCadnano(self):
+        """Returns the report printed by one cold start."""
+        env = dict(os.environ)
+        env['CADNANO_IGNORE_ENV_VARS_EXCEPT_FOR_ME'] = 'YES'
+        proc = subprocess.Popen([sys.executable, 'main.py',
+                                 '--quit-after-startup'],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, env=env)
+        output = proc.communicate()[0]
+        self.assertEqual(proc.returncode, 0, output)
+        return output
+
+    def testTimeToWindow(self):
+        budget = float(os.environ.get('CADNANO_STARTUP_BUDGET',
+                                      self.timeToWindowBudget))
+        times = []
+        for i in range(self.runs):
+            output = self.startCadnano()
+            match = re.search(r"Time to window: ([\d.]+) ms", output)
+            self.assertTrue(match, output)
+            times.append(float(match.group(1)) / 1000)
+        print "time to window: %.3f s (budget %.3f s)" % (min(times), budget)
+        self.assertTrue(min(times) <= budget,
+                        "time to window %.3f s is over the %.3f s budget" % \
+                                                        (min(times), budget))
+
+    def testDeferredModules(self):
+        output = self.startCadnano()
+        match = re.search(r"Deferred modules imported: (.*)", output)
+        self.assertTrue(match, output)
+        self.assertEqual(match.group(1).strip(), 'none', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+structureencodertests.py
+
+Checks the nucleotides and the PDB and oxDNA records written by
+model/io/structureencoder.py for a design with insertions and skips.
+
+Run these tests by calling "python -m tests.structureencodertests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import cadnano
+from model.designdiff import loadPart
+from model.io.structureencoder import encodeOxDNA, encodePDB, \
+                                      oligoNucleotides, sortedOligos, \
+                                      strandNucleotidePositions
+
+inputDir = "tests/functionaltestinputs"
+
+
+def expectedLength(oligo):
+    """Bases of oligo's strands, plus insertions, minus skips."""
+    total = 0
+    for strand in oligo.strand5p().generator3pStrand():
+        lowIdx, highIdx = strand.idxs()
+        total += highIdx - lowIdx + 1
+        total += sum(i.length() for i in strand.insertionsOnStrand())
+    return total
+
+
+class StructureEncoderTests(unittest.TestCase):
+    def setUp(self):
+        cadnano.app()
+        self.part = loadPart("%s/loops_and_skips.json" % inputDir)[1]
+        self.oligos = sortedOligos(self.part)
+        self.tdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tdir)
+
+    def testNucleotideCount(self):
+        insertions = self.part.insertions().values()[0].values()
+        self.assertTrue([i for i in insertions if i.isSkip()])
+        self.assertTrue([i for i in insertions if not i.isSkip()])
+        for oligo in self.oligos:
+            backbone, axis, direction, seq = oligoNucleotides(oligo)
+            n = expectedLength(oligo)
+            self.assertEqual(oligo.length(), n)
+            self.assertEqual((len(seq), backbone.shape, axis.shape,
+                              len(direction)), (n, (n, 3), (n, 3), n))
+        strand = self.oligos[0].strand5p()
+        positions = strandNucleotidePositions(strand)
+        skips = set(i.idx() for i in strand.insertionsOnStrand() \
+                                                        if i.isSkip())
+        self.assertFalse(skips & set(positions))
+        self.assertEqual(len(set(positions)), len(positions))
+
+    def testPDB(self):
+        fname = os.path.join(self.tdir, "design.pdb")
+        encodePDB(self.part, fname)
+        lines = open(fname).read().split('\n')
+        self.assertTrue(lines[0].startswith("REMARK"))
+        self.assertEqual(lines[-2:], ["END", ""])
+        atoms = [line for line in lines if line.startswith("ATOM  ")]
+        self.assertEqual(len(atoms),
+                         2 * sum(expectedLength(o) for o in self.oligos))
+        self.assertEqual(len([line for line in lines if line == "TER"]),
+                         len(self.oligos))
+        for serial, line in enumerate(atoms, 1):
+            self.assertEqual(len(line), 78)
+            self.assertEqual(int(line[6:11]), serial)
+            self.assertTrue(line[12:16] in (" P  ", " N1 "))
+            self.assertTrue(line[17:20] in (" DA", " DC", " DG", " DT"))
+            self.assertEqual(line[76:78], " " + line[13])
+            for lo, hi in ((30, 38), (38, 46), (46, 54)):
+                float(line[lo:hi])  # x, y and z parse
+        # residues count 1, 2, 3... within each chain, two atoms each
+        chainA = [line for line in atoms if line[21] == 'A']
+        self.assertEqual([int(line[22:26]) for line in chainA[::2]],
+                         range(1, len(chainA) / 2 + 1))
+
+    def testOxDNA(self):
+        topFname = os.path.join(self.tdir, "design.top")
+        confFname = os.path.join(self.tdir, "design.conf")
+        encodeOxDNA(self.part, topFname, confFname)
+        top = open(topFname).read().split('\n')[:-1]
+        conf = open(confFname).read().split('\n')[:-1]
+        n = sum(expectedLength(o) for o in self.oligos)
+        self.assertEqual(map(int, top[0].split()), [n, len(self.oligos)])
+        self.assertEqual(len(top), n + 1)
+        start = 0
+        for strandId, oligo in enumerate(self.oligos, 1):
+            length = expectedLength(oligo)
+            records = [line.split() for line in top[1 + start:
+                                                    1 + start + length]]
+            self.assertTrue(all(len(r) == 4 for r in records))
+            self.assertEqual(set(int(r[0]) for r in records),
+                             set([strandId]))
+            self.assertTrue(all(r[1] in "ACGT" for r in records))
+            # listed 3' to 5': each nucleotide's 3' neighbor precedes it
+            self.assertEqual([int(r[2]) for r in records],
+                             [-1] + range(start, start + length - 1))
+            self.assertEqual([int(r[3]) for r in records],
+                             range(start + 1, start + length) + [-1])
+            start += length
+        self.assertEqual(conf[0], "t = 0")
+        self.assertTrue(conf[1].startswith("b = "))
+        self.assertEqual(len(conf[1].split()), 5)
+        self.assertEqual(conf[2], "E = 0 0 0")
+        self.assertEqual(len(conf), n + 3)
+        self.assertTrue(all(len(map(float, line.split())) == 15 \
+                                                    for line in conf[3:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
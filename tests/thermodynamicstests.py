@@ -0,0 +1,83 @@
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+thermodynamicstests.py
+
+Tests of the nearest-neighbor Tm and dG of model/thermodynamics.py.
+
+Run these tests by calling "python -m tests.thermodynamicstests" from
+cadnano2 root directory.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+import math
+import unittest
+
+import numpy as np
+
+from model.thermodynamics import R, SequenceWindows, evaluate
+
+oneMolar = {'na': 1.0, 'mg': 0.0, 'strandConc': 1e-4, 'concFactor': 4}
+
+
+class ThermodynamicsTests(unittest.TestCase):
+    def testSumOfStacks(self):
+        """CGTTGA, summed by hand from the SantaLucia 1998 table."""
+        dH = -10.6 - 8.4 - 7.9 - 8.5 - 8.2 + 0.1 + 2.3
+        dS = -27.2 - 22.4 - 22.2 - 22.7 - 22.2 - 2.8 + 4.1
+        result = evaluate(['CGTTGA'], oneMolar)
+        self.assertAlmostEqual(result.dH[0], dH)
+        self.assertAlmostEqual(result.dS[0], dS)
+        self.assertAlmostEqual(result.dG[0], dH - 310.15 * dS / 1000)
+        tm = 1000 * dH / (dS + R * math.log(1e-4 / 4)) - 273.15
+        self.assertAlmostEqual(result.tm[0], tm)
+
+    def testUnknownBases(self):
+        tm = evaluate(['ACGTACGTAC', 'ACGT ACGTA', '', 'A'], oneMolar).tm
+        self.assertFalse(np.isnan(tm[0]))
+        self.assertTrue(np.isnan(tm[1:]).all())
+
+    def testSalt(self):
+        """Staples melt higher in more salt and more Mg2+."""
+        seq = ['GATTACAGATTACAGCGCGTTAGCAATCGCAT']
+        low = evaluate(seq, {'na': 0.01, 'mg': 0.0}).tm[0]
+        high = evaluate(seq, {'na': 0.1, 'mg': 0.0}).tm[0]
+        mg = evaluate(seq, {'na': 0.01, 'mg': 0.0125}).tm[0]
+        self.assertTrue(low < high)
+        self.assertTrue(low < mg)
+
+    def testCircularWindows(self):
+        seq = 'ACGTTGCAGGATCCATTAGC'
+        windows = SequenceWindows(seq, circular=True)
+        starts = range(len(seq))
+        wrapped = windows.evaluate(starts, [8] * len(seq)).tm
+        linear = evaluate([(seq + seq)[i:i + 8] for i in starts]).tm
+        self.assertTrue(np.allclose(wrapped, linear))
+
+
+if __name__ == "__main__":
+    unittest.main()
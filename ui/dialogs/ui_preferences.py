@@ -207,6 +207,18 @@ class Ui_Preferences(object):
         self.defaultToolLabel.setText(QtGui.QApplication.translate("Preferences", "Default tool at startup:", None, QtGui.QApplication.UnicodeUTF8))
         self.defaultToolLabel.setObjectName(_fromUtf8("defaultToolLabel"))
         self.formLayout.setWidget(2, QtGui.QFormLayout.LabelRole, self.defaultToolLabel)
+        self.virtualizeLabel = QtGui.QLabel(self.settings)
+        self.virtualizeLabel.setText(QtGui.QApplication.translate("Preferences", "Large designs:", None, QtGui.QApplication.UnicodeUTF8))
+        self.virtualizeLabel.setObjectName(_fromUtf8("virtualizeLabel"))
+        self.formLayout.setWidget(4, QtGui.QFormLayout.LabelRole, self.virtualizeLabel)
+        self.virtualizeCheckBox = QtGui.QCheckBox(self.settings)
+        self.virtualizeCheckBox.setText(QtGui.QApplication.translate("Preferences", "Only draw strands near the visible area", None, QtGui.QApplication.UnicodeUTF8))
+        self.virtualizeCheckBox.setObjectName(_fromUtf8("virtualizeCheckBox"))
+        self.formLayout.setWidget(4, QtGui.QFormLayout.FieldRole, self.virtualizeCheckBox)
+        self.batchCheckBox = QtGui.QCheckBox(self.settings)
+        self.batchCheckBox.setText(QtGui.QApplication.translate("Preferences", "Draw oligos as single paths until hovered", None, QtGui.QApplication.UnicodeUTF8))
+        self.batchCheckBox.setObjectName(_fromUtf8("batchCheckBox"))
+        self.formLayout.setWidget(5, QtGui.QFormLayout.FieldRole, self.batchCheckBox)
         self.verticalLayout_4.addLayout(self.formLayout)
         self.buttonBox = QtGui.QDialogButtonBox(self.settings)
         self.buttonBox.setStandardButtons(QtGui.QDialogButtonBox.RestoreDefaults)
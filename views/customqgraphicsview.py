@@ -37,21 +37,16 @@ Copyright (c) 2010 . All rights reserved.
 
 """
 from cadnano import app
+from instrumentation import timed
 from views import styles
 
 import util
 # import Qt stuff into the module namespace with PySide, PyQt4 independence
-util.qtWrapImport('QtCore', globals(), ['Qt', 'QTimer', 'pyqtSignal', 'QTimeLine'])
+util.qtWrapImport('QtCore', globals(), ['Qt', 'QTimer', 'pyqtSignal', 'QTimeLine',
+                                         'QRectF'])
 util.qtWrapImport('QtGui', globals(),  ['QGraphicsView', 'QGraphicsScene', 'qApp', 'QPen','QPaintEngine'])
 
-# for OpenGL mode
-try:
-    from PyQt4.QtGui import QWidget
-    from OpenGL import GL
-    from PyQt4.QtOpenGL import QGLWidget, QGLFormat, QGL
-except:
-    GL = False
-
+# OpenGL mode is off, so QtOpenGL and PyOpenGL are not imported at startup
 GL = False
 
 class CustomQGraphicsView(QGraphicsView):
@@ -116,8 +111,11 @@ class CustomQGraphicsView(QGraphicsView):
 
         self.toolbar = None  # custom hack for the paint tool palette
         self._name = None
+        self._lastViewState = None  # (transform, root transform, size)
+        self._rubberBandOrigin = None  # view pos of a rubber band drag
 
         if GL:
+            from PyQt4.QtOpenGL import QGLWidget, QGLFormat, QGL
             self.setViewport(QGLWidget(QGLFormat(QGL.SampleBuffers)))
             self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
         else:
@@ -126,6 +124,8 @@ class CustomQGraphicsView(QGraphicsView):
     # end def
 
     levelOfDetailChangedSignal = pyqtSignal(bool)
+    viewChangedSignal = pyqtSignal()  # panned, zoomed or resized
+    rubberBandChangedSignal = pyqtSignal(QRectF)  # scene rect, or null
 
     def __repr__(self):
         clsName = self.__class__.__name__
@@ -376,6 +376,13 @@ class CustomQGraphicsView(QGraphicsView):
                 self._y0 = yf
             elif self._dollyZoomEnable == True:
                 self.dollyZoom(event)
+        if self._rubberBandOrigin is not None:
+            # sent before Qt selects, so listeners can create the items
+            # the band should select
+            origin = self.mapToScene(self._rubberBandOrigin)
+            pos = self.mapToScene(event.pos())
+            rect = QRectF(origin, pos).normalized()
+            self.rubberBandChangedSignal.emit(rect)
         # adding this allows events to be passed to items underneath
         QGraphicsView.mouseMoveEvent(self, event)
     # end def
@@ -398,10 +405,18 @@ class CustomQGraphicsView(QGraphicsView):
                 QGraphicsView.mousePressEvent(self, event)
         else:
             QGraphicsView.mousePressEvent(self, event)
+            # Qt starts a rubber band when no item takes the press
+            if self.dragMode() == QGraphicsView.RubberBandDrag and \
+                    event.button() == Qt.LeftButton and \
+                    self.scene().mouseGrabberItem() is None:
+                self._rubberBandOrigin = event.pos()
     #end def
 
     def mouseReleaseEvent(self, event):
         """If panning, stop. If handles were pressed, release them."""
+        if self._rubberBandOrigin is not None:
+            self._rubberBandOrigin = None
+            self.rubberBandChangedSignal.emit(QRectF())
         if self._transformEnable == True:
             # QMouseEvent.button() returns the button that triggered the event
             which_button = event.button()
@@ -538,8 +553,17 @@ class CustomQGraphicsView(QGraphicsView):
         self.resetGL()
     # end def
 
+    @timed('view')
     def paintEvent(self, event):
         if self.toolbar:
             self.toolbar.setPos(self.mapToScene(0, 0))
+        # panning moves sceneRootItem rather than the scroll bars, so
+        # the visible area is compared here, once per repaint
+        if self.sceneRootItem is not None:
+            viewState = (self.transform(), self.sceneRootItem.transform(),
+                         self.viewport().size())
+            if viewState != self._lastViewState:
+                self._lastViewState = viewState
+                self.viewChangedSignal.emit()
         QGraphicsView.paintEvent(self, event)
 #end class
@@ -40,12 +40,7 @@ util.qtWrapImport('QtGui', globals(), ['QAction', 'QApplication',
                                        'QGraphicsView', 'QMainWindow',
                                        'QGraphicsItem', 'QGraphicsRectItem',
                                        'QWidget', 'QPaintEngine'])
-# for OpenGL mode
-try:
-    from OpenGL import GL
-except:
-    GL = False
-
+# OpenGL mode is off, so PyOpenGL is not imported at startup
 GL = False
 
 class DocumentWindow(QMainWindow, ui_mainwindow.Ui_MainWindow):
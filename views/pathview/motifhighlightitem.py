@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+
+"""
+motifhighlightitem.py
+
+A highlight layer of the path view for the MotifHits of
+model/motifscanner.py. A MotifHighlightItem draws a box over the bases
+of every hit, on the helix and strand each part of it lies on, as one
+QPainterPath. It shows the hits of the last scan: the PartItem redraws it
+when helices move, but edits are not rescanned until the next scan.
+"""
+
+from views import styles
+import util
+
+util.qtWrapImport('QtCore', globals(), ['Qt'])
+util.qtWrapImport('QtGui', globals(), ['QBrush', 'QGraphicsItem',
+                                       'QGraphicsPathItem', 'QPainterPath',
+                                       'QPen'])
+
+_baseWidth = styles.PATH_BASE_WIDTH
+
+
+class MotifHighlightItem(QGraphicsPathItem):
+    """Boxes over the bases of MotifHits, in a PartItem's proxy."""
+    def __init__(self, partItem):
+        super(MotifHighlightItem, self).__init__(partItem.proxy())
+        self._partItem = partItem
+        self._hits = []
+        self.setAcceptHoverEvents(False)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setZValue(styles.ZMOTIFHIGHLIGHT)
+        self.setPen(QPen(styles.motifstroke, styles.PATH_GRID_STROKE_WIDTH))
+        self.setBrush(QBrush(styles.motiffill))
+    # end def
+
+    def hits(self):
+        return list(self._hits)
+    # end def
+
+    def setHits(self, hits):
+        self._hits = list(hits)
+        self.refresh()
+    # end def
+
+    def refresh(self):
+        """Redraws the hits at the current positions of the helices."""
+        path = QPainterPath()
+        path.setFillRule(Qt.WindingFill)  # overlapping hits stay filled
+        bw = _baseWidth
+        itemForVirtualHelix = self._partItem.itemForVirtualHelix
+        for hit in self._hits:
+            for strand, lowIdx, highIdx in hit.segments:
+                try:
+                    vhi = itemForVirtualHelix(strand.virtualHelix())
+                except KeyError:
+                    continue  # the helix was removed since the scan
+                y = vhi.y() + (0 if vhi.isStrandOnTop(strand) else bw)
+                path.addRect(lowIdx * bw, y, (highIdx - lowIdx + 1) * bw, bw)
+        self.setPath(path)
+    # end def
+
+    def remove(self):
+        self.scene().removeItem(self)
+        self._partItem = None
+    # end def
+# end class
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+oligopathitem.py
+
+Display-only drawing of oligos in the path view. An OligoPathItem draws
+every strand and crossover of one oligo that lies on depopulated helices
+(see PathVirtualizer) as a single cached QPainterPath, in place of the
+StrandItem, EndpointItem and XoverItem children that a populated helix
+has. The items take no mouse or hover events, so the VirtualHelixItem
+underneath still sees the pointer and can be populated before it is
+edited.
+"""
+
+from views import styles
+import util
+
+util.qtWrapImport('QtCore', globals(), ['Qt'])
+util.qtWrapImport('QtGui', globals(), ['QColor', 'QGraphicsItem',
+                                       'QGraphicsPathItem', 'QPainterPath',
+                                       'QPen'])
+
+_baseWidth = styles.PATH_BASE_WIDTH
+
+
+class OligoPathItem(QGraphicsPathItem):
+    """One oligo's strands and crossovers on depopulated helices."""
+    def __init__(self, oligo, parent):
+        super(OligoPathItem, self).__init__(parent)
+        self._oligo = oligo
+        self._color = None
+        self.setAcceptHoverEvents(False)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        self.setZValue(styles.ZSTRANDITEM)
+        self.updateColor()
+    # end def
+
+    def oligo(self):
+        return self._oligo
+    # end def
+
+    def updateColor(self):
+        """Sets the pen from the oligo color, if it has changed."""
+        color = self._oligo.color()
+        if color == self._color:
+            return
+        self._color = color
+        pen = QPen(QColor(color), styles.PATH_STRAND_STROKE_WIDTH)
+        pen.setCapStyle(Qt.FlatCap)
+        self.setPen(pen)
+    # end def
+
+    def remove(self):
+        self.scene().removeItem(self)
+        self._oligo = None
+    # end def
+# end class
+
+
+class OligoPathBatch(object):
+    """
+    The OligoPathItems of a PartItem. update() is given the depopulated
+    VirtualHelixItems and redraws only the oligos with strands on helices
+    that were edited (VirtualHelix.revision), moved, or populated or
+    depopulated since the previous update.
+    """
+    def __init__(self, partItem):
+        self._partItem = partItem
+        self._items = {}  # oligo -> OligoPathItem
+        self._helices = {}  # vhi -> (revision, y, oligos drawn on it)
+    # end def
+
+    def items(self):
+        return self._items.values()
+    # end def
+
+    def clear(self):
+        for item in self._items.itervalues():
+            item.remove()
+        self._items = {}
+        self._helices = {}
+    # end def
+
+    def update(self, virtualHelixItems):
+        dirty = set()
+        current = set(virtualHelixItems)
+        for vhi in self._helices.keys():
+            if vhi not in current:
+                dirty.update(self._helices.pop(vhi)[2])
+        for vhi in virtualHelixItems:
+            vh = vhi.virtualHelix()
+            state = self._helices.get(vhi)
+            if state is not None and state[:2] == (vh.revision(), vhi.y()):
+                continue
+            oligos = set(strand.oligo() for strandSet in vh.getStrandSets() \
+                                        for strand in strandSet)
+            if state is not None:
+                dirty.update(state[2])
+            dirty.update(oligos)
+            self._helices[vhi] = (vh.revision(), vhi.y(), oligos)
+        for oligo in dirty:
+            self._redraw(oligo)
+        # recoloring an oligo does not touch its helices
+        for item in self._items.itervalues():
+            item.updateColor()
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _redraw(self, oligo):
+        path = self._oligoPath(oligo)
+        item = self._items.get(oligo)
+        if path.isEmpty():
+            if item is not None:
+                del self._items[oligo]
+                item.remove()
+            return
+        if item is None:
+            item = OligoPathItem(oligo, self._partItem.proxy())
+            self._items[oligo] = item
+        item.setPath(path)
+    # end def
+
+    def _oligoPath(self, oligo):
+        """
+        Returns the path of the strands of oligo on batched helices, and of
+        the crossovers leaving them. Crossovers leaving populated helices
+        are drawn by their StrandItems.
+        """
+        path = QPainterPath()
+        strand5p = oligo.strand5p()
+        if strand5p is None:
+            return path
+        bw = _baseWidth
+        itemForVirtualHelix = self._partItem.itemForVirtualHelix
+        helices = self._helices
+        for strand in strand5p.generator3pStrand():
+            if strand.oligo() is not oligo:
+                break  # oligo was split or merged since; redrawn separately
+            vhi = itemForVirtualHelix(strand.virtualHelix())
+            if vhi not in helices:
+                continue
+            lowIdx, highIdx = strand.idxs()
+            y = vhi.y() + (0 if vhi.isStrandOnTop(strand) else bw) + bw / 2.
+            path.moveTo(lowIdx * bw, y)
+            path.lineTo((highIdx + 1) * bw, y)
+            strand3p = strand.connection3p()
+            if strand3p is None:
+                continue
+            vhi3p = itemForVirtualHelix(strand3p.virtualHelix())
+            x5 = (strand.idx3Prime() + .5) * bw
+            x3 = (strand3p.idx5Prime() + .5) * bw
+            y3 = vhi3p.y() + (0 if vhi3p.isStrandOnTop(strand3p) else bw) \
+                                                                + bw / 2.
+            # bulge outward past the ends, like XoverItem
+            if strand.isDrawn5to3():
+                cx = max(x5, x3) + bw
+            else:
+                cx = min(x5, x3) - bw
+            path.moveTo(x5, y)
+            path.quadTo(cx, (y + y3) / 2., x3, y3)
+        return path
+    # end def
+# end class
@@ -29,6 +29,8 @@ from collections import defaultdict
 from math import ceil
 from activesliceitem import ActiveSliceItem
 from controllers.itemcontrollers.partitemcontroller import PartItemController
+from instrumentation import timed
+from pathvirtualizer import PathVirtualizer
 from prexoveritem import PreXoverItem
 from strand.xoveritem import XoverNode3
 from ui.mainwindow.svgbutton import SVGButton
@@ -73,6 +75,8 @@ class PartItem(QGraphicsRectItem):
         self._initResizeButtons()
         self._proxyParent = ProxyParentItem(self)
         self._proxyParent.setFlag(QGraphicsItem.ItemHasNoContents)
+        self._virtualizer = PathVirtualizer(self, viewroot.scene().views()[0])
+        self._motifHighlight = None  # made on the first setMotifHits
     # end def
     
     def proxy(self):
@@ -134,6 +138,9 @@ class PartItem(QGraphicsRectItem):
     def partRemovedSlot(self, sender):
         """docstring for partRemovedSlot"""
         self._activeSliceItem.removed()
+        self._virtualizer.remove()
+        self._virtualizer = None
+        self._motifHighlight = None
         self.parentItem().removePartItem(self)
         scene = self.scene()
         scene.removeItem(self)
@@ -200,6 +207,7 @@ class PartItem(QGraphicsRectItem):
         self._setVirtualHelixItemList(newList)
     # end def
 
+    @timed('view')
     def updatePreXoverItemsSlot(self, sender, virtualHelix):
         part = self.part()
         if virtualHelix == None:
@@ -242,6 +250,15 @@ class PartItem(QGraphicsRectItem):
         return self._virtualHelixHash[virtualHelix.coord()]
     # end def
 
+    def virtualHelixItems(self):
+        """Returns the VirtualHelixItems in path view order, top first."""
+        return self._virtualHelixItemList
+    # end def
+
+    def virtualizer(self):
+        return self._virtualizer
+    # end def
+
     def virtualHelixBoundingRect(self):
         return self._vHRect
     # end def
@@ -346,6 +363,9 @@ class PartItem(QGraphicsRectItem):
         self._virtualHelixItemList = newList
         if zoomToFit:
             self.scene().views()[0].zoomToFit()
+        self._virtualizer.schedule()
+        if self._motifHighlight is not None:
+            self._motifHighlight.refresh()
     # end def
 
     def _updateBoundingRect(self):
@@ -382,6 +402,26 @@ class PartItem(QGraphicsRectItem):
         if bool == False:
             self._modRect.hide()
 
+    def motifHits(self):
+        """Returns the MotifHits shown by the highlight layer."""
+        if self._motifHighlight is None:
+            return []
+        return self._motifHighlight.hits()
+    # end def
+
+    def setMotifHits(self, hits):
+        """
+        Highlights the bases of hits, MotifHits of model/motifscanner.py,
+        in place of any shown before. An empty list clears the layer.
+        """
+        if self._motifHighlight is None:
+            if not hits:
+                return
+            from motifhighlightitem import MotifHighlightItem
+            self._motifHighlight = MotifHighlightItem(self)
+        self._motifHighlight.setHits(hits)
+    # end def
+
     def getOrderedVirtualHelixList(self):
         """Used for encoding."""
         ret = []
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License
+#
+# Copyright (c) 2011 Wyss Institute at Harvard University
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# http://www.opensource.org/licenses/mit-license.php
+
+"""
+pathvirtualizer.py
+
+Keeps the path view of a large part responsive by building StrandItems
+(and their endpoint, xover and insertion items) only for some helices.
+Every helix keeps its VirtualHelixItem, so handles, prexovers and
+itemForVirtualHelix lookups work as before; the other helices are drawn
+as placeholder rows (see VirtualHelixItem.populate and depopulate).
+
+A helix is populated when it is within PATH_VIRTUALIZE_MARGIN viewport
+heights of the visible area, when one of its strands has a crossover into
+such a helix (so every crossover on screen is drawn), when it has
+selected strands, or when it is the active helix. It is depopulated again
+only once it is twice as far away, so scrolling back and forth near the
+edge does not rebuild the same items over and over.
+
+With the batchPathItems preference on, only the helix under the pointer,
+the selection and the active helix are populated. The strands of all
+other helices are drawn in color as one OligoPathItem per oligo, so a
+design costs a few hundred items on screen whatever its size.
+
+In either mode the helices under a rubber band drag are populated as the
+band grows, before the view selects, so the band finds their strands.
+"""
+
+from math import ceil, floor
+from oligopathitem import OligoPathBatch
+from views import styles
+import util
+from cadnano import app
+
+util.qtWrapImport('QtCore', globals(), ['QTimer'])
+
+_margin = styles.PATH_VIRTUALIZE_MARGIN
+
+
+class PathVirtualizer(object):
+    """
+    Populates and depopulates the VirtualHelixItems of a PartItem. Turned
+    on by the virtualizePathView or batchPathItems preference; while both
+    are off every helix is populated. Updates are coalesced into one per
+    event loop turn.
+    """
+    def __init__(self, partItem, view):
+        self._partItem = partItem
+        self._view = view
+        self._hoveredItem = None
+        self._rubberBand = None  # part rect of a rubber band drag
+        self._rubberBandRows = None
+        self._oligoBatch = OligoPathBatch(partItem)
+        self._undoStack = partItem.part().undoStack()
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.update)
+        view.viewChangedSignal.connect(self.schedule)
+        view.rubberBandChangedSignal.connect(self.setRubberBand)
+        # undo, redo and new commands may edit helices that have no items
+        self._undoStack.indexChanged.connect(self.schedule)
+    # end def
+
+    def remove(self):
+        self._timer.stop()
+        self._oligoBatch.clear()
+        self._view.viewChangedSignal.disconnect(self.schedule)
+        self._view.rubberBandChangedSignal.disconnect(self.setRubberBand)
+        self._undoStack.indexChanged.disconnect(self.schedule)
+        self._partItem = None
+        self._view = None
+        self._undoStack = None
+    # end def
+
+    def isEnabled(self):
+        prefs = app().prefs
+        return prefs.virtualizePathView or prefs.batchPathItems
+    # end def
+
+    def isBatching(self):
+        return app().prefs.batchPathItems
+    # end def
+
+    def oligoPathItems(self):
+        return self._oligoBatch.items()
+    # end def
+
+    def setHoveredItem(self, virtualHelixItem):
+        """Called on hover, to populate the helix before it is edited."""
+        if virtualHelixItem is not self._hoveredItem:
+            self._hoveredItem = virtualHelixItem
+            self.schedule()
+    # end def
+
+    def setRubberBand(self, sceneRect):
+        """
+        Called as a rubber band drag changes, with a null rect when it ends.
+        Populates the helices under the band at once, since the view
+        selects right after this returns.
+        """
+        if self._partItem is None:
+            return
+        if sceneRect.isNull():
+            self._rubberBand = self._rubberBandRows = None
+            self.schedule()
+            return
+        self._rubberBand = self._partItem.mapFromScene(sceneRect).boundingRect()
+        rows = self._rowsIn(self._partItem.virtualHelixItems(),
+                            self._rubberBand, 0)
+        if rows != self._rubberBandRows and self.isEnabled():
+            self._rubberBandRows = rows
+            self.update()
+    # end def
+
+    def schedule(self, *args):
+        """Requests an update at the next event loop turn."""
+        if self._partItem is not None and not self._timer.isActive():
+            self._timer.start()
+    # end def
+
+    def update(self):
+        """
+        Populates the helices that should show strands, depopulates the
+        ones that have moved far enough away, and refreshes the
+        placeholders of helices edited since they were last drawn.
+        """
+        if self._partItem is None:
+            return
+        vhis = self._partItem.virtualHelixItems()
+        if not self.isEnabled():
+            self._oligoBatch.clear()
+            for vhi in vhis:
+                vhi.populate()
+            return
+        isBatching = self.isBatching()
+        if isBatching:
+            # crossovers out of batched helices are drawn by the batch
+            wanted = set([self._hoveredItem]) & set(vhis)
+            wanted.update(self._pinnedItems())
+            wanted.update(self._rubberBandItems(vhis))
+            keep = wanted
+        else:
+            wanted = set(vhis[slice(*self._rowRange(vhis, _margin))])
+            for vhi in list(wanted):
+                wanted.update(self._partnerItems(vhi))
+            wanted.update(self._pinnedItems())
+            wanted.update(self._rubberBandItems(vhis))
+            keep = set(vhis[slice(*self._rowRange(vhis, 2 * _margin))])
+        depopulated = []
+        for vhi in vhis:
+            if vhi in wanted:
+                vhi.populate()
+            elif not vhi.isPopulated() or vhi not in keep:
+                vhi.depopulate()
+                vhi.refreshPlaceholder(not isBatching)
+                depopulated.append(vhi)
+        self._oligoBatch.update(depopulated if isBatching else [])
+    # end def
+
+    ### PRIVATE SUPPORT METHODS ###
+    def _rowRange(self, vhis, margin):
+        """
+        Returns the (first, last + 1) positions in vhis of the helices
+        within margin viewport heights of the visible area.
+        """
+        if not vhis:
+            return 0, 0
+        view = self._view
+        visible = view.mapToScene(view.viewport().rect())
+        rect = self._partItem.mapFromScene(visible).boundingRect()
+        return self._rowsIn(vhis, rect, margin * rect.height())
+    # end def
+
+    def _rowsIn(self, vhis, rect, extra):
+        """
+        Returns the (first, last + 1) positions in vhis of the helices
+        within extra of rect, in part coordinates.
+        """
+        if not vhis:
+            return 0, 0
+        if len(vhis) > 1:
+            step = vhis[1].y() - vhis[0].y()
+        else:
+            step = styles.PATH_HELIX_HEIGHT + styles.PATH_HELIX_PADDING
+        first = int(floor((rect.top() - extra - vhis[0].y()) / step))
+        last = int(ceil((rect.bottom() + extra - vhis[0].y()) / step))
+        n = len(vhis)
+        return util.clamp(first, 0, n), util.clamp(last + 1, 0, n)
+    # end def
+
+    def _rubberBandItems(self, vhis):
+        """Returns the items of the helices under a rubber band drag."""
+        if self._rubberBand is None:
+            return []
+        return vhis[slice(*self._rowsIn(vhis, self._rubberBand, 0))]
+    # end def
+
+    def _partnerItems(self, vhi):
+        """
+        Returns the items of the helices whose strands have a crossover
+        into vhi. Crossovers are drawn by the StrandItem at their 5' end.
+        """
+        partItem = self._partItem
+        ret = set()
+        for strandSet in vhi.virtualHelix().getStrandSets():
+            for strand in strandSet:
+                strand5p = strand.connection5p()
+                if strand5p is not None:
+                    ret.add(partItem.itemForVirtualHelix(
+                                                strand5p.virtualHelix()))
+        return ret
+    # end def
+
+    def _pinnedItems(self):
+        """Returns the items of the active helix and of selected strands."""
+        partItem = self._partItem
+        part = partItem.part()
+        vhs = set()
+        if part.activeVirtualHelix() is not None:
+            vhs.add(part.activeVirtualHelix())
+        for obj in partItem.document().selectionDict():
+            virtualHelix = getattr(obj, 'virtualHelix', None)
+            if virtualHelix is not None:
+                vhs.add(virtualHelix())
+        return set(partItem.itemForVirtualHelix(vh) for vh in vhs \
+                                                if vh.part() == part)
+    # end def
+# end class
@@ -29,6 +29,7 @@ from exceptions import NotImplementedError
 from math import floor
 from controllers.itemcontrollers.strand.stranditemcontroller import StrandItemController
 from endpointitem import EndpointItem
+from instrumentation import timed
 from views import styles
 from xoveritem import XoverItem
 from decorators.insertionitem import InsertionItem
@@ -154,6 +155,7 @@ class StrandItem(QGraphicsLineItem):
         scene.removeItem(self)
     # end def
 
+    @timed('view')
     def strandUpdateSlot(self, strand):
         """
         Slot for just updating connectivity and color, and endpoint showing
@@ -24,14 +24,6 @@
 
 import os
 from cadnano import app
-from selecttool import SelectTool
-from penciltool import PencilTool
-from breaktool import BreakTool
-from erasetool import EraseTool
-from insertiontool import InsertionTool
-from skiptool import SkipTool
-from painttool import PaintTool
-from addseqtool import AddSeqTool
 import util
 
 # import Qt stuff into the module namespace with PySide, PyQt4 independence
@@ -42,28 +34,30 @@ util.qtWrapImport('QtGui', globals(), [ 'QActionGroup'])
 class PathToolManager(QObject):
     """
     Manages the interactions between Path widgets / UI elements and the model.
+    Each tool is imported and created the first time it is chosen (see tool).
     """
+    # tool name -> (module, class)
+    toolClasses = {'Select': ('selecttool', 'SelectTool'),
+                   'Pencil': ('penciltool', 'PencilTool'),
+                   'Break': ('breaktool', 'BreakTool'),
+                   'Erase': ('erasetool', 'EraseTool'),
+                   'Insertion': ('insertiontool', 'InsertionTool'),
+                   'Skip': ('skiptool', 'SkipTool'),
+                   'Paint': ('painttool', 'PaintTool'),
+                   'AddSeq': ('addseqtool', 'AddSeqTool')}
+
     def __init__(self, win):
         super(PathToolManager, self).__init__()
         self.window = win
         self._activeTool = None
         self._activePart = None
-        self.selectTool = SelectTool(self)
-        self.pencilTool = PencilTool(self)
-        self.breakTool = BreakTool(self)
-        self.eraseTool = EraseTool(self)
-        self.insertionTool = InsertionTool(self)
-        self.skipTool = SkipTool(self)
-        self.paintTool = PaintTool(self) # (self, win.pathGraphicsView.toolbar)
-        self.addSeqTool = AddSeqTool(self)
+        self._tools = {}
 
         def installTool(toolName, window):
             toolWidget = getattr(window, 'actionPath' + toolName)
-            lToolName = toolName[0].lower() + toolName[1:]
-            tool = getattr(self, lToolName + 'Tool')
-            tool.actionName = 'actionPath' + toolName
 
             def clickHandler(self):
+                tool = self.tool(toolName)
                 toolWidget.setChecked(True)
                 self.setActiveTool(tool)
                 if hasattr(tool, 'widgetClicked'):
@@ -89,6 +83,21 @@ class PathToolManager(QObject):
     ### SLOTS ###
 
     ### METHODS ###
+    def tool(self, toolName):
+        """
+        Returns the tool named toolName (e.g. 'Pencil'), importing and
+        creating it on first use. It is also kept as self.pencilTool etc.
+        """
+        tool = self._tools.get(toolName)
+        if tool is None:
+            modName, className = self.toolClasses[toolName]
+            mod = __import__(modName, globals(), locals(), [className], -1)
+            tool = getattr(mod, className)(self)
+            tool.actionName = 'actionPath' + toolName
+            self._tools[toolName] = tool
+            setattr(self, toolName[0].lower() + toolName[1:] + 'Tool', tool)
+        return tool
+
     def activePart(self):
         return self._activePart
 
@@ -116,7 +125,8 @@ class PathToolManager(QObject):
         self.activeToolChangedSignal.emit(self._activeTool.actionName)
 
     def isSelectToolActive(self):
-        if self.activeTool() == self.selectTool:
+        if self.activeTool() is not None and \
+                                self.activeTool() == self._tools.get('Select'):
             return True
         return False
 
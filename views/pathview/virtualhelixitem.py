@@ -28,6 +28,7 @@
 from math import floor
 from controllers.itemcontrollers.virtualhelixitemcontroller import VirtualHelixItemController
 from model.enum import StrandType
+from instrumentation import timed
 from strand.stranditem import StrandItem
 from views import styles
 from virtualhelixhandleitem import VirtualHelixHandleItem
@@ -58,6 +59,10 @@ class VirtualHelixItem(QGraphicsPathItem):
         self._lastStrandSet = None
         self._lastIdx = None
         self._scaffoldBackground = None
+        # while depopulated, strands are drawn by _placeholder alone
+        self._isPopulated = not partItem.virtualizer().isEnabled()
+        self._placeholder = None
+        self._placeholderRevision = None
         self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
         self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         self.setBrush(QBrush(Qt.NoBrush))
@@ -73,6 +78,8 @@ class VirtualHelixItem(QGraphicsPathItem):
         self.refreshPath()
         self.setAcceptHoverEvents(True)  # for pathtools
         self.setZValue(styles.ZPATHHELIX)
+        if not self._isPopulated:
+            partItem.virtualizer().schedule()
     # end def
 
     ### SIGNALS ###
@@ -92,8 +99,12 @@ class VirtualHelixItem(QGraphicsPathItem):
         new Strand.  The StrandItem is responsible for creating its own
         controller for communication with the model, and for adding itself to
         its parent (which is *this* VirtualHelixItem, i.e. 'self').
+        A depopulated item only asks for its placeholder to be redrawn.
         """
-        StrandItem(strand, self, self._viewroot)
+        if self._isPopulated:
+            StrandItem(strand, self, self._viewroot)
+        else:
+            self._partItem.virtualizer().schedule()
     # end def
 
     def decoratorAddedSlot(self, decorator):
@@ -155,6 +166,10 @@ class VirtualHelixItem(QGraphicsPathItem):
         return self._modelVirtualHelix
     # end def
 
+    def isPopulated(self):
+        return self._isPopulated
+    # end def
+
     def window(self):
         return self._partItem.window()
     # end def
@@ -185,11 +200,13 @@ class VirtualHelixItem(QGraphicsPathItem):
         return x, y
     # end def
 
+    @timed('view')
     def refreshPath(self):
         """
         Returns a QPainterPath object for the minor grid lines.
         The path also includes a border outline and a midline for
-        dividing scaffold and staple bases.
+        dividing scaffold and staple bases. Depopulated items skip the
+        grid lines.
         """
         bw = _baseWidth
         bw2 = 2 * bw
@@ -200,7 +217,7 @@ class VirtualHelixItem(QGraphicsPathItem):
         # border
         path.addRect(0, 0, bw * canvasSize, 2 * bw)
         # minor tick marks
-        for i in range(canvasSize):
+        for i in range(canvasSize if self._isPopulated else 0):
             x = round(bw * i) + .5
             if i % subStepSize == 0:
                 path.moveTo(x-.5, 0)
@@ -248,6 +265,74 @@ class VirtualHelixItem(QGraphicsPathItem):
         """Called by part on resize."""
         self.refreshPath()
 
+    @timed('view')
+    def refreshPlaceholder(self, show=True):
+        """
+        Redraws the strands of a depopulated item as plain gray bars, if
+        the model helix was edited since they were last drawn. With show
+        False the bars are removed (the oligo batch draws the strands).
+        """
+        vh = self._modelVirtualHelix
+        if not show:
+            if self._placeholder is not None:
+                self.scene().removeItem(self._placeholder)
+                self._placeholder = None
+                self._placeholderRevision = None
+            return
+        if self._isPopulated or self._placeholderRevision == vh.revision():
+            return
+        self._placeholderRevision = vh.revision()
+        bw = _baseWidth
+        path = QPainterPath()
+        for strandSet in vh.getStrandSets():
+            x, y = self.upperLeftCornerOfBaseType(0, strandSet.strandType())
+            for strand in strandSet:
+                lowIdx, highIdx = strand.idxs()
+                path.addRect(lowIdx * bw, y + bw / 3.,
+                             (highIdx - lowIdx + 1) * bw, bw / 3.)
+        if self._placeholder is None:
+            self._placeholder = QGraphicsPathItem(self)
+            self._placeholder.setPen(QPen(Qt.NoPen))
+            self._placeholder.setBrush(QBrush(styles.graystroke))
+        self._placeholder.setPath(path)
+    # end def
+
+    @timed('view')
+    def populate(self):
+        """
+        Creates the StrandItems of every strand of the helix, replacing
+        the placeholder. Selected strands are selected again.
+        """
+        if self._isPopulated:
+            return
+        self._isPopulated = True
+        self.refreshPlaceholder(False)
+        self.refreshPath()
+        doc = self._partItem.document()
+        for strandSet in self._modelVirtualHelix.getStrandSets():
+            for strand in strandSet:
+                strandItem = StrandItem(strand, self, self._viewroot)
+                if doc.isModelStrandSelected(strand):
+                    strandItem.selectIfRequired(doc,
+                                    doc.getSelectedStrandValue(strand))
+    # end def
+
+    @timed('view')
+    def depopulate(self):
+        """
+        Removes the StrandItems of the helix, as if their strands had been
+        removed from the model. PathVirtualizer then draws the strands with
+        refreshPlaceholder or the oligo batch.
+        """
+        if not self._isPopulated:
+            return
+        self._isPopulated = False
+        for item in self.childItems():
+            if isinstance(item, StrandItem):
+                item.strandRemovedSlot(item.strand())
+        self.refreshPath()
+    # end def
+
     ### PUBLIC SUPPORT METHODS ###
     def setActive(self, idx):
         """Makes active the virtual helix associated with this item."""
@@ -347,6 +432,7 @@ class VirtualHelixItem(QGraphicsPathItem):
         baseIdx = int(floor(event.pos().x() / _baseWidth))
         loc = "%d[%d]" % (self.number(), baseIdx)
         self._partItem.updateStatusBar(loc)
+        self._partItem.virtualizer().setHoveredItem(self)
 
         activeTool = self._activeTool()
         toolMethodName = str(activeTool) + "HoverMove"
@@ -21,7 +21,6 @@
 # THE SOFTWARE.
 #
 # http://www.opensource.org/licenses/mit-license.php
-from ui.dialogs.ui_preferences import Ui_Preferences
 from views import styles
 import util
 import cadnano
@@ -32,13 +31,22 @@ util.qtWrapImport('QtGui', globals(), ['QWidget', 'QDialogButtonBox',\
                                        'QMessageBox'])
 
 class Preferences(object):
-    """docstring for Preferences"""
+    """
+    The user preferences, kept in QSettings. The dialog and its resources
+    are only loaded the first time it is shown.
+    """
     def __init__(self):
         self.qs = QSettings()
+        self.uiPrefs = None
+        self.widget = None
+        self.readPreferences()
+
+    def _setupDialog(self):
+        from ui.dialogs.ui_preferences import Ui_Preferences
         self.uiPrefs = Ui_Preferences()
         self.widget = QWidget()
         self.uiPrefs.setupUi(self.widget)
-        self.readPreferences()
+        self._updateDialog()
         self.widget.addAction(self.uiPrefs.actionClose)
         self.uiPrefs.actionClose.triggered.connect(self.hideDialog)
         self.uiPrefs.honeycombRowsSpinBox.valueChanged.connect(self.setHoneycombRows)
@@ -50,17 +58,22 @@ class Preferences(object):
         self.uiPrefs.autoScafComboBox.currentIndexChanged.connect(self.setAutoScaf)
         self.uiPrefs.defaultToolComboBox.currentIndexChanged.connect(self.setStartupTool)
         self.uiPrefs.zoomSpeedSlider.valueChanged.connect(self.setZoomSpeed)
+        self.uiPrefs.virtualizeCheckBox.toggled.connect(self.setVirtualizePathView)
+        self.uiPrefs.batchCheckBox.toggled.connect(self.setBatchPathItems)
         # self.uiPrefs.helixAddCheckBox.toggled.connect(self.setZoomToFitOnHelixAddition)
         self.uiPrefs.buttonBox.clicked.connect(self.handleButtonClick)
         self.uiPrefs.addPluginButton.clicked.connect(self.addPlugin)
 
     def showDialog(self):
         # self.exec_()
+        if self.widget is None:
+            self._setupDialog()
         self.readPreferences()
         self.widget.show()  # launch prefs in mode-less dialog
 
     def hideDialog(self):
-        self.widget.hide()
+        if self.widget is not None:
+            self.widget.hide()
 
     # @pyqtSlot(object)
     def handleButtonClick(self, button):
@@ -83,7 +96,13 @@ class Preferences(object):
         self.startupToolIndex = self.qs.value("startupTool", styles.PREF_STARTUP_TOOL_INDEX).toInt()[0]
         self.zoomSpeed = self.qs.value("zoomSpeed", styles.PREF_ZOOM_SPEED).toInt()[0]
         self.zoomOnHelixAdd = self.qs.value("zoomOnHelixAdd", styles.PREF_ZOOM_AFTER_HELIX_ADD).toBool()
+        self.virtualizePathView = self.qs.value("virtualizePathView", styles.PREF_VIRTUALIZE_PATH_VIEW).toBool()
+        self.batchPathItems = self.qs.value("batchPathItems", styles.PREF_BATCH_PATH_ITEMS).toBool()
         self.qs.endGroup()
+        if self.uiPrefs is not None:
+            self._updateDialog()
+
+    def _updateDialog(self):
         self.uiPrefs.honeycombRowsSpinBox.setProperty("value", self.honeycombRows)
         self.uiPrefs.honeycombColsSpinBox.setProperty("value", self.honeycombCols)
         self.uiPrefs.honeycombStepsSpinBox.setProperty("value", self.honeycombSteps)
@@ -93,8 +112,11 @@ class Preferences(object):
         self.uiPrefs.autoScafComboBox.setCurrentIndex(self.autoScafIndex)
         self.uiPrefs.defaultToolComboBox.setCurrentIndex(self.startupToolIndex)
         self.uiPrefs.zoomSpeedSlider.setProperty("value", self.zoomSpeed)
+        self.uiPrefs.virtualizeCheckBox.setChecked(self.virtualizePathView)
+        self.uiPrefs.batchCheckBox.setChecked(self.batchPathItems)
         ptw = self.uiPrefs.pluginTableWidget
-        loadedPluginPaths = cadnano.loadedPlugins.keys()
+        loadedPluginPaths = sorted(set(cadnano.loadedPlugins.keys()) |\
+                                   set(cadnano.pluginManifests.keys()))
         ptw.setRowCount(len(loadedPluginPaths))
         for i in range(len(loadedPluginPaths)):
             row = QTableWidgetItem(loadedPluginPaths[i])
@@ -113,6 +135,8 @@ class Preferences(object):
         self.uiPrefs.autoScafComboBox.setCurrentIndex(styles.PREF_AUTOSCAF_INDEX)
         self.uiPrefs.defaultToolComboBox.setCurrentIndex(styles.PREF_STARTUP_TOOL_INDEX)
         self.uiPrefs.zoomSpeedSlider.setProperty("value", styles.PREF_ZOOM_SPEED)
+        self.uiPrefs.virtualizeCheckBox.setChecked(styles.PREF_VIRTUALIZE_PATH_VIEW)
+        self.uiPrefs.batchCheckBox.setChecked(styles.PREF_BATCH_PATH_ITEMS)
         # self.uiPrefs.helixAddCheckBox.setChecked(styles.PREF_ZOOM_AFTER_HELIX_ADD)
 
     def setHoneycombRows(self, rows):
@@ -169,6 +193,29 @@ class Preferences(object):
         self.qs.setValue("zoomSpeed", self.zoomSpeed)
         self.qs.endGroup()
 
+    def setVirtualizePathView(self, checked):
+        self.virtualizePathView = checked
+        self.qs.beginGroup("Preferences")
+        self.qs.setValue("virtualizePathView", self.virtualizePathView)
+        self.qs.endGroup()
+        self._schedulePathVirtualizers()
+
+    def setBatchPathItems(self, checked):
+        self.batchPathItems = checked
+        self.qs.beginGroup("Preferences")
+        self.qs.setValue("batchPathItems", self.batchPathItems)
+        self.qs.endGroup()
+        self._schedulePathVirtualizers()
+
+    def _schedulePathVirtualizers(self):
+        """
+        Applies a changed path view pref now instead of on the next scroll,
+        zoom or edit.
+        """
+        for dc in cadnano.app().documentControllers:
+            for partItem in dc.win.pathroot.partItems():
+                partItem.virtualizer().schedule()
+
     # def setZoomToFitOnHelixAddition(self, checked):
     #     self.zoomOnHelixAdd = checked
     #     self.qs.beginGroup("Preferences")
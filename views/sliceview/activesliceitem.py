@@ -63,12 +63,14 @@ class ActiveSliceItem(QGraphicsRectItem):
         part = self.part()
         if part.numberOfVirtualHelices() == 0:
             return
-        newlyActiveVHs = set()
         activeBaseIdx = part.activeBaseIndex()
+        # one column lookup in the occupancy index for the whole slice
+        activeVHs = set(part.occupancy().virtualHelicesWithStrandAt(\
+                                                            activeBaseIdx))
         for vhi in self._partItem._virtualHelixHash.itervalues():
             vh = vhi.virtualHelix()
             if vh:
-                isActiveNow = vh.hasStrandAtIdx(activeBaseIdx)
+                isActiveNow = vh in activeVHs
                 vhi.setActiveSliceView(isActiveNow, activeBaseIdx)
     # end def
 
@@ -119,6 +119,14 @@ class EmptyHelixItem(QGraphicsEllipseItem):
         return self._partItem.part()
     # end def
 
+    def coord(self):
+        return self._coord
+    # end def
+
+    def partItem(self):
+        return self._partItem
+    # end def
+
     def translateVH(self, delta):
         """
         used to update a child virtual helix position on a hover event
@@ -179,6 +187,7 @@ class EmptyHelixItem(QGraphicsEllipseItem):
         to the default colors if necessary.
         """
         self.setNotHovered()
+        self._partItem.emptyHelixHoverLeft(self)
     # end def
 
     def mousePressEvent(self, event):
@@ -190,13 +199,11 @@ class EmptyHelixItem(QGraphicsEllipseItem):
     def mouseMoveEvent(self, event):
         partItem = self._partItem
         posInParent = partItem.mapFromItem(self, QPointF(event.pos()))
-        # Qt doesn't have any way to ask for graphicsitem(s) at a
-        # particular position but it *can* do intersections, so we
-        # just use those instead
-        partItem.probe.setPos(posInParent)
-        for ci in partItem.probe.collidingItems():
-            if isinstance(ci, EmptyHelixItem):
-                self.dragSessionAction(ci)
+        # the helix under the pointer is found from the lattice geometry,
+        # which also finds the points a sparse lattice has no item for yet
+        ci = partItem.emptyHelixItemAtPosition(posInParent)
+        if ci is not None:
+            self.dragSessionAction(ci)
     # end def
 
     def autoScafMidSeam(self, strands):
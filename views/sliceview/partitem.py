@@ -32,9 +32,11 @@ from views import styles
 import util
 # import Qt stuff into the module namespace with PySide, PyQt4 independence
 util.qtWrapImport('QtCore', globals(), ['QRectF', 'QPointF', 'QEvent', 'Qt', \
-                                        'pyqtSignal', 'pyqtSlot', 'QObject'])
+                                        'pyqtSignal', 'pyqtSlot', 'QObject',
+                                        'QTimer'])
 util.qtWrapImport('QtGui', globals(), ['QBrush', 'QGraphicsItem', 
                                        'QGraphicsEllipseItem',
+                                       'QGraphicsPathItem',
                                        'QPainterPath', 'QPen'])
 
 _radius = styles.SLICE_HELIX_RADIUS
@@ -52,7 +54,10 @@ class PartItem(QGraphicsItem):
         Parent should be either a SliceRootItem, or an AssemblyItem.
 
         Invariant: keys in _emptyhelixhash = range(_nrows) x range(_ncols)
-        where x is the cartesian product.
+        where x is the cartesian product, unless the lattice is sparse.
+        A sparse lattice (SLICE_SPARSE_LATTICE_SIZE points or more) draws
+        its empty helices as one LatticeBackground path, and only has
+        EmptyHelixItems for occupied and hovered coordinates.
         
         Order matters for deselector, probe, and setlattice
         """
@@ -63,9 +68,13 @@ class PartItem(QGraphicsItem):
         self._scaleFactor = self._radius/modelPart.radius()
         self._emptyhelixhash = {}
         self._virtualHelixHash = {}
+        self._latticeCoords = set()
+        self._isSparse = False
+        self._hoveredCoord = None  # sparse lattices only
         self._nrows, self._ncols = 0, 0
         self._rect = QRectF(0, 0, 0, 0)
         self._initDeselector()
+        self._latticeBackground = PartItem.LatticeBackground(self)
         # Cache of VHs that were active as of last call to activeSliceChanged
         # If None, all slices will be redrawn and the cache will be filled.
         # Connect destructor. This is for removing a part from scenes.
@@ -161,7 +170,7 @@ class PartItem(QGraphicsItem):
         vh = virtualHelix
         coords = vh.coord()
 
-        emptyHelixItem = self._emptyhelixhash[coords]
+        emptyHelixItem = self.emptyHelixItemAt(*coords)
         # TODO test to see if self._virtualHelixHash is necessary
         vhi = VirtualHelixItem(vh, emptyHelixItem)
         self._virtualHelixHash[coords] = vhi
@@ -213,9 +222,10 @@ class PartItem(QGraphicsItem):
         helix = EmptyHelixItem(row, column, self)
         # helix.setFlag(QGraphicsItem.ItemStacksBehindParent, True)
         self._emptyhelixhash[(row, column)] = helix
+        return helix
     # end def
 
-    def _killHelixItemAt(row, column):
+    def _killHelixItemAt(self, row, column):
         s = self._emptyhelixhash[(row, column)]
         s.scene().removeItem(s)
         del self._emptyhelixhash[(row, column)]
@@ -229,14 +239,22 @@ class PartItem(QGraphicsItem):
         oldList = list(oldSet)
         newSet = set(newCoords)
         newList = list(newSet)
+        self._latticeCoords = newSet
+        self._isSparse = len(newSet) >= styles.SLICE_SPARSE_LATTICE_SIZE
         for coord in oldList:
-            if coord not in newSet:
+            if coord not in newSet and coord in self._emptyhelixhash:
                 self._killHelixItemAt(*coord)
         # end for
-        for coord in newList:
-            if coord not in oldSet:
-                self._spawnEmptyHelixItemAt(*coord)
-        # end for
+        if self._isSparse:
+            for item in self._emptyhelixhash.values():
+                self.releaseEmptyHelixItem(item)
+            self._latticeBackground.setLattice(newList)
+        else:
+            for coord in newList:
+                if coord not in self._emptyhelixhash:
+                    self._spawnEmptyHelixItemAt(*coord)
+            # end for
+            self._latticeBackground.setLattice([])
         # self._updateGeometry(newCols, newRows)
         # self.prepareGeometryChange()
         # the Deselector copies our rect so it changes too
@@ -246,10 +264,94 @@ class PartItem(QGraphicsItem):
 
     ### PUBLIC SUPPORT METHODS ###
     def getVirtualHelixItemByCoord(self, row, column):
-        if (row, column) in self._emptyhelixhash:
-            return self._virtualHelixHash[(row, column)]
-        else:
-            return None
+        return self._virtualHelixHash.get((row, column))
+    # end def
+
+    def coordAtPosition(self, pos):
+        """
+        Returns the lattice coordinate of the helix circle containing pos
+        (in PartItem coordinates), or None.
+        """
+        radius = self._radius
+        scaleFactor = self._scaleFactor
+        part = self._part
+        px, py = pos.x(), pos.y()
+        # positionToCoord takes the upper left corner of a helix
+        row, column = part.positionToCoord(px - radius, py - radius,
+                                           scaleFactor)
+        # it rounds, so near the edge of a circle check the neighbors too
+        for r in (row, row - 1, row + 1):
+            for c in (column, column - 1, column + 1):
+                if (r, c) not in self._latticeCoords:
+                    continue
+                x, y = part.latticeCoordToPositionXY(r, c, scaleFactor)
+                dx, dy = px - x - radius, py - y - radius
+                if dx * dx + dy * dy <= radius * radius:
+                    return (r, c)
+        return None
+    # end def
+
+    def emptyHelixItemAt(self, row, column):
+        """
+        Returns the EmptyHelixItem at (row, column), creating it first if
+        the lattice is sparse, or None if the coordinate is off the lattice.
+        """
+        item = self._emptyhelixhash.get((row, column))
+        if item is None and (row, column) in self._latticeCoords:
+            item = self._spawnEmptyHelixItemAt(row, column)
+        return item
+    # end def
+
+    def emptyHelixItemAtPosition(self, pos):
+        coord = self.coordAtPosition(pos)
+        return self.emptyHelixItemAt(*coord) if coord else None
+    # end def
+
+    def releaseEmptyHelixItem(self, emptyHelixItem):
+        """
+        Removes emptyHelixItem if the lattice is sparse and the item is
+        neither occupied nor hovered; the background draws it instead.
+        """
+        coord = emptyHelixItem.coord()
+        if not self._isSparse or coord == self._hoveredCoord or \
+                            emptyHelixItem.virtualHelixItem() is not None:
+            return
+        self._killHelixItemAt(*coord)
+    # end def
+
+    def setHoveredCoord(self, coord):
+        """
+        Called by the LatticeBackground as the pointer moves over a sparse
+        lattice: creates the item under the pointer so it can be clicked,
+        and releases the previously hovered one.
+        """
+        if coord == self._hoveredCoord:
+            return
+        oldItem = self._emptyhelixhash.get(self._hoveredCoord)
+        self._hoveredCoord = coord
+        if oldItem is not None:
+            oldItem.setNotHovered()
+            self.releaseEmptyHelixItem(oldItem)
+        if coord is not None:
+            self.emptyHelixItemAt(*coord).setHovered()
+    # end def
+
+    def emptyHelixHoverLeft(self, emptyHelixItem):
+        """
+        Called by an EmptyHelixItem the pointer has left. If a sparse
+        lattice spawned it on hover, the LatticeBackground may not see the
+        pointer go (it can leave the lattice straight from the item), so
+        the hovered coordinate is cleared here, once the item's event has
+        been handled, since that releases the item.
+        """
+        coord = emptyHelixItem.coord()
+        if coord == self._hoveredCoord:
+            QTimer.singleShot(0, lambda: self._hoverLeft(coord))
+    # end def
+
+    def _hoverLeft(self, coord):
+        if coord == self._hoveredCoord:
+            self.setHoveredCoord(None)
     # end def
 
     def paint(self, painter, option, widget=None):
@@ -277,7 +379,9 @@ class PartItem(QGraphicsItem):
         # self.window().statusBar().showMessage(statusString, timeout)
 
     def vhAtCoordsChanged(self, row, col):
-        self._emptyhelixhash[(row, col)].update()
+        item = self._emptyhelixhash.get((row, col))
+        if item is not None:
+            item.update()
     # end def
 
     def zoomToFit(self):
@@ -308,6 +412,42 @@ class PartItem(QGraphicsItem):
             pass
 
 
+    class LatticeBackground(QGraphicsPathItem):
+        """
+        Draws every lattice point of a sparse PartItem as one cached path,
+        in the EmptyHelixItem style. Hit testing uses the lattice geometry
+        (PartItem.coordAtPosition) rather than the path, and hovers are
+        passed on to the PartItem.
+        """
+        def __init__(self, parentHGI):
+            super(PartItem.LatticeBackground, self).__init__(parentHGI)
+            self.parentHGI = parentHGI
+            self.setBrush(EmptyHelixItem._defaultBrush)
+            self.setPen(EmptyHelixItem._defaultPen)
+            self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+            self.setZValue(styles.ZSLICEHELIX - 1)
+            self.setAcceptsHoverEvents(True)
+            self.setAcceptedMouseButtons(Qt.NoButton)
+        def setLattice(self, coords):
+            part = self.parentHGI.part()
+            scaleFactor = self.parentHGI.scaleFactor()
+            diameter = 2 * PartItem._radius
+            path = QPainterPath()
+            for row, column in coords:
+                x, y = part.latticeCoordToPositionXY(row, column, scaleFactor)
+                path.addEllipse(x, y, diameter, diameter)
+            self.setPath(path)
+        def contains(self, point):
+            return self.parentHGI.coordAtPosition(point) is not None
+        def hoverMoveEvent(self, event):
+            self.parentHGI.setHoveredCoord(
+                                self.parentHGI.coordAtPosition(event.pos()))
+        def hoverLeaveEvent(self, event):
+            # onto the hovered item keeps it; off the lattice clears it
+            self.parentHGI.setHoveredCoord(
+                                self.parentHGI.coordAtPosition(event.pos()))
+
+
     class IntersectionProbe(QGraphicsItem):
         def boundingRect(self):
             return QRectF(0, 0, .1, .1)
@@ -104,12 +104,14 @@ class VirtualHelixItem(QGraphicsEllipseItem):
     def virtualHelixRemovedSlot(self, virtualHelix):
         self._controller.disconnectSignals()
         self._controller = None
-        self._emptyHelixItem.setNotHovered()
+        emptyHelixItem = self._emptyHelixItem
+        emptyHelixItem.setNotHovered()
         self._virtualHelix = None
         self._emptyHelixItem = None
         self.scene().removeItem(self._label)
         self._label = None
         self.scene().removeItem(self)
+        emptyHelixItem.partItem().releaseEmptyHelixItem(emptyHelixItem)
     # end def
 
     def strandAddedSlot(self, sender, strand):
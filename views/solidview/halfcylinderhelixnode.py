@@ -32,6 +32,8 @@ import sys
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import math
+import numpy as np
+from model.helixmesh import halfCylinderHelixMesh
 
 nodeName = "spHalfCylinderHelixNode"
 id = OpenMaya.MTypeId(0x00117701)
@@ -127,163 +129,40 @@ class HalfCylinderHelixNode(OpenMayaMPx.MPxNode):
                    parity, strandType, outData):
         """
         This is the core function of the class that created the MFnMesh of
-        the Half-Cylinder Helical Shape. The process can be though of as
-        if we are creating a regular cylinder, so first create the starting
-        endcap, then create the middle part, and last the closing endcap.
-        When creating the middle part, we add additional rotation to the
-        verts to create the overall helical shape.
+        the Half-Cylinder Helical Shape. The geometry itself is computed by
+        model.helixmesh.halfCylinderHelixMesh, which does not depend on
+        Maya; here we just copy its buffers into the Maya arrays.
         """
         # XXX [SB] are start and end are inverted right now?
-        middleBase = totalNumBases / 2
-        end = (middleBase - startVal)
-        start = (endVal - middleBase)
-        baseCount = start + end + 1
-        numVerticesEnds = 20
-        numMiddleSections = int(baseCount * edgesPerBase) - 1
-        rise = riseAttr / edgesPerBase
-        start_pos = -start * (riseAttr)
-        numVerticesTotal = (numVerticesEnds * 2) + \
-                            numMiddleSections * numVerticesEnds
-        rot_ang = -rotationAttr / edgesPerBase
-        gap = rise / 6.0
-
-        numFacesEnds = numVerticesEnds - 2
-        numFacesTotal = (numVerticesEnds - 2) * 2 + \
-                        (numVerticesEnds) * (numMiddleSections + 1)
-        numFaceConnects = ((numVerticesEnds - 2) * 2 * 3) + \
-                           (numVerticesEnds * (numMiddleSections + 1) * 4)
-
-        vtx = []
-        rotation = 0
-        starting_rotation = endVal * rotationAttr + \
-                            (math.pi * (not parity)) + rotationOffset + \
-                            (math.pi * strandType)
-
-        # Create Endpoint verts
-        vtx.append(OpenMaya.MFloatPoint(0.0, start_pos + gap, 0.0))
-        self.end3DPos = OpenMaya.MFloatPoint(0.0, start_pos + gap, 0.0)
-        #print start_pos + gap
-        for i in range(1, numVerticesEnds):
-            val = i * (180 / (numFacesEnds))
-            rad = (val * math.pi) / 180
-            vtx.append(OpenMaya.MFloatPoint(radius * \
-                                math.cos(starting_rotation + rad),
-                                start_pos + gap,
-                                radius * math.sin(starting_rotation + rad)))
-        # Create Middle verts
-        for i in range(0, numMiddleSections):
-            rotation = rot_ang * (i + 1)
-            pos = rise * (i + 1)
-            vtx.append(OpenMaya.MFloatPoint(0.0, start_pos + pos, 0.0))
-            for i in range(1, numVerticesEnds):
-                val = i * (180 / (numFacesEnds))
-                rad = (val * math.pi) / 180
-                #print "vrt %d, %f %f" % (i, val, rad)
-                x = radius * math.cos(starting_rotation + rad + rotation)
-                y = radius * math.sin(starting_rotation + rad + rotation)
-                vtx.append(OpenMaya.MFloatPoint(x, start_pos + pos, y))
-
-        # Create EndPiece verts
-        vtx.append(OpenMaya.MFloatPoint(0.0,
-                            start_pos + (numMiddleSections + 1) * rise - gap,
-                            0.0))
-        self.start3DPos = OpenMaya.MFloatPoint(0.0,
-                            start_pos + (numMiddleSections + 1) * rise - gap,
-                             0.0)
-        for i in range(1, numVerticesEnds):
-            rotation = rot_ang * (1 + numMiddleSections)
-            val = i * (180 / (numFacesEnds))
-            rad = (val * math.pi) / 180
-            #print "vrt %d, %f %f" % (i, val, rad)
-            x = radius * math.cos(starting_rotation + rad + rotation)
-            y = radius * math.sin(starting_rotation + rad + rotation)
-            vtx.append(OpenMaya.MFloatPoint(x,
-                            start_pos + (numMiddleSections + 1) * rise - gap,
-                            y))
-        #print "vtx length %d"  % len(vtx)
-        points = OpenMaya.MFloatPointArray()
-        points.setLength(numVerticesTotal)
-
-        for i in range(0, numVerticesTotal):
-            points.set(vtx[i], i)
-
-        faceConnects = OpenMaya.MIntArray()
-        faceConnects.setLength(numFaceConnects)
-        #print "numFaceConnects %d" % numFaceConnects
-        offset = 1
-        count = 0
-
-        # Front End Piece Faces
-        # in a fan fashion, we build a list of faces, each face is 3 verts,
-        # with 0 being the verst vet, so we get faces such as (0, 1, 2),
-        # the next face would be (0, 2, 3), and next (0, 3, 4), etc.
-        for i in range(0, numFacesEnds):
-            faceConnects.set(0, count)
-            count += 1
-            faceConnects.set(offset, count)
-            offset += 1
-            count += 1
-            faceConnects.set(offset, count)
-            count += 1
-
-        # Middle Piece Faces
-        # 
-        for k in range(0, numMiddleSections + 1):
-            for i in range(0, numVerticesEnds):
-                if i < numVerticesEnds - 1:
-                    v1 = (k * numVerticesEnds) + i
-                    v2 = (k * numVerticesEnds) + 1 + i
-                    v3 = ((k + 1) * numVerticesEnds) + i
-                    v4 = ((k + 1) * numVerticesEnds) + 1 + i
-                else:
-                    v1 = (k * numVerticesEnds) + i
-                    v2 = (k * numVerticesEnds)
-                    v3 = ((k + 1) * numVerticesEnds) + i
-                    v4 = ((k + 1) * numVerticesEnds)
-                faceConnects.set(v1, count)
-                count += 1
-                faceConnects.set(v2, count)
-                count += 1
-                faceConnects.set(v4, count)
-                count += 1
-                faceConnects.set(v3, count)
-                count += 1
-
-        # Back End Piece Faces, like the front one, we do it in a fan order
-        offset = numVerticesTotal - numVerticesEnds + 1
-        for i in range(numFacesTotal - numFacesEnds, numFacesTotal):
-            #print numVerticesTotal-numVerticesEnds
-            #print offset
-            faceConnects.set(numVerticesTotal - numVerticesEnds, count)
-            count += 1
-            faceConnects.set(offset, count)
-            offset += 1
-            count += 1
-            #print offset
-            faceConnects.set(offset, count)
-            count += 1
-        #print "face connect ended at %d" % count
-        faceCounts = OpenMaya.MIntArray()
-        faceCounts.setLength(numFacesTotal)
-        count = 0
-        # Set Face Counds, the faces on the ends are made from 3 verts
-        # and faces in the middle are made from 4
-        for i in range(0, numFacesEnds):
-            #print count
-            faceCounts.set(3, count)
-            count += 1
-        for i in range(numFacesEnds, numFacesTotal - numFacesEnds):
-            #print count
-            faceCounts.set(4, count)
-            count += 1
-        for i in range(numFacesTotal - numFacesEnds, numFacesTotal):
-            #print count
-            faceCounts.set(3, count)
-            count += 1
-        #print "face count ended at %d" % count
+        vertices, faceCounts, faceConnects, startPos, endPos = \
+                halfCylinderHelixMesh(startVal, endVal, totalNumBases,
+                                      radius, rotationAttr, rotationOffset,
+                                      riseAttr, edgesPerBase,
+                                      parity, strandType)
+        self.start3DPos = OpenMaya.MFloatPoint(*startPos)
+        self.end3DPos = OpenMaya.MFloatPoint(*endPos)
+
+        numVerticesTotal = len(vertices)
+        numFacesTotal = len(faceCounts)
+        # one bulk copy of homogeneous (x, y, z, 1) points, rather than a
+        # Python call per vertex
+        homogeneous = np.ones((numVerticesTotal, 4), dtype=np.float32)
+        homogeneous[:, :3] = vertices
+        pointsUtil = OpenMaya.MScriptUtil()
+        pointsUtil.createFromList(homogeneous.ravel().tolist(),
+                                  4 * numVerticesTotal)
+        points = OpenMaya.MFloatPointArray(pointsUtil.asFloat4Ptr(),
+                                           numVerticesTotal)
+
+        faceConnectsArray = OpenMaya.MIntArray()
+        OpenMaya.MScriptUtil.createIntArrayFromList(faceConnects.tolist(),
+                                                    faceConnectsArray)
+        faceCountsArray = OpenMaya.MIntArray()
+        OpenMaya.MScriptUtil.createIntArrayFromList(faceCounts.tolist(),
+                                                    faceCountsArray)
         meshFS = OpenMaya.MFnMesh()
         meshFS.create(numVerticesTotal, numFacesTotal,
-                      points, faceCounts, faceConnects, outData)
+                      points, faceCountsArray, faceConnectsArray, outData)
 
 
 def nodeCreator():
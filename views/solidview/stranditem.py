@@ -32,6 +32,8 @@ from controllers.itemcontrollers.strand.stranditemcontroller \
                                                 import StrandItemController
 from model.enum import StrandType
 from model.enum import LatticeType
+from model.helixmesh import rotationOffsetForLattice, \
+                             decoratorRotOffsetForLattice
 
 from cadnano import app
 import maya.OpenMayaUI as mui
@@ -266,12 +268,11 @@ class StrandItem(object):
         cSType = part.crossSectionType()
         cmds.setAttr("%s.rotation" % cylinderName, part.twistPerBase())
         cmds.setAttr("%s.parity" % cylinderName, vhi.isEvenParity())
-        if cSType == LatticeType.Honeycomb:
-            cmds.setAttr("%s.rotationOffset" % cylinderName, 250)
-            cmds.setAttr("%s.decoratorRotOffset" % cylinderName, 90)
-        elif cSType == LatticeType.Square:
-            cmds.setAttr("%s.rotationOffset" % cylinderName, 125)
-            cmds.setAttr("%s.decoratorRotOffset" % cylinderName, 200)
+        if cSType in rotationOffsetForLattice:
+            cmds.setAttr("%s.rotationOffset" % cylinderName,
+                         rotationOffsetForLattice[cSType])
+            cmds.setAttr("%s.decoratorRotOffset" % cylinderName,
+                         decoratorRotOffsetForLattice[cSType])
         else:
             raise NotImplementedError
         cmds.setAttr("%s.strandType" % cylinderName, strandType)
@@ -37,6 +37,7 @@ SLICE_HELIX_RADIUS = 15
 SLICE_HELIX_STROKE_WIDTH = 0.5
 SLICE_HELIX_HILIGHT_WIDTH = 2.5
 SLICE_HELIX_MOD_HILIGHT_WIDTH = 1
+SLICE_SPARSE_LATTICE_SIZE = 2500  # lattice points above which empty helices are drawn as one path
 HONEYCOMB_PART_MAXROWS = 30
 HONEYCOMB_PART_MAXCOLS = 32
 HONEYCOMB_PART_MAXSTEPS = 2
@@ -54,6 +55,8 @@ lightorangefill = QColor(255, 234, 183)
 lightorangestroke = QColor(234, 132, 81)
 grayfill = QColor(238, 238, 238)  # eeeeee (was a1a1a1)
 graystroke = QColor(102, 102, 102)  # 666666 (was 424242)
+motiffill = QColor(255, 51, 153, 96)  # ff3399, translucent
+motifstroke = QColor(204, 0, 102)  # cc0066
 
 # Path Sizing
 VIRTUALHELIXHANDLEITEM_RADIUS = 30
@@ -61,6 +64,7 @@ VIRTUALHELIXHANDLEITEM_STROKE_WIDTH = 2
 PATH_BASE_WIDTH = 20  # used to size bases (grid squares, handles, etc)
 PATH_HELIX_HEIGHT = 2 * PATH_BASE_WIDTH  # staple + scaffold
 PATH_HELIX_PADDING = 50 # gap between PathHelix objects in path view
+PATH_VIRTUALIZE_MARGIN = 1.0  # viewport heights drawn beyond the visible area
 PATH_GRID_STROKE_WIDTH = 0.5
 SLICE_HANDLE_STROKE_WIDTH = 1
 PATH_STRAND_STROKE_WIDTH = 3
@@ -135,6 +139,8 @@ PREF_AUTOSCAF_INDEX = 0
 PREF_STARTUP_TOOL_INDEX = 0
 PREF_ZOOM_SPEED = 20#50
 PREF_ZOOM_AFTER_HELIX_ADD = True
+PREF_VIRTUALIZE_PATH_VIEW = False
+PREF_BATCH_PATH_ITEMS = False
 
 
 #Z values
@@ -142,6 +148,7 @@ PREF_ZOOM_AFTER_HELIX_ADD = True
 ZACTIVESLICEHANDLE = 10
 ZPATHHELIXGROUP = 20
 ZPATHHELIX = 30
+ZMOTIFHIGHLIGHT = 35
 ZPATHSELECTION = 40
 ZSLICEHELIX = 50
 ZDESELECTOR = 60